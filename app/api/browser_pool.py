@@ -0,0 +1,77 @@
+"""
+浏览器租借池
+
+每个CDP地址对应一个独立的浏览器，同一时间只能被一个任务使用。
+工作线程在执行任务前租借一个浏览器，任务结束后归还，
+保证并发任务之间不会在同一个浏览器上互相干扰。
+"""
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Sequence
+
+from app.config.config_com import BROWSER_CDP_URLS
+
+
+class BrowserPool:
+    """浏览器CDP地址的租借池"""
+
+    def __init__(self, cdp_urls: Sequence[str] = BROWSER_CDP_URLS):
+        """
+        Args:
+            cdp_urls: 可用的浏览器CDP地址列表，不能为空
+        """
+        if not cdp_urls:
+            raise ValueError("浏览器租借池至少需要一个CDP地址")
+        self.cdp_urls: List[str] = list(cdp_urls)
+        self._available: "queue.Queue[str]" = queue.Queue()
+        for url in self.cdp_urls:
+            self._available.put(url)
+        self._leased: set = set()
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return len(self.cdp_urls)
+
+    @property
+    def in_use(self) -> int:
+        with self._lock:
+            return len(self._leased)
+
+    def acquire(self, timeout: Optional[float] = None) -> str:
+        """租借一个浏览器
+
+        Args:
+            timeout: 最长等待秒数，None 表示一直等待
+
+        Returns:
+            租借到的CDP地址
+
+        Raises:
+            TimeoutError: 超时仍没有空闲浏览器
+        """
+        try:
+            url = self._available.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("没有空闲的浏览器") from None
+        with self._lock:
+            self._leased.add(url)
+        return url
+
+    def release(self, url: str) -> None:
+        """归还浏览器，重复归还会被忽略"""
+        with self._lock:
+            if url not in self._leased:
+                return
+            self._leased.discard(url)
+        self._available.put(url)
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None) -> Iterator[str]:
+        """以上下文管理器的方式租借浏览器，退出时自动归还"""
+        url = self.acquire(timeout)
+        try:
+            yield url
+        finally:
+            self.release(url)
@@ -0,0 +1,94 @@
+"""
+HR 消息后台同步
+
+InboxPoller 在后台线程中每隔 BOSS_INBOX_POLL_INTERVAL 秒从浏览器租借池租借一个浏览器，
+执行一轮增量同步（sync_boss_inbox）后立即归还。与找工作任务共用同一个租借池，
+浏览器都在使用中时跳过本轮，不会与岗位查找任务争抢同一个浏览器。
+"""
+import asyncio
+import threading
+from typing import Awaitable, Callable, Optional
+
+from app.api.browser_pool import BrowserPool
+from app.config.config_com import BOSS_INBOX_LEASE_TIMEOUT, BOSS_INBOX_POLL_INTERVAL
+from app.multi_agents.utils import get_logger
+from app.multi_agents.utils.hr_inbox import InboxStore, SyncStats, get_inbox_store
+
+logger = get_logger(__name__, level="debug")
+
+# 同步函数: (CDP地址, 消息数据库) -> 同步统计
+SyncFunc = Callable[[str, InboxStore], Awaitable[SyncStats]]
+
+
+def _default_sync(cdp_url: str, store: InboxStore) -> Awaitable[SyncStats]:
+    # 延迟导入，未开启同步的进程不需要导入 browser_use
+    from app.multi_agents.tools.boss_chat_source import sync_boss_inbox
+    return sync_boss_inbox(cdp_url, store)
+
+
+class InboxPoller:
+    """定期增量同步HR消息的后台线程"""
+
+    def __init__(
+        self,
+        browser_pool: BrowserPool,
+        store: Optional[InboxStore] = None,
+        interval: float = BOSS_INBOX_POLL_INTERVAL,
+        lease_timeout: float = BOSS_INBOX_LEASE_TIMEOUT,
+        sync: SyncFunc = _default_sync,
+    ):
+        """
+        Args:
+            browser_pool: 浏览器租借池，应与 JobManager 使用同一个
+            store: 消息数据库，默认使用 get_inbox_store()
+            interval: 同步间隔（秒）
+            lease_timeout: 等待空闲浏览器的最长时间（秒）
+            sync: 同步函数，默认打开Boss直聘聊天页面同步
+        """
+        self.browser_pool = browser_pool
+        self.store = store
+        self.interval = interval
+        self.lease_timeout = lease_timeout
+        self.sync = sync
+        self.last_stats: Optional[SyncStats] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def sync_once(self) -> Optional[SyncStats]:
+        """执行一轮同步，没有空闲浏览器时跳过并返回 None"""
+        store = self.store or get_inbox_store()
+        try:
+            with self.browser_pool.lease(timeout=self.lease_timeout) as cdp_url:
+                self.last_stats = asyncio.run(self.sync(cdp_url, store))
+        except TimeoutError:
+            logger.debug("浏览器都在使用中，跳过本轮HR消息同步", agent_name="message_processor")
+            return None
+        return self.last_stats
+
+    def start(self) -> None:
+        """启动后台同步线程，启动后立即同步一次"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="inbox-poller", daemon=True)
+        self._thread.start()
+        logger.info(f"HR消息同步已启动，间隔{self.interval}秒", agent_name="api")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """通知后台线程在本轮同步结束后退出"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sync_once()
+            except Exception as e:
+                logger.error(f"HR消息同步失败: {e}", agent_name="message_processor")
+            self._stop.wait(self.interval)
@@ -0,0 +1,219 @@
+"""
+任务队列与工作线程池
+
+HTTP 请求只负责把任务放进有界队列并立即返回任务ID；
+固定数量的工作线程从队列中取出任务，租借一个浏览器后以流式方式运行智能体图，
+执行过程中的事件保存在任务上，供轮询和 SSE 接口读取。
+队列满时拒绝新任务（由接口层转换为 429），避免请求无限堆积。
+"""
+import queue
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import HumanMessage
+
+from app.api.browser_pool import BrowserPool
+from app.config.config_com import API_JOB_TTL, API_MAX_QUEUE_SIZE, API_WORKERS, TEAM_MEMBERS
+from app.multi_agents.graph.streaming import stream_agent
+from app.multi_agents.utils import get_logger
+
+logger = get_logger(__name__, level="debug")
+
+
+class JobStatus(str, Enum):
+    """任务状态枚举"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """任务队列已满"""
+
+
+class ThreadBusyError(Exception):
+    """同一会话线程已有未完成的任务"""
+
+
+@dataclass
+class Job:
+    """一次找工作请求"""
+    job_id: str
+    thread_id: str
+    query: str
+    status: JobStatus = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[str] = None
+    error: Optional[str] = None
+    checkpoint_id: Optional[str] = None
+    cdp_url: Optional[str] = None
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    _cond: threading.Condition = field(default_factory=threading.Condition, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+    def add_event(self, event: Dict[str, Any]) -> None:
+        with self._cond:
+            self.events.append(event)
+            self._cond.notify_all()
+
+    def finish(self, status: JobStatus, result: Optional[str] = None, error: Optional[str] = None) -> None:
+        with self._cond:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+            self._cond.notify_all()
+
+    def wait_events(self, start: int, timeout: Optional[float] = None) -> Tuple[List[Dict[str, Any]], bool]:
+        """等待序号 start 之后的新事件
+
+        Args:
+            start: 已读取的事件数
+            timeout: 最长等待秒数
+
+        Returns:
+            (新事件列表, 任务是否已结束)
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.events) > start or self.done, timeout)
+            return self.events[start:], self.done
+
+
+class JobManager:
+    """有界任务队列和智能体图工作线程池"""
+
+    def __init__(
+        self,
+        graph: Any = None,
+        browser_pool: Optional[BrowserPool] = None,
+        max_queue_size: int = API_MAX_QUEUE_SIZE,
+        num_workers: Optional[int] = API_WORKERS,
+        job_ttl: float = API_JOB_TTL,
+    ):
+        """
+        Args:
+            graph: build_agent 编译后的图，默认在 start 时使用 SqliteDeltaSaver 构建
+            browser_pool: 浏览器租借池，默认使用 BROWSER_CDP_URLS
+            max_queue_size: 等待中的任务上限，超过时 submit 抛出 QueueFullError
+            num_workers: 工作线程数，默认等于浏览器数量
+            job_ttl: 已结束任务的保留秒数
+        """
+        self.graph = graph
+        self.browser_pool = browser_pool or BrowserPool()
+        self.num_workers = num_workers or self.browser_pool.size
+        self.job_ttl = job_ttl
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue(maxsize=max_queue_size)
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+
+    @property
+    def running(self) -> bool:
+        return any(worker.is_alive() for worker in self._workers)
+
+    def start(self) -> None:
+        """构建图（如果需要）并启动工作线程"""
+        if self.running:
+            return
+        if self.graph is None:
+            from app.multi_agents.graph.checkpointer import SqliteDeltaSaver
+            from app.multi_agents.graph.node_graph import build_agent
+            self.graph = build_agent(checkpointer=SqliteDeltaSaver())
+        self._workers = [
+            threading.Thread(target=self._worker_loop, name=f"graph-worker-{i}", daemon=True)
+            for i in range(self.num_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+        logger.info(f"任务队列已启动，工作线程数: {self.num_workers}", agent_name="api")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """通知工作线程在完成当前任务后退出"""
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def submit(self, query: str, thread_id: Optional[str] = None) -> Job:
+        """提交一个任务
+
+        Args:
+            query: 用户的找工作请求
+            thread_id: 会话线程ID，传入已有的ID可以在之前的检查点上继续对话
+
+        Raises:
+            ThreadBusyError: 该线程已有未完成的任务
+            QueueFullError: 任务队列已满
+        """
+        self._cleanup()
+        job = Job(job_id=uuid.uuid4().hex, thread_id=thread_id or uuid.uuid4().hex, query=query)
+        with self._lock:
+            if any(j.thread_id == job.thread_id and not j.done for j in self._jobs.values()):
+                raise ThreadBusyError(f"线程 {job.thread_id} 已有未完成的任务")
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFullError("任务队列已满，请稍后重试") from None
+            self._jobs[job.job_id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        """队列统计：排队数、队列容量、工作线程数、占用中的浏览器数"""
+        return {
+            "queued": self._queue.qsize(),
+            "max_queue_size": self._queue.maxsize,
+            "workers": self.num_workers,
+            "browsers_in_use": self.browser_pool.in_use,
+            "browsers": self.browser_pool.size,
+        }
+
+    def _cleanup(self) -> None:
+        """移除超过保留时长的已结束任务"""
+        deadline = time.time() - self.job_ttl
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items() if job.done and job.finished_at < deadline]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def _worker_loop(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            try:
+                with self.browser_pool.lease() as cdp_url:
+                    self._run_job(job, cdp_url)
+            except Exception as e:
+                logger.error(f"任务 {job.job_id} 执行失败: {e}", agent_name="api")
+                job.finish(JobStatus.FAILED, error=str(e))
+
+    def _run_job(self, job: Job, cdp_url: str) -> None:
+        """在租借到的浏览器上运行智能体图"""
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+        job.cdp_url = cdp_url
+        config = {"configurable": {"thread_id": job.thread_id, "cdp_url": cdp_url}}
+        state = {"messages": [HumanMessage(content=job.query)], "TEAM_MEMBERS": TEAM_MEMBERS}
+
+        for event in stream_agent(self.graph, state, config):
+            job.add_event(event)
+
+        snapshot = self.graph.get_state(config)
+        job.checkpoint_id = snapshot.config.get("configurable", {}).get("checkpoint_id")
+        messages = snapshot.values.get("messages", [])
+        job.finish(JobStatus.SUCCEEDED, result=messages[-1].content if messages else None)
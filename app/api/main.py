@@ -0,0 +1,42 @@
+"""
+HTTP API 入口
+
+启动方式:
+    uvicorn app.api.main:app --host 0.0.0.0 --port 8000
+"""
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI
+
+from app.api.inbox_poller import InboxPoller
+from app.api.job_queue import JobManager
+from app.api.routers import job_router
+from app.config.config_com import BOSS_INBOX_POLL_ENABLED
+
+
+def create_app(job_manager: Optional[JobManager] = None, inbox_poll: bool = BOSS_INBOX_POLL_ENABLED) -> FastAPI:
+    """创建 FastAPI 应用
+
+    Args:
+        job_manager: 任务管理器，默认按配置创建；应用启动时启动工作线程，关闭时停止
+        inbox_poll: 是否在后台同步HR消息（与任务管理器共用浏览器租借池）
+    """
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        app.state.job_manager = job_manager or JobManager()
+        app.state.job_manager.start()
+        app.state.inbox_poller = InboxPoller(app.state.job_manager.browser_pool) if inbox_poll else None
+        if app.state.inbox_poller is not None:
+            app.state.inbox_poller.start()
+        yield
+        if app.state.inbox_poller is not None:
+            app.state.inbox_poller.stop(timeout=5)
+        app.state.job_manager.stop(timeout=5)
+
+    app = FastAPI(title="Boss直聘自动找工作", lifespan=lifespan)
+    app.include_router(job_router)
+    return app
+
+
+app = create_app()
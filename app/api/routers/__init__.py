@@ -0,0 +1,6 @@
+"""
+API路由
+"""
+from .job_routes import router as job_router
+
+__all__ = ["job_router"]
@@ -0,0 +1,96 @@
+"""
+找工作任务路由
+
+POST /jobs               提交任务，队列满时返回 429
+GET  /jobs/{job_id}        轮询任务状态和结果
+GET  /jobs/{job_id}/events 以 SSE 推送任务执行事件
+GET  /queue              查看队列状态
+"""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+
+from app.api.job_queue import Job, JobManager, QueueFullError, ThreadBusyError
+from app.api.schemas import JobAccepted, JobResponse, JobSearchRequest, QueueStats
+
+router = APIRouter(tags=["jobs"])
+
+# SSE 连接在没有新事件时发送心跳的间隔（秒）
+SSE_HEARTBEAT_INTERVAL = 1.0
+
+
+def get_job_manager(request: Request) -> JobManager:
+    return request.app.state.job_manager
+
+
+def _get_job_or_404(job_manager: JobManager, job_id: str) -> Job:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"任务 {job_id} 不存在")
+    return job
+
+
+def _json_default(value: Any) -> Any:
+    """事件中可能包含消息对象等无法直接序列化的值"""
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    return str(value)
+
+
+def format_sse(event_id: int, event: str, data: Any) -> str:
+    payload = json.dumps(data, ensure_ascii=False, default=_json_default)
+    return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n"
+
+
+async def _job_event_stream(job: Job, start: int) -> AsyncIterator[str]:
+    index = start
+    while True:
+        events, is_done = await asyncio.to_thread(job.wait_events, index, SSE_HEARTBEAT_INTERVAL)
+        for event in events:
+            yield format_sse(index, event.get("type", "message"), event)
+            index += 1
+        if is_done:
+            yield format_sse(index, "done", JobResponse.from_job(job).model_dump(mode="json"))
+            return
+        if not events:
+            yield ": heartbeat\n\n"
+
+
+@router.post("/jobs", response_model=JobAccepted, status_code=status.HTTP_202_ACCEPTED)
+def submit_job(payload: JobSearchRequest, job_manager: JobManager = Depends(get_job_manager)) -> JobAccepted:
+    try:
+        job = job_manager.submit(payload.query, payload.thread_id)
+    except QueueFullError as e:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e), headers={"Retry-After": "5"})
+    except ThreadBusyError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return JobAccepted(job_id=job.job_id, thread_id=job.thread_id, status=job.status)
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+def get_job(job_id: str, job_manager: JobManager = Depends(get_job_manager)) -> JobResponse:
+    return JobResponse.from_job(_get_job_or_404(job_manager, job_id))
+
+
+@router.get("/jobs/{job_id}/events")
+def stream_job_events(
+    job_id: str,
+    last_event_id: Optional[int] = Header(None),
+    job_manager: JobManager = Depends(get_job_manager),
+) -> StreamingResponse:
+    """按 SSE 推送任务事件，断线重连时根据 Last-Event-ID 从下一条事件继续"""
+    job = _get_job_or_404(job_manager, job_id)
+    start = 0 if last_event_id is None else last_event_id + 1
+    return StreamingResponse(
+        _job_event_stream(job, start),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/queue", response_model=QueueStats)
+def get_queue_stats(job_manager: JobManager = Depends(get_job_manager)) -> QueueStats:
+    return QueueStats(**job_manager.stats())
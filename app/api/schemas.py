@@ -0,0 +1,59 @@
+"""
+接口的请求与响应模型
+"""
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from app.api.job_queue import Job, JobStatus
+
+
+class JobSearchRequest(BaseModel):
+    """找工作请求"""
+    query: str = Field(..., min_length=1, description="自然语言描述的找工作需求")
+    thread_id: Optional[str] = Field(None, description="会话线程ID，传入已有的ID可以继续之前的对话")
+
+
+class JobAccepted(BaseModel):
+    """任务已进入队列"""
+    job_id: str
+    thread_id: str
+    status: JobStatus
+
+
+class JobResponse(BaseModel):
+    """任务状态与结果"""
+    job_id: str
+    thread_id: str
+    status: JobStatus
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[str] = None
+    error: Optional[str] = None
+    checkpoint_id: Optional[str] = None
+    event_count: int = 0
+
+    @classmethod
+    def from_job(cls, job: Job) -> "JobResponse":
+        return cls(
+            job_id=job.job_id,
+            thread_id=job.thread_id,
+            status=job.status,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+            result=job.result,
+            error=job.error,
+            checkpoint_id=job.checkpoint_id,
+            event_count=len(job.events),
+        )
+
+
+class QueueStats(BaseModel):
+    """任务队列状态"""
+    queued: int
+    max_queue_size: int
+    workers: int
+    browsers_in_use: int
+    browsers: int
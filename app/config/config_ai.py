@@ -14,7 +14,8 @@ DEEPSEEK_MODEL = os.getenv("DEEPSEEK_MODEL")
 
 # OpenAI配置
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-OPENAI_MODEL = os.getenv("OPENAI_MODEL")
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+OPENAI_API_BASE = os.getenv("OPENAI_API_BASE")
 
 # 千问配置
 DASHSCOPE_API_KEY = os.getenv("DASHSCOPE_API_KEY")
@@ -1,2 +1,199 @@
+import os
+
 CHROME_INSTANCE_PATH = None
-TEAM_MEMBERS = [ "browser" , "reporter","job_find"]
\ No newline at end of file
+TEAM_MEMBERS = [ "browser" , "reporter","job_find", "message_processor", "resume", "data_collector"]
+# build_agent 中已注册为节点的工作智能体，监督智能体的快速路由只会调度这些节点
+WORKER_NODES = ["job_find", "message_processor", "resume", "data_collector"]
+
+# 规划完成首个步骤后即可提前调度的工作智能体（计划剩余部分在其执行期间继续生成）
+EARLY_DISPATCH_AGENTS = ["job_find"]
+PLANNER_EARLY_DISPATCH = True
+
+# 快速路由：置信度达到阈值时前台/监督智能体跳过LLM调用
+FAST_ROUTE_ENABLED = True
+FAST_ROUTE_THRESHOLD = 0.85
+FAST_ROUTE_USE_EMBEDDING = False
+
+# 各提示词（节点）每次调用LLM时历史消息的token预算，超出时压缩较早的长消息
+NODE_TOKEN_BUDGETS = {
+    "coordinator": 2000,
+    "planner": 6000,
+    "supervisor": 3000,
+    "jobfind": 4000,
+    "browse": 4000,
+    "db_query": 6000,
+}
+
+# 检查点数据库路径（SqliteDeltaSaver）
+CHECKPOINT_DB_PATH = "data/checkpoints.db"
+
+# 可供岗位查找使用的浏览器CDP地址，每个地址对应一个独立的浏览器，同一时间只租借给一个任务
+BROWSER_CDP_URLS = ["http://localhost:9999"]
+
+# 岗位查找是否在独立的工作进程中执行：每个CDP地址一个进程，按线程ID分片以保持Cookie亲和性
+JOB_FIND_PROCESS_POOL = False
+
+# HTTP API 的任务队列：队列满时新请求返回 429；工作线程数默认等于浏览器数量
+API_MAX_QUEUE_SIZE = 16
+API_WORKERS = None
+# 已结束任务在内存中保留的时长（秒）
+API_JOB_TTL = 3600
+
+# LLM 请求调度：按提供商（或 "提供商:模型"）限制 RPM/TPM 和最大并发，交互式节点的请求优先
+LLM_SCHEDULER_ENABLED = True
+LLM_RATE_LIMITS = {
+    "deepseek": {"rpm": 60, "tpm": 120000, "max_concurrency": 8},
+    "qianwen": {"rpm": 60, "tpm": 100000, "max_concurrency": 8},
+    "openai": {"rpm": 60, "tpm": 100000, "max_concurrency": 8},
+}
+LLM_INTERACTIVE_NODES = ["frontdesk", "planner", "supervisor"]
+# 单次请求超过该延迟（秒）时降低并发上限
+LLM_LATENCY_TARGET = 30.0
+# 请求排队等待的最长秒数
+LLM_SCHEDULER_TIMEOUT = 300.0
+
+# 按思考级别在多个LLM提供商之间路由：列表顺序为偏好顺序，只在已配置API Key的提供商之间路由
+LLM_ROUTING_ENABLED = True
+LLM_ROUTES = {
+    "SIMPLE": ["qianwen", "deepseek", "openai"],
+    "BASIC": ["deepseek", "qianwen", "openai"],
+    "ADVANCED": ["deepseek", "openai", "qianwen"],
+    "DEEP": ["deepseek", "openai", "qianwen"],
+}
+# 对延迟敏感的思考级别：首选提供商超过该秒数未返回时，向次优提供商发出对冲请求
+LLM_HEDGE_DELAYS = {"SIMPLE": 3.0}
+# 提供商健康统计的滚动窗口（秒）；连续失败达到次数后熔断一段时间（秒）
+LLM_HEALTH_WINDOW = 120.0
+LLM_BREAKER_FAILURES = 3
+LLM_BREAKER_COOLDOWN = 30.0
+
+# 批量岗位评估：一次请求评估多个岗位，按模型上下文窗口（token）自动确定每批岗位数，多批并发执行
+JOB_EVAL_CONTEXT_WINDOW = 32000
+JOB_EVAL_MAX_BATCH = 25
+JOB_EVAL_CONCURRENCY = 3
+# 单个岗位描述的最大字符数，超出部分截断
+JOB_EVAL_ITEM_MAX_CHARS = 600
+# Boss直聘搜索结果页中岗位卡片的选择器
+JOB_CARD_SELECTOR = ".job-card-wrapper, .job-card-box"
+
+# 提示词缓存友好布局：静态指令在前，粗粒度的动态变量（如日期）放在系统提示词末尾，之后才是历史消息，
+# 使同一节点的重复调用能命中提供商的前缀缓存（DeepSeek 上下文缓存、DashScope 等）
+PROMPT_CACHE_LAYOUT = True
+# 缓存布局下 CURRENT_TIME 的格式，粒度越粗，前缀保持不变的时间越长
+PROMPT_CACHE_TIME_FORMAT = "%Y-%m-%d %A"
+# 提供商缓存的最小单位（token）
+PROMPT_CACHE_BLOCK_TOKENS = 64
+
+# 录制/回放：record 时把真实的 LLM、搜索引擎和 Boss直聘工具交互写入夹具文件，
+# replay 时从夹具回放，无需 API Key 和浏览器即可离线运行和压测整个图；off 为正常调用
+REPLAY_MODE = os.getenv("REPLAY_MODE", "off")
+REPLAY_DIR = os.getenv("REPLAY_DIR", "data/replay")
+# 回放时的延迟倍数：1 为按录制时的真实延迟，0 为不等待
+REPLAY_LATENCY_SCALE = float(os.getenv("REPLAY_LATENCY_SCALE", "1.0"))
+
+# python_repl 沙箱进程池：预先启动并导入常用库的工作进程，代码在独立进程中执行
+SANDBOX_POOL_SIZE = 2
+# 预导入的模块及其在执行环境中的名称，未安装的模块会被跳过
+SANDBOX_PRELOAD_MODULES = {"numpy": "np", "pandas": "pd"}
+# 单次执行的超时（秒），超时的工作进程会被终止并替换
+SANDBOX_TIMEOUT = 30
+# 每个工作进程的内存上限（MB，仅 Linux/macOS 生效）
+SANDBOX_MEMORY_MB = 1024
+# 每个工作进程执行多少次代码后回收，避免内存泄漏和残留状态累积
+SANDBOX_MAX_EXECUTIONS = 50
+
+# bash_tool：单条命令的最长执行时间（秒），超时后终止整个进程组
+BASH_TIMEOUT = 120
+# 同时执行的命令数上限，超出的命令排队等待
+BASH_MAX_CONCURRENCY = 4
+# 返回给智能体的输出只保留开头和结尾的字节数，中间部分省略
+BASH_OUTPUT_HEAD_BYTES = 4000
+BASH_OUTPUT_TAIL_BYTES = 4000
+# 命令输出总量超过该字节数时终止命令
+BASH_MAX_OUTPUT_BYTES = 20 * 1024 * 1024
+
+# 岗位搜索结果缓存：相同（关键词、城市、薪资档位、页码）的搜索在有效期内直接复用，多个用户和工作进程共享
+JOB_SEARCH_CACHE_PATH = "data/job_search_cache.db"
+# 缓存有效期（秒），岗位列表变化较快，只做短时间复用
+JOB_SEARCH_CACHE_TTL = 1800
+# 搜索结果页向下滚动加载的次数
+JOB_SEARCH_SCROLL_ROUNDS = 3
+
+# 岗位查找浏览器智能体的执行预算：超过步数、时长（秒）或输入token数时提前结束并返回已完成的部分结果
+BROWSER_MAX_STEPS = 40
+BROWSER_MAX_SECONDS = 900
+BROWSER_MAX_TOKENS = 400000
+# 循环检测：最近 BROWSER_LOOP_WINDOW 步中同一页面状态（URL + DOM 哈希）出现 BROWSER_LOOP_THRESHOLD 次即判定为循环
+BROWSER_LOOP_WINDOW = 10
+BROWSER_LOOP_THRESHOLD = 3
+
+# 浏览器智能体只向模型发送变化的页面元素，元素使用整个任务内固定的编号
+BROWSER_DOM_DIFF = True
+
+# 岗位查找浏览器的轻量页面配置：创建浏览器上下文时拦截请求，不加载智能体用不到的资源
+BROWSER_BLOCK_RESOURCES = True
+# 拦截的资源类型（Playwright resource_type）
+BROWSER_BLOCKED_RESOURCE_TYPES = ["image", "media", "font"]
+# 拦截的统计/广告域名（包含子域名）
+BROWSER_BLOCKED_DOMAINS = [
+    "hm.baidu.com", "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+    "cnzz.com", "umeng.com", "growingio.com", "sensorsdata.cn",
+]
+# 允许加载子资源的域名，其他域名的脚本、样式和接口请求一律拦截；为空表示不限制
+BROWSER_ALLOWED_DOMAINS = ["zhipin.com", "bosszhipin.com", "geetest.com"]
+# 不做任何拦截的域名（滑块验证码需要加载图片）
+BROWSER_EXEMPT_DOMAINS = ["geetest.com"]
+
+# 浏览器工具以无头模式运行（通过 BROWSER_CDP_URLS 连接的浏览器需要自行以 --headless=new 启动）
+BROWSER_HEADLESS = True
+# 是否每一步都向模型发送页面截图；关闭时只发送页面文本，智能体调用 request_screenshot 或上一步失败时才截图
+BROWSER_USE_VISION = False
+# 连续失败多少步后自动在下一步附带截图，0 表示只在智能体请求时截图
+BROWSER_SCREENSHOT_AFTER_FAILURES = 1
+
+# HR 沟通消息同步：后台定期通过浏览器租借池读取Boss直聘聊天列表，只打开有变化的会话并保存新消息，
+# 有新的HR消息的会话进入待分析队列（需要浏览器已登录，默认关闭）
+BOSS_INBOX_POLL_ENABLED = False
+# 同步间隔（秒）
+BOSS_INBOX_POLL_INTERVAL = 300
+# 等待空闲浏览器的最长时间（秒），浏览器都在执行岗位查找任务时跳过本轮同步
+BOSS_INBOX_LEASE_TIMEOUT = 5
+# 消息数据库路径
+BOSS_INBOX_DB_PATH = "data/hr_inbox.db"
+# Boss直聘聊天页面及聊天列表、消息的选择器
+BOSS_CHAT_URL = "https://www.zhipin.com/web/geek/chat"
+BOSS_CHAT_ITEM_SELECTOR = ".user-list li"
+BOSS_CHAT_MESSAGE_SELECTOR = ".chat-message .message-item"
+
+# HR 回复分析：规则（可选 embedding）预分类明确的回复（自动回复、拒绝、索要简历），其余按批发送给 LLM 结构化评估
+HR_REPLY_PRECLASSIFY = True
+HR_REPLY_USE_EMBEDDING = False
+# 超过该字符数的回复可能包含多个意图，不使用规则预分类
+HR_REPLY_RULE_MAX_CHARS = 60
+# 每批会话数上限、同时进行的批次数、模型上下文窗口（token）
+HR_REPLY_MAX_BATCH = 20
+HR_REPLY_CONCURRENCY = 3
+HR_REPLY_CONTEXT_WINDOW = 32000
+# 每个会话发送给模型的新消息最大字符数（保留最新的部分）
+HR_REPLY_ITEM_MAX_CHARS = 400
+# message_processor 每次最多分析的会话数
+HR_REPLY_MAX_CONVERSATIONS = 200
+
+# 简历定制：简历按章节拆分，定制内容按 (章节, 岗位聚类) 缓存，相似岗位复用已有定制，
+# 只有岗位的特有要求涉及到的章节才重新生成
+RESUME_PATH = "data/resume.md"
+RESUME_TAILOR_DB_PATH = "data/resume_tailor.db"
+# 岗位 embedding 与聚类质心的余弦相似度不低于该值时归入该聚类
+RESUME_CLUSTER_THRESHOLD = 0.85
+# 不需要定制的章节
+RESUME_STATIC_SECTIONS = ["基本信息", "个人信息", "联系方式", "教育经历"]
+# resume 智能体每次最多定制的岗位数
+RESUME_MAX_JOBS = 20
+
+# 岗位市场数据：搜索读取到的岗位卡片先暂存，data_collector 解析后按月份追加为 NumPy 列式分区文件，
+# 用于按城市/关键词/技能统计薪资分位数等市场数据
+JOB_MARKET_COLLECT = True
+JOB_MARKET_DIR = "data/job_market"
+# 市场报告中每组至少需要的岗位数、展示的组数
+JOB_MARKET_MIN_COUNT = 5
+JOB_MARKET_TOP = 10
@@ -1,32 +1,45 @@
-from langgraph.prebuilt import create_react_agent
+import functools
 
 from app.multi_agents.utils import ThinkingLevel, get_llm_by_type
-from app.multi_agents.tools import browser_tool, db_query_tools
 from app.multi_agents.prompts import apply_prompt_template, PromptType
 
 
-# 创建职位查找Agent
-job_find_agent = create_react_agent(
-    model=get_llm_by_type(ThinkingLevel.BASIC), 
-    tools=[browser_tool],
-    prompt=apply_prompt_template(PromptType.JOB_FIND)
-)
-
-# 创建数据库查询Agent
-db_query_agent = create_react_agent(
-    model=get_llm_by_type(ThinkingLevel.ADVANCED),
-    tools=db_query_tools,
-    prompt=apply_prompt_template(PromptType.DB_QUERY)
-)
-
-
-
-
-
-
-
-
-
+@functools.lru_cache(maxsize=None)
+def get_job_find_agent():
+    """创建职位查找Agent，首次调用时才导入浏览器工具并构造"""
+    from langgraph.prebuilt import create_react_agent
+    from app.multi_agents.tools import browser_tool
+    return create_react_agent(
+        model=get_llm_by_type(ThinkingLevel.BASIC),
+        tools=[browser_tool],
+        # 提示词按每次调用时的状态生成
+        prompt=lambda state: apply_prompt_template(PromptType.JOB_FIND, state)
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def get_db_query_agent():
+    """创建数据库查询Agent，首次调用时才构造数据库工具"""
+    from langgraph.prebuilt import create_react_agent
+    from app.multi_agents.tools import db_query_tools
+    return create_react_agent(
+        model=get_llm_by_type(ThinkingLevel.ADVANCED),
+        tools=db_query_tools,
+        prompt=lambda state: apply_prompt_template(PromptType.DB_QUERY, state)
+    )
+
+
+# 保持 agents.job_find_agent / agents.db_query_agent 的访问方式，按需创建
+_LAZY_AGENTS = {
+    "job_find_agent": get_job_find_agent,
+    "db_query_agent": get_db_query_agent,
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_AGENTS:
+        return _LAZY_AGENTS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 """
@@ -1,13 +1,16 @@
 from langgraph.types import Command
 from langgraph.graph import END
 from .state_langgraph import State,Router
+from .streaming import emit_progress
+from .plan_parser import PlanStream, register_plan_stream, pop_plan_stream
+from .pre_router import frontdesk_router, supervisor_router
 from typing import Literal
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph
 from app.multi_agents.utils import get_llm_by_type, ThinkingLevel, get_logger
 from app.multi_agents.prompts.template import PromptType, apply_prompt_template
 from langchain_core.messages import BaseMessage,AIMessage
-from app.multi_agents.tools import boss_job_tool
-from browser_use.agent.prompts import SystemPrompt
+from app.config.config_com import EARLY_DISPATCH_AGENTS, PLANNER_EARLY_DISPATCH, FAST_ROUTE_ENABLED, JOB_FIND_PROCESS_POOL, HR_REPLY_MAX_CONVERSATIONS, RESUME_MAX_JOBS, JOB_MARKET_MIN_COUNT, JOB_MARKET_TOP
 from datetime import  datetime
 import re
 
@@ -38,8 +41,14 @@ def frontdesk_node(state: State) -> Command[Literal["planner", "__end__"]]:
     
     流转: 前台智能体 -> 规划智能体 or __end__
     """
-    llm = get_llm_by_type(ThinkingLevel.SIMPLE)
     logger.debug("前台智能体开始工作", agent_name="frontdesk")
+    # 可确定的请求（如找工作）直接路由，不调用LLM
+    decision = frontdesk_router.decide(state) if FAST_ROUTE_ENABLED else None
+    if decision is not None:
+        logger.agent_transition("frontdesk", decision.target, f"快速路由命中({decision.source})，跳过LLM调用")
+        return Command(goto=decision.target)
+
+    llm = get_llm_by_type(ThinkingLevel.SIMPLE)
     # 使用apply_prompt_template函数生成完整的消息列表
     formatted_messages = apply_prompt_template(PromptType.COORDINATOR, state)
 
@@ -54,7 +63,18 @@ def frontdesk_node(state: State) -> Command[Literal["planner", "__end__"]]:
 
     return Command(goto=goto)
 
-def planner_node(state: State) -> Command[Literal["supervisor", "__end__"]]:
+def _start_plan_stream(state: State) -> PlanStream:
+    """在后台流式生成计划，每解析出一个步骤就推送进度"""
+    llm = get_llm_by_type(ThinkingLevel.ADVANCED)
+    # 使用apply_prompt_template函数生成完整的消息列表
+    formatted_messages = apply_prompt_template(PromptType.PLANNER, state)
+
+    def _on_step(index, step):
+        emit_progress("planner", f"计划步骤{index + 1}: {step['title']}", index=index, step=step)
+
+    return PlanStream(llm.stream(formatted_messages), on_step=_on_step).start()
+
+def planner_node(state: State, config: RunnableConfig) -> Command[Literal["supervisor", "job_find", "__end__"]]:
     """
     规划智能体: 任务分解和规划专家
     
@@ -62,16 +82,28 @@ def planner_node(state: State) -> Command[Literal["supervisor", "__end__"]]:
     目标: 将复杂需求分解为子任务序列，制定执行计划
     责任边界: 不执行具体任务，专注于任务拆解和依赖关系管理
     
-    流转: 规划智能体 -> 监督智能体 or __end__
+    流转: 规划智能体 -> 监督智能体 or 首个步骤的工作智能体(提前调度) or __end__
     """
 
-    llm = get_llm_by_type(ThinkingLevel.ADVANCED)
-    # 使用apply_prompt_template函数生成完整的消息列表
-    formatted_messages = apply_prompt_template(PromptType.PLANNER, state)
-    result = llm.invoke(formatted_messages)
-    
+    # 流式生成计划，每个Step闭合时立即可用
+    plan_stream = _start_plan_stream(state)
+
+    thread_id = config.get("configurable", {}).get("thread_id")
+    if PLANNER_EARLY_DISPATCH and thread_id:
+        first_step = plan_stream.wait_step(0)
+        if (
+            first_step is not None
+            and not plan_stream.finished
+            and first_step["agent_name"] in EARLY_DISPATCH_AGENTS
+        ):
+            # 首个步骤已就绪，直接调度工作智能体，剩余计划由监督智能体在下一轮合并
+            register_plan_stream(thread_id, plan_stream)
+            goto = first_step["agent_name"]
+            logger.agent_transition("planner", goto, "首个步骤已生成，提前调度")
+            return Command(goto=goto, update={"plan_steps": [first_step], "next": goto, "plan_pending": True})
+
     # 清理content中的代码块标记
-    cleaned_content = clean_content(result.content)
+    cleaned_content = clean_content(plan_stream.result())
     
     logger.debug("规划智能体完成工作", agent_name="planner")    
     logger.debug(f"规划智能体结果: {cleaned_content}", agent_name="planner")
@@ -80,9 +112,12 @@ def planner_node(state: State) -> Command[Literal["supervisor", "__end__"]]:
     # 判断是否需要监督智能体
     # 这里简化为直接转到监督智能体
     logger.agent_transition("planner", "supervisor", "规划完成，转到监督智能体")
-    return Command(goto="supervisor", update={"full_plan": cleaned_content})
+    return Command(
+        goto="supervisor",
+        update={"full_plan": cleaned_content, "plan_steps": plan_stream.parser.steps, "plan_pending": False},
+    )
 
-def supervisor_node(state: State) -> Command[Literal["executor", "job_find"]]:
+def supervisor_node(state: State, config: RunnableConfig) -> Command[Literal["executor", "job_find", "message_processor", "resume", "data_collector", "__end__"]]:
     """
     监督智能体: 执行监督和质量控制
 
@@ -92,18 +127,44 @@ def supervisor_node(state: State) -> Command[Literal["executor", "job_find"]]:
     
     流转: 监督智能体 -> 执行智能体 or __end__
     """
-    llm = get_llm_by_type(ThinkingLevel.SIMPLE)
-    # 使用apply_prompt_template函数生成完整的消息列表
-    formatted_messages = apply_prompt_template(PromptType.SUPERVISOR, state)
-    result = llm.with_structured_output(Router). invoke(formatted_messages)
-    goto = result["next"]
+    update = {}
+    thread_id = config.get("configurable", {}).get("thread_id")
+    plan_stream = pop_plan_stream(thread_id) if thread_id else None
+    if plan_stream is None and state.get("plan_pending"):
+        # 提前调度时的计划流只存在于规划所在的进程中；从检查点恢复、换到其他工作进程或重启后
+        # 找不到它，此时重新生成并等待完整计划，而不是只按首个步骤继续
+        logger.warning("未找到提前调度的规划，重新生成完整计划", agent_name="supervisor")
+        plan_stream = _start_plan_stream(state)
+    if plan_stream is not None:
+        # 规划已提前调度，工作智能体执行期间计划继续生成，这里合并完整计划
+        try:
+            update = {
+                "full_plan": clean_content(plan_stream.result()),
+                "plan_steps": plan_stream.parser.steps,
+                "plan_pending": False,
+            }
+            state = {**state, **update}
+        except Exception as e:
+            logger.error(f"合并规划结果失败: {e}", agent_name="supervisor")
 
     logger.debug("监督智能体开始工作", agent_name="supervisor")
+    # 计划或规则可以确定下一个工作智能体时直接调度，不调用LLM
+    decision = supervisor_router.decide(state) if FAST_ROUTE_ENABLED else None
+    if decision is not None:
+        goto = decision.target
+    else:
+        llm = get_llm_by_type(ThinkingLevel.SIMPLE)
+        # 使用apply_prompt_template函数生成完整的消息列表
+        formatted_messages = apply_prompt_template(PromptType.SUPERVISOR, state)
+        result = llm.with_structured_output(Router). invoke(formatted_messages)
+        goto = result["next"]
 
-
-
-    logger.agent_transition("supervisor", "executor", "监督任务设置完成，转到执行智能体")
-    return Command(goto=goto, update={"next": goto })
+    logger.agent_transition("supervisor", goto, "监督任务设置完成，转到执行智能体")
+    update["next"] = goto
+    if goto == "FINISH":
+        # FINISH不是图中的节点，对应工作流结束
+        return Command(goto=END, update=update)
+    return Command(goto=goto, update=update)
 def executor_node(state: State) -> Command[Literal["__end__"]]:
     """
     执行智能体: 具体任务执行者
@@ -118,7 +179,7 @@ def executor_node(state: State) -> Command[Literal["__end__"]]:
     logger.agent_transition("executor", "__end__", "任务执行完成，工作流结束")
     return Command(goto=END)
 
-def job_find_node(state: State) -> Command[Literal["supervisor"]]:
+def job_find_node(state: State, config: RunnableConfig) -> Command[Literal["supervisor"]]:
     """
     岗位查找智能体: 
     
@@ -140,15 +201,42 @@ def job_find_node(state: State) -> Command[Literal["supervisor"]]:
         logger.debug(f"调用Boss直聘工具开始", agent_name="job_find")
 
         print(formatted_messages[0])
-        result = boss_job_tool._run(formatted_messages[0])
+        emit_progress("job_find", "开始在Boss直聘查找岗位")
+        configurable = config.get("configurable", {})
+        step_callback = lambda step: emit_progress("job_find", f"浏览器第{step['step']}步", **step)
+        if JOB_FIND_PROCESS_POOL:
+            # 在独立进程中执行：由任务队列租借的浏览器交给独占它的工作进程，
+            # 没有租借时按线程ID分片，同一会话始终使用同一个浏览器
+            from app.multi_agents.tools.boss_job_pool import get_boss_job_pool
+            result = get_boss_job_pool().run(
+                formatted_messages[0],
+                shard_key=configurable.get("thread_id", "default"),
+                step_callback=step_callback,
+                cdp_url=configurable.get("cdp_url"),
+            )
+        else:
+            # 延迟导入：browser_use 只在真正需要浏览器时加载
+            from app.multi_agents.tools.boss_job_tool import boss_job_tool
+            # 由任务队列租借的浏览器通过 configurable.cdp_url 传入，未指定时使用默认浏览器
+            result = boss_job_tool._run(
+                formatted_messages[0],
+                step_callback=step_callback,
+                cdp_url=configurable.get("cdp_url"),
+            )
         logger.debug(f"调用Boss直聘工具完成: {result[:100]}...", agent_name="job_find")
         
         # 创建消息
         msg = AIMessage(content=result,  name="browse")
+        update = {"messages": [msg]}
+        # 批量评估推荐沟通的岗位交给简历智能体定制简历
+        from app.multi_agents.utils.job_evaluator import parse_recommended
+        recommended = parse_recommended(result)
+        if recommended:
+            update["filter_job_list"] = recommended
         
         # 记录日志并返回命令
-        logger.agent_transition("job_find", "supervisor", "岗位查找完成")
-        return Command(goto="supervisor", update={"messages": [msg]})
+        logger.agent_transition("job_find", "supervisor", f"岗位查找完成，推荐{len(recommended)}个岗位")
+        return Command(goto="supervisor", update=update)
     except Exception as e:
         # 处理异常
         error_msg = f"岗位查找失败: {str(e)}"
@@ -166,9 +254,25 @@ def message_processor_node(state: State) -> Command[Literal["__end__"]]:
     
     流转: 消息处理智能体 -> __end__
     """
-    # 使用goto参数直接指定下一个节点为__end__
-    logger.agent_transition("message_processor", "__end__", "消息处理完成")
-    return Command(goto="__end__")
+    # 延迟导入：只有分析HR回复时才需要消息数据库和评估器
+    from app.multi_agents.utils.hr_inbox import get_inbox_store
+    from app.multi_agents.utils.hr_reply_scorer import format_assessments, get_hr_reply_scorer
+
+    # 只分析后台同步到新HR消息的会话，预分类后其余会话批量调用LLM
+    store = get_inbox_store()
+    pending = store.pending(limit=HR_REPLY_MAX_CONVERSATIONS)
+    if not pending:
+        logger.agent_transition("message_processor", "__end__", "没有新的HR回复")
+        return Command(goto="__end__", update={"messages": [AIMessage(content="没有新的HR回复需要分析", name="message_processor")]})
+
+    assessments, failed = get_hr_reply_scorer().score(pending)
+    # 评估失败的会话不保存也不标记为已分析，留在待分析队列中下次重试
+    store.save_assessments([(pending[assessment.index], assessment) for assessment in assessments])
+    msg = AIMessage(content=format_assessments(pending, assessments, failed), name="message_processor")
+    logger.agent_transition(
+        "message_processor", "__end__", f"消息处理完成，分析{len(assessments)}个会话，失败{len(failed)}个",
+    )
+    return Command(goto="__end__", update={"messages": [msg]})
 
 def resume_node(state: State) -> Command[Literal["__end__"]]:
     """
@@ -180,8 +284,32 @@ def resume_node(state: State) -> Command[Literal["__end__"]]:
     
     流转: 简历智能体 -> __end__
     """
-    logger.agent_transition("resume", "__end__", "简历处理完成")
-    return Command(goto="__end__")
+    # 延迟导入：只有定制简历时才需要 embedding 和定制缓存
+    from app.multi_agents.utils.resume_tailor import get_resume_tailor
+
+    # 为筛选出的岗位定制简历和打招呼语，相似岗位复用已有的定制章节
+    jobs = list(state.get("filter_job_list") or [])[:RESUME_MAX_JOBS]
+    if not jobs:
+        logger.agent_transition("resume", "__end__", "没有需要定制简历的岗位")
+        return Command(goto="__end__", update={"messages": [AIMessage(content="没有需要定制简历的岗位", name="resume")]})
+
+    tailor = get_resume_tailor()
+    try:
+        results = tailor.tailor_many(jobs)
+    except FileNotFoundError:
+        error_msg = f"未找到简历文件: {tailor.resume_path}"
+        logger.error(error_msg, agent_name="resume")
+        return Command(goto="__end__", update={"messages": [AIMessage(content=error_msg, name="resume")]})
+
+    lines = [f"已为{len(results)}个岗位定制简历:"]
+    for result in results:
+        regenerated = [name for name in result.regenerated if not name.startswith("__")]
+        lines.append(
+            f"- {result.job[:40]}: 重新生成{len(regenerated)}个章节，复用{len(result.reused)}个章节；打招呼语: {result.greeting}"
+        )
+    msg = AIMessage(content="\n".join(lines), name="resume")
+    logger.agent_transition("resume", "__end__", f"简历处理完成，定制{len(results)}个岗位")
+    return Command(goto="__end__", update={"messages": [msg]})
 
 def data_collector_node(state: State) -> Command[Literal["__end__"]]:
     """
@@ -193,8 +321,26 @@ def data_collector_node(state: State) -> Command[Literal["__end__"]]:
     
     流转: 数据收集智能体 -> __end__
     """
-    logger.agent_transition("data_collector", "__end__", "数据收集完成")
-    return Command(goto="__end__")
+    # 延迟导入：只有统计岗位市场数据时才需要 numpy
+    from app.multi_agents.utils.job_market import count_by, get_job_market_store, salary_percentiles
+
+    # 把搜索时暂存的岗位写入列式分区，再用向量化聚合统计，不需要让LLM阅读岗位列表
+    store = get_job_market_store()
+    collected = store.flush()
+    data = store.load()
+    if not len(data):
+        logger.agent_transition("data_collector", "__end__", "没有岗位数据")
+        return Command(goto="__end__", update={"messages": [AIMessage(content="还没有收集到岗位数据，请先搜索岗位", name="data_collector")]})
+
+    lines = [f"本次收集{collected}个岗位，累计{len(data)}个岗位。", "", "各城市月薪（K，25/50/75分位）:"]
+    by_city = salary_percentiles(data, by="city", min_count=JOB_MARKET_MIN_COUNT)
+    for city, stats in list(by_city.items())[:JOB_MARKET_TOP]:
+        lines.append(f"- {city}（{stats['count']}个）: {stats['p25']} / {stats['p50']} / {stats['p75']}")
+    lines += ["", "热门技能（岗位数）:"]
+    lines.append("、".join(f"{skill}({count})" for skill, count in count_by(data, "skill", top=JOB_MARKET_TOP).items()) or "无")
+    msg = AIMessage(content="\n".join(lines), name="data_collector")
+    logger.agent_transition("data_collector", "__end__", f"数据收集完成，收集{collected}个岗位")
+    return Command(goto="__end__", update={"messages": [msg]})
 
 def user_interaction_node(state: State) -> Command[Literal["__end__"]]:
     """
@@ -227,7 +373,10 @@ def build_agent(checkpointer=None) -> StateGraph:
     构建智能体图
     
     参数:
-        checkpointer: 用于保存状态的检查点存储器
+        checkpointer: 用于保存状态的检查点存储器，生产环境可使用 checkpointer.SqliteDeltaSaver
+
+    编译后的图既可以用 graph.invoke 一次性运行，也可以通过
+    streaming.stream_agent 流式获取规划/监督智能体的 token 和岗位查找的进度事件
     """
     # 创建图
     workflow = StateGraph(State)
@@ -238,14 +387,14 @@ def build_agent(checkpointer=None) -> StateGraph:
     workflow.add_node("supervisor", supervisor_node)
     workflow.add_node("executor", executor_node)
     workflow.add_node("job_find", job_find_node)
+    workflow.add_node("message_processor", message_processor_node)
+    workflow.add_node("resume", resume_node)
+    workflow.add_node("data_collector", data_collector_node)
     
     # 设置入口点
     workflow.set_entry_point("frontdesk")
     
-    # 添加边
-    workflow.add_edge("frontdesk", "planner")
-    workflow.add_edge("planner", "supervisor")
-
+    # 节点之间的流转全部由各节点返回的Command决定
     
     logger.info("智能体图构建完成", agent_name="system")
     
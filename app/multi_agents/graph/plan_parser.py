@@ -0,0 +1,237 @@
+"""
+规划结果的增量解析
+
+规划智能体按照 prompts/planner.md 中的 Plan/Step 结构输出 JSON。
+IncrementalPlanParser 在 LLM 流式输出的过程中逐块解析，每当 steps 数组中
+一个 Step 对象闭合就立即返回它；PlanStream 在后台线程中驱动生成，
+让监督智能体可以在计划的剩余部分仍在生成时就开始调度第一个步骤。
+"""
+import contextvars
+import json
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from .state_langgraph import Step
+
+
+class IncrementalPlanParser:
+    """Plan JSON 的增量解析器
+
+    只跟踪 JSON 的括号层级和字符串状态，不依赖完整文本；
+    允许输出被 ```json 代码块包裹（第一个 "{" 之前的内容会被忽略）。
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.steps: List[Step] = []
+        self.thought: Optional[str] = None
+        self.title: Optional[str] = None
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._last_string: Optional[str] = None
+        self._key: Optional[str] = None
+        self._steps_level: Optional[int] = None
+        self._step_start = -1
+        self._closed = False
+
+    @property
+    def done(self) -> bool:
+        """顶层 Plan 对象是否已经闭合"""
+        return self._closed
+
+    def feed(self, chunk: str) -> List[Step]:
+        """输入一段新的文本
+
+        Args:
+            chunk: LLM 新生成的文本片段
+
+        Returns:
+            本次新解析出的完整 Step 列表
+        """
+        if not chunk:
+            return []
+        self.buffer += chunk
+        new_steps: List[Step] = []
+        buffer = self.buffer
+
+        while self._pos < len(buffer):
+            char = buffer[self._pos]
+            index = self._pos
+            self._pos += 1
+
+            if self._closed:
+                break
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._on_string_end(buffer[self._string_start:index + 1])
+                continue
+
+            if not self._stack and char != "{":
+                # 跳过代码块标记等前缀
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = index
+            elif char == ":":
+                if len(self._stack) == 1:
+                    self._key = self._last_string
+            elif char == ",":
+                if len(self._stack) == 1:
+                    self._key = None
+            elif char in "{[":
+                self._stack.append(char)
+                if char == "[" and len(self._stack) == 2 and self._key == "steps":
+                    self._steps_level = len(self._stack)
+                elif char == "{" and self._steps_level is not None and len(self._stack) == self._steps_level + 1:
+                    self._step_start = index
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if char == "}" and self._step_start >= 0 and len(self._stack) == self._steps_level:
+                    step = self._parse_step(buffer[self._step_start:index + 1])
+                    self._step_start = -1
+                    if step is not None:
+                        self.steps.append(step)
+                        new_steps.append(step)
+                elif char == "]" and self._steps_level is not None and len(self._stack) == self._steps_level - 1:
+                    self._steps_level = None
+                if not self._stack:
+                    self._closed = True
+
+        return new_steps
+
+    def _on_string_end(self, raw: str) -> None:
+        """处理一个刚刚结束的字符串，用于识别顶层的键和 thought/title 的值"""
+        if len(self._stack) != 1:
+            return
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+        if self._key is None:
+            self._last_string = value
+        elif self._key == "thought":
+            self.thought = value
+        elif self._key == "title":
+            self.title = value
+
+    @staticmethod
+    def _parse_step(raw: str) -> Optional[Step]:
+        """把一个完整的 Step JSON 片段转换为 Step，缺少 agent_name 时忽略"""
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(data, dict) or not data.get("agent_name"):
+            return None
+        step = Step(
+            agent_name=data["agent_name"],
+            title=data.get("title", ""),
+            description=data.get("description", ""),
+        )
+        if data.get("note"):
+            step["note"] = data["note"]
+        return step
+
+
+class PlanStream:
+    """在后台线程中流式生成规划结果
+
+    调用方可以通过 wait_step 等待某个步骤解析完成，
+    通过 result 等待整个计划生成完毕。
+    """
+
+    def __init__(self, chunks: Iterable[Any], on_step=None):
+        """
+        Args:
+            chunks: LLM 的流式输出（llm.stream 的返回值），元素为消息块或字符串
+            on_step: 每解析出一个步骤时的回调，参数为 (序号, Step)
+        """
+        self.parser = IncrementalPlanParser()
+        self._chunks = chunks
+        self._on_step = on_step
+        self._cond = threading.Condition()
+        self._finished = False
+        self._error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "PlanStream":
+        """启动后台生成，复制当前上下文以保留 LangGraph 的回调与流写入器"""
+        context = contextvars.copy_context()
+        self._thread = threading.Thread(target=context.run, args=(self._consume,), daemon=True)
+        self._thread.start()
+        return self
+
+    def _consume(self) -> None:
+        try:
+            for chunk in self._chunks:
+                text = chunk if isinstance(chunk, str) else getattr(chunk, "content", "")
+                new_steps = self.parser.feed(text) if isinstance(text, str) else []
+                with self._cond:
+                    if new_steps:
+                        self._cond.notify_all()
+                if self._on_step:
+                    base = len(self.parser.steps) - len(new_steps)
+                    for offset, step in enumerate(new_steps):
+                        self._on_step(base + offset, step)
+        except BaseException as e:  # noqa: BLE001 - 需要把异常传递给等待方
+            self._error = e
+        finally:
+            with self._cond:
+                self._finished = True
+                self._cond.notify_all()
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    def wait_step(self, index: int, timeout: Optional[float] = None) -> Optional[Step]:
+        """等待第 index 个步骤解析完成
+
+        Returns:
+            对应的 Step；计划生成结束但步骤不足时返回 None
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.parser.steps) > index or self._finished, timeout)
+            if len(self.parser.steps) > index:
+                return self.parser.steps[index]
+            return None
+
+    def result(self, timeout: Optional[float] = None) -> str:
+        """等待计划生成结束并返回完整的原始文本
+
+        Raises:
+            异常: 后台生成过程中出现的异常会在这里重新抛出
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._finished, timeout)
+        if self._error is not None:
+            raise self._error
+        return self.parser.buffer
+
+
+# 正在生成中的规划，按线程 ID 索引
+_active_streams: Dict[str, PlanStream] = {}
+_active_lock = threading.Lock()
+
+
+def register_plan_stream(key: str, stream: PlanStream) -> None:
+    """登记一个仍在生成中的规划"""
+    with _active_lock:
+        _active_streams[key] = stream
+
+
+def pop_plan_stream(key: str) -> Optional[PlanStream]:
+    """取出并移除某个线程仍在生成中的规划，不存在时返回 None"""
+    with _active_lock:
+        return _active_streams.pop(key, None)
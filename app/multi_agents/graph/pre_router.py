@@ -0,0 +1,310 @@
+"""
+快速路由
+
+前台智能体和监督智能体的大部分请求（找工作）路由结果是可预测的。
+PreRouter 在调用 LLM 之前先用关键词/正则规则和可选的本地 embedding 分类器判断，
+置信度足够高时直接给出路由结果，否则回退到 LLM，并统计节省的 LLM 调用次数。
+"""
+import math
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+from app.config.config_com import FAST_ROUTE_THRESHOLD, FAST_ROUTE_USE_EMBEDDING, WORKER_NODES
+from app.multi_agents.utils import get_logger
+
+logger = get_logger(__name__, level="debug")
+
+
+@dataclass
+class RouteDecision:
+    """路由结果"""
+    target: str
+    confidence: float
+    source: str  # rule / embedding / plan
+
+
+@dataclass
+class RouteRule:
+    """关键词/正则路由规则
+
+    patterns 任意一个命中且 excludes 都不命中时，规则生效
+    """
+    target: str
+    patterns: Sequence[str]
+    excludes: Sequence[str] = ()
+    confidence: float = 0.95
+    max_length: Optional[int] = None  # 输入超过该长度时规则不生效
+    _compiled: List[re.Pattern] = field(default_factory=list, init=False, repr=False)
+    _compiled_excludes: List[re.Pattern] = field(default_factory=list, init=False, repr=False)
+
+    def __post_init__(self):
+        self._compiled = [re.compile(p, re.IGNORECASE) for p in self.patterns]
+        self._compiled_excludes = [re.compile(p, re.IGNORECASE) for p in self.excludes]
+
+    def match(self, text: str) -> bool:
+        if self.max_length is not None and len(text) > self.max_length:
+            return False
+        if any(p.search(text) for p in self._compiled_excludes):
+            return False
+        return any(p.search(text) for p in self._compiled)
+
+
+class EmbeddingClassifier:
+    """基于 embedding 质心的本地小型分类器
+
+    每个标签提供若干示例句，首次使用时计算示例 embedding 的质心；
+    分类时对各质心的余弦相似度做 softmax，最高概率作为置信度。
+    """
+
+    def __init__(self, examples: Mapping[str, Sequence[str]], embedding: Any = None, temperature: float = 0.05):
+        """
+        Args:
+            examples: 标签 -> 示例句列表
+            embedding: 提供 embed_documents/embed_query 的 embedding 实例，默认使用 DashScope
+            temperature: softmax 温度，越小置信度越两极化
+        """
+        self.examples = {label: list(texts) for label, texts in examples.items()}
+        self.temperature = temperature
+        self._embedding = embedding
+        self._centroids: Optional[Dict[str, List[float]]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def embedding(self):
+        if self._embedding is None:
+            from app.multi_agents.utils.embedding_factory import EmbeddingFactory, EmbeddingProviderType
+            self._embedding = EmbeddingFactory.create_embedding(EmbeddingProviderType.DASHSCOPE)
+        return self._embedding
+
+    def _ensure_centroids(self) -> Dict[str, List[float]]:
+        with self._lock:
+            if self._centroids is None:
+                centroids = {}
+                for label, texts in self.examples.items():
+                    vectors = self.embedding.embed_documents(texts)
+                    centroids[label] = [sum(col) / len(vectors) for col in zip(*vectors)]
+                self._centroids = centroids
+            return self._centroids
+
+    @staticmethod
+    def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+        dot = sum(x * y for x, y in zip(a, b))
+        norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+        return dot / norm if norm else 0.0
+
+    def classify(self, text: str) -> Optional[RouteDecision]:
+        """对文本分类，返回置信度最高的标签"""
+        centroids = self._ensure_centroids()
+        if not centroids:
+            return None
+        vector = self.embedding.embed_query(text)
+        scores = {label: self._cosine(vector, centroid) for label, centroid in centroids.items()}
+        peak = max(scores.values())
+        weights = {label: math.exp((score - peak) / self.temperature) for label, score in scores.items()}
+        total = sum(weights.values())
+        label = max(weights, key=weights.get)
+        return RouteDecision(target=label, confidence=weights[label] / total, source="embedding")
+
+
+def latest_user_text(messages: Sequence[Any]) -> str:
+    """取出最近一条用户消息的文本，兼容消息对象和字典两种格式"""
+    for message in reversed(messages or []):
+        if isinstance(message, dict):
+            if message.get("role") in ("user", "human"):
+                return str(message.get("content", ""))
+        elif getattr(message, "type", None) == "human":
+            return str(message.content)
+    return ""
+
+
+class PreRouter:
+    """LLM 调用之前的快速路由器"""
+
+    def __init__(
+        self,
+        name: str,
+        rules: Sequence[RouteRule] = (),
+        classifier: Optional[EmbeddingClassifier] = None,
+        threshold: float = FAST_ROUTE_THRESHOLD,
+    ):
+        """
+        Args:
+            name: 路由器名称，用于日志
+            rules: 按顺序匹配的规则
+            classifier: 可选的 embedding 分类器，规则未命中时使用
+            threshold: 置信度阈值，低于该值回退到 LLM
+        """
+        self.name = name
+        self.rules = list(rules)
+        self.classifier = classifier
+        self.threshold = threshold
+        self._stats = {"total": 0, "fast": 0, "fallback": 0}
+        self._stats_lock = threading.Lock()
+
+    def route(self, text: str) -> Optional[RouteDecision]:
+        """对文本进行快速路由，无法确定时返回 None"""
+        text = (text or "").strip()
+        if not text:
+            return None
+        for rule in self.rules:
+            if rule.match(text):
+                return RouteDecision(rule.target, rule.confidence, "rule")
+        if self.classifier is not None:
+            try:
+                return self.classifier.classify(text)
+            except Exception as e:
+                logger.warning(f"embedding分类失败，回退到LLM: {e}", agent_name=self.name)
+        return None
+
+    def route_state(self, state: Mapping[str, Any]) -> Optional[RouteDecision]:
+        """根据图状态进行快速路由，默认只看最近一条用户消息"""
+        return self.route(latest_user_text(state.get("messages", [])))
+
+    def decide(self, state: Mapping[str, Any]) -> Optional[RouteDecision]:
+        """给出最终的快速路由结果并记录统计，置信度不足时返回 None 表示需要调用 LLM"""
+        decision = self.route_state(state)
+        accepted = decision is not None and decision.confidence >= self.threshold
+        with self._stats_lock:
+            self._stats["total"] += 1
+            self._stats["fast" if accepted else "fallback"] += 1
+        if accepted:
+            logger.debug(
+                f"快速路由命中 -> {decision.target} ({decision.source}, 置信度{decision.confidence:.2f})，"
+                f"累计节省LLM调用{self._stats['fast']}次",
+                agent_name=self.name,
+            )
+            return decision
+        return None
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """路由统计：总次数、快速路由次数（即节省的LLM调用次数）、回退次数"""
+        with self._stats_lock:
+            return {**self._stats, "saved_llm_calls": self._stats["fast"]}
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self._stats = {"total": 0, "fast": 0, "fallback": 0}
+
+
+class SupervisorPreRouter(PreRouter):
+    """监督智能体的快速路由器
+
+    在文本规则之前优先使用图状态中的确定性信息：
+    - 岗位查找智能体已返回结果时，计划中有后续的简历智能体则调度它，否则按规划约定直接结束
+    - 计划中的步骤全部属于同一个工作智能体时，直接调度它
+
+    只会调度图中已注册的工作智能体节点，其余目标（如计划中的 browser、reporter）交给LLM判断。
+    """
+
+    def __init__(
+        self,
+        *args,
+        finish_after: Sequence[str] = ("browse",),
+        follow_ups: Mapping[str, str] = {"browse": "resume"},
+        workers: Sequence[str] = WORKER_NODES,
+        **kwargs,
+    ):
+        """
+        Args:
+            finish_after: 最后一条消息来自这些名称时直接结束
+            follow_ups: 最后一条消息的名称 -> 后续工作智能体，计划中包含该智能体时调度它而不是结束
+            workers: 图中已注册的工作智能体节点
+        """
+        super().__init__(*args, **kwargs)
+        self.finish_after = tuple(finish_after)
+        self.follow_ups = dict(follow_ups)
+        self.workers = frozenset(workers)
+
+    def route_state(self, state: Mapping[str, Any]) -> Optional[RouteDecision]:
+        messages = state.get("messages", [])
+        last_name = getattr(messages[-1], "name", None) if messages else None
+        steps = state.get("plan_steps") or []
+        agents = {step.get("agent_name") for step in steps}
+        if last_name in self.finish_after:
+            follow_up = self.follow_ups.get(last_name)
+            if follow_up in agents and follow_up in self.workers:
+                return RouteDecision(follow_up, 1.0, "plan")
+            return RouteDecision("FINISH", 1.0, "plan")
+        if last_name == "error":
+            # 工作智能体执行失败，是否重试交给LLM判断
+            return None
+
+        if len(agents) == 1 and agents <= self.workers:
+            return RouteDecision(agents.pop(), 1.0, "plan")
+
+        decision = super().route_state(state)
+        if decision is not None and decision.target not in self.workers:
+            return None
+        return decision
+
+
+# 找工作请求的关键词
+JOB_SEARCH_PATTERNS = [
+    r"找工作", r"求职", r"岗位", r"职位", r"招聘", r"boss ?直聘", r"\bboss\b", r"投递", r"工作机会",
+    r"(寻找|查找|搜索|找).{0,20}(工作|开发|工程师|实习)",
+]
+
+# 同时包含这些内容时说明请求涉及其他智能体，不走快速路由
+MULTI_TASK_PATTERNS = [r"计算", r"\d+\s*[*x×/+\-]\s*\d+", r"新闻", r"报告", r"代码"]
+
+# 分析HR回复的请求
+HR_MESSAGE_PATTERNS = [r"hr.{0,8}(回复|消息|回信)", r"(分析|查看|看看|整理).{0,6}(回复|聊天消息|沟通消息)"]
+
+# 岗位市场统计的请求
+JOB_MARKET_PATTERNS = [r"(薪资|工资|薪酬|市场).{0,6}(行情|水平|分布|统计|分位)", r"(热门|需求最多|常见).{0,4}技能"]
+
+GREETING_PATTERNS = [r"^(你好|您好|hi|hello|嗨|早上好|下午好|晚上好|在吗)[!！。.~～\s]*$"]
+
+
+def default_frontdesk_router(use_embedding: bool = FAST_ROUTE_USE_EMBEDDING) -> PreRouter:
+    """创建前台智能体的默认快速路由器（目标: planner / __end__）"""
+    classifier = None
+    if use_embedding:
+        classifier = EmbeddingClassifier({
+            "planner": ["帮我找AI Agent开发工作", "去boss直聘搜索深圳的Python岗位", "计算20*20等于多少", "搜索最新的新闻"],
+            "__end__": ["你好", "你是谁", "今天天气怎么样", "早上好"],
+        })
+    return PreRouter(
+        "frontdesk",
+        rules=[
+            RouteRule("planner", JOB_SEARCH_PATTERNS),
+            RouteRule("planner", HR_MESSAGE_PATTERNS),
+            RouteRule("planner", JOB_MARKET_PATTERNS),
+            RouteRule("__end__", GREETING_PATTERNS, confidence=0.9, max_length=10),
+        ],
+        classifier=classifier,
+    )
+
+
+def default_supervisor_router(use_embedding: bool = FAST_ROUTE_USE_EMBEDDING) -> SupervisorPreRouter:
+    """创建监督智能体的默认快速路由器（目标: WORKER_NODES / FINISH）"""
+    classifier = None
+    if use_embedding:
+        classifier = EmbeddingClassifier({
+            "job_find": ["帮我找AI Agent开发工作", "去boss直聘搜索深圳的Python岗位", "投递上海产品经理职位"],
+            "message_processor": ["看看HR有没有回复", "分析一下HR的回复"],
+            "data_collector": ["深圳Python岗位的薪资行情", "统计一下热门技能"],
+            "browser": ["打开github查看项目", "在网页上点赞这篇文章"],
+            "reporter": ["根据结果写一份报告", "总结上面的内容"],
+        })
+    return SupervisorPreRouter(
+        "supervisor",
+        rules=[
+            RouteRule("message_processor", HR_MESSAGE_PATTERNS, excludes=MULTI_TASK_PATTERNS),
+            RouteRule("data_collector", JOB_MARKET_PATTERNS, excludes=MULTI_TASK_PATTERNS),
+            RouteRule("job_find", JOB_SEARCH_PATTERNS, excludes=MULTI_TASK_PATTERNS),
+        ],
+        classifier=classifier,
+    )
+
+
+frontdesk_router = default_frontdesk_router()
+supervisor_router = default_supervisor_router()
+
+
+def get_router_stats() -> Dict[str, Dict[str, int]]:
+    """获取默认快速路由器的统计信息"""
+    return {router.name: router.stats for router in (frontdesk_router, supervisor_router)}
@@ -1,5 +1,5 @@
 from typing import Literal
-from typing_extensions import TypedDict
+from typing_extensions import TypedDict, NotRequired
 from langgraph.graph import MessagesState
 
 from app.config.config_com import TEAM_MEMBERS
@@ -11,7 +11,24 @@ OPTIONS = TEAM_MEMBERS + ["FINISH"]
 class Router(TypedDict):
     """Worker to route to next. If no workers needed, route to FINISH."""
 
-    next: Literal["researcher", "job_find", "coder", "browser", "reporter", "FINISH"]
+    next: Literal["researcher", "job_find", "message_processor", "resume", "data_collector", "coder", "browser", "reporter", "FINISH"]
+
+
+class Step(TypedDict):
+    """规划中的单个步骤，对应 prompts/planner.md 中的 Step 接口"""
+
+    agent_name: str
+    title: str
+    description: str
+    note: NotRequired[str]
+
+
+class Plan(TypedDict):
+    """规划智能体输出的完整计划"""
+
+    thought: str
+    title: str
+    steps: list[Step]
 
 
 class State(MessagesState):
@@ -23,6 +40,9 @@ class State(MessagesState):
     # Runtime Variables
     next: list[str]
     full_plan: str
+    plan_steps: list[Step]
+    # 规划提前调度了首个步骤、完整计划尚未合并到状态中
+    plan_pending: bool
     deep_thinking_mode: bool
     search_before_planning: bool
     filter_job_list: list[str]
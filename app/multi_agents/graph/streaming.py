@@ -0,0 +1,139 @@
+"""
+智能体图的流式输出
+
+将 LangGraph 的多种 stream_mode（messages / custom / updates）统一转换为
+调用方易于消费的事件字典，让用户在第一个 token 生成时就能看到输出，
+而不必等待整张图执行完毕。
+"""
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, Optional, Sequence
+
+from langgraph.config import get_stream_writer
+
+
+class StreamEventType(Enum):
+    """流式事件类型枚举"""
+    TOKEN = "token"        # LLM 生成的 token
+    PROGRESS = "progress"  # 节点内部的进度事件（如浏览器每一步操作）
+    UPDATE = "update"      # 节点执行完成后的状态更新
+
+    def __str__(self) -> str:
+        return self.value
+
+
+# 默认同时订阅的流模式
+DEFAULT_STREAM_MODES = ("messages", "custom", "updates")
+
+# 默认转发 token 的节点
+DEFAULT_TOKEN_NODES = ("planner", "supervisor")
+
+
+def emit_progress(node: str, message: str, **data: Any) -> None:
+    """在节点内部发送进度事件
+
+    只有调用方以 custom 模式流式运行图时事件才会被转发；
+    在图之外调用（例如单独调试工具）时静默忽略。
+
+    Args:
+        node: 发送事件的节点名称
+        message: 进度描述
+        **data: 附加的结构化数据
+    """
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:
+        # 不在图的运行上下文中
+        return
+    writer({"type": StreamEventType.PROGRESS.value, "node": node, "message": message, **data})
+
+
+def _chunk_text(chunk: Any) -> str:
+    """提取消息块中的文本，结构化输出时回退到工具调用参数片段"""
+    content = getattr(chunk, "content", "")
+    if isinstance(content, list):
+        content = "".join(
+            part.get("text", "") if isinstance(part, dict) else str(part) for part in content
+        )
+    if content:
+        return content
+    tool_call_chunks = getattr(chunk, "tool_call_chunks", None) or []
+    return "".join(tc.get("args") or "" for tc in tool_call_chunks)
+
+
+def normalize_stream_chunk(
+    mode: str,
+    chunk: Any,
+    token_nodes: Optional[Iterable[str]] = DEFAULT_TOKEN_NODES,
+) -> Optional[Dict[str, Any]]:
+    """将单个 LangGraph 流式输出块转换为统一的事件字典
+
+    Args:
+        mode: 流模式（messages / custom / updates）
+        chunk: 对应模式下 LangGraph 产生的数据块
+        token_nodes: 需要转发 token 的节点，为 None 时转发所有节点
+
+    Returns:
+        事件字典，不需要转发时返回 None
+    """
+    if mode == "messages":
+        message, metadata = chunk
+        node = metadata.get("langgraph_node")
+        if token_nodes is not None and node not in token_nodes:
+            return None
+        text = _chunk_text(message)
+        if not text:
+            return None
+        return {"type": StreamEventType.TOKEN.value, "node": node, "content": text}
+
+    if mode == "custom":
+        if isinstance(chunk, dict):
+            return {"type": StreamEventType.PROGRESS.value, **chunk}
+        return {"type": StreamEventType.PROGRESS.value, "node": None, "message": str(chunk)}
+
+    if mode == "updates":
+        # updates 模式下每个块形如 {节点名: 更新内容}
+        node, update = next(iter(chunk.items()))
+        return {"type": StreamEventType.UPDATE.value, "node": node, "data": update}
+
+    return {"type": mode, "data": chunk}
+
+
+def stream_agent(
+    graph,
+    state: Dict[str, Any],
+    config: Optional[Dict[str, Any]] = None,
+    stream_mode: Sequence[str] = DEFAULT_STREAM_MODES,
+    token_nodes: Optional[Iterable[str]] = DEFAULT_TOKEN_NODES,
+) -> Iterator[Dict[str, Any]]:
+    """以流式方式运行智能体图
+
+    Args:
+        graph: build_agent 编译后的图
+        state: 初始状态
+        config: 运行配置，例如 {"configurable": {"thread_id": "..."}}
+        stream_mode: 订阅的流模式
+        token_nodes: 需要转发 token 的节点，为 None 时转发所有节点
+
+    Yields:
+        统一格式的事件字典，包含 type、node 以及具体内容
+    """
+    token_nodes = tuple(token_nodes) if token_nodes is not None else None
+    for mode, chunk in graph.stream(state, config, stream_mode=list(stream_mode)):
+        event = normalize_stream_chunk(mode, chunk, token_nodes)
+        if event is not None:
+            yield event
+
+
+async def astream_agent(
+    graph,
+    state: Dict[str, Any],
+    config: Optional[Dict[str, Any]] = None,
+    stream_mode: Sequence[str] = DEFAULT_STREAM_MODES,
+    token_nodes: Optional[Iterable[str]] = DEFAULT_TOKEN_NODES,
+) -> AsyncIterator[Dict[str, Any]]:
+    """stream_agent 的异步版本，参数含义相同"""
+    token_nodes = tuple(token_nodes) if token_nodes is not None else None
+    async for mode, chunk in graph.astream(state, config, stream_mode=list(stream_mode)):
+        event = normalize_stream_chunk(mode, chunk, token_nodes)
+        if event is not None:
+            yield event
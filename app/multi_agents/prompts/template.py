@@ -2,13 +2,21 @@
 from enum import Enum  # 用于创建枚举类
 import os  # 用于处理文件路径
 import re  # 用于正则表达式操作
+import functools
 from datetime import datetime  # 用于获取当前时间
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
 from pathlib import Path
 
 # 导入LangChain和LangGraph相关组件
 from langchain_core.prompts import PromptTemplate  # 用于创建提示模板
-from langgraph.prebuilt.chat_agent_executor import AgentState  # 用于管理代理状态
+
+from app.config.config_com import NODE_TOKEN_BUDGETS, PROMPT_CACHE_LAYOUT, PROMPT_CACHE_TIME_FORMAT
+from app.multi_agents.utils.context_manager import compact_messages, estimate_tokens
+from app.multi_agents.utils.prompt_cache import default_prompt_cache_tracker
+
+if TYPE_CHECKING:
+    # 仅用于类型标注，运行时导入 langgraph.prebuilt 的开销较大
+    from langgraph.prebuilt.chat_agent_executor import AgentState  # 用于管理代理状态
 
 
 class PromptType(Enum):
@@ -49,20 +57,49 @@ def get_prompt_template(prompt_type: PromptType, encoding: str = 'utf-8') -> str
     return template
 
 
+# 模板中含有该占位符的行在缓存友好布局下移到系统提示词末尾
+_DYNAMIC_LINE_PATTERN = re.compile(r"^.*(?<!\{)\{CURRENT_TIME\}(?!\}).*\n?", re.M)
+# 移除时间行后留下的空的 --- 分隔块
+_EMPTY_FENCE_PATTERN = re.compile(r"^---[ \t]*\n(?:[ \t]*\n)*---[ \t]*\n", re.M)
+
+
+@functools.lru_cache(maxsize=None)
+def get_static_prompt_template(prompt_type: PromptType) -> str:
+    """获取去掉时间等动态行的模板，内容在进程内保持不变，可作为提供商缓存的前缀
+
+    Args:
+        prompt_type: 提示词模板类型（PromptType枚举）
+
+    Returns:
+        只包含静态指令的模板字符串
+    """
+    template = _DYNAMIC_LINE_PATTERN.sub("", get_prompt_template(prompt_type))
+    return _EMPTY_FENCE_PATTERN.sub("", template).lstrip()
+
+
 # 应用提示词模板函数
 def apply_prompt_template(
     prompt_type: PromptType,
-    state: AgentState,
-    time_format: str = "%a %b %d %Y %H:%M:%S %z",
-    additional_vars: Optional[Dict[str, Any]] = None
+    state: "AgentState",
+    time_format: Optional[str] = None,
+    additional_vars: Optional[Dict[str, Any]] = None,
+    token_budget: Optional[int] = None,
+    cache_layout: Optional[bool] = None
 ) -> List[Dict[str, str]]:
     """将提示词模板应用到当前状态，生成系统提示消息
     
+    缓存友好布局下，系统提示词按"静态指令 -> 粗粒度的动态变量（日期）"排列，之后才是历史消息，
+    同一节点的重复调用拥有相同的前缀，可以命中提供商的前缀缓存；每次组装的可缓存前缀长度
+    记录在 default_prompt_cache_tracker 中。
+    
     Args:
         prompt_type: 提示词模板类型（PromptType枚举）
         state: 代理状态对象，包含消息历史等信息
-        time_format: 时间格式字符串，默认为 "%a %b %d %Y %H:%M:%S %z"
+        time_format: 时间格式字符串，默认缓存布局下为 PROMPT_CACHE_TIME_FORMAT，否则为 "%a %b %d %Y %H:%M:%S %z"
         additional_vars: 额外的模板变量，可选
+        token_budget: 整个提示词的token预算，默认取NODE_TOKEN_BUDGETS中的配置；
+            超出时较早的长消息会被压缩为摘要和引用
+        cache_layout: 是否使用缓存友好布局，默认取 PROMPT_CACHE_LAYOUT
         
     Returns:
         包含系统提示和历史消息的列表
@@ -72,26 +109,42 @@ def apply_prompt_template(
         ValueError: 当模板变量格式不正确时
     """
     try:
+        cache_layout = PROMPT_CACHE_LAYOUT if cache_layout is None else cache_layout
+        if time_format is None:
+            time_format = PROMPT_CACHE_TIME_FORMAT if cache_layout else "%a %b %d %Y %H:%M:%S %z"
+        current_time = datetime.now().strftime(time_format)
         # 准备模板变量
         template_vars = {
-            "CURRENT_TIME": datetime.now().strftime(time_format),
+            "CURRENT_TIME": current_time,
             **state,
             **(additional_vars or {})
         }
         print(template_vars)
         # 创建系统提示
         # 模板中某个没有的变量没有被成功填充，会报错，需要处理
+        template = get_static_prompt_template(prompt_type) if cache_layout else get_prompt_template(prompt_type)
         system_prompt = PromptTemplate(
-            template=get_prompt_template(prompt_type),
+            template=template,
             input_variables=list(template_vars.keys())
         ).format(**template_vars)
+        if cache_layout:
+            # 动态变量放在静态指令之后，只影响系统提示词的结尾
+            system_prompt = f"{system_prompt.rstrip()}\n\n---\n当前时间: {current_time}\n"
         
         # 验证消息格式
         if not isinstance(state["messages"], list):
             raise ValueError("state['messages'] 必须是列表类型")
         print(state["messages"])
+
+        messages = state["messages"]
+        budget = token_budget or NODE_TOKEN_BUDGETS.get(prompt_type.value)
+        if budget:
+            # 系统提示词本身不压缩，剩余预算留给历史消息
+            messages = compact_messages(messages, max(budget - estimate_tokens(system_prompt), 0))
             
-        return [{"role": "system", "content": system_prompt}] + state["messages"]
+        formatted = [{"role": "system", "content": system_prompt}] + messages
+        default_prompt_cache_tracker.record(prompt_type.value, formatted)
+        return formatted
         
     except KeyError as e:
         raise KeyError(f"缺少必要的状态变量：{e}")
@@ -1,14 +1,38 @@
 """
 包含Agent使用的各种工具
+
+工具按需加载：只有在第一次访问某个工具时才导入对应模块（例如 browser_use），
+只需要数据库工具的进程不会为浏览器工具付出导入和构造的开销。
 """
-from .brower_use_tool import browser_tool
-from .boss_job_tool import boss_job_tool
-from .db_query_tool import db_query_tools, pin_query_tool, sql_query_tool
+import importlib
+
+# 工具名称 -> 定义它的子模块
+_LAZY_ATTRS = {
+    "browser_tool": ".brower_use_tool",
+    "boss_job_tool": ".boss_job_tool",
+    "db_query_tools": ".db_query_tool",
+    "pin_query_tool": ".db_query_tool",
+    "sql_query_tool": ".db_query_tool",
+}
 
 __all__ = [
-    "browser_tool", 
-    "boss_job_tool", 
+    "browser_tool",
+    "boss_job_tool",
     "db_query_tools",
     "pin_query_tool",
     "sql_query_tool"
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    # 缓存到包的命名空间，之后的访问不再经过 __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,37 +1,222 @@
-import logging
-import subprocess
-from typing import Annotated
-from langchain_core.tools import tool
+import asyncio
+import codecs
+import os
+import signal
+import threading
+from typing import Any, Callable, ClassVar, Dict, Optional, Type
 
+from langchain.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from app.config.config_com import (
+    BASH_MAX_CONCURRENCY,
+    BASH_MAX_OUTPUT_BYTES,
+    BASH_OUTPUT_HEAD_BYTES,
+    BASH_OUTPUT_TAIL_BYTES,
+    BASH_TIMEOUT,
+)
+from app.multi_agents.graph.streaming import emit_progress
+from app.multi_agents.utils import get_logger
 
 # 初始化日志记录器
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__, level="debug")
+
+# 所有事件循环和线程共享的并发上限（同步调用各自运行事件循环，asyncio.Semaphore 无法跨循环使用）
+_command_slots = threading.BoundedSemaphore(BASH_MAX_CONCURRENCY)
+
+
+class OutputBuffer:
+    """只保留开头和结尾的命令输出，内存占用与输出总量无关"""
+
+    def __init__(self, head_bytes: int = BASH_OUTPUT_HEAD_BYTES, tail_bytes: int = BASH_OUTPUT_TAIL_BYTES):
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+
+    def write(self, data: bytes) -> None:
+        self.total += len(data)
+        room = self.head_bytes - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        self.tail += data
+        # 超过两倍再裁剪，避免每次写入都移动数据
+        if len(self.tail) > 2 * self.tail_bytes:
+            del self.tail[:len(self.tail) - self.tail_bytes]
+
+    @property
+    def truncated(self) -> bool:
+        return self.total > self.head_bytes + self.tail_bytes
+
+    def text(self) -> str:
+        """输出文本，中间被省略的部分用标记代替"""
+        tail = bytes(self.tail[-self.tail_bytes:]) if self.tail_bytes else b""
+        if not self.truncated:
+            return (bytes(self.head) + bytes(self.tail)).decode("utf-8", errors="replace")
+        omitted = self.total - len(self.head) - len(tail)
+        return (
+            bytes(self.head).decode("utf-8", errors="replace")
+            + f"\n...[省略 {omitted} 字节]...\n"
+            + tail.decode("utf-8", errors="replace")
+        )
 
 
-@tool
-def bash_tool(
-    cmd: Annotated[str, "要执行的bash命令。"],
-):
-    """使用此工具执行bash命令并进行必要的操作。"""
-    logger.info(f"Executing Bash Command: {cmd}")
+def _kill(process: asyncio.subprocess.Process) -> None:
+    """终止命令及其启动的子进程"""
+    if process.returncode is not None:
+        return
     try:
-        # 执行命令并捕获输出
-        result = subprocess.run(
-            cmd, shell=True, check=True, text=True, capture_output=True
+        if os.name == "nt":
+            process.kill()
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+async def _drain(process: asyncio.subprocess.Process) -> None:
+    while await process.stdout.read(65536):
+        pass
+    await process.wait()
+
+
+async def _acquire_slot(slots: threading.BoundedSemaphore) -> None:
+    # 轮询获取线程信号量，等待期间不阻塞事件循环，被取消时也不会占用名额
+    while not slots.acquire(blocking=False):
+        await asyncio.sleep(0.05)
+
+
+async def run_command(
+    cmd: str,
+    timeout: float = BASH_TIMEOUT,
+    max_output_bytes: int = BASH_MAX_OUTPUT_BYTES,
+    head_bytes: int = BASH_OUTPUT_HEAD_BYTES,
+    tail_bytes: int = BASH_OUTPUT_TAIL_BYTES,
+    on_output: Optional[Callable[[str], None]] = None,
+    slots: Optional[threading.BoundedSemaphore] = None,
+) -> Dict[str, Any]:
+    """异步执行shell命令，边执行边读取输出
+
+    Args:
+        cmd: 要执行的命令
+        timeout: 最长执行时间（秒），超时后终止命令
+        max_output_bytes: 输出总量上限，超出后终止命令
+        head_bytes: 结果中保留的输出开头字节数
+        tail_bytes: 结果中保留的输出结尾字节数
+        on_output: 每读到一段输出时调用，参数为解码后的文本
+        slots: 并发名额，默认使用全局的 BASH_MAX_CONCURRENCY 个名额
+
+    Returns:
+        {"exit_code": 退出码, "output": 输出（stdout 与 stderr 合并，可能被截断）,
+         "total_bytes": 输出总字节数, "truncated": 是否截断, "killed": None / "timeout" / "output_limit"}
+    """
+    slots = slots or _command_slots
+    await _acquire_slot(slots)
+    process = None
+    try:
+        process = await asyncio.create_subprocess_shell(
+            cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            # 独立的进程组，超时时连同命令启动的子进程一起终止
+            start_new_session=os.name != "nt",
         )
-        # 返回标准输出作为结果
-        return result.stdout
-    except subprocess.CalledProcessError as e:
-        # 如果命令失败，返回错误信息
-        error_message = f"Command failed with exit code {e.returncode}.\nStdout: {e.stdout}\nStderr: {e.stderr}"
-        logger.error(error_message)
-        return error_message
-    except Exception as e:
-        # 捕获任何其他异常
-        error_message = f"Error executing command: {str(e)}"
-        logger.error(error_message)
-        return error_message
+        buffer = OutputBuffer(head_bytes, tail_bytes)
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+        async def pump() -> Optional[str]:
+            while True:
+                chunk = await process.stdout.read(65536)
+                if not chunk:
+                    break
+                buffer.write(chunk)
+                if on_output is not None:
+                    text = decoder.decode(chunk)
+                    if text:
+                        on_output(text)
+                if buffer.total > max_output_bytes:
+                    return "output_limit"
+            await process.wait()
+            return None
+
+        try:
+            killed = await asyncio.wait_for(pump(), timeout)
+        except asyncio.TimeoutError:
+            killed = "timeout"
+        if killed:
+            logger.warning(f"命令被终止({killed}): {cmd}")
+            _kill(process)
+            # 进程退出且输出管道读到 EOF 后 wait 才会返回，丢弃管道中剩余的输出
+            await asyncio.wait_for(_drain(process), 5)
+        return {
+            "exit_code": process.returncode,
+            "output": buffer.text(),
+            "total_bytes": buffer.total,
+            "truncated": buffer.truncated,
+            "killed": killed,
+        }
+    finally:
+        if process is not None:
+            # 调用方取消等待时不留下仍在运行的命令
+            _kill(process)
+        slots.release()
+
+
+def format_command_result(result: Dict[str, Any], timeout: float = BASH_TIMEOUT, max_output_bytes: int = BASH_MAX_OUTPUT_BYTES) -> str:
+    """把 run_command 的结果转换为返回给智能体的文本"""
+    output = result["output"]
+    if result["killed"] == "timeout":
+        return f"Command timed out after {timeout}s and was killed.\nOutput: {output}"
+    if result["killed"] == "output_limit":
+        return f"Command produced more than {max_output_bytes} bytes of output and was killed.\nOutput: {output}"
+    if result["exit_code"] != 0:
+        return f"Command failed with exit code {result['exit_code']}.\nOutput: {output}"
+    return output
+
+
+class BashInput(BaseModel):
+    """bash_tool的输入。"""
+
+    cmd: str = Field(..., description="要执行的bash命令。")
+
+
+class BashTool(BaseTool):
+    name: ClassVar[str] = "bash_tool"
+    args_schema: Type[BaseModel] = BashInput
+    description: ClassVar[str] = "使用此工具执行bash命令并进行必要的操作。"
+
+    timeout: float = BASH_TIMEOUT
+    max_output_bytes: int = BASH_MAX_OUTPUT_BYTES
+
+    async def _execute(self, cmd: str) -> str:
+        logger.info(f"Executing Bash Command: {cmd}")
+        try:
+            result = await run_command(
+                cmd,
+                timeout=self.timeout,
+                max_output_bytes=self.max_output_bytes,
+                on_output=lambda text: emit_progress("bash", text),
+            )
+        except Exception as e:
+            # 捕获任何其他异常
+            error_message = f"Error executing command: {str(e)}"
+            logger.error(error_message)
+            return error_message
+        return format_command_result(result, self.timeout, self.max_output_bytes)
+
+    def _run(self, cmd: str) -> str:
+        """同步执行命令（在独立的事件循环中运行）"""
+        return asyncio.run(self._execute(cmd))
+
+    async def _arun(self, cmd: str) -> str:
+        """异步执行命令，多个命令可以在同一个事件循环中并发执行"""
+        return await self._execute(cmd)
+
+
+bash_tool = BashTool()
 
 
 if __name__ == "__main__":
-    print(bash_tool.invoke("dir"))
+    print(bash_tool.invoke("ls"))
@@ -0,0 +1,116 @@
+"""
+从Boss直聘聊天页面读取HR消息
+
+BossChatSource 在已登录的浏览器页面上读取聊天列表和单个会话的消息，供 sync_inbox 增量同步。
+sync_boss_inbox 连接租借到的浏览器（CDP地址），以轻量页面配置打开聊天页面并执行一轮同步。
+"""
+import hashlib
+from typing import Any, Dict, List
+
+from browser_use import Browser, BrowserConfig
+
+from app.config.config_com import (
+    BOSS_CHAT_ITEM_SELECTOR,
+    BOSS_CHAT_MESSAGE_SELECTOR,
+    BOSS_CHAT_URL,
+    BROWSER_HEADLESS,
+)
+from app.multi_agents.tools.resource_profile import ProfiledBrowserContext
+from app.multi_agents.utils.hr_inbox import (
+    SENDER_HR,
+    SENDER_ME,
+    SENDER_SYSTEM,
+    ChatMessage,
+    ConversationSummary,
+    InboxStore,
+    SyncStats,
+    sync_inbox,
+)
+
+# 读取聊天列表条目：会话ID、各行文本
+_READ_ITEMS_JS = (
+    "elements => elements.map(element => ({"
+    "id: element.dataset.id || element.getAttribute('key') || (element.querySelector('[data-id]') || {}).dataset?.id || '',"
+    "lines: element.innerText.split('\\n').map(line => line.trim()).filter(Boolean)}))"
+)
+
+# 读取会话中的消息：消息ID、发送方、文本、时间
+_READ_MESSAGES_JS = (
+    "elements => elements.map(element => ({"
+    "id: element.dataset.mid || element.dataset.id || '',"
+    "mine: element.classList.contains('item-myself'),"
+    "system: element.classList.contains('item-system'),"
+    "text: (element.querySelector('.text, .message-content') || element).innerText.trim(),"
+    "time: (element.querySelector('.time, .message-time') || {}).innerText || ''}))"
+)
+
+
+def parse_conversation(item: Dict[str, Any]) -> ConversationSummary:
+    """把聊天列表条目转换为 ConversationSummary
+
+    条目文本依次为: 时间、HR姓名、公司、HR职位/岗位、最后一条消息预览（各行可能缺失）
+    """
+    lines = [line for line in item.get("lines", []) if not line.isdigit()]
+    text = "\n".join(item.get("lines", []))
+    conversation_id = item.get("id") or hashlib.sha1("\n".join(lines[1:4]).encode("utf-8")).hexdigest()[:16]
+    fields = (lines[1:] + ["", "", ""])[:3]
+    return ConversationSummary(conversation_id, fields[0], fields[1], fields[2], text)
+
+
+def parse_messages(items: List[Dict[str, Any]]) -> List[ChatMessage]:
+    """把消息元素转换为 ChatMessage，没有消息ID时按发送方、时间、文本和出现次数生成"""
+    messages = []
+    seen: Dict[str, int] = {}
+    for item in items:
+        sender = SENDER_SYSTEM if item.get("system") else SENDER_ME if item.get("mine") else SENDER_HR
+        text = item.get("text", "")
+        message_id = item.get("id")
+        if not message_id:
+            key = f"{sender}|{item.get('time', '')}|{text}"
+            seen[key] = seen.get(key, 0) + 1
+            message_id = hashlib.sha1(f"{key}|{seen[key]}".encode("utf-8")).hexdigest()[:16]
+        messages.append(ChatMessage(str(message_id), sender, text, item.get("time", "")))
+    return messages
+
+
+class BossChatSource:
+    """浏览器中的Boss直聘聊天页面"""
+
+    def __init__(self, page):
+        """
+        Args:
+            page: 已打开聊天页面（BOSS_CHAT_URL）的 Playwright 页面
+        """
+        self.page = page
+        self._items: Dict[str, int] = {}
+
+    async def list_conversations(self) -> List[ConversationSummary]:
+        await self.page.wait_for_selector(BOSS_CHAT_ITEM_SELECTOR, timeout=15000)
+        items = await self.page.eval_on_selector_all(BOSS_CHAT_ITEM_SELECTOR, _READ_ITEMS_JS)
+        summaries = [parse_conversation(item) for item in items]
+        self._items = {summary.conversation_id: index for index, summary in enumerate(summaries)}
+        return summaries
+
+    async def read_messages(self, conversation_id: str) -> List[ChatMessage]:
+        """打开会话读取消息，消息区域加载超时时抛出异常，由 sync_inbox 留到下一轮重试"""
+        await self.page.locator(BOSS_CHAT_ITEM_SELECTOR).nth(self._items[conversation_id]).click()
+        await self.page.wait_for_selector(BOSS_CHAT_MESSAGE_SELECTOR, timeout=10000)
+        return parse_messages(await self.page.eval_on_selector_all(BOSS_CHAT_MESSAGE_SELECTOR, _READ_MESSAGES_JS))
+
+
+async def sync_boss_inbox(cdp_url: str, store: InboxStore) -> SyncStats:
+    """连接指定浏览器，打开聊天页面执行一轮增量同步
+
+    Args:
+        cdp_url: 租借到的浏览器CDP地址
+        store: 消息数据库
+    """
+    browser = Browser(config=BrowserConfig(headless=BROWSER_HEADLESS, cdp_url=cdp_url))
+    context = ProfiledBrowserContext(browser)
+    try:
+        page = await context.get_current_page()
+        await page.goto(BOSS_CHAT_URL)
+        return await sync_inbox(BossChatSource(page), store)
+    finally:
+        await context.close()
+        await browser.close()
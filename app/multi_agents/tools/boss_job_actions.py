@@ -0,0 +1,142 @@
+"""
+Boss直聘浏览器智能体的自定义动作
+
+search_job_listings 按规范化的搜索条件获取岗位列表，优先使用多个用户共享的搜索结果缓存，
+未命中时才打开搜索结果页并滚动加载，新读取的岗位同时暂存到岗位市场数据中。
+evaluate_job_listings 一次读取全部岗位卡片，交给 BatchJobEvaluator 批量评估，
+浏览器智能体不必再逐个卡片推理是否匹配，只需要打开推荐的岗位点击"立即沟通"。
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+from browser_use import Controller
+from browser_use.agent.views import ActionResult
+from browser_use.browser.context import BrowserContext
+
+from app.config.config_com import JOB_CARD_SELECTOR, JOB_MARKET_COLLECT, JOB_SEARCH_SCROLL_ROUNDS
+from app.multi_agents.utils.job_evaluator import BatchJobEvaluator, JobVerdict, get_job_evaluator
+from app.multi_agents.utils.job_market import JobMarketStore, get_job_market_store
+from app.multi_agents.utils.job_search_cache import JobQuery, JobSearchCache, get_job_search_cache, make_job_query
+from app.multi_agents.utils.logger import get_logger
+
+logger = get_logger(__name__, level="debug")
+
+# 读取岗位卡片文本和详情链接的脚本
+_READ_CARDS_JS = (
+    "elements => elements.map(element => ({"
+    "text: element.innerText, url: (element.querySelector('a[href]') || {}).href || ''}))"
+)
+
+
+def _title(text: str) -> str:
+    return text.strip().splitlines()[0] if text.strip() else ""
+
+
+def format_listings(listings: Sequence[Dict[str, Any]], cached: bool) -> str:
+    """把岗位列表整理成浏览器智能体使用的文本：每个岗位一行标题和链接"""
+    source = "来自缓存，无需再打开搜索页" if cached else "已从搜索结果页读取"
+    lines = [f"找到{len(listings)}个岗位（{source}），接下来使用 evaluate_job_listings 评估:"]
+    for index, listing in enumerate(listings):
+        lines.append(f"- 第{index + 1}个 {_title(listing['text'])} {listing.get('url', '')}".rstrip())
+    return "\n".join(lines)
+
+
+def format_verdicts(
+    cards: Sequence[str],
+    verdicts: Sequence[JobVerdict],
+    urls: Optional[Sequence[str]] = None,
+) -> str:
+    """把评估结论整理成浏览器智能体容易使用的文本：推荐的岗位按分数排列，其余只给出数量
+
+    Args:
+        cards: 岗位卡片文本
+        verdicts: 评估结论
+        urls: 岗位详情链接，与 cards 一一对应；提供时附在推荐岗位后面，智能体可以直接打开
+    """
+    matched = sorted((v for v in verdicts if v.match), key=lambda v: v.score, reverse=True)
+    lines: List[str] = [f"共评估{len(verdicts)}个岗位，推荐沟通{len(matched)}个（第N个指页面上从上到下的第N张岗位卡片）:"]
+    for verdict in matched:
+        url = f" {urls[verdict.index]}" if urls and urls[verdict.index] else ""
+        lines.append(f"- 第{verdict.index + 1}个 {_title(cards[verdict.index])}（{verdict.score}分）: {verdict.reason}{url}")
+    if len(matched) < len(verdicts):
+        lines.append(f"其余{len(verdicts) - len(matched)}个岗位不符合要求，无需查看")
+    return "\n".join(lines)
+
+
+async def _read_cards(page) -> List[Dict[str, Any]]:
+    cards = await page.eval_on_selector_all(JOB_CARD_SELECTOR, _READ_CARDS_JS)
+    return [card for card in cards if card.get("text", "").strip()]
+
+
+def _stage_market_listings(store: Optional[JobMarketStore], query: JobQuery, listings: Sequence[Dict[str, Any]]) -> None:
+    """暂存新读取的岗位，暂存失败不影响搜索"""
+    if store is None and not JOB_MARKET_COLLECT:
+        return
+    try:
+        (store or get_job_market_store()).stage(query, listings)
+    except Exception as e:
+        logger.warning(f"暂存岗位市场数据失败: {e}", agent_name="job_find")
+
+
+def build_boss_job_controller(
+    evaluator: Optional[BatchJobEvaluator] = None,
+    search_cache: Optional[JobSearchCache] = None,
+    market_store: Optional[JobMarketStore] = None,
+) -> Controller:
+    """创建注册了岗位搜索和批量评估动作的浏览器控制器
+
+    Args:
+        evaluator: 批量评估器，默认使用 get_job_evaluator()
+        search_cache: 岗位搜索结果缓存，默认使用 get_job_search_cache()
+        market_store: 岗位市场数据存储，默认在 JOB_MARKET_COLLECT 开启时使用 get_job_market_store()
+
+    Returns:
+        可传给 BrowserAgent 的 Controller
+    """
+    controller = Controller()
+    # 最近一次 search_job_listings 得到的岗位列表，缓存命中时页面上没有岗位卡片，评估时使用它
+    last_search: List[Dict[str, Any]] = []
+
+    @controller.action(
+        "按条件搜索Boss直聘岗位并返回岗位列表（含详情链接），相同的搜索会直接使用缓存的结果。"
+        "keyword 为岗位关键词，city 为城市（可为空），salary 为薪资要求（如'2万以上'，可为空），page 为页码。"
+        "搜索岗位时优先使用该动作，不要在搜索框中输入"
+    )
+    async def search_job_listings(browser: BrowserContext, keyword: str, city: str = "", salary: str = "", page: int = 1):
+        query = make_job_query(keyword, city, salary, page)
+        cache = search_cache or get_job_search_cache()
+        listings = cache.get(query)
+        cached = listings is not None
+        if not cached:
+            current = await browser.get_current_page()
+            await current.goto(query.url)
+            try:
+                await current.wait_for_selector(JOB_CARD_SELECTOR, timeout=15000)
+            except Exception:
+                return ActionResult(error=f"搜索结果页没有岗位卡片: {query.url}")
+            for _ in range(JOB_SEARCH_SCROLL_ROUNDS):
+                await current.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                await current.wait_for_timeout(800)
+            listings = await _read_cards(current)
+            if listings:
+                cache.put(query, listings)
+                _stage_market_listings(market_store, query, listings)
+        last_search[:] = listings
+        logger.info(f"岗位搜索 {query.key}: {len(listings)}个岗位，缓存{'命中' if cached else '未命中'}", agent_name="job_find")
+        return ActionResult(extracted_content=format_listings(listings, cached), include_in_memory=True)
+
+    @controller.action(
+        "一次性评估当前页面上（或最近一次 search_job_listings 返回的）全部岗位是否符合用户要求，返回推荐沟通的岗位、理由及链接。"
+        "requirements 填写用户的岗位要求（如薪资、岗位职责）。筛选岗位时优先使用该动作，不要逐个查看岗位"
+    )
+    async def evaluate_job_listings(requirements: str, browser: BrowserContext):
+        page = await browser.get_current_page()
+        listings = await _read_cards(page) or last_search
+        if not listings:
+            return ActionResult(error="当前页面没有找到岗位卡片，请先搜索岗位")
+        cards = [listing["text"] for listing in listings]
+        verdicts = await (evaluator or get_job_evaluator()).aevaluate(cards, requirements)
+        summary = format_verdicts(cards, verdicts, [listing.get("url", "") for listing in listings])
+        logger.info(summary, agent_name="job_find")
+        return ActionResult(extracted_content=summary, include_in_memory=True)
+
+    return controller
@@ -0,0 +1,135 @@
+"""
+岗位查找浏览器智能体的步数治理
+
+岗位查找提示词要求智能体在很多情况下"从第一步重新开始"，并且持续迭代直到筛选完所有岗位，
+运行中经常反复访问相同的页面，消耗大量 LLM 步数，同时一直占用浏览器和模型配额。
+StepGovernor 包裹 BrowserAgent 的运行：
+- 以页面状态指纹（URL + DOM 哈希 + 滚动位置）检测循环
+- 限制最大步数、最长运行时间和输入 token 总数
+- 触发任一限制时停止智能体，返回已完成步骤的部分结果
+"""
+import asyncio
+import hashlib
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Optional
+
+from app.config.config_com import (
+    BROWSER_LOOP_THRESHOLD,
+    BROWSER_LOOP_WINDOW,
+    BROWSER_MAX_SECONDS,
+    BROWSER_MAX_STEPS,
+    BROWSER_MAX_TOKENS,
+)
+from app.multi_agents.utils.logger import get_logger
+
+logger = get_logger(__name__, level="debug")
+
+# browser_use 的步骤回调: (浏览器状态, 模型输出, 步数) -> None
+StepCallback = Callable[[Any, Any, int], None]
+
+
+def page_fingerprint(browser_state: Any) -> str:
+    """计算页面状态指纹：URL、可交互元素树的哈希和滚动位置"""
+    element_tree = getattr(browser_state, "element_tree", None)
+    try:
+        dom = element_tree.clickable_elements_to_string() if element_tree is not None else ""
+    except Exception:
+        dom = repr(element_tree)
+    dom_hash = hashlib.sha1(dom.encode("utf-8", errors="replace")).hexdigest()[:16]
+    return f"{getattr(browser_state, 'url', '')}#{dom_hash}@{getattr(browser_state, 'pixels_above', 0)}"
+
+
+class StepGovernor:
+    """单个浏览器任务的步数、时长、token 预算和循环检测"""
+
+    def __init__(
+        self,
+        max_steps: int = BROWSER_MAX_STEPS,
+        max_seconds: float = BROWSER_MAX_SECONDS,
+        max_tokens: int = BROWSER_MAX_TOKENS,
+        loop_window: int = BROWSER_LOOP_WINDOW,
+        loop_threshold: int = BROWSER_LOOP_THRESHOLD,
+    ):
+        """
+        Args:
+            max_steps: 最大步数
+            max_seconds: 最长运行时间（秒）
+            max_tokens: 输入 token 总数上限
+            loop_window: 循环检测考察的最近步数
+            loop_threshold: 同一页面状态在窗口内出现多少次判定为循环
+        """
+        self.max_steps = max_steps
+        self.max_seconds = max_seconds
+        self.max_tokens = max_tokens
+        self.loop_threshold = loop_threshold
+        self._fingerprints: Deque[str] = deque(maxlen=loop_window)
+        self._started = time.monotonic()
+        self.stop_reason: Optional[str] = None
+
+    def observe(self, browser_state: Any) -> None:
+        """记录一步的页面状态，同一状态重复出现时标记为循环"""
+        fingerprint = page_fingerprint(browser_state)
+        self._fingerprints.append(fingerprint)
+        if self.stop_reason is None and self._fingerprints.count(fingerprint) >= self.loop_threshold:
+            self.stop_reason = (
+                f"检测到循环：最近{len(self._fingerprints)}步中有{self.loop_threshold}步停留在相同的页面状态"
+                f"（{getattr(browser_state, 'url', '')}）"
+            )
+
+    def check(self, steps: int, tokens: int) -> Optional[str]:
+        """检查预算，超出时返回并记录停止原因"""
+        if self.stop_reason is None:
+            elapsed = time.monotonic() - self._started
+            if steps >= self.max_steps:
+                self.stop_reason = f"达到最大步数{self.max_steps}"
+            elif elapsed >= self.max_seconds:
+                self.stop_reason = f"运行时间超过{self.max_seconds}秒"
+            elif tokens >= self.max_tokens:
+                self.stop_reason = f"输入token数{tokens}超过上限{self.max_tokens}"
+        return self.stop_reason
+
+    def wrap_step_callback(self, step_callback: Optional[StepCallback]) -> StepCallback:
+        """在 browser_use 的步骤回调之前记录页面状态
+
+        Args:
+            step_callback: 原有的步骤回调，可为 None
+
+        Returns:
+            可传给 BrowserAgent 的 register_new_step_callback
+        """
+        def _on_step(browser_state, agent_output, step: int) -> None:
+            self.observe(browser_state)
+            if step_callback is not None:
+                step_callback(browser_state, agent_output, step)
+
+        return _on_step
+
+    async def on_step_end(self, agent) -> None:
+        """每步结束后检查预算和循环，触发时停止智能体"""
+        history = agent.state.history
+        reason = self.check(agent.state.n_steps, history.total_input_tokens())
+        if reason and not agent.state.stopped:
+            logger.warning(f"浏览器任务提前结束: {reason}", agent_name="job_find")
+            agent.stop()
+
+    async def run(self, agent):
+        """在预算内运行智能体
+
+        Args:
+            agent: browser_use 的 Agent，创建时需传入 wrap_step_callback 返回的回调
+
+        Returns:
+            智能体的 AgentHistoryList，提前结束时只包含已完成的步骤
+        """
+        self._started = time.monotonic()
+        try:
+            return await asyncio.wait_for(
+                agent.run(max_steps=self.max_steps, on_step_end=self.on_step_end),
+                timeout=self.max_seconds,
+            )
+        except asyncio.TimeoutError:
+            # 单步（例如一次很慢的模型调用）超时的情况，钩子来不及检查
+            self.stop_reason = self.stop_reason or f"运行时间超过{self.max_seconds}秒"
+            logger.warning(f"浏览器任务提前结束: {self.stop_reason}", agent_name="job_find")
+            return agent.state.history
@@ -0,0 +1,299 @@
+"""
+岗位查找的多进程工作池
+
+浏览器自动化（DOM 序列化、截图编码等）占用大量 CPU 和内存，
+在同一个解释器里并发执行会互相阻塞。BossJobProcessPool 为每个浏览器CDP地址
+启动一个独立的工作进程，进程内独占该浏览器并运行 BossJobTool；
+协调方通过本地队列下发任务、接收进度和结果。
+任务队列（JobManager/BrowserPool）已经为任务租借了浏览器时，任务交给独占该CDP地址的工作进程；
+没有租借时按用户/线程ID做稳定分片，同一个会话总是落在同一个浏览器上，保持 Cookie 和登录状态。
+"""
+import atexit
+import hashlib
+import itertools
+import multiprocessing as mp
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.connection import wait as wait_connections
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.config.config_com import BROWSER_CDP_URLS
+from app.multi_agents.utils import get_logger
+
+logger = get_logger(__name__, level="debug")
+
+# 任务运行函数: (任务指令, CDP地址, 步骤回调) -> 结果文本
+Runner = Callable[[str, str, Callable[[Dict[str, Any]], None]], str]
+
+# run() 的进度队列中表示任务已结束的标记
+_DONE = object()
+
+
+def run_boss_job(task: str, cdp_url: str, step_callback: Callable[[Dict[str, Any]], None]) -> str:
+    """默认的任务运行函数：在工作进程内使用 BossJobTool 操作指定浏览器"""
+    from app.multi_agents.tools.boss_job_tool import boss_job_tool
+    return boss_job_tool._run(task, step_callback=step_callback, cdp_url=cdp_url)
+
+
+def _worker_main(shard: int, cdp_url: str, runner: Runner, tasks: "mp.Queue", results) -> None:
+    """工作进程入口：串行执行分配到本分片的任务
+
+    每个进程通过独占的管道回传消息，进程崩溃不会影响其他进程的结果通道。
+    消息格式为 (类型, 任务ID, 内容)，类型为 progress / result / error
+    """
+    send_lock = threading.Lock()
+
+    def send(message) -> None:
+        with send_lock:
+            results.send(message)
+
+    while True:
+        item = tasks.get()
+        if item is None:
+            return
+        task_id, task = item
+        try:
+            result = runner(task, cdp_url, lambda step: send(("progress", task_id, step)))
+            send(("result", task_id, result))
+        except Exception as e:
+            send(("error", task_id, f"{type(e).__name__}: {e}"))
+
+
+def _call_step_callback(step_callback: Callable[[Dict[str, Any]], None], step: Dict[str, Any]) -> None:
+    """调用进度回调，回调出错不影响任务"""
+    try:
+        step_callback(step)
+    except Exception as e:
+        logger.warning(f"进度回调出错: {e}", agent_name="job_find")
+
+
+def shard_for(key: str, num_shards: int) -> int:
+    """根据键计算稳定的分片序号（不受 PYTHONHASHSEED 影响，重启后仍然一致）"""
+    digest = hashlib.md5(str(key).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % num_shards
+
+
+class BossJobProcessPool:
+    """每个浏览器一个工作进程的岗位查找进程池"""
+
+    def __init__(
+        self,
+        cdp_urls: Sequence[str] = BROWSER_CDP_URLS,
+        runner: Runner = run_boss_job,
+        start_method: str = "spawn",
+    ):
+        """
+        Args:
+            cdp_urls: 浏览器CDP地址列表，每个地址启动一个工作进程
+            runner: 工作进程中执行任务的函数，必须是可被 pickle 的模块级函数
+            start_method: 进程启动方式，默认 spawn，避免继承父进程中的事件循环和浏览器连接
+        """
+        if not cdp_urls:
+            raise ValueError("进程池至少需要一个CDP地址")
+        self.cdp_urls = list(cdp_urls)
+        self.runner = runner
+        self._ctx = mp.get_context(start_method)
+        self._task_queues: List["mp.Queue"] = []
+        self._readers: List[Any] = []
+        self._processes: List[Any] = []
+        self._pending: Dict[int, Tuple[int, Future, Optional[Callable[[Dict[str, Any]], None]]]] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._collector: Optional[threading.Thread] = None
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        return len(self.cdp_urls)
+
+    def start(self) -> "BossJobProcessPool":
+        """启动全部工作进程和结果收集线程"""
+        with self._lock:
+            if self._processes:
+                return self
+            for shard in range(self.size):
+                self._task_queues.append(None)
+                self._readers.append(None)
+                self._processes.append(self._spawn(shard))
+            self._collector = threading.Thread(target=self._collect, name="boss-job-collector", daemon=True)
+            self._collector.start()
+        logger.info(f"岗位查找进程池已启动，进程数: {self.size}", agent_name="job_find")
+        return self
+
+    def _spawn(self, shard: int):
+        """为分片创建新的任务队列和结果管道并启动工作进程"""
+        reader, writer = self._ctx.Pipe(duplex=False)
+        self._task_queues[shard] = self._ctx.Queue()
+        self._readers[shard] = reader
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(shard, self.cdp_urls[shard], self.runner, self._task_queues[shard], writer),
+            name=f"boss-job-worker-{shard}",
+            daemon=True,
+        )
+        process.start()
+        # 父进程不再持有写端，工作进程退出后读端才能收到 EOF
+        writer.close()
+        return process
+
+    def shard_of(self, shard_key: str, cdp_url: Optional[str] = None) -> int:
+        """选择执行任务的工作进程：指定了CDP地址时使用独占该浏览器的进程，否则按分片键分片
+
+        Raises:
+            ValueError: 指定的CDP地址不属于任何工作进程
+        """
+        if cdp_url:
+            try:
+                return self.cdp_urls.index(cdp_url)
+            except ValueError:
+                raise ValueError(f"进程池中没有使用浏览器 {cdp_url} 的工作进程") from None
+        return shard_for(shard_key, self.size)
+
+    def submit(
+        self,
+        task: str,
+        shard_key: str,
+        step_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        cdp_url: Optional[str] = None,
+    ) -> Future:
+        """提交任务到租借的浏览器或 shard_key 对应的工作进程
+
+        Args:
+            task: 任务指令
+            shard_key: 分片键（用户ID或线程ID），没有指定 cdp_url 时相同的键总是由同一个进程和浏览器处理
+            step_callback: 在协调方进程的结果收集线程中接收浏览器步骤进度的回调
+            cdp_url: 任务队列为该任务租借的浏览器CDP地址，指定时由独占该浏览器的进程执行
+
+        Returns:
+            任务结果的 Future
+        """
+        if self._closed:
+            raise RuntimeError("进程池已关闭")
+        shard = self.shard_of(shard_key, cdp_url)
+        self.start()
+        future: Future = Future()
+        with self._lock:
+            task_id = next(self._ids)
+            self._pending[task_id] = (shard, future, step_callback)
+        self._task_queues[shard].put((task_id, task))
+        return future
+
+    def run(
+        self,
+        task: str,
+        shard_key: str,
+        step_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        timeout: Optional[float] = None,
+        cdp_url: Optional[str] = None,
+    ) -> str:
+        """同步执行任务并返回结果，参数含义同 submit
+
+        与 submit 不同，进度回调在调用 run 的线程中执行（而不是结果收集线程），
+        回调可以使用调用方线程的上下文，例如图节点中 LangGraph 的流写入器（emit_progress）。
+
+        Raises:
+            TimeoutError: 超过 timeout 秒任务仍未完成
+        """
+        if step_callback is None:
+            return self.submit(task, shard_key, cdp_url=cdp_url).result(timeout)
+        progress: "queue.Queue[Any]" = queue.Queue()
+        future = self.submit(task, shard_key, progress.put, cdp_url=cdp_url)
+        # 收集线程先分发进度再设置结果，结束标记一定排在全部进度之后
+        future.add_done_callback(lambda _: progress.put(_DONE))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                step = progress.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if step is _DONE:
+                break
+            _call_step_callback(step_callback, step)
+        return future.result(0)
+
+    def _collect(self) -> None:
+        """结果收集线程：分发进度和结果，并重启意外退出的工作进程"""
+        while not self._closed:
+            with self._lock:
+                readers = list(self._readers)
+            ready = wait_connections(readers, timeout=0.5)
+            if not ready:
+                self._check_workers()
+                continue
+            for reader in ready:
+                try:
+                    message = reader.recv()
+                except (EOFError, OSError):
+                    # 工作进程已退出，等待进程状态更新后重启
+                    self._check_workers(wait=True)
+                    continue
+                self._dispatch(*message)
+
+    def _dispatch(self, kind: str, task_id: int, payload: Any) -> None:
+        """把工作进程的消息分发给对应任务的回调或 Future"""
+        with self._lock:
+            entry = self._pending.get(task_id) if kind == "progress" else self._pending.pop(task_id, None)
+        if entry is None:
+            return
+        _, future, step_callback = entry
+        if kind == "progress":
+            if step_callback is not None:
+                _call_step_callback(step_callback, payload)
+        elif kind == "result":
+            future.set_result(payload)
+        else:
+            future.set_exception(RuntimeError(payload))
+
+    def _check_workers(self, wait: bool = False) -> None:
+        """重启已退出的工作进程，并把分配给它的未完成任务标记为失败
+
+        Args:
+            wait: 结果管道已关闭时为 True，短暂等待进程退出以确认状态
+        """
+        for shard, process in enumerate(self._processes):
+            if wait:
+                process.join(1.0)
+            if process.is_alive() or self._closed:
+                continue
+            logger.error(f"岗位查找进程 {shard} 异常退出(exitcode={process.exitcode})，正在重启", agent_name="job_find")
+            with self._lock:
+                lost = [task_id for task_id, (s, _, _) in self._pending.items() if s == shard]
+                futures = [self._pending.pop(task_id)[1] for task_id in lost]
+                # 旧队列中可能残留未执行的任务（它们已被标记失败），_spawn 会换用新的队列和管道
+                self._readers[shard].close()
+                self._processes[shard] = self._spawn(shard)
+            for future in futures:
+                future.set_exception(RuntimeError(f"岗位查找进程 {shard} 异常退出"))
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """停止全部工作进程，未完成的任务标记为失败"""
+        if self._closed:
+            return
+        self._closed = True
+        for task_queue in self._task_queues:
+            task_queue.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for _, future, _ in pending.values():
+            future.set_exception(RuntimeError("进程池已关闭"))
+
+
+_default_pool: Optional[BossJobProcessPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_boss_job_pool() -> BossJobProcessPool:
+    """获取默认的岗位查找进程池，首次调用时启动，进程退出时自动关闭"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = BossJobProcessPool().start()
+            atexit.register(_default_pool.shutdown)
+        return _default_pool
@@ -1,6 +1,7 @@
 import asyncio
+import functools
 from pydantic import BaseModel, Field
-from typing import ClassVar, Type, Optional, Any, List, Dict
+from typing import ClassVar, Type, Optional, Any, List, Dict, Callable
 from langchain.tools import BaseTool
 from langchain_core.messages import AIMessage
 
@@ -8,11 +9,24 @@ from browser_use import Browser, BrowserConfig, AgentHistoryList
 from browser_use import Agent as BrowserAgent
 from app.multi_agents.utils import LLMFactory, LLMProviderType
 from app.utils.log_util import create_logged_tool
-from app.config.config_com import CHROME_INSTANCE_PATH
+from app.config.config_com import (
+    CHROME_INSTANCE_PATH, BROWSER_CDP_URLS, BROWSER_DOM_DIFF, BROWSER_BLOCK_RESOURCES, BROWSER_HEADLESS,
+    BROWSER_USE_VISION, REPLAY_MODE,
+)
 from browser_use.agent.prompts import SystemPrompt
+from app.multi_agents.tools.boss_job_actions import build_boss_job_controller
+from app.multi_agents.tools.boss_job_governor import StepGovernor
+from app.multi_agents.tools.dom_snapshot import DomSnapshotter
+from app.multi_agents.tools.resource_profile import ProfiledBrowserContext
+from app.multi_agents.tools.screenshot_policy import OnDemandScreenshots, register_screenshot_action
 
-# 创建默认LLM实例
-default_llm = LLMFactory.create_llm(LLMProviderType.QIANWEN)
+@functools.lru_cache(maxsize=None)
+def get_default_llm():
+    """获取默认的千问LLM，首次使用时才创建
+
+    browser_use 根据模型类名选择工具调用方式，因此不使用录制/回放包装，工具整体的录制由 ReplayBossJobTool 负责
+    """
+    return LLMFactory.create_llm(LLMProviderType.QIANWEN, replay=False)
 
 
 class BossJobInput(BaseModel):
@@ -41,23 +55,47 @@ class BossJobTool(BaseTool):
             **kwargs: 其他BaseTool需要的参数
         """
         super().__init__(**kwargs)
-        self._llm = llm if llm is not None else default_llm
+        self._llm = llm
 
-    def _run(self, task: str ) -> str:
-        """同步运行Boss直聘任务"""
-        
-        # 创建浏览器实例
-        self._browser = Browser(config=BrowserConfig(
-            headless=False,
-            cdp_url="http://localhost:9999",
+    @property
+    def llm(self):
+        """浏览器代理使用的LLM，未指定时在首次使用时创建默认的千问LLM"""
+        if self._llm is None:
+            self._llm = get_default_llm()
+        return self._llm
+
+    def _run(
+        self,
+        task: str,
+        step_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        cdp_url: Optional[str] = None,
+    ) -> str:
+        """同步运行Boss直聘任务
+
+        Args:
+            task: 任务指令
+            step_callback: 可选的步骤回调，浏览器每完成一步都会收到一个进度字典
+            cdp_url: 要连接的浏览器CDP地址，默认使用 BROWSER_CDP_URLS 中的第一个
+        """
+        # 浏览器和代理使用局部变量，同一个工具实例可以被多个工作线程同时调用
+        browser = Browser(config=BrowserConfig(
+            headless=BROWSER_HEADLESS,
+            cdp_url=cdp_url or BROWSER_CDP_URLS[0],
         ))
-        
-        
-        self._agent = BrowserAgent(
+        browser_context = self._create_browser_context(browser)
+        # 每个任务独立的步数、时长和token预算，出现循环时提前结束
+        governor = StepGovernor()
+        agent = BrowserAgent(
             task=task,
-            llm=self._llm,
-            browser=self._browser,
+            llm=self.llm,
+            browser=browser,
+            browser_context=browser_context,
+            use_vision=BROWSER_USE_VISION,
+            controller=self._build_controller(),
+            register_new_step_callback=governor.wrap_step_callback(self._wrap_step_callback(step_callback)),
         )
+        self._attach_agent_hooks(agent)
+        self._browser, self._agent = browser, agent
         
         try:
             # 创建新的事件循环
@@ -65,40 +103,99 @@ class BossJobTool(BaseTool):
             asyncio.set_event_loop(loop)
             try:
                 # 运行协程并等待结果
-                result = loop.run_until_complete(self._agent.run())
+                result = loop.run_until_complete(governor.run(agent))
                 # 处理结果
                 if isinstance(result, AgentHistoryList):
                     # 构建结构化的返回结果
-                    formatted_result = self._format_result(result)
+                    formatted_result = self._format_result(result, governor.stop_reason)
                     return formatted_result
                 return str(result)
             finally:
                 # 确保关闭浏览器连接
-                if self._browser:
-                    loop.run_until_complete(self._browser.close())
+                if browser_context is not None:
+                    loop.run_until_complete(browser_context.close())
+                loop.run_until_complete(browser.close())
                 # 关闭事件循环
                 loop.close()
         except Exception as e:
             return f"执行Boss直聘任务时出错: {str(e)}"
 
-    def _format_result(self, result: AgentHistoryList) -> str:
+    @staticmethod
+    def _build_controller():
+        """岗位搜索、批量评估动作，关闭视觉时再加上按需截图动作"""
+        controller = build_boss_job_controller()
+        if not BROWSER_USE_VISION:
+            register_screenshot_action(controller)
+        return controller
+
+    @staticmethod
+    def _attach_agent_hooks(agent: BrowserAgent) -> None:
+        """挂载DOM差分和按需截图"""
+        if BROWSER_DOM_DIFF:
+            DomSnapshotter().attach(agent)
+        if not BROWSER_USE_VISION:
+            OnDemandScreenshots().attach(agent)
+
+    @staticmethod
+    def _create_browser_context(browser: Browser) -> Optional[ProfiledBrowserContext]:
+        """创建拦截图片、字体、视频和统计脚本的浏览器上下文，关闭资源拦截时返回None（由browser_use自行创建）"""
+        if not BROWSER_BLOCK_RESOURCES:
+            return None
+        return ProfiledBrowserContext(browser)
+
+    @staticmethod
+    def _wrap_step_callback(step_callback: Optional[Callable[[Dict[str, Any]], None]]):
+        """将browser_use的步骤回调转换为简单的进度字典回调
+
+        Args:
+            step_callback: 接收进度字典的回调函数
+
+        Returns:
+            可传给BrowserAgent的register_new_step_callback，未提供回调时返回None
+        """
+        if step_callback is None:
+            return None
+
+        def _on_step(browser_state, agent_output, step: int) -> None:
+            current_state = getattr(agent_output, "current_state", None)
+            actions = [
+                action.model_dump(exclude_unset=True)
+                for action in (getattr(agent_output, "action", None) or [])
+            ]
+            step_callback({
+                "step": step,
+                "url": getattr(browser_state, "url", None),
+                "title": getattr(browser_state, "title", None),
+                "next_goal": getattr(current_state, "next_goal", None),
+                "actions": actions,
+            })
+
+        return _on_step
+
+    def _format_result(self, result: AgentHistoryList, stop_reason: Optional[str] = None) -> str:
         """将浏览器代理的结果格式化为结构化输出
         
         Args:
             result: 浏览器代理执行的结果
+            stop_reason: 任务被 StepGovernor 提前结束的原因
             
         Returns:
             格式化后的结果字符串
         """
         # 提取操作步骤
         steps = []
+        final_result = None
         for action in result.all_results:
             if action.is_done:
                 # 最终结果
                 final_result = action.extracted_content
-            else:
+            elif action.extracted_content:
                 # 中间步骤
                 steps.append(action.extracted_content)
+        if final_result is None:
+            # 没有完成动作（提前结束或失败）时以已完成的步骤作为部分结果
+            reason = stop_reason or "未完成任务"
+            final_result = f"任务提前结束（{reason}），以上为已完成的部分结果"
         
         # 构建结构化输出
         output = f"""
@@ -112,40 +209,60 @@ class BossJobTool(BaseTool):
 """
         return output
 
-    async def _arun(self, instruction: str) -> str:
+    async def _arun(
+        self,
+        instruction: str,
+        step_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        cdp_url: Optional[str] = None,
+    ) -> str:
         """异步运行Boss直聘任务"""
         # 创建浏览器实例
-        self._browser = Browser(config=BrowserConfig(
-            headless=False,
-            cdp_url="http://localhost:9999"
+        browser = Browser(config=BrowserConfig(
+            headless=BROWSER_HEADLESS,
+            cdp_url=cdp_url or BROWSER_CDP_URLS[0],
         ))
+        self._browser = browser
+        browser_context = self._create_browser_context(browser)
         
         try:
-            self._agent = BrowserAgent(
+            governor = StepGovernor()
+            agent = BrowserAgent(
                 task=instruction,
-                llm=self._llm,
-                browser=self._browser,
-                system_prompt_class=SystemPrompt()
+                llm=self.llm,
+                browser=browser,
+                browser_context=browser_context,
+                system_prompt_class=SystemPrompt(),
+                use_vision=BROWSER_USE_VISION,
+                controller=self._build_controller(),
+                register_new_step_callback=governor.wrap_step_callback(self._wrap_step_callback(step_callback)),
             )
+            self._attach_agent_hooks(agent)
+            self._agent = agent
             # 运行任务
-            result = await self._agent.run()
+            result = await governor.run(agent)
             # 处理结果
             if isinstance(result, AgentHistoryList):
                 # 构建结构化的返回结果
-                formatted_result = self._format_result(result)
+                formatted_result = self._format_result(result, governor.stop_reason)
                 return formatted_result
             return str(result)
         except Exception as e:
             return f"执行Boss直聘任务时出错: {str(e)}"
         finally:
             # 确保浏览器被关闭
-            if self._browser:
-                await self._browser.close()
+            if browser_context is not None:
+                await browser_context.close()
+            await browser.close()
+            if self._browser is browser:
                 self._browser = None
 
 # 创建默认工具实例
 BossJobTool = create_logged_tool(BossJobTool)
 boss_job_tool = BossJobTool()
+if REPLAY_MODE in ("record", "replay"):
+    # 录制/回放模式：回放时不连接浏览器，直接返回录制的结果和步骤进度
+    from app.multi_agents.utils.replay import ReplayBossJobTool
+    boss_job_tool = ReplayBossJobTool(boss_job_tool, mode=REPLAY_MODE)
 
 
 def create_boss_job_tool(llm=None):
@@ -1,13 +1,16 @@
 import asyncio
+import functools
 
 from pydantic import BaseModel, Field
 from typing import Optional, ClassVar, Type
 from langchain.tools import BaseTool
-from browser_use import AgentHistoryList, Browser, BrowserConfig
+from browser_use import AgentHistoryList, Browser, BrowserConfig, Controller
 from browser_use import Agent as BrowserAgent
 from app.multi_agents.utils import LLMFactory, LLMProviderType
 from app.utils.log_util import create_logged_tool
-from app.config.config_com import CHROME_INSTANCE_PATH
+from app.config.config_com import BROWSER_DOM_DIFF, BROWSER_HEADLESS, BROWSER_USE_VISION, CHROME_INSTANCE_PATH
+from app.multi_agents.tools.dom_snapshot import DomSnapshotter
+from app.multi_agents.tools.screenshot_policy import OnDemandScreenshots, register_screenshot_action
 
 expected_browser = None
 # 如果指定了Chrome实例则使用， 可以指定为本地的chrome浏览器， 也可以指定为远程的浏览器
@@ -16,7 +19,10 @@ expected_browser = None
 #        config=BrowserConfig(chrome_instance_path=CHROME_INSTANCE_PATH)
  #   )
 
-vl_llm = LLMFactory.create_llm(LLMProviderType.QIANWEN,    temperature=0)
+@functools.lru_cache(maxsize=None)
+def get_vl_llm():
+    """获取浏览器代理使用的千问LLM，首次使用时才创建（browser_use 依赖模型类名，不使用录制/回放包装）"""
+    return LLMFactory.create_llm(LLMProviderType.QIANWEN, replay=False, temperature=0)
 
 
 
@@ -35,13 +41,31 @@ class BrowserTool(BaseTool):
 
     _agent: Optional[BrowserAgent] = None
 
-    def _run(self, instruction: str) -> str:
-        """同步运行浏览器任务。"""
-        self._agent = BrowserAgent(
+    @staticmethod
+    def _create_agent(instruction: str) -> BrowserAgent:
+        """创建浏览器代理：默认无头运行、只发送页面文本，需要时才截图"""
+        controller = Controller()
+        if not BROWSER_USE_VISION:
+            register_screenshot_action(controller)
+        agent = BrowserAgent(
             task=instruction,  # 将根据每个请求设置
-            llm=vl_llm,
-            browser=expected_browser,
+            llm=get_vl_llm(),
+            # 未指定Chrome实例时由代理创建并在结束时关闭浏览器
+            browser=expected_browser or Browser(config=BrowserConfig(headless=BROWSER_HEADLESS)),
+            use_vision=BROWSER_USE_VISION,
+            controller=controller,
         )
+        # 代理只关闭自己创建的浏览器，这里创建的浏览器也交给它关闭
+        agent.injected_browser = expected_browser is not None
+        if BROWSER_DOM_DIFF:
+            DomSnapshotter().attach(agent)
+        if not BROWSER_USE_VISION:
+            OnDemandScreenshots().attach(agent)
+        return agent
+
+    def _run(self, instruction: str) -> str:
+        """同步运行浏览器任务。"""
+        self._agent = self._create_agent(instruction)
         try:
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
@@ -59,9 +83,7 @@ class BrowserTool(BaseTool):
 
     async def _arun(self, instruction: str) -> str:
         """异步运行浏览器任务。"""
-        self._agent = BrowserAgent(
-            task=instruction, llm=vl_llm  # 将根据每个请求设置
-        )
+        self._agent = self._create_agent(instruction)
         try:
             result = await self._agent.run()
             return (
@@ -1,5 +1,6 @@
+import functools
 import sqlite3
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Type
 from pydantic import BaseModel, Field
 from langchain.tools import BaseTool
 from app.utils import create_logged_tool, log_func
@@ -122,13 +123,13 @@ class DBQueryTool:
 # 创建LangChain工具
 class PinQueryTool(BaseTool):
     """查询电路引脚表的工具"""
-    name = "query_pin_table"
-    description = "查询电路引脚表，需要提供元件ID和可选的引脚名称"
-    args_schema = PinQueryInput
+    name: str = "query_pin_table"
+    description: str = "查询电路引脚表，需要提供元件ID和可选的引脚名称"
+    args_schema: Type[BaseModel] = PinQueryInput
+    db_tool: Any = None
     
     def __init__(self, db_tool: DBQueryTool = None):
-        super().__init__()
-        self.db_tool = db_tool or DBQueryTool()
+        super().__init__(db_tool=db_tool or DBQueryTool())
     
     def _run(self, component_id: str, pin_name: Optional[str] = None) -> Dict[str, Any]:
         return self.db_tool.query_pin_table({"component_id": component_id, "pin_name": pin_name})
@@ -136,27 +137,46 @@ class PinQueryTool(BaseTool):
 
 class SQLQueryTool(BaseTool):
     """执行SQL查询的工具"""
-    name = "execute_sql"
-    description = "直接执行SQL查询语句，可以查询任何表"
-    args_schema = SQLQueryInput
+    name: str = "execute_sql"
+    description: str = "直接执行SQL查询语句，可以查询任何表"
+    args_schema: Type[BaseModel] = SQLQueryInput
+    db_tool: Any = None
     
     def __init__(self, db_tool: DBQueryTool = None):
-        super().__init__()
-        self.db_tool = db_tool or DBQueryTool()
+        super().__init__(db_tool=db_tool or DBQueryTool())
     
     def _run(self, sql: str, params: Optional[List[Any]] = None) -> Dict[str, Any]:
         return self.db_tool.execute_sql({"sql": sql, "params": params})
 
 
-# 创建共享数据库连接
-db_connection = DBConnection()
+@functools.lru_cache(maxsize=None)
+def get_db_query_tools() -> List[BaseTool]:
+    """创建共享数据库连接和工具实例，首次使用时才构造
 
-# 创建共享数据库工具
-db_tool = DBQueryTool(db_connection)
+    Returns:
+        数据库查询工具列表 [pin_query_tool, sql_query_tool]
+    """
+    # 创建共享数据库连接
+    db_connection = DBConnection()
 
-# 创建工具实例
-pin_query_tool = create_logged_tool(PinQueryTool)(db_tool=db_tool)
-sql_query_tool = create_logged_tool(SQLQueryTool)(db_tool=db_tool)
+    # 创建共享数据库工具
+    db_tool = DBQueryTool(db_connection)
 
-# 数据库查询工具列表
-db_query_tools = [pin_query_tool, sql_query_tool] 
\ No newline at end of file
+    # 创建工具实例
+    pin_query_tool = create_logged_tool(PinQueryTool)(db_tool=db_tool)
+    sql_query_tool = create_logged_tool(SQLQueryTool)(db_tool=db_tool)
+    return [pin_query_tool, sql_query_tool]
+
+
+# 工具实例按需创建，保持原有的模块属性访问方式
+_LAZY_TOOLS = {
+    "db_query_tools": lambda: get_db_query_tools(),
+    "pin_query_tool": lambda: get_db_query_tools()[0],
+    "sql_query_tool": lambda: get_db_query_tools()[1],
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_TOOLS:
+        return _LAZY_TOOLS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
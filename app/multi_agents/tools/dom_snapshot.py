@@ -0,0 +1,206 @@
+"""
+浏览器智能体的 DOM 快照差分
+
+browser_use 每一步都把当前页面的全部可交互元素序列化后发送给模型，而且元素编号按本次提取的顺序分配，
+长岗位列表页滚动时每一步都有几千 token 几乎不变的内容，同一个元素的编号还会变化。
+DomSnapshotter 挂载到 BrowserAgent 上之后：
+- 按元素的位置（标签 + XPath）分配会话内固定的短编号，点击等动作直接使用该编号
+- 新增或内容变化的元素以"页面元素"消息写入对话记忆，之后的步骤不再重复发送
+- 每一步的状态消息只列出当前视口内的元素编号
+进入新页面时从对话记忆中删除上一个页面的"页面元素"消息，再发送新页面的全部元素。
+"""
+import dataclasses
+import functools
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import HumanMessage
+
+from app.multi_agents.utils.context_manager import estimate_tokens
+from app.multi_agents.utils.logger import get_logger
+
+logger = get_logger(__name__, level="debug")
+
+# 元素文本在快照中保留的最大字符数
+_MAX_TEXT_CHARS = 120
+
+# "页面元素"消息在 browser_use 消息历史中的类型标记，离开页面时按它删除
+PAGE_ELEMENTS_TYPE = "page_elements"
+
+
+def _ranges(ids: List[int]) -> str:
+    """把编号列表压缩为区间表示，例如 [1, 2, 3, 7] -> "1-3, 7" """
+    parts = []
+    start = prev = None
+    for i in sorted(ids):
+        if prev is not None and i == prev + 1:
+            prev = i
+            continue
+        if start is not None:
+            parts.append(f"{start}-{prev}" if prev != start else str(start))
+        start = prev = i
+    if start is not None:
+        parts.append(f"{start}-{prev}" if prev != start else str(start))
+    return ", ".join(parts)
+
+
+class _CompactTree:
+    """替代 BrowserState.element_tree 的对象，只用于生成状态消息"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def clickable_elements_to_string(self, include_attributes: Optional[List[str]] = None) -> str:
+        return self.text
+
+
+class DomSnapshotter:
+    """为单个浏览器智能体维护固定元素编号和已发送的页面元素"""
+
+    def __init__(self):
+        self._ids: Dict[Tuple[str, str], int] = {}
+        self._next_id = 1
+        self._page_url: Optional[str] = None
+        # 本页面已经写入对话记忆的元素描述
+        self._known: Dict[int, str] = {}
+        # 本页面仍在对话记忆中的"页面元素"消息的 token 数，之后每次调用模型都会随历史一起发送
+        self._page_tokens = 0
+        # 累计：每一步完整元素列表的 token 数 / 每一步实际发送的元素相关 token 数
+        self.full_tokens = 0
+        self.sent_tokens = 0
+
+    def stable_id(self, node: Any) -> int:
+        """按标签和 XPath 分配会话内固定的编号"""
+        key = (node.tag_name, node.xpath)
+        if key not in self._ids:
+            self._ids[key] = self._next_id
+            self._next_id += 1
+        return self._ids[key]
+
+    def remap(self, state: Any) -> Any:
+        """把 browser_use 按提取顺序分配的元素编号替换为固定编号（原地修改，动作执行时按新编号查找元素）"""
+        remapped = {}
+        for node in state.selector_map.values():
+            node.highlight_index = self.stable_id(node)
+            remapped[node.highlight_index] = node
+        state.selector_map.clear()
+        state.selector_map.update(remapped)
+        return state
+
+    @staticmethod
+    def describe(node: Any, include_attributes: List[str]) -> str:
+        """单个元素的描述，格式与 browser_use 的元素列表一致"""
+        text = node.get_all_text_till_next_clickable_element().strip().replace("\n", " ")[:_MAX_TEXT_CHARS]
+        attributes = " ".join(
+            f"{key}='{value}'" for key, value in node.attributes.items()
+            if key in include_attributes and str(value).strip() and str(value).strip() != text
+        )
+        line = f"[{node.highlight_index}]<{node.tag_name}"
+        if attributes:
+            line += f" {attributes}"
+        return f"{line}>{text}</{node.tag_name}>" if text else f"{line} />"
+
+    def diff(self, state: Any, include_attributes: List[str]) -> Tuple[Optional[str], str]:
+        """计算本步需要写入记忆的元素变化和状态消息中的元素部分
+
+        Returns:
+            (页面元素消息，没有变化时为 None；状态消息中替代完整元素列表的文本)
+        """
+        current = {index: self.describe(node, include_attributes) for index, node in state.selector_map.items()}
+        new_page = state.url != self._page_url
+        if new_page:
+            self._page_url = state.url
+            self._known = {}
+            self._page_tokens = 0
+        changed = [index for index, line in current.items() if self._known.get(index) != line]
+        self._known.update({index: current[index] for index in changed})
+
+        memory = None
+        if changed:
+            header = f"页面元素（{state.url}）:" if new_page else f"页面元素更新（{state.url}，新增或变化{len(changed)}个）:"
+            memory = "\n".join([header, *(current[index] for index in sorted(changed))])
+            self._page_tokens += estimate_tokens(memory)
+        if not current:
+            return memory, ""
+        elements = (
+            f"当前视口中的元素编号: {_ranges(list(current))}\n"
+            "（元素内容见对话中的'页面元素'消息，编号在整个任务中保持不变；未列出的元素不在视口内，需要滚动）"
+        )
+        full = state.element_tree.clickable_elements_to_string(include_attributes=include_attributes)
+        self.full_tokens += estimate_tokens(full)
+        # 本页面之前的"页面元素"消息仍在历史中，每一步都会重新发送
+        self.sent_tokens += estimate_tokens(elements) + self._page_tokens
+        return memory, elements
+
+    @staticmethod
+    def drop_page_elements(message_manager: Any) -> int:
+        """从 browser_use 的消息历史中删除之前页面的"页面元素"消息
+
+        Returns:
+            删除的消息数
+        """
+        history = message_manager.state.history
+        kept = []
+        for managed in history.messages:
+            if managed.metadata.message_type == PAGE_ELEMENTS_TYPE:
+                history.current_tokens -= managed.metadata.tokens
+            else:
+                kept.append(managed)
+        removed = len(history.messages) - len(kept)
+        history.messages[:] = kept
+        return removed
+
+    def add_state_message(self, message_manager: Any, state: Any, result=None, step_info=None, use_vision=True) -> None:
+        """替代 MessageManager.add_state_message：元素变化写入记忆，状态消息只包含元素编号"""
+        from browser_use.agent.prompts import AgentMessagePrompt
+
+        # 与 browser_use 相同：需要记忆的动作结果直接写入历史
+        if result:
+            for r in result:
+                if r.include_in_memory:
+                    if r.extracted_content:
+                        message_manager._add_message_with_tokens(HumanMessage(content="Action result: " + str(r.extracted_content)))
+                    if r.error:
+                        last_line = r.error.rstrip("\n").split("\n")[-1]
+                        message_manager._add_message_with_tokens(HumanMessage(content="Action error: " + last_line))
+                    result = None
+
+        include_attributes = message_manager.settings.include_attributes
+        if state.url != self._page_url and self._page_url is not None:
+            # 离开页面后上一个页面的元素已经没用，不再随之后的每次调用发送
+            removed = self.drop_page_elements(message_manager)
+            logger.debug(f"DOM快照: 进入新页面，删除{removed}条旧页面元素消息", agent_name="browser")
+        memory, elements = self.diff(state, include_attributes)
+        if memory:
+            message_manager._add_message_with_tokens(HumanMessage(content=memory), message_type=PAGE_ELEMENTS_TYPE)
+        compact_state = dataclasses.replace(state, element_tree=_CompactTree(elements))
+        message = AgentMessagePrompt(
+            compact_state, result, include_attributes=include_attributes, step_info=step_info,
+        ).get_user_message(use_vision)
+        message_manager._add_message_with_tokens(message)
+        logger.debug(
+            f"DOM快照: 累计完整元素列表约{self.full_tokens} tokens，实际发送约{self.sent_tokens} tokens",
+            agent_name="browser",
+        )
+
+    def attach(self, agent: Any) -> Any:
+        """挂载到 browser_use 的 Agent 上
+
+        页面状态在浏览器上下文中获取后立即改用固定编号，动作执行和状态消息使用同一套编号。
+
+        Args:
+            agent: browser_use 的 Agent
+
+        Returns:
+            传入的 agent
+        """
+        context = agent.browser_context
+        get_state = context.get_state
+
+        @functools.wraps(get_state)
+        async def _get_state(*args, **kwargs):
+            return self.remap(await get_state(*args, **kwargs))
+
+        context.get_state = _get_state
+        message_manager = agent._message_manager
+        message_manager.add_state_message = functools.partial(self.add_state_message, message_manager)
+        return agent
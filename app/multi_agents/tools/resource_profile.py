@@ -0,0 +1,128 @@
+"""
+自动化浏览的轻量页面配置
+
+Boss直聘页面会加载大量图片、字体、视频和统计脚本，浏览器智能体只读取页面结构和文本，用不到这些资源。
+ResourceProfile 在浏览器上下文中注册请求拦截：按资源类型和域名拦截不需要的请求，
+子资源只允许来自岗位页面需要的域名，从而缩短页面加载时间、减少流量和浏览器内存占用。
+ProfiledBrowserContext 在 browser_use 创建 Playwright 上下文时应用该配置。
+"""
+from collections import Counter
+from typing import Iterable, Optional, Sequence
+from urllib.parse import urlparse
+
+from browser_use.browser.context import BrowserContext, BrowserContextConfig
+
+from app.config.config_com import (
+    BROWSER_ALLOWED_DOMAINS,
+    BROWSER_BLOCKED_DOMAINS,
+    BROWSER_BLOCKED_RESOURCE_TYPES,
+    BROWSER_EXEMPT_DOMAINS,
+)
+from app.multi_agents.utils.logger import get_logger
+
+logger = get_logger(__name__, level="debug")
+
+# 不经过网络的地址，始终放行
+_LOCAL_SCHEMES = ("data", "blob", "about", "chrome", "chrome-extension")
+
+
+def domain_matches(host: str, domains: Iterable[str]) -> bool:
+    """host 是否为 domains 中某个域名或其子域名"""
+    host = (host or "").lower()
+    return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+
+class ResourceProfile:
+    """按资源类型和域名决定是否放行请求"""
+
+    def __init__(
+        self,
+        blocked_types: Sequence[str] = BROWSER_BLOCKED_RESOURCE_TYPES,
+        blocked_domains: Sequence[str] = BROWSER_BLOCKED_DOMAINS,
+        allowed_domains: Sequence[str] = BROWSER_ALLOWED_DOMAINS,
+        exempt_domains: Sequence[str] = BROWSER_EXEMPT_DOMAINS,
+    ):
+        """
+        Args:
+            blocked_types: 拦截的资源类型，如 image、media、font
+            blocked_domains: 拦截的域名（统计、广告）
+            allowed_domains: 允许加载子资源的域名，为空表示不限制
+            exempt_domains: 不做任何拦截的域名
+        """
+        self.blocked_types = set(blocked_types)
+        self.blocked_domains = list(blocked_domains)
+        self.allowed_domains = list(allowed_domains)
+        self.exempt_domains = list(exempt_domains)
+        self.blocked: Counter = Counter()
+        self.allowed = 0
+
+    def allows(self, url: str, resource_type: str) -> bool:
+        """判断请求是否放行
+
+        Args:
+            url: 请求地址
+            resource_type: Playwright 的资源类型（document、script、image 等）
+        """
+        parsed = urlparse(url)
+        if parsed.scheme in _LOCAL_SCHEMES:
+            return True
+        host = parsed.hostname or ""
+        if domain_matches(host, self.exempt_domains):
+            return True
+        if domain_matches(host, self.blocked_domains):
+            return False
+        if resource_type in self.blocked_types:
+            return False
+        # 页面跳转不受白名单限制，只限制页面加载的子资源
+        if resource_type != "document" and self.allowed_domains and not domain_matches(host, self.allowed_domains):
+            return False
+        return True
+
+    async def handle(self, route) -> None:
+        """Playwright 路由处理函数"""
+        request = route.request
+        if self.allows(request.url, request.resource_type):
+            self.allowed += 1
+            await route.continue_()
+        else:
+            self.blocked[request.resource_type] += 1
+            await route.abort("blockedbyclient")
+
+    async def apply(self, context) -> None:
+        """在 Playwright 浏览器上下文中注册请求拦截"""
+        await context.route("**/*", self.handle)
+
+    async def remove(self, context) -> None:
+        """取消请求拦截（通过CDP复用的浏览器上下文会在之后的任务中继续使用）"""
+        try:
+            await context.unroute("**/*", self.handle)
+        except Exception as e:
+            logger.debug(f"取消请求拦截失败: {e}", agent_name="job_find")
+
+
+class ProfiledBrowserContext(BrowserContext):
+    """创建 Playwright 上下文时应用 ResourceProfile 的 browser_use 浏览器上下文
+
+    传给 BrowserAgent(browser_context=...) 时由调用方负责关闭。
+    """
+
+    def __init__(self, browser, config: Optional[BrowserContextConfig] = None, profile: Optional[ResourceProfile] = None):
+        super().__init__(browser=browser, config=config)
+        self.profile = profile or ResourceProfile()
+        self._routed_context = None
+
+    async def _create_context(self, browser):
+        context = await super()._create_context(browser)
+        await self.profile.apply(context)
+        self._routed_context = context
+        return context
+
+    async def close(self):
+        if self._routed_context is not None:
+            await self.profile.remove(self._routed_context)
+            self._routed_context = None
+            logger.debug(
+                f"请求拦截统计: 放行{self.profile.allowed}个，拦截{dict(self.profile.blocked)}",
+                agent_name="job_find",
+            )
+        await super().close()
@@ -0,0 +1,310 @@
+"""
+python_repl 的沙箱进程池
+
+代码不在智能体进程中执行，而是交给预先启动的工作进程：工作进程启动时已导入 numpy/pandas，
+通过管道接收代码、返回输出。每次执行都有超时和内存上限，工作进程执行一定次数后回收替换。
+多个 coder 步骤可以同时在不同的工作进程中执行，不会阻塞智能体进程。
+
+同一个会话（线程ID）的代码固定交给同一个工作进程，在该会话自己的命名空间中执行，
+之前定义的变量在后续调用中仍然可用（先加载数据、再画图）；工作进程被回收或超时终止后命名空间重置。
+
+Linux/macOS 上使用 forkserver 启动方式：forkserver 进程预先导入常用库，
+新的工作进程从它 fork 出来，替换被回收或超时终止的进程几乎没有开销。
+"""
+import atexit
+import contextlib
+import importlib
+import io
+import multiprocessing as mp
+import threading
+import traceback
+from typing import Any, Dict, List, Optional, Set
+
+from app.config.config_com import (
+    SANDBOX_MAX_EXECUTIONS,
+    SANDBOX_MEMORY_MB,
+    SANDBOX_POOL_SIZE,
+    SANDBOX_PRELOAD_MODULES,
+    SANDBOX_TIMEOUT,
+)
+from app.multi_agents.utils import get_logger
+
+logger = get_logger(__name__, level="debug")
+
+
+def _default_start_method() -> str:
+    return "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+
+
+def _limit_memory(memory_mb: Optional[int]) -> None:
+    """限制当前进程的地址空间，超出时代码中的分配会抛出 MemoryError"""
+    if not memory_mb:
+        return
+    try:
+        import resource
+    except ImportError:
+        # Windows 没有 resource 模块，不限制内存
+        return
+    limit = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _preload_namespace(preload: Dict[str, str]) -> Dict[str, Any]:
+    """导入预加载模块，返回代码执行时的基础命名空间"""
+    namespace: Dict[str, Any] = {}
+    for module_name, alias in preload.items():
+        try:
+            namespace[alias] = importlib.import_module(module_name)
+        except ImportError:
+            pass
+    return namespace
+
+
+def execute_code(code: str, scope: Dict[str, Any]) -> Dict[str, Any]:
+    """在命名空间中执行代码，代码定义的变量保留在 scope 中
+
+    Args:
+        code: Python 代码
+        scope: 执行代码的命名空间
+
+    Returns:
+        {"stdout": 标准输出, "error": 异常信息，成功时为 None}
+    """
+    stdout = io.StringIO()
+    error = None
+    try:
+        with contextlib.redirect_stdout(stdout):
+            exec(compile(code, "<sandbox>", "exec"), scope)
+    except MemoryError:
+        error = "MemoryError: 超出沙箱内存上限"
+    except BaseException:
+        error = traceback.format_exc(limit=-3)
+    return {"stdout": stdout.getvalue(), "error": error}
+
+
+def _worker_main(conn, preload: Dict[str, str], memory_mb: Optional[int]) -> None:
+    """工作进程入口：逐条接收 (会话, 代码) 并返回执行结果，收到 None 或管道关闭时退出
+
+    每个会话使用自己的命名空间（基础命名空间的副本），先后执行的代码共享变量；
+    会话为 None 时每次执行使用新的副本。
+    """
+    namespace = _preload_namespace(preload)
+    _limit_memory(memory_mb)
+    sessions: Dict[str, Dict[str, Any]] = {}
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+        if message is None:
+            return
+        session, code = message
+        scope = sessions.get(session) if session is not None else None
+        if scope is None:
+            scope = dict(namespace, __name__="__main__")
+            if session is not None:
+                sessions[session] = scope
+        conn.send(execute_code(code, scope))
+
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.executions = 0
+        self.busy = False
+
+    def stop(self, timeout: float = 1.0) -> None:
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class SandboxPool:
+    """预热的 Python 沙箱工作进程池"""
+
+    def __init__(
+        self,
+        size: int = SANDBOX_POOL_SIZE,
+        preload: Optional[Dict[str, str]] = None,
+        timeout: float = SANDBOX_TIMEOUT,
+        memory_mb: Optional[int] = SANDBOX_MEMORY_MB,
+        max_executions: int = SANDBOX_MAX_EXECUTIONS,
+        start_method: Optional[str] = None,
+    ):
+        """
+        Args:
+            size: 工作进程数，即可同时执行的代码数
+            preload: 预导入的模块 {模块名: 别名}，默认 SANDBOX_PRELOAD_MODULES
+            timeout: 默认的单次执行超时（秒）
+            memory_mb: 每个工作进程的内存上限（MB），None 表示不限制
+            max_executions: 工作进程执行多少次后回收
+            start_method: 进程启动方式，默认优先使用 forkserver
+        """
+        if size < 1:
+            raise ValueError("沙箱进程池至少需要一个工作进程")
+        self.size = size
+        self.preload = dict(SANDBOX_PRELOAD_MODULES if preload is None else preload)
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.max_executions = max_executions
+        self._ctx = mp.get_context(start_method or _default_start_method())
+        if self._ctx.get_start_method() == "forkserver":
+            # forkserver 启动前生效：之后 fork 出的工作进程直接继承已导入的模块
+            self._ctx.set_forkserver_preload([__name__, *self.preload])
+        self._workers: List[_Worker] = []
+        # 会话 -> 保存其命名空间的工作进程
+        self._sessions: Dict[str, _Worker] = {}
+        # 工作进程被回收后命名空间已经重置、还没有告知调用方的会话
+        self._reset_sessions: Set[str] = set()
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._started = False
+        self._closed = False
+
+    def start(self) -> "SandboxPool":
+        """启动全部工作进程"""
+        with self._lock:
+            if self._started:
+                return self
+            self._started = True
+        for _ in range(self.size):
+            self._spawn()
+        logger.info(f"沙箱进程池已启动，进程数: {self.size}", agent_name="coder")
+        return self
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.preload, self.memory_mb),
+            name="sandbox-worker",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        worker = _Worker(process, parent_conn)
+        with self._available:
+            self._workers.append(worker)
+            self._available.notify_all()
+        return worker
+
+    def _replace(self, worker: _Worker) -> None:
+        """停止工作进程并补充一个新的进程，保存在该进程中的会话命名空间随之重置"""
+        worker.stop()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            for session in [s for s, w in self._sessions.items() if w is worker]:
+                del self._sessions[session]
+                self._reset_sessions.add(session)
+        if not self._closed:
+            self._spawn()
+
+    def _acquire(self, session: Optional[str]) -> _Worker:
+        """取得执行代码的工作进程：会话已有工作进程时等待它空闲，否则选择会话最少的空闲进程"""
+        with self._available:
+            while True:
+                if self._closed:
+                    raise RuntimeError("沙箱进程池已关闭")
+                worker = self._sessions.get(session) if session is not None else None
+                if worker is None:
+                    idle = [w for w in self._workers if not w.busy]
+                    if idle:
+                        counts = {id(w): 0 for w in idle}
+                        for w in self._sessions.values():
+                            if id(w) in counts:
+                                counts[id(w)] += 1
+                        worker = min(idle, key=lambda w: counts[id(w)])
+                        if session is not None:
+                            self._sessions[session] = worker
+                if worker is not None and not worker.busy:
+                    worker.busy = True
+                    return worker
+                self._available.wait()
+
+    def _release(self, worker: _Worker) -> None:
+        with self._available:
+            worker.busy = False
+            self._available.notify_all()
+
+    def run(self, code: str, timeout: Optional[float] = None, session: Optional[str] = None) -> Dict[str, Any]:
+        """在工作进程中执行代码，没有可用的进程时等待
+
+        Args:
+            code: Python 代码
+            timeout: 执行超时（秒），默认使用池的 timeout
+            session: 会话ID（如线程ID）；指定时在该会话的命名空间中执行，之前定义的变量仍然可用，
+                None 表示每次执行使用新的命名空间
+
+        Returns:
+            {"stdout": 标准输出, "error": 异常信息，成功时为 None, "reset": 会话的命名空间自上次执行后是否被重置}
+
+        Raises:
+            RuntimeError: 进程池已关闭
+        """
+        if self._closed:
+            raise RuntimeError("沙箱进程池已关闭")
+        self.start()
+        timeout = self.timeout if timeout is None else timeout
+        worker = self._acquire(session)
+        with self._lock:
+            reset = session in self._reset_sessions
+            self._reset_sessions.discard(session)
+        return dict(self._execute(worker, code, timeout, session), reset=reset)
+
+    def _execute(self, worker: _Worker, code: str, timeout: float, session: Optional[str]) -> Dict[str, Any]:
+        """在取得的工作进程中执行代码，结束后释放、回收或替换该进程"""
+        try:
+            worker.conn.send((session, code))
+            if not worker.conn.poll(timeout):
+                logger.warning(f"沙箱代码执行超过 {timeout} 秒，终止工作进程", agent_name="coder")
+                worker.process.kill()
+                self._replace(worker)
+                return {"stdout": "", "error": f"TimeoutError: 代码执行超过 {timeout} 秒"}
+            result = worker.conn.recv()
+        except (EOFError, OSError):
+            # 工作进程在执行中退出（例如被系统 OOM 终止或代码调用了 os._exit）
+            worker.process.join(1.0)
+            exitcode = worker.process.exitcode
+            self._replace(worker)
+            return {"stdout": "", "error": f"沙箱进程异常退出(exitcode={exitcode})"}
+        worker.executions += 1
+        if worker.executions >= self.max_executions:
+            self._replace(worker)
+        else:
+            self._release(worker)
+        return result
+
+    def shutdown(self) -> None:
+        """停止全部工作进程"""
+        if self._closed:
+            return
+        with self._available:
+            self._closed = True
+            workers, self._workers = self._workers, []
+            self._sessions.clear()
+            self._reset_sessions.clear()
+            self._available.notify_all()
+        for worker in workers:
+            worker.stop()
+
+
+_default_pool: Optional[SandboxPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_sandbox_pool() -> SandboxPool:
+    """获取默认的沙箱进程池，首次调用时启动，进程退出时自动关闭"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = SandboxPool().start()
+            atexit.register(_default_pool.shutdown)
+        return _default_pool
@@ -1,19 +1,32 @@
 from typing import Annotated
-from langchain_experimental.utilities import PythonREPL
-# Python REPL工具，用于执行Python代码
-repl = PythonREPL()
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import tool
+from app.multi_agents.tools.sandbox_pool import get_sandbox_pool
+
+
+# Python REPL工具，代码在沙箱进程池的独立进程中执行（带超时和内存限制）
+# 同一线程（会话）的代码在同一个命名空间中执行，变量在多次调用之间保留
 @tool
 def python_repl(
     code: Annotated[str, "The python code to execute to generate your chart."],
+    config: RunnableConfig,
 ):
     """Use this to execute python code. If you want to see the output of a value,
-    you should print it out with `print(...)`. This is visible to the user."""
-    try:
-        result = repl.run(code)
-    except BaseException as e:
-        return f"Failed to execute. Error: {repr(e)}"
+    you should print it out with `print(...)`. This is visible to the user.
+    numpy and pandas are already imported as `np` and `pd`.
+    Variables, functions and imports from earlier calls in this conversation are kept,
+    so you can load data in one call and use it in the next. If a call reports that the
+    sandbox was restarted, earlier variables are gone and must be recreated."""
+    session = (config or {}).get("configurable", {}).get("thread_id")
+    result = get_sandbox_pool().run(code, session=session)
+    notice = (
+        "Note: the sandbox was restarted before this call, variables from earlier calls are gone.\n"
+        if result.get("reset") else ""
+    )
+    if result["error"]:
+        return f"{notice}Failed to execute. Error: {result['error']}\nStdout: {result['stdout']}"
 
-    result_str = f"Successfully executed:\n```python\n{code}\n```\nStdout: {result}"
+    result_str = f"{notice}Successfully executed:\n```python\n{code}\n```\nStdout: {result['stdout']}"
     return (
         result_str + "\n\nIf you have completed all tasks, respond with FINAL ANSWER."
     )
@@ -0,0 +1,112 @@
+"""
+浏览器智能体的按需截图
+
+browser_use 每一步获取页面状态时都会截图，开启视觉时还把截图随状态消息发送给模型，
+无头服务器上既要渲染截图，又要向模型发送很大的图片。关闭视觉后，OnDemandScreenshots 挂载到 BrowserAgent 上：
+- 默认不截图，模型只根据页面文本和元素列表决策
+- 智能体调用 request_screenshot 动作，或上一步动作失败时，下一步才截图并随状态消息发送给模型
+"""
+from typing import Any
+
+from browser_use import Controller
+from browser_use.agent.views import ActionResult
+from browser_use.browser.context import BrowserContext
+
+from app.config.config_com import BROWSER_SCREENSHOT_AFTER_FAILURES
+from app.multi_agents.utils.logger import get_logger
+
+logger = get_logger(__name__, level="debug")
+
+
+class OnDemandScreenshots:
+    """只在需要时截图并把截图发送给模型"""
+
+    def __init__(self, after_failures: int = BROWSER_SCREENSHOT_AFTER_FAILURES):
+        """
+        Args:
+            after_failures: 上一步失败（动作报错或连续失败次数）达到该值时自动截图，0 表示只在智能体请求时截图
+        """
+        self.after_failures = after_failures
+        self.pending = False
+        self.taken = 0
+        self.skipped = 0
+        self._agent: Any = None
+
+    def request(self) -> None:
+        """请求在下一步截图"""
+        self.pending = True
+
+    def _last_step_failed(self) -> bool:
+        if not self.after_failures or self._agent is None:
+            return False
+        state = self._agent.state
+        failures = state.consecutive_failures
+        if state.last_result and any(r.error for r in state.last_result):
+            failures = max(failures, 1)
+        return failures >= self.after_failures
+
+    def should_capture(self) -> bool:
+        """获取页面状态时是否截图"""
+        return self.pending or self._last_step_failed()
+
+    def attach(self, agent: Any) -> Any:
+        """挂载到 browser_use 的 Agent 上（创建 Agent 时应传入 use_vision=False）
+
+        Args:
+            agent: browser_use 的 Agent
+
+        Returns:
+            传入的 agent
+        """
+        self._agent = agent
+        context = agent.browser_context
+        take_screenshot = context.take_screenshot
+
+        async def _take_screenshot(full_page: bool = False):
+            if not self.should_capture():
+                self.skipped += 1
+                return None
+            self.taken += 1
+            logger.debug(f"按需截图: 已截图{self.taken}次，跳过{self.skipped}次", agent_name="browser")
+            return await take_screenshot(full_page)
+
+        context.take_screenshot = _take_screenshot
+        # request_screenshot 动作通过浏览器上下文找到本对象
+        context.screenshots = self
+
+        message_manager = agent._message_manager
+        add_state_message = message_manager.add_state_message
+
+        def _add_state_message(state, result=None, step_info=None, use_vision=True):
+            # 只有本步截了图时才把截图发送给模型，截图发送后请求才算完成
+            # （同一步内执行多个动作时 browser_use 会再次获取页面状态，不能在截图时就清除请求）
+            if state.screenshot is not None:
+                self.pending = False
+            return add_state_message(state, result, step_info, use_vision=state.screenshot is not None)
+
+        message_manager.add_state_message = _add_state_message
+        return agent
+
+
+def register_screenshot_action(controller: Controller) -> Controller:
+    """在控制器上注册 request_screenshot 动作
+
+    Args:
+        controller: 浏览器控制器
+
+    Returns:
+        传入的 controller
+    """
+
+    @controller.action(
+        "只根据页面文本无法完成当前操作时（例如找不到要点击的元素、页面布局无法理解、出现验证码），"
+        "请求在下一步附带当前页面的截图。能根据文本完成时不要使用"
+    )
+    async def request_screenshot(browser: BrowserContext):
+        screenshots = getattr(browser, "screenshots", None)
+        if screenshots is None:
+            return ActionResult(extracted_content="每一步都已附带截图，无需请求")
+        screenshots.request()
+        return ActionResult(extracted_content="已请求截图，下一步的页面状态将附带截图", include_in_memory=True)
+
+    return controller
@@ -0,0 +1,196 @@
+"""
+上下文管理
+
+State 中的消息会随着会话不断增长（例如岗位查找返回的完整 Markdown 结果），
+每次调用 LLM 都会重新发送全部历史。本模块在组装提示词时按节点的 token 预算
+压缩较早的长消息：原文保存在旁路存储中，消息里只保留摘要和引用，
+从而让提示词长度不随会话长度增长。
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# 压缩后消息中的引用前缀
+REF_PREFIX = "ctx://"
+
+_CJK_PATTERN = re.compile(r"[\u4e00-\u9fff\u3000-\u303f\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算文本的 token 数
+
+    中文字符按每字约 1 个 token，其余字符按每 4 个字符约 1 个 token 计算，
+    不依赖具体模型的分词器。
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _content_of(message: Any) -> str:
+    content = message.get("content", "") if isinstance(message, dict) else getattr(message, "content", "")
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return str(content or "")
+
+
+def _role_of(message: Any) -> str:
+    if isinstance(message, dict):
+        return message.get("role", "")
+    return getattr(message, "type", "")
+
+
+def _with_content(message: Any, content: str) -> Any:
+    """返回替换了内容的消息副本，不修改原消息"""
+    if isinstance(message, dict):
+        return {**message, "content": content}
+    return message.model_copy(update={"content": content})
+
+
+def message_tokens(message: Any) -> int:
+    """估算单条消息的 token 数（含少量角色开销）"""
+    return estimate_tokens(_content_of(message)) + 4
+
+
+class ContentStore:
+    """被压缩消息原文的旁路存储
+
+    以内容哈希为键，相同内容只保存一份；超过容量时淘汰最久未使用的条目。
+    """
+
+    def __init__(self, max_items: int = 1024):
+        self.max_items = max_items
+        self._items: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, content: str) -> str:
+        """保存原文，返回引用"""
+        ref = REF_PREFIX + hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+        with self._lock:
+            self._items[ref] = content
+            self._items.move_to_end(ref)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+        return ref
+
+    def get(self, ref: str) -> Optional[str]:
+        """根据引用取回原文，不存在时返回 None"""
+        with self._lock:
+            content = self._items.get(ref)
+            if content is not None:
+                self._items.move_to_end(ref)
+            return content
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+# 默认的旁路存储
+default_content_store = ContentStore()
+
+
+def extractive_summary(text: str, max_chars: int = 300) -> str:
+    """抽取式摘要：优先保留标题和列表行，直到达到字符上限"""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    key_lines = [line for line in lines if line.startswith(("#", "-", "*", "|"))] or lines
+    summary = ""
+    for line in key_lines:
+        if len(summary) + len(line) + 1 > max_chars:
+            break
+        summary += line + "\n"
+    return summary.strip() or text[:max_chars]
+
+
+def compact_messages(
+    messages: Sequence[Any],
+    budget: int,
+    store: Optional[ContentStore] = None,
+    keep_recent: int = 2,
+    summarizer: Callable[[str], str] = extractive_summary,
+    min_compact_tokens: int = 200,
+) -> List[Any]:
+    """把消息列表压缩到 token 预算以内
+
+    压缩顺序：
+        1. 从最早的消息开始，把较长的非用户消息替换为"摘要 + 引用"；
+        2. 仍然超出预算时，丢弃最早的已压缩消息；
+        3. 最后才压缩最近的 keep_recent 条消息。
+    第一条用户消息（原始需求）始终保留。
+
+    Args:
+        messages: 原始消息列表（消息对象或字典）
+        budget: token 预算
+        store: 保存原文的旁路存储，默认使用 default_content_store
+        keep_recent: 优先保持原样的最近消息条数
+        summarizer: 摘要函数
+        min_compact_tokens: 小于该 token 数的消息不值得压缩
+
+    Returns:
+        压缩后的新消息列表
+    """
+    store = default_content_store if store is None else store
+    result = list(messages)
+    total = sum(message_tokens(m) for m in result)
+    if total <= budget:
+        return result
+
+    first_user = next((i for i, m in enumerate(result) if _role_of(m) in ("human", "user")), None)
+    recent_start = max(len(result) - keep_recent, 0)
+
+    def _compact(index: int) -> int:
+        message = result[index]
+        content = _content_of(message)
+        before = message_tokens(message)
+        if before < min_compact_tokens or content.startswith("[已压缩"):
+            return 0
+        ref = store.put(content)
+        stub = f"[已压缩: 原文约{estimate_tokens(content)} tokens，引用 {ref}]\n{summarizer(content)}"
+        result[index] = _with_content(message, stub)
+        return before - message_tokens(result[index])
+
+    # 1. 压缩较早的长消息
+    for i in range(recent_start):
+        if total <= budget:
+            return result
+        if i == first_user or _role_of(result[i]) in ("human", "user"):
+            continue
+        total -= _compact(i)
+
+    # 2. 丢弃最早的历史消息（保留原始需求）
+    i = 0
+    while total > budget and i < recent_start:
+        if i == first_user:
+            i += 1
+            continue
+        # 带工具调用的消息与其后的工具结果一起丢弃，避免出现孤立的工具消息
+        end = i + 1
+        if getattr(result[i], "tool_calls", None):
+            while end < recent_start and _role_of(result[end]) == "tool":
+                end += 1
+        total -= sum(message_tokens(m) for m in result[i:end])
+        del result[i:end]
+        recent_start -= end - i
+        if first_user is not None and first_user > i:
+            first_user -= end - i
+
+    # 3. 最后压缩最近的消息
+    for i in range(recent_start, len(result)):
+        if total <= budget:
+            break
+        if i == first_user:
+            continue
+        total -= _compact(i)
+
+    return result
+
+
+def context_stats(messages: Sequence[Any]) -> Dict[str, int]:
+    """统计消息列表的条数、估算 token 数以及已压缩条数"""
+    return {
+        "messages": len(messages),
+        "tokens": sum(message_tokens(m) for m in messages),
+        "compacted": sum(1 for m in messages if _content_of(m).startswith("[已压缩")),
+    }
@@ -0,0 +1,297 @@
+"""
+HR 沟通消息的增量同步
+
+聊天列表中每个会话显示最后一条消息的预览和时间。InboxStore 为每个会话记录高水位：
+聊天列表条目的签名和已保存的最后一条消息ID。sync_inbox 每轮只读取一次聊天列表，
+只打开签名发生变化的会话，只保存高水位之后的新消息；有新的HR消息的会话进入待分析队列，
+消息分析只处理队列中的会话和未分析的消息。同步的开销与新消息数量成正比，而不是与会话总数成正比。
+打开会话读取失败或没有读到新消息时不推进签名，下一轮同步会重新打开该会话。
+"""
+import functools
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Protocol, Sequence, Tuple
+
+from app.config.config_com import BOSS_INBOX_DB_PATH
+from app.multi_agents.utils.logger import get_logger
+
+logger = get_logger(__name__, level="debug")
+
+# 消息发送方
+SENDER_HR = "hr"
+SENDER_ME = "me"
+SENDER_SYSTEM = "system"
+
+
+class ConversationSummary(NamedTuple):
+    """聊天列表中的一个会话"""
+    conversation_id: str
+    hr_name: str
+    company: str
+    job_title: str
+    # 列表条目的原始文本（最后一条消息预览、时间、未读数等），变化时说明会话有新消息
+    preview: str
+
+    @property
+    def signature(self) -> str:
+        return hashlib.sha1(self.preview.encode("utf-8")).hexdigest()[:16]
+
+
+class ChatMessage(NamedTuple):
+    """会话中的一条消息"""
+    message_id: str
+    sender: str
+    text: str
+    sent_at: str = ""
+
+
+class PendingConversation(NamedTuple):
+    """待分析的会话及其未分析的消息"""
+    conversation_id: str
+    hr_name: str
+    company: str
+    job_title: str
+    messages: List[ChatMessage]
+    # pending() 读取到的最后一条消息的行号，标记已分析时只标记到这里，之后同步到的消息留给下一轮
+    last_row_id: int = 0
+
+
+class SyncStats(NamedTuple):
+    """一轮同步的统计"""
+    listed: int
+    opened: int
+    new_messages: int
+    queued: int
+    # 打开后读取消息失败的会话数
+    failed: int = 0
+
+
+class InboxSource(Protocol):
+    """聊天消息来源（浏览器中的Boss直聘聊天页面，测试中为模拟数据）"""
+
+    async def list_conversations(self) -> List[ConversationSummary]:
+        ...
+
+    async def read_messages(self, conversation_id: str) -> List[ChatMessage]:
+        """读取会话中的消息，读取失败时抛出异常（不能用空列表表示失败）"""
+        ...
+
+
+def messages_after(messages: Sequence[ChatMessage], last_message_id: Optional[str]) -> List[ChatMessage]:
+    """高水位之后的消息；高水位消息不在本次读取的范围内时返回全部（由数据库按消息ID去重）"""
+    if last_message_id is None:
+        return list(messages)
+    for index in range(len(messages) - 1, -1, -1):
+        if messages[index].message_id == last_message_id:
+            return list(messages[index + 1:])
+    return list(messages)
+
+
+class InboxStore:
+    """基于 SQLite 的会话高水位、消息和待分析队列"""
+
+    def __init__(self, db_path: str = BOSS_INBOX_DB_PATH):
+        """
+        Args:
+            db_path: SQLite 数据库文件路径，":memory:" 表示内存数据库
+        """
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS conversations ("
+            "conversation_id TEXT PRIMARY KEY, hr_name TEXT, company TEXT, job_title TEXT, "
+            "signature TEXT, last_message_id TEXT, updated_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, conversation_id TEXT NOT NULL, message_id TEXT NOT NULL, "
+            "sender TEXT NOT NULL, text TEXT NOT NULL, sent_at TEXT, analyzed INTEGER NOT NULL DEFAULT 0, "
+            "UNIQUE (conversation_id, message_id));"
+            "CREATE TABLE IF NOT EXISTS analysis_queue ("
+            "conversation_id TEXT PRIMARY KEY, queued_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS assessments ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, conversation_id TEXT NOT NULL, intent TEXT NOT NULL, "
+            "interest INTEGER NOT NULL, next_action TEXT NOT NULL, reason TEXT, source TEXT, assessed_at REAL NOT NULL);"
+        )
+        self.conn.commit()
+
+    def high_water_marks(self) -> Dict[str, Tuple[str, Optional[str]]]:
+        """各会话的高水位: 会话ID -> (列表条目签名, 最后一条消息ID)"""
+        with self.lock:
+            rows = self.conn.execute("SELECT conversation_id, signature, last_message_id FROM conversations").fetchall()
+        return {conversation_id: (signature, last_id) for conversation_id, signature, last_id in rows}
+
+    def save(self, summary: ConversationSummary, messages: Sequence[ChatMessage]) -> Tuple[int, bool]:
+        """保存会话的新消息并推进高水位，有新的HR消息时加入待分析队列
+
+        没有新增消息时不更新列表条目签名：预览变了却没读到新消息（页面还没加载出来），
+        下一轮同步仍会打开该会话。
+
+        Args:
+            summary: 聊天列表中的会话
+            messages: 高水位之后的消息，按时间顺序
+
+        Returns:
+            (实际新增的消息数, 是否加入了待分析队列)
+        """
+        now = time.time()
+        with self.lock:
+            inserted = 0
+            new_from_hr = False
+            for message in messages:
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO messages (conversation_id, message_id, sender, text, sent_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (summary.conversation_id, message.message_id, message.sender, message.text, message.sent_at),
+                )
+                if cursor.rowcount:
+                    inserted += 1
+                    new_from_hr = new_from_hr or message.sender == SENDER_HR
+            last_id = messages[-1].message_id if messages else None
+            signature = summary.signature if inserted else None
+            self.conn.execute(
+                "INSERT INTO conversations (conversation_id, hr_name, company, job_title, signature, last_message_id, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (conversation_id) DO UPDATE SET "
+                "hr_name = excluded.hr_name, company = excluded.company, job_title = excluded.job_title, "
+                "signature = COALESCE(excluded.signature, conversations.signature), "
+                "last_message_id = COALESCE(excluded.last_message_id, conversations.last_message_id), "
+                "updated_at = excluded.updated_at",
+                (summary.conversation_id, summary.hr_name, summary.company, summary.job_title,
+                 signature, last_id, now),
+            )
+            if new_from_hr:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO analysis_queue (conversation_id, queued_at) VALUES (?, ?)",
+                    (summary.conversation_id, now),
+                )
+            self.conn.commit()
+        return inserted, new_from_hr
+
+    def pending(self, limit: Optional[int] = None) -> List[PendingConversation]:
+        """待分析队列中的会话（按加入队列的先后），每个会话附带未分析的消息"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT q.conversation_id, c.hr_name, c.company, c.job_title FROM analysis_queue q "
+                "JOIN conversations c ON c.conversation_id = q.conversation_id ORDER BY q.queued_at LIMIT ?",
+                (-1 if limit is None else limit,),
+            ).fetchall()
+            result = []
+            for conversation_id, hr_name, company, job_title in rows:
+                messages = self.conn.execute(
+                    "SELECT id, message_id, sender, text, sent_at FROM messages "
+                    "WHERE conversation_id = ? AND analyzed = 0 ORDER BY id",
+                    (conversation_id,),
+                ).fetchall()
+                result.append(PendingConversation(
+                    conversation_id, hr_name, company, job_title, [ChatMessage(*row[1:]) for row in messages],
+                    messages[-1][0] if messages else 0,
+                ))
+        return result
+
+    def _mark_analyzed(self, conversation: PendingConversation) -> None:
+        # 只标记 pending() 读取到的消息；读取之后又同步到新的HR消息时会话留在队列中
+        self.conn.execute(
+            "UPDATE messages SET analyzed = 1 WHERE conversation_id = ? AND id <= ?",
+            (conversation.conversation_id, conversation.last_row_id),
+        )
+        self.conn.execute(
+            "DELETE FROM analysis_queue WHERE conversation_id = ? AND NOT EXISTS ("
+            "SELECT 1 FROM messages WHERE conversation_id = ? AND analyzed = 0 AND sender = ?)",
+            (conversation.conversation_id, conversation.conversation_id, SENDER_HR),
+        )
+
+    def mark_analyzed(self, conversations: Sequence[PendingConversation]) -> None:
+        """标记 pending() 返回的会话消息已分析，没有更新的HR消息时移出待分析队列"""
+        with self.lock:
+            for conversation in conversations:
+                self._mark_analyzed(conversation)
+            self.conn.commit()
+
+    def save_assessments(self, assessments: Sequence[Tuple[PendingConversation, Any]]) -> None:
+        """保存会话的评估结果，同时按 mark_analyzed 的规则标记消息已分析并移出待分析队列
+
+        Args:
+            assessments: (pending() 返回的会话, 评估结果) 列表，评估结果需要有 intent、interest、next_action、reason、source 属性
+        """
+        now = time.time()
+        with self.lock:
+            for conversation, assessment in assessments:
+                self.conn.execute(
+                    "INSERT INTO assessments (conversation_id, intent, interest, next_action, reason, source, assessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (conversation.conversation_id, assessment.intent, assessment.interest, assessment.next_action,
+                     assessment.reason, assessment.source, now),
+                )
+                self._mark_analyzed(conversation)
+            self.conn.commit()
+
+    def latest_assessments(self) -> Dict[str, Dict[str, Any]]:
+        """各会话最近一次的评估结果: 会话ID -> 字段字典"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT conversation_id, intent, interest, next_action, reason, source, assessed_at FROM assessments "
+                "WHERE id IN (SELECT MAX(id) FROM assessments GROUP BY conversation_id)"
+            ).fetchall()
+        keys = ("intent", "interest", "next_action", "reason", "source", "assessed_at")
+        return {row[0]: dict(zip(keys, row[1:])) for row in rows}
+
+    def message_count(self, conversation_id: Optional[str] = None) -> int:
+        """已保存的消息数"""
+        with self.lock:
+            if conversation_id is None:
+                return self.conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM messages WHERE conversation_id = ?", (conversation_id,),
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self.lock:
+            self.conn.close()
+
+
+async def sync_inbox(source: InboxSource, store: InboxStore) -> SyncStats:
+    """执行一轮增量同步：读取聊天列表，只打开有变化的会话，只保存高水位之后的消息
+
+    Args:
+        source: 聊天消息来源
+        store: 消息数据库
+
+    Returns:
+        本轮同步的统计
+    """
+    summaries = await source.list_conversations()
+    marks = store.high_water_marks()
+    opened = new_messages = queued = failed = 0
+    for summary in summaries:
+        signature, last_message_id = marks.get(summary.conversation_id, (None, None))
+        if signature == summary.signature:
+            continue
+        opened += 1
+        try:
+            messages = await source.read_messages(summary.conversation_id)
+        except Exception as e:
+            # 不保存、不推进签名，下一轮同步重新打开
+            failed += 1
+            logger.warning(f"读取会话 {summary.conversation_id} 的消息失败: {e}", agent_name="message_processor")
+            continue
+        inserted, enqueued = store.save(summary, messages_after(messages, last_message_id))
+        new_messages += inserted
+        queued += int(enqueued)
+    stats = SyncStats(len(summaries), opened, new_messages, queued, failed)
+    logger.info(
+        f"HR消息同步: 会话{stats.listed}个，打开{stats.opened}个，新消息{stats.new_messages}条，"
+        f"待分析{stats.queued}个，读取失败{stats.failed}个",
+        agent_name="message_processor",
+    )
+    return stats
+
+
+@functools.lru_cache(maxsize=None)
+def get_inbox_store() -> InboxStore:
+    """获取默认的消息数据库"""
+    return InboxStore()
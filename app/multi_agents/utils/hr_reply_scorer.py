@@ -0,0 +1,368 @@
+"""
+HR 回复的批量意向评估
+
+每天可能有上百条 HR 回复，逐条调用 LLM 既慢又贵。HRReplyScorer 分两级处理待分析的会话：
+- 预分类：规则（可选 embedding 分类器）识别意图明确的短回复——自动回复、明确拒绝、索要简历，
+  直接给出意向分数和下一步行动，不调用 LLM
+- 其余会话按上下文窗口分批，一次结构化输出请求评估一批会话，多批并发执行，请求走调度器的 BULK 通道
+
+评估结果由 InboxStore.save_assessments 保存，会话同时移出待分析队列；
+重试后仍然评估失败的会话单独返回，不保存也不标记，留在队列中等下次分析。
+"""
+import functools
+from typing import Any, Dict, List, Literal, NamedTuple, Optional, Sequence
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from pydantic import BaseModel, Field
+
+from app.config.config_com import (
+    FAST_ROUTE_THRESHOLD,
+    HR_REPLY_CONCURRENCY,
+    HR_REPLY_CONTEXT_WINDOW,
+    HR_REPLY_ITEM_MAX_CHARS,
+    HR_REPLY_MAX_BATCH,
+    HR_REPLY_PRECLASSIFY,
+    HR_REPLY_RULE_MAX_CHARS,
+    HR_REPLY_USE_EMBEDDING,
+)
+from app.multi_agents.graph.pre_router import EmbeddingClassifier, PreRouter, RouteRule
+from app.multi_agents.utils.context_manager import estimate_tokens
+from app.multi_agents.utils.hr_inbox import SENDER_HR, SENDER_ME, PendingConversation
+from app.multi_agents.utils.logger import get_logger
+
+logger = get_logger(__name__, level="debug")
+
+Intent = Literal["resume_request", "interview_invite", "question", "interested", "rejection", "auto_reply", "other"]
+NextAction = Literal["send_resume", "answer_question", "schedule_interview", "follow_up", "none"]
+
+SCORER_PROMPT = """你是求职沟通分析助手。下面是求职者与多位HR的会话中HR新发来的消息，逐一分析每个会话：
+- intent: HR的意图，resume_request 索要简历，interview_invite 邀请面试，question 提出问题（薪资、到岗时间、经历等），
+  interested 表示感兴趣但没有具体要求，rejection 拒绝，auto_reply 自动回复，other 其他
+- interest: HR对求职者的兴趣程度，0~100
+- next_action: 求职者的下一步行动，send_resume 发送简历，answer_question 回答问题，schedule_interview 确认面试时间，
+  follow_up 稍后跟进，none 无需行动
+- reason: 一句话理由；HR提出问题时写明需要回答的问题
+- 每个会话都必须返回一条结果，index 使用会话前方括号中的编号"""
+
+# 每个会话的结果在输出中大约占用的 token 数
+_ASSESSMENT_TOKENS = 70
+
+
+class ReplyAssessment(BaseModel):
+    """单个会话的HR回复评估"""
+
+    index: int = Field(description="会话编号")
+    intent: Intent = Field(description="HR的意图")
+    interest: int = Field(description="HR的兴趣程度，0~100")
+    next_action: NextAction = Field(description="求职者的下一步行动")
+    reason: str = Field(description="一句话理由")
+    source: str = Field(default="llm", description="评估来源: rule / embedding / llm")
+
+
+class ScoredReplies(NamedTuple):
+    """一次评估的结果"""
+    # 评估成功的会话，index 为会话在输入中的下标，按下标排列
+    assessments: List[ReplyAssessment]
+    # 重试后仍然失败的会话下标 -> 失败原因
+    failed: Dict[int, str]
+
+
+class ReplyAssessmentBatch(BaseModel):
+    """一批会话的评估结果"""
+
+    assessments: List[ReplyAssessment] = Field(description="每个会话一条评估结果")
+
+
+# 预分类意图对应的兴趣分数、下一步行动和理由
+PRECLASSIFIED = {
+    "auto_reply": (40, "follow_up", "HR的自动回复，等待HR本人回复"),
+    "rejection": (0, "none", "HR明确表示不合适"),
+    "resume_request": (80, "send_resume", "HR索要简历"),
+}
+
+AUTO_REPLY_PATTERNS = [
+    r"自动回复", r"稍后(再)?回复", r"(正在|在)忙", r"暂时不在", r"不在线", r"尽快(查看|回复|联系)",
+    r"已收到.{0,6}(简历|消息)",
+]
+REJECTION_PATTERNS = [
+    r"不(太|是很)?(合适|匹配|符合)", r"暂(时)?不(考虑|需要)", r"(已|已经)(招满|招到|关闭|下线|停止招聘)",
+    r"很遗憾", r"抱歉.{0,10}(不|无法)", r"祝你早日找到",
+]
+RESUME_REQUEST_PATTERNS = [
+    r"(发|发送|传|给).{0,6}简历", r"简历.{0,4}(发|看看|看一下|一下)", r"附件简历",
+]
+RESUME_REQUEST_EXCLUDES = [r"收到"]
+# 同时出现这些内容时回复包含其他问题或安排，交给 LLM
+MIXED_INTENT_PATTERNS = [r"薪资|期望|到岗|面试|几年|为什么|什么时候|时间|多少|吗.{2,}[?？]"]
+
+
+def default_reply_preclassifier(use_embedding: bool = HR_REPLY_USE_EMBEDDING) -> PreRouter:
+    """创建HR回复的默认预分类器（目标: auto_reply / rejection / resume_request）"""
+    classifier = None
+    if use_embedding:
+        classifier = EmbeddingClassifier({
+            "auto_reply": ["您好，我现在有事不在，稍后回复您", "已收到您的简历，我会尽快查看"],
+            "rejection": ["不好意思，您的经历和岗位不太匹配", "这个岗位已经招到人了"],
+            "resume_request": ["方便发一份简历吗", "可以把简历发我看看"],
+        })
+    return PreRouter(
+        "message_processor",
+        # 拒绝优先：自动回复和索要简历的措辞可能出现在拒绝的客套话中
+        rules=[
+            RouteRule("rejection", REJECTION_PATTERNS, excludes=[r"如果.{0,4}不", r"合适吗"], max_length=HR_REPLY_RULE_MAX_CHARS),
+            RouteRule("auto_reply", AUTO_REPLY_PATTERNS, excludes=MIXED_INTENT_PATTERNS, max_length=HR_REPLY_RULE_MAX_CHARS),
+            RouteRule(
+                "resume_request", RESUME_REQUEST_PATTERNS, excludes=MIXED_INTENT_PATTERNS + RESUME_REQUEST_EXCLUDES,
+                max_length=HR_REPLY_RULE_MAX_CHARS,
+            ),
+        ],
+        classifier=classifier,
+    )
+
+
+def render_conversation(conversation: PendingConversation, max_chars: int = HR_REPLY_ITEM_MAX_CHARS) -> str:
+    """把会话的新消息转换为单行紧凑文本，超出长度时保留最新的部分"""
+    header = " ".join(part for part in (conversation.company, conversation.job_title, conversation.hr_name) if part)
+    lines = []
+    for message in conversation.messages:
+        speaker = "HR" if message.sender == SENDER_HR else "我" if message.sender == SENDER_ME else "系统"
+        lines.append(f"{speaker}: {' '.join(message.text.split())}")
+    text = " | ".join(lines)
+    if len(text) > max_chars:
+        text = "…" + text[-max_chars:]
+    return f"（{header}）{text}" if header else text
+
+
+def hr_text(conversation: PendingConversation) -> str:
+    """会话中HR新发来的消息文本，用于预分类"""
+    return "\n".join(message.text.strip() for message in conversation.messages if message.sender == SENDER_HR)
+
+
+class HRReplyScorer:
+    """预分类 + 批量结构化输出的HR回复评估"""
+
+    def __init__(
+        self,
+        llm: Any = None,
+        preclassifier: Optional[PreRouter] = None,
+        preclassify: bool = HR_REPLY_PRECLASSIFY,
+        threshold: float = FAST_ROUTE_THRESHOLD,
+        context_window: int = HR_REPLY_CONTEXT_WINDOW,
+        max_batch_size: int = HR_REPLY_MAX_BATCH,
+        max_concurrency: int = HR_REPLY_CONCURRENCY,
+    ):
+        """
+        Args:
+            llm: 支持 with_structured_output 的聊天模型，默认使用 BASIC 级别的模型
+            preclassifier: 预分类器，默认使用 default_reply_preclassifier()
+            preclassify: 是否启用预分类
+            threshold: 预分类置信度阈值，低于该值交给 LLM
+            context_window: 模型上下文窗口（token），决定每批最多能放多少会话
+            max_batch_size: 每批会话数上限
+            max_concurrency: 同时进行的批次数
+        """
+        self._llm = llm
+        self.preclassifier = preclassifier or (default_reply_preclassifier() if preclassify else None)
+        self.threshold = threshold
+        self.context_window = context_window
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
+        self._structured = None
+        self.stats = {"conversations": 0, "preclassified": 0, "llm_calls": 0}
+
+    @property
+    def structured_llm(self):
+        if self._structured is None:
+            if self._llm is None:
+                from app.multi_agents.utils.llm_factory import get_llm_by_type, ThinkingLevel
+                self._llm = get_llm_by_type(ThinkingLevel.BASIC)
+            self._structured = self._llm.with_structured_output(ReplyAssessmentBatch)
+        return self._structured
+
+    def preclassify(self, conversation: PendingConversation, index: int) -> Optional[ReplyAssessment]:
+        """用规则/embedding 评估意图明确的回复，无法确定时返回 None"""
+        if self.preclassifier is None:
+            return None
+        decision = self.preclassifier.route(hr_text(conversation))
+        if decision is None or decision.confidence < self.threshold or decision.target not in PRECLASSIFIED:
+            return None
+        interest, next_action, reason = PRECLASSIFIED[decision.target]
+        return ReplyAssessment(
+            index=index, intent=decision.target, interest=interest, next_action=next_action,
+            reason=reason, source=decision.source,
+        )
+
+    def make_batches(self, texts: Sequence[str], indices: Sequence[int]) -> List[List[int]]:
+        """按上下文窗口把需要 LLM 评估的会话顺序分批
+
+        Returns:
+            每批会话在 texts 中的下标列表
+        """
+        budget = self.context_window - estimate_tokens(SCORER_PROMPT) - 50
+        batches: List[List[int]] = []
+        current: List[int] = []
+        used = 0
+        for index in indices:
+            cost = estimate_tokens(texts[index]) + 8 + _ASSESSMENT_TOKENS
+            if current and (used + cost > budget or len(current) >= self.max_batch_size):
+                batches.append(current)
+                current, used = [], 0
+            current.append(index)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    @staticmethod
+    def _messages(texts: Sequence[str], batch: Sequence[int]) -> List[Any]:
+        # 批内使用从 1 开始的局部编号，结果再映射回原始下标
+        items = "\n".join(f"[{number}] {texts[index]}" for number, index in enumerate(batch, 1))
+        return [
+            SystemMessage(content=SCORER_PROMPT),
+            HumanMessage(content=f"## 会话列表（共{len(batch)}个）\n{items}"),
+        ]
+
+    def _config(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "run_name": "hr_reply_scorer",
+            "metadata": {"llm_lane": "bulk"},
+        }
+
+    @staticmethod
+    def _absorb(
+        pending: List[List[int]],
+        outputs: Sequence[Any],
+        results: Dict[int, ReplyAssessment],
+        failed: Dict[int, str],
+    ) -> List[List[int]]:
+        """记录各批次的结果，返回需要重试的批次
+
+        请求失败的批次对半拆分后重试；模型遗漏的会话单独组成新批次重试。
+        单个会话仍然失败时记入 failed，不生成评估结果，由调用方留在待分析队列中下次重试。
+        """
+        retry: List[List[int]] = []
+        for batch, output in zip(pending, outputs):
+            if isinstance(output, Exception):
+                logger.warning(f"{len(batch)}个会话的批量评估失败: {output}", agent_name="message_processor")
+                if len(batch) > 1:
+                    middle = len(batch) // 2
+                    retry.extend([batch[:middle], batch[middle:]])
+                else:
+                    failed[batch[0]] = f"评估失败: {output}"
+                continue
+
+            for assessment in output.assessments if output is not None else []:
+                if 1 <= assessment.index <= len(batch):
+                    index = batch[assessment.index - 1]
+                    results[index] = assessment.model_copy(update={"index": index, "source": "llm"})
+            missing = [index for index in batch if index not in results]
+            if not missing:
+                continue
+            if len(missing) < len(batch):
+                retry.append(missing)
+            elif len(batch) > 1:
+                middle = len(batch) // 2
+                retry.extend([batch[:middle], batch[middle:]])
+            else:
+                failed[batch[0]] = "模型未返回评估结果"
+        return retry
+
+    def _prepare(self, conversations: Sequence[PendingConversation]):
+        texts = [render_conversation(conversation) for conversation in conversations]
+        results: Dict[int, ReplyAssessment] = {}
+        for index, conversation in enumerate(conversations):
+            assessment = self.preclassify(conversation, index)
+            if assessment is not None:
+                results[index] = assessment
+        remaining = [index for index in range(len(conversations)) if index not in results]
+        self.stats["conversations"] += len(conversations)
+        self.stats["preclassified"] += len(results)
+        return texts, results, self.make_batches(texts, remaining)
+
+    def _finish(
+        self,
+        conversations: Sequence[PendingConversation],
+        results: Dict[int, ReplyAssessment],
+        failed: Dict[int, str],
+    ) -> ScoredReplies:
+        preclassified = sum(1 for result in results.values() if result.source != "llm")
+        logger.info(
+            f"HR回复评估: {len(conversations)}个会话，预分类{preclassified}个，失败{len(failed)}个，"
+            f"累计LLM调用{self.stats['llm_calls']}次",
+            agent_name="message_processor",
+        )
+        return ScoredReplies([results[index] for index in sorted(results)], failed)
+
+    def score(self, conversations: Sequence[PendingConversation]) -> ScoredReplies:
+        """评估待分析会话中的HR回复
+
+        Args:
+            conversations: InboxStore.pending() 返回的会话
+
+        Returns:
+            评估成功的结果（index 为会话在 conversations 中的下标）和重试后仍然失败的会话
+        """
+        texts, results, pending = self._prepare(conversations)
+        failed: Dict[int, str] = {}
+        while pending:
+            inputs = [self._messages(texts, batch) for batch in pending]
+            self.stats["llm_calls"] += len(inputs)
+            try:
+                outputs = self.structured_llm.batch(inputs, config=self._config(), return_exceptions=True)
+            except Exception as e:
+                # 整个 batch 调用失败时按每个批次都失败处理
+                outputs = [e] * len(inputs)
+            pending = self._absorb(pending, outputs, results, failed)
+        return self._finish(conversations, results, failed)
+
+    async def ascore(self, conversations: Sequence[PendingConversation]) -> ScoredReplies:
+        """score 的异步版本"""
+        texts, results, pending = self._prepare(conversations)
+        failed: Dict[int, str] = {}
+        while pending:
+            inputs = [self._messages(texts, batch) for batch in pending]
+            self.stats["llm_calls"] += len(inputs)
+            try:
+                outputs = await self.structured_llm.abatch(inputs, config=self._config(), return_exceptions=True)
+            except Exception as e:
+                outputs = [e] * len(inputs)
+            pending = self._absorb(pending, outputs, results, failed)
+        return self._finish(conversations, results, failed)
+
+
+def format_assessments(
+    conversations: Sequence[PendingConversation],
+    assessments: Sequence[ReplyAssessment],
+    failed: Sequence[int] = (),
+) -> str:
+    """把评估结果整理成按兴趣程度排列的文本，需要行动的会话在前
+
+    Args:
+        conversations: 评估的会话
+        assessments: 评估结果，index 为会话在 conversations 中的下标
+        failed: 评估失败的会话下标
+    """
+    labels = {
+        "send_resume": "发送简历", "answer_question": "回答问题", "schedule_interview": "确认面试",
+        "follow_up": "稍后跟进", "none": "无需行动",
+    }
+    order = sorted(
+        range(len(assessments)),
+        key=lambda i: (assessments[i].next_action in ("none", "follow_up"), -assessments[i].interest),
+    )
+    lines = [f"共分析{len(assessments)}个会话的HR回复:"]
+    for i in order:
+        assessment = assessments[i]
+        conversation = conversations[assessment.index]
+        name = " ".join(part for part in (conversation.company, conversation.hr_name) if part) or conversation.conversation_id
+        lines.append(f"- {name}（兴趣{assessment.interest}）: {labels[assessment.next_action]}，{assessment.reason}")
+    if failed:
+        lines.append(f"另有{len(failed)}个会话评估失败，已保留在待分析队列中，下次重新分析")
+    return "\n".join(lines)
+
+
+@functools.lru_cache(maxsize=None)
+def get_hr_reply_scorer() -> HRReplyScorer:
+    """获取默认的HR回复评估器，首次使用时才创建模型"""
+    return HRReplyScorer()
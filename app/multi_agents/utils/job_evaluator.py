@@ -0,0 +1,225 @@
+"""
+批量岗位评估
+
+浏览器智能体逐个岗位卡片判断是否符合用户需求时，每张卡片都要消耗一次 LLM 推理。
+BatchJobEvaluator 把多个岗位打包进一次结构化输出请求，每个岗位返回一条评估结论；
+每批岗位数按模型上下文窗口估算，多批之间并发执行，请求走调度器的 BULK 通道，
+不会挤占交互式节点的配额。一页 60 个岗位通常只需要 2~3 次 LLM 调用。
+"""
+import functools
+import re
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from pydantic import BaseModel, Field
+
+from app.config.config_com import (
+    JOB_EVAL_CONTEXT_WINDOW, JOB_EVAL_MAX_BATCH, JOB_EVAL_CONCURRENCY, JOB_EVAL_ITEM_MAX_CHARS,
+)
+from app.multi_agents.utils.context_manager import estimate_tokens
+from app.multi_agents.utils.logger import get_logger
+
+logger = get_logger(__name__, level="debug")
+
+# 岗位可以是卡片文本，也可以是字段字典（如 {"岗位": ..., "薪资": ...}）
+Listing = Union[str, Mapping[str, Any]]
+
+EVALUATOR_PROMPT = """你是岗位筛选助手。根据用户的岗位要求，逐一判断下面编号的每个岗位是否符合要求。
+- 每个岗位都必须返回一条结论，index 使用岗位前方括号中的编号
+- score 为 0~100 的匹配分数，match 表示是否建议沟通
+- reason 用一句话说明理由，重点关注薪资和岗位职责"""
+
+# 每个岗位的结论在输出中大约占用的 token 数
+_VERDICT_TOKENS = 60
+
+# format_verdicts 输出中推荐岗位的行: - 第N个 标题（分数分）: 理由 链接
+_RECOMMENDED_LINE = re.compile(r"^\s*- 第\d+个 (.+?)（\d+分）: (.*?)(?: ((?:https?://|/)\S+))?$", re.M)
+
+
+class JobVerdict(BaseModel):
+    """单个岗位的评估结论"""
+
+    index: int = Field(description="岗位编号")
+    match: bool = Field(description="是否符合用户要求，建议沟通")
+    score: int = Field(description="匹配分数，0~100")
+    reason: str = Field(description="一句话理由")
+
+
+class JobVerdictBatch(BaseModel):
+    """一批岗位的评估结论"""
+
+    verdicts: List[JobVerdict] = Field(description="每个岗位一条评估结论")
+
+
+def render_listing(listing: Listing, max_chars: int = JOB_EVAL_ITEM_MAX_CHARS) -> str:
+    """把岗位转换为单行紧凑文本，超出长度时截断"""
+    if isinstance(listing, Mapping):
+        text = "；".join(f"{key}: {value}" for key, value in listing.items() if value not in (None, ""))
+    else:
+        text = " ".join(str(listing).split())
+    return text if len(text) <= max_chars else text[:max_chars] + "…"
+
+
+def parse_recommended(text: str) -> List[str]:
+    """从评估结果文本（boss_job_actions.format_verdicts 的输出）中取出推荐沟通的岗位
+
+    岗位查找智能体的结果是文本（进程池模式下由子进程返回），简历智能体据此定制简历。
+
+    Args:
+        text: 包含评估结果的文本，如岗位查找智能体的执行结果
+
+    Returns:
+        "标题 理由" 形式的岗位描述，按出现顺序去重
+    """
+    jobs: List[str] = []
+    for title, reason, _ in _RECOMMENDED_LINE.findall(text or ""):
+        job = f"{title.strip()} {reason.strip()}".strip()
+        if job not in jobs:
+            jobs.append(job)
+    return jobs
+
+
+class BatchJobEvaluator:
+    """把多个岗位打包成结构化输出请求进行批量评估"""
+
+    def __init__(
+        self,
+        llm: Any = None,
+        context_window: int = JOB_EVAL_CONTEXT_WINDOW,
+        max_batch_size: int = JOB_EVAL_MAX_BATCH,
+        max_concurrency: int = JOB_EVAL_CONCURRENCY,
+    ):
+        """
+        Args:
+            llm: 支持 with_structured_output 的聊天模型，默认使用 BASIC 级别的模型
+            context_window: 模型上下文窗口（token），决定每批最多能放多少岗位
+            max_batch_size: 每批岗位数上限，批次过大时模型容易遗漏条目
+            max_concurrency: 同时进行的批次数
+        """
+        self._llm = llm
+        self.context_window = context_window
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
+        self._structured = None
+
+    @property
+    def structured_llm(self):
+        if self._structured is None:
+            if self._llm is None:
+                from app.multi_agents.utils.llm_factory import get_llm_by_type, ThinkingLevel
+                self._llm = get_llm_by_type(ThinkingLevel.BASIC)
+            self._structured = self._llm.with_structured_output(JobVerdictBatch)
+        return self._structured
+
+    def make_batches(self, texts: Sequence[str], requirements: str) -> List[List[int]]:
+        """按上下文窗口把岗位顺序分批
+
+        每批的输入（系统提示、用户要求、岗位文本）加上预留的输出 token 不超过上下文窗口。
+
+        Returns:
+            每批岗位在 texts 中的下标列表
+        """
+        budget = self.context_window - estimate_tokens(EVALUATOR_PROMPT) - estimate_tokens(requirements) - 50
+        batches: List[List[int]] = []
+        current: List[int] = []
+        used = 0
+        for index, text in enumerate(texts):
+            cost = estimate_tokens(text) + 8 + _VERDICT_TOKENS
+            if current and (used + cost > budget or len(current) >= self.max_batch_size):
+                batches.append(current)
+                current, used = [], 0
+            current.append(index)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    @staticmethod
+    def _messages(requirements: str, texts: Sequence[str], batch: Sequence[int]) -> List[Any]:
+        # 批内使用从 1 开始的局部编号，结果再映射回原始下标
+        items = "\n".join(f"[{number}] {texts[index]}" for number, index in enumerate(batch, 1))
+        return [
+            SystemMessage(content=EVALUATOR_PROMPT),
+            HumanMessage(content=f"## 岗位要求\n{requirements}\n\n## 岗位列表（共{len(batch)}个）\n{items}"),
+        ]
+
+    def _config(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "run_name": "batch_job_evaluator",
+            "metadata": {"llm_lane": "bulk"},
+        }
+
+    @staticmethod
+    def _absorb(
+        pending: List[List[int]],
+        outputs: Sequence[Any],
+        results: Dict[int, JobVerdict],
+    ) -> List[List[int]]:
+        """记录各批次的结论，返回需要重试的批次
+
+        请求失败的批次对半拆分后重试（例如超出上下文窗口）；模型遗漏的岗位单独组成新批次重试。
+        重试批次总是比原批次小，因此最终一定结束；单个岗位仍然失败时记为不匹配。
+        """
+        retry: List[List[int]] = []
+        for batch, output in zip(pending, outputs):
+            if isinstance(output, Exception):
+                logger.warning(f"{len(batch)}个岗位的批量评估失败: {output}", agent_name="job_evaluator")
+                if len(batch) > 1:
+                    middle = len(batch) // 2
+                    retry.extend([batch[:middle], batch[middle:]])
+                else:
+                    results[batch[0]] = JobVerdict(index=batch[0], match=False, score=0, reason=f"评估失败: {output}")
+                continue
+
+            for verdict in output.verdicts if output is not None else []:
+                if 1 <= verdict.index <= len(batch):
+                    index = batch[verdict.index - 1]
+                    results[index] = verdict.model_copy(update={"index": index})
+            missing = [index for index in batch if index not in results]
+            if not missing:
+                continue
+            if len(missing) < len(batch):
+                retry.append(missing)
+            elif len(batch) > 1:
+                middle = len(batch) // 2
+                retry.extend([batch[:middle], batch[middle:]])
+            else:
+                results[batch[0]] = JobVerdict(index=batch[0], match=False, score=0, reason="模型未返回评估结果")
+        return retry
+
+    def evaluate(self, listings: Sequence[Listing], requirements: str) -> List[JobVerdict]:
+        """批量评估岗位
+
+        Args:
+            listings: 岗位列表
+            requirements: 用户的岗位要求
+
+        Returns:
+            与 listings 一一对应的评估结论，index 为岗位在 listings 中的下标
+        """
+        texts = [render_listing(listing) for listing in listings]
+        results: Dict[int, JobVerdict] = {}
+        pending = self.make_batches(texts, requirements)
+        while pending:
+            inputs = [self._messages(requirements, texts, batch) for batch in pending]
+            outputs = self.structured_llm.batch(inputs, config=self._config(), return_exceptions=True)
+            pending = self._absorb(pending, outputs, results)
+        return [results[index] for index in range(len(texts))]
+
+    async def aevaluate(self, listings: Sequence[Listing], requirements: str) -> List[JobVerdict]:
+        """evaluate 的异步版本"""
+        texts = [render_listing(listing) for listing in listings]
+        results: Dict[int, JobVerdict] = {}
+        pending = self.make_batches(texts, requirements)
+        while pending:
+            inputs = [self._messages(requirements, texts, batch) for batch in pending]
+            outputs = await self.structured_llm.abatch(inputs, config=self._config(), return_exceptions=True)
+            pending = self._absorb(pending, outputs, results)
+        return [results[index] for index in range(len(texts))]
+
+
+@functools.lru_cache(maxsize=None)
+def get_job_evaluator() -> BatchJobEvaluator:
+    """获取默认的批量岗位评估器，首次使用时才创建模型"""
+    return BatchJobEvaluator()
@@ -0,0 +1,441 @@
+"""
+岗位市场数据的列式存储与聚合
+
+岗位搜索（search_job_listings）从搜索结果页读取到的岗位卡片先写入 SQLite 暂存表（多个进程可以同时写入），
+data_collector 智能体把暂存的岗位解析为结构化字段（薪资、城市、经验、学历、公司规模、技能），
+按月份分区追加为 NumPy 列式文件（.npz）：
+- 数值列（薪资上下限、薪数、公司规模、时间）使用紧凑的定长数组，未知值为 NaN / -1
+- 字符串列（城市、关键词、岗位、公司、经验、学历）使用字典编码：每个分区一张字符串表，列中只保存下标
+- 每个岗位的技能列表按 CSR 方式保存（偏移数组 + 技能下标数组）
+
+读取时合并各分区的字符串表并重新映射下标，按岗位去重后由向量化的聚合函数（分组分位数、计数）
+直接计算，百万级岗位的市场统计在几秒内完成，不需要再让 LLM 阅读岗位列表。
+"""
+import functools
+import glob
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config.config_com import JOB_MARKET_DIR
+from app.multi_agents.utils.job_search_cache import CITY_CODES, JobQuery
+from app.multi_agents.utils.logger import get_logger
+from app.multi_agents.utils.skill_keywords import extract_keywords
+
+logger = get_logger(__name__, level="debug")
+
+# 字典编码的字符串列
+STRING_COLUMNS = ("city", "keyword", "title", "company", "experience", "education")
+# 数值列及其类型
+NUMERIC_COLUMNS = {
+    "job_key": np.uint64,
+    "seen_at": np.float64,
+    "salary_low": np.float32,
+    "salary_high": np.float32,
+    "salary_months": np.uint8,
+    "size_low": np.int32,
+    "size_high": np.int32,
+}
+
+_SALARY = re.compile(r"(\d+(?:\.\d+)?)\s*-\s*(\d+(?:\.\d+)?)\s*(k|K|元/天|元/时|万)(?:\s*·\s*(\d+)薪)?")
+_EXPERIENCE = re.compile(r"^(经验不限|在校/应届|应届生?|\d+-\d+年|\d+年以上|\d+年以内|1年以内)$")
+_EDUCATION = re.compile(r"^(学历不限|初中及以下|中专/中技|高中|大专|本科|硕士|博士)$")
+_COMPANY_SIZE = re.compile(r"^(?:(\d+)-(\d+)人|(\d+)人以上)$")
+# 融资阶段和常见行业等不是公司名的卡片行
+_NOT_COMPANY = re.compile(
+    r"^(未融资|天使轮|A\+?轮|B轮|C轮|D轮及以上|已上市|不需要融资|"
+    r"互联网|计算机软件|人工智能|电子商务|游戏|金融|IT服务|企业服务|数据服务|通信|半导体|.{0,6}/.{0,6})$"
+)
+
+
+class ListingRecord(NamedTuple):
+    """解析后的岗位"""
+    job_key: int
+    seen_at: float
+    city: str
+    keyword: str
+    title: str
+    company: str
+    experience: str
+    education: str
+    # 月薪上下限（K），面议或无法识别时为 NaN
+    salary_low: float
+    salary_high: float
+    salary_months: int
+    # 公司规模上下限（人），未知为 -1
+    size_low: int
+    size_high: int
+    skills: Tuple[str, ...]
+
+
+def job_key(text: str, url: str = "") -> int:
+    """岗位的去重键：有详情链接时按链接（去掉查询参数），否则按卡片文本"""
+    source = url.split("?")[0] if url else " ".join(text.split())
+    return int.from_bytes(hashlib.sha1(source.encode("utf-8")).digest()[:8], "little")
+
+
+def parse_salary(text: str) -> Tuple[float, float, int]:
+    """把薪资描述（"20-30K·14薪"、"200-300元/天"、"1-1.5万"）转换为月薪上下限（K）和薪数"""
+    match = _SALARY.search(text or "")
+    if not match:
+        return float("nan"), float("nan"), 12
+    low, high, unit = float(match.group(1)), float(match.group(2)), match.group(3)
+    if unit == "万":
+        low, high = low * 10, high * 10
+    elif unit == "元/天":
+        # 按每月21.75个工作日折算
+        low, high = low * 21.75 / 1000, high * 21.75 / 1000
+    elif unit == "元/时":
+        low, high = low * 8 * 21.75 / 1000, high * 8 * 21.75 / 1000
+    return low, high, int(match.group(4) or 12)
+
+
+def parse_listing(listing: Mapping[str, Any], keyword: str = "", city: str = "", seen_at: Optional[float] = None) -> ListingRecord:
+    """把岗位卡片（{"text": 卡片文本, "url": 详情链接}）解析为结构化字段
+
+    卡片文本每行一个字段，顺序因页面版本而异，按各字段的格式识别；第一行为岗位名，
+    经验/学历之后第一个无法识别的行作为公司名。
+
+    Args:
+        listing: search_job_listings 读取的岗位卡片
+        keyword: 搜索关键词（规范化后）
+        city: 搜索城市，卡片中没有城市时使用
+        seen_at: 看到岗位的时间，默认为当前时间
+    """
+    text = listing.get("text", "")
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    title = lines[0] if lines else ""
+    salary_low, salary_high, months = parse_salary(text)
+    experience = education = company = ""
+    size_low = size_high = -1
+    for line in lines[1:]:
+        area = line.split("·")[0]
+        if area in CITY_CODES and area != "全国":
+            city = area
+        elif _EXPERIENCE.match(line):
+            experience = line
+        elif _EDUCATION.match(line):
+            education = line
+        elif _COMPANY_SIZE.match(line):
+            match = _COMPANY_SIZE.match(line)
+            size_low, size_high = (int(match.group(1)), int(match.group(2))) if match.group(1) else (int(match.group(3)), -1)
+        elif not company and (experience or education) and not _SALARY.search(line) and not _NOT_COMPANY.match(line):
+            company = line
+    return ListingRecord(
+        job_key(text, listing.get("url", "")), time.time() if seen_at is None else seen_at,
+        city or "全国", keyword, title, company, experience, education,
+        salary_low, salary_high, months, size_low, size_high, tuple(sorted(extract_keywords(text))),
+    )
+
+
+class MarketData:
+    """内存中的列式岗位数据，字符串列和技能为全局字符串表的下标"""
+
+    def __init__(self, columns: Dict[str, np.ndarray], strings: np.ndarray, skill_offsets: np.ndarray, skill_codes: np.ndarray):
+        self.columns = columns
+        self.strings = strings
+        self.skill_offsets = skill_offsets
+        self.skill_codes = skill_codes
+
+    def __len__(self) -> int:
+        return len(self.columns["job_key"])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def code(self, value: str) -> int:
+        """字符串在字符串表中的下标，不存在时为 -1"""
+        index = int(np.searchsorted(self.strings, value))
+        return index if index < len(self.strings) and self.strings[index] == value else -1
+
+    def decode(self, name: str) -> np.ndarray:
+        """字符串列解码为字符串数组"""
+        return self.strings[self.columns[name]]
+
+    @property
+    def salary_mid(self) -> np.ndarray:
+        """月薪中位估计（K）: 上下限的平均值"""
+        return (self.columns["salary_low"] + self.columns["salary_high"]) / 2
+
+    def take(self, indices: np.ndarray) -> "MarketData":
+        """按下标（或布尔掩码）选取岗位"""
+        indices = np.flatnonzero(indices) if indices.dtype == bool else np.asarray(indices, dtype=np.int64)
+        counts = np.diff(self.skill_offsets)[indices]
+        starts = self.skill_offsets[:-1][indices]
+        positions = np.repeat(starts - np.concatenate(([0], np.cumsum(counts)[:-1])), counts) + np.arange(counts.sum())
+        return MarketData(
+            {name: column[indices] for name, column in self.columns.items()},
+            self.strings,
+            np.concatenate(([0], np.cumsum(counts))).astype(np.int64),
+            self.skill_codes[positions],
+        )
+
+    def filter(self, skill: Optional[str] = None, **equals: str) -> "MarketData":
+        """按字符串列的取值和技能筛选岗位，如 filter(city="深圳", skill="python")"""
+        mask = np.ones(len(self), dtype=bool)
+        for name, value in equals.items():
+            mask &= self.columns[name] == self.code(value)
+        if skill is not None:
+            owners = np.repeat(np.arange(len(self)), np.diff(self.skill_offsets))
+            has_skill = np.zeros(len(self), dtype=bool)
+            has_skill[owners[self.skill_codes == self.code(skill)]] = True
+            mask &= has_skill
+        return self.take(mask)
+
+    def dedupe(self) -> "MarketData":
+        """同一岗位被多次看到时只保留最近的一条"""
+        keys, seen_at = self.columns["job_key"], self.columns["seen_at"]
+        order = np.lexsort((-seen_at, keys))
+        _, first = np.unique(keys[order], return_index=True)
+        return self.take(np.sort(order[first]))
+
+
+def _empty_data() -> MarketData:
+    columns = {name: np.zeros(0, dtype=dtype) for name, dtype in NUMERIC_COLUMNS.items()}
+    columns.update({name: np.zeros(0, dtype=np.int64) for name in STRING_COLUMNS})
+    return MarketData(columns, np.array([], dtype=str), np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64))
+
+
+def encode_records(records: Sequence[ListingRecord]) -> Dict[str, np.ndarray]:
+    """把岗位编码为一个分区的列式数组（字符串列字典编码，技能为 CSR 格式）"""
+    table: Dict[str, int] = {}
+
+    def encode(value: str) -> int:
+        return table.setdefault(value, len(table))
+
+    arrays: Dict[str, np.ndarray] = {
+        name: np.fromiter((getattr(record, name) for record in records), dtype=dtype, count=len(records))
+        for name, dtype in NUMERIC_COLUMNS.items()
+    }
+    for name in STRING_COLUMNS:
+        arrays[name] = np.fromiter((encode(getattr(record, name)) for record in records), dtype=np.int32, count=len(records))
+    counts = np.fromiter((len(record.skills) for record in records), dtype=np.int64, count=len(records))
+    arrays["skill_offsets"] = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+    arrays["skill_codes"] = np.fromiter(
+        (encode(skill) for record in records for skill in record.skills), dtype=np.int32, count=int(counts.sum()),
+    )
+    arrays["strings"] = np.array(list(table), dtype=str)
+    return arrays
+
+
+def merge_partitions(partitions: Iterable[Mapping[str, np.ndarray]]) -> MarketData:
+    """合并多个分区：各分区的字符串表合并为一张排好序的全局字符串表，并重新映射字符串列和技能的下标"""
+    partitions = [partition for partition in partitions if len(partition["job_key"])]
+    if not partitions:
+        return _empty_data()
+    strings, inverse = np.unique(np.concatenate([partition["strings"] for partition in partitions]), return_inverse=True)
+    offsets = np.cumsum([0] + [len(partition["strings"]) for partition in partitions])
+    columns: Dict[str, List[np.ndarray]] = {name: [] for name in (*NUMERIC_COLUMNS, *STRING_COLUMNS)}
+    skill_offsets, skill_codes, base = [np.zeros(1, dtype=np.int64)], [], 0
+    for partition, offset in zip(partitions, offsets):
+        remap = inverse[offset:offset + len(partition["strings"])]
+        for name in NUMERIC_COLUMNS:
+            columns[name].append(partition[name])
+        for name in STRING_COLUMNS:
+            columns[name].append(remap[partition[name]])
+        skill_codes.append(remap[partition["skill_codes"]])
+        skill_offsets.append(partition["skill_offsets"][1:] + base)
+        base += len(partition["skill_codes"])
+    return MarketData(
+        {name: np.concatenate(parts) for name, parts in columns.items()},
+        strings,
+        np.concatenate(skill_offsets),
+        np.concatenate(skill_codes),
+    )
+
+
+def _group_codes(data: MarketData, by: str) -> Tuple[np.ndarray, np.ndarray]:
+    """分组的下标和每行对应的岗位下标；按技能分组时一个岗位属于多个组"""
+    if by == "skill":
+        return data.skill_codes, np.repeat(np.arange(len(data)), np.diff(data.skill_offsets))
+    return data[by], np.arange(len(data))
+
+
+def grouped_percentiles(
+    groups: np.ndarray,
+    values: np.ndarray,
+    percentiles: Sequence[float],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """向量化的分组分位数（线性插值，与 np.percentile 的默认方法一致）
+
+    Args:
+        groups: 每个值所属的组
+        values: 值，NaN 会被忽略
+        percentiles: 0~100 的分位点
+
+    Returns:
+        (组, 每组的值数量, 形状为 [组数, 分位点数] 的分位数)
+    """
+    valid = ~np.isnan(values)
+    groups, values = groups[valid], values[valid]
+    order = np.lexsort((values, groups))
+    groups, values = groups[order], values[order]
+    unique, starts, counts = np.unique(groups, return_index=True, return_counts=True)
+    positions = starts[:, None] + (counts[:, None] - 1) * (np.asarray(percentiles, dtype=np.float64)[None, :] / 100)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, (starts + counts - 1)[:, None])
+    fraction = positions - lower
+    result = values[lower] + (values[upper] - values[lower]) * fraction if len(values) else np.zeros((0, len(percentiles)))
+    return unique, counts, result
+
+
+def salary_percentiles(
+    data: MarketData,
+    by: str = "city",
+    percentiles: Sequence[float] = (25, 50, 75),
+    min_count: int = 1,
+    annual: bool = False,
+) -> Dict[str, Dict[str, float]]:
+    """按城市/关键词/技能等分组的月薪（K）分位数
+
+    Args:
+        data: 岗位数据
+        by: 分组的列名（city、keyword、title、company、experience、education）或 "skill"
+        percentiles: 分位点
+        min_count: 岗位数少于该值的组不返回
+        annual: 为 True 时按薪数折算为年薪（K）
+
+    Returns:
+        组名 -> {"count": 岗位数, "p25": ..., "p50": ..., ...}，按岗位数从多到少排列
+    """
+    mid = data.salary_mid.astype(np.float64)
+    if annual:
+        mid = mid * data["salary_months"]
+    codes, rows = _group_codes(data, by)
+    groups, counts, values = grouped_percentiles(codes, mid[rows], percentiles)
+    order = np.argsort(-counts, kind="stable")
+    result: Dict[str, Dict[str, float]] = {}
+    for i in order[counts[order] >= min_count]:
+        stats = {"count": int(counts[i])}
+        stats.update({f"p{p:g}": round(float(v), 2) for p, v in zip(percentiles, values[i])})
+        result[str(data.strings[groups[i]])] = stats
+    return result
+
+
+def count_by(data: MarketData, by: str = "skill", top: Optional[int] = None) -> Dict[str, int]:
+    """按列或技能统计岗位数，按数量从多到少排列"""
+    codes, _ = _group_codes(data, by)
+    counts = np.bincount(codes, minlength=len(data.strings))
+    order = np.argsort(-counts, kind="stable")
+    order = order[counts[order] > 0][:top]
+    return {str(data.strings[i]): int(counts[i]) for i in order}
+
+
+class JobMarketStore:
+    """岗位暂存表 + 按月分区的列式文件"""
+
+    def __init__(self, root: str = JOB_MARKET_DIR):
+        """
+        Args:
+            root: 数据目录，暂存数据库和分区文件都保存在该目录下
+        """
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(root, "staging.db"), check_same_thread=False, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS staged_listings ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, keyword TEXT NOT NULL, city TEXT NOT NULL, "
+            "text TEXT NOT NULL, url TEXT, seen_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def stage(self, query: JobQuery, listings: Sequence[Mapping[str, Any]]) -> None:
+        """暂存一次搜索读取到的岗位卡片"""
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO staged_listings (keyword, city, text, url, seen_at) VALUES (?, ?, ?, ?, ?)",
+                [(query.keyword, query.city, listing.get("text", ""), listing.get("url", ""), now) for listing in listings],
+            )
+            self.conn.commit()
+
+    def staged_count(self) -> int:
+        """暂存表中等待写入分区的岗位数"""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM staged_listings").fetchone()[0]
+
+    def append(self, records: Sequence[ListingRecord]) -> List[str]:
+        """把岗位按月份追加为新的分区文件
+
+        Returns:
+            写入的分区文件路径
+        """
+        by_month: Dict[str, List[ListingRecord]] = {}
+        for record in records:
+            by_month.setdefault(time.strftime("%Y-%m", time.localtime(record.seen_at)), []).append(record)
+        paths = []
+        for month, items in sorted(by_month.items()):
+            directory = os.path.join(self.root, f"month={month}")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"part-{time.time_ns()}-{os.getpid()}.npz")
+            # 先写临时文件再改名，读取方不会看到写了一半的分区
+            temp = path[:-4] + ".tmp.npz"
+            np.savez(temp, **encode_records(items))
+            os.replace(temp, path)
+            paths.append(path)
+        return paths
+
+    def flush(self) -> int:
+        """把暂存的岗位解析后写入分区文件并清空暂存表
+
+        Returns:
+            写入的岗位数
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, keyword, city, text, url, seen_at FROM staged_listings ORDER BY id"
+            ).fetchall()
+        if not rows:
+            return 0
+        records = [
+            parse_listing({"text": text, "url": url}, keyword, city, seen_at)
+            for _, keyword, city, text, url, seen_at in rows
+        ]
+        self.append(records)
+        with self.lock:
+            self.conn.execute("DELETE FROM staged_listings WHERE id <= ?", (rows[-1][0],))
+            self.conn.commit()
+        logger.info(f"岗位市场数据: 写入{len(records)}个岗位", agent_name="data_collector")
+        return len(records)
+
+    def partitions(self, months: Optional[Sequence[str]] = None) -> List[str]:
+        """分区文件路径，months 为 "YYYY-MM" 列表时只返回这些月份的分区"""
+        paths = sorted(glob.glob(os.path.join(self.root, "month=*", "part-*.npz")))
+        paths = [path for path in paths if not path.endswith(".tmp.npz")]
+        if months is not None:
+            wanted = {f"month={month}" for month in months}
+            paths = [path for path in paths if os.path.basename(os.path.dirname(path)) in wanted]
+        return paths
+
+    def load(self, months: Optional[Sequence[str]] = None, dedupe: bool = True) -> MarketData:
+        """读取分区文件并合并
+
+        Args:
+            months: 只读取这些月份（"YYYY-MM"），默认全部
+            dedupe: 同一岗位多次出现时只保留最近的一条
+        """
+        partitions = []
+        for path in self.partitions(months):
+            with np.load(path) as archive:
+                partitions.append({name: archive[name] for name in archive.files})
+        data = merge_partitions(partitions)
+        return data.dedupe() if dedupe and len(data) else data
+
+    def close(self) -> None:
+        """关闭暂存数据库连接"""
+        with self.lock:
+            self.conn.close()
+
+
+@functools.lru_cache(maxsize=None)
+def get_job_market_store() -> JobMarketStore:
+    """获取默认的岗位市场数据存储"""
+    return JobMarketStore()
@@ -0,0 +1,181 @@
+"""
+岗位搜索结果缓存
+
+很多用户的搜索几乎相同（"深圳 Python 开发"、"Python开发 深圳"），每次都由浏览器打开搜索页、
+滚动加载岗位列表，代价很高。本模块把搜索条件规范化为 JobQuery（关键词、城市、薪资档位、页码），
+以它为键把岗位列表保存在 SQLite 中，在有效期内供所有会话和岗位查找工作进程复用。
+只有针对具体岗位的"立即沟通"操作才需要用户自己的浏览器会话。
+"""
+import functools
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+from urllib.parse import urlencode
+
+from app.config.config_com import JOB_SEARCH_CACHE_PATH, JOB_SEARCH_CACHE_TTL
+from app.multi_agents.utils.logger import get_logger
+
+logger = get_logger(__name__, level="debug")
+
+BOSS_SEARCH_URL = "https://www.zhipin.com/web/geek/job"
+
+# Boss直聘的城市编码
+CITY_CODES = {
+    "全国": "100010000",
+    "北京": "101010100",
+    "上海": "101020100",
+    "天津": "101030100",
+    "重庆": "101040100",
+    "西安": "101110100",
+    "南京": "101190100",
+    "苏州": "101190400",
+    "武汉": "101200100",
+    "杭州": "101210100",
+    "厦门": "101230200",
+    "长沙": "101250100",
+    "成都": "101270100",
+    "广州": "101280100",
+    "深圳": "101280600",
+}
+
+# Boss直聘的薪资档位：(月薪下限K, 档位编码)，按下限从高到低匹配
+SALARY_BANDS = [(50, "407"), (20, "406"), (10, "405"), (5, "404"), (3, "403"), (0, "402")]
+
+# 关键词中与搜索内容无关的词
+_FILLER_WORDS = (
+    "在boss直聘上", "boss直聘上", "boss直聘", "帮我", "请", "寻找", "查找", "搜索", "找", "去", "的", "工作", "岗位", "职位", "招聘",
+)
+
+_SALARY_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(k|千|万|w)?", re.I)
+
+
+class JobQuery(NamedTuple):
+    """规范化后的搜索条件"""
+    keyword: str
+    city: str
+    salary: str
+    page: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.keyword}|{self.city}|{self.salary}|{self.page}"
+
+    @property
+    def url(self) -> str:
+        """Boss直聘搜索结果页地址"""
+        params = {"query": self.keyword, "city": CITY_CODES.get(self.city, CITY_CODES["全国"])}
+        if self.salary:
+            params["salary"] = self.salary
+        if self.page > 1:
+            params["page"] = self.page
+        return f"{BOSS_SEARCH_URL}?{urlencode(params)}"
+
+
+def normalize_city(text: str) -> str:
+    """城市名去掉"市"等后缀，空值视为全国"""
+    text = (text or "").strip().rstrip("市")
+    return text or "全国"
+
+
+def find_city(text: str) -> Optional[str]:
+    """在文本中查找已知的城市名"""
+    for city in CITY_CODES:
+        if city != "全国" and city in text:
+            return city
+    return None
+
+
+def salary_band(text: str) -> str:
+    """把薪资描述（如"2万以上"、"20-30K"、"8000"）转换为按下限划分的薪资档位编码，没有薪资要求时为空字符串"""
+    match = _SALARY_PATTERN.search(text or "")
+    if not match:
+        return ""
+    value, unit = float(match.group(1)), (match.group(2) or "").lower()
+    if unit in ("万", "w"):
+        value *= 10
+    elif not unit and value >= 1000:
+        value /= 1000
+    return next(code for lower, code in SALARY_BANDS if value >= lower)
+
+
+def normalize_keyword(text: str) -> str:
+    """规范化搜索关键词：小写、去掉城市名和无关词、按词排序，使语序不同的相同搜索得到同一个键"""
+    text = (text or "").lower()
+    for city in CITY_CODES:
+        text = text.replace(city, " ")
+    for word in _FILLER_WORDS:
+        text = text.replace(word, " ")
+    # 英文与中文之间补空格："python开发" 与 "python 开发" 视为相同
+    text = re.sub(r"(?<=[a-z0-9+#])(?=[一-鿿])|(?<=[一-鿿])(?=[a-z0-9+#])", " ", text)
+    tokens = re.findall(r"[\w+#.]+", text)
+    return " ".join(sorted(set(token.strip(".") for token in tokens if token.strip("."))))
+
+
+def make_job_query(keyword: str, city: str = "", salary: str = "", page: int = 1) -> JobQuery:
+    """根据浏览器智能体给出的搜索条件创建规范化的 JobQuery，城市未单独给出时从关键词中识别"""
+    city = normalize_city(city) if city else (find_city(keyword) or "全国")
+    return JobQuery(normalize_keyword(keyword), city, salary_band(salary), max(int(page or 1), 1))
+
+
+class JobSearchCache:
+    """基于 SQLite 的岗位搜索结果缓存，多个进程可以共享同一个数据库文件"""
+
+    def __init__(self, db_path: str = JOB_SEARCH_CACHE_PATH, ttl: float = JOB_SEARCH_CACHE_TTL):
+        """
+        Args:
+            db_path: SQLite 数据库文件路径，":memory:" 表示内存数据库
+            ttl: 缓存有效期（秒）
+        """
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_search ("
+            "key TEXT PRIMARY KEY, listings TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def get(self, query: JobQuery) -> Optional[List[Dict[str, Any]]]:
+        """读取有效期内的岗位列表，未命中或已过期时返回 None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT listings FROM job_search WHERE key = ? AND created_at > ?",
+                (query.key, time.time() - self.ttl),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        logger.debug(f"岗位搜索缓存命中: {query.key}", agent_name="job_find")
+        return json.loads(row[0])
+
+    def put(self, query: JobQuery, listings: List[Dict[str, Any]]) -> None:
+        """保存岗位列表，同时清理已过期的记录"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO job_search (key, listings, created_at) VALUES (?, ?, ?)",
+                (query.key, json.dumps(listings, ensure_ascii=False), now),
+            )
+            self.conn.execute("DELETE FROM job_search WHERE created_at <= ?", (now - self.ttl,))
+            self.conn.commit()
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self.lock:
+            self.conn.close()
+
+
+@functools.lru_cache(maxsize=None)
+def get_job_search_cache() -> JobSearchCache:
+    """获取默认的岗位搜索结果缓存"""
+    return JobSearchCache()
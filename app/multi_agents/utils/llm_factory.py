@@ -4,8 +4,10 @@ from enum import Enum, auto
 import os
 from app.config.config_ai import (
     DEEPSEEK_API_KEY, DEEPSEEK_API_BASE, DEEPSEEK_MODEL,
-    DASHSCOPE_API_KEY, QWEN_MODEL
+    DASHSCOPE_API_KEY, QWEN_MODEL,
+    OPENAI_API_KEY, OPENAI_API_BASE, OPENAI_MODEL
 )
+from app.config.config_com import LLM_SCHEDULER_ENABLED, LLM_ROUTING_ENABLED, LLM_ROUTES, LLM_HEDGE_DELAYS, REPLAY_MODE
 
 class LLMProviderType(Enum):
     """LLM提供商类型枚举"""
@@ -36,9 +38,18 @@ class LLMProvider(ABC):
         """返回配置好的LLM实例"""
         pass
 
+    @classmethod
+    def is_available(cls) -> bool:
+        """是否已配置可用（API Key等），路由时只考虑可用的提供商"""
+        return True
+
 class DeepSeekProvider(LLMProvider):
     """DeepSeek LLM提供商实现"""
     
+    @classmethod
+    def is_available(cls) -> bool:
+        return bool(DEEPSEEK_API_KEY and DEEPSEEK_API_BASE and DEEPSEEK_MODEL)
+
     def get_llm(self, **kwargs) -> Any:
         from langchain_deepseek import ChatDeepSeek
         print("=="*200)
@@ -53,7 +64,8 @@ class DeepSeekProvider(LLMProvider):
             "temperature": 0,
             "max_tokens": None,
             "timeout": 120,
-            "max_retries": 5,
+            # 限流由调度器统一处理，客户端只做少量重试，避免限流时放大请求量
+            "max_retries": 2,
             "default_headers": {"Connection": "keep-alive"}
         }
         
@@ -65,12 +77,40 @@ class DeepSeekProvider(LLMProvider):
 class OpenAIProvider(LLMProvider):
     """OpenAI LLM提供商实现"""
     
+    @classmethod
+    def is_available(cls) -> bool:
+        return bool(OPENAI_API_KEY)
+
     def get_llm(self, **kwargs) -> Any:
-        pass
+        """
+        OpenAI（或任意 OpenAI 兼容服务）LLM实现，基于 langchain_openai.ChatOpenAI
+        支持参数：api_key, base_url, model, temperature, max_tokens 等
+        """
+        from langchain_openai import ChatOpenAI
+        # 默认配置
+        config = {
+            "api_key": OPENAI_API_KEY,
+            "model": OPENAI_MODEL,
+            "temperature": 0,
+            "max_tokens": None,
+            "timeout": 120,
+            "max_retries": 2,
+        }
+        if OPENAI_API_BASE:
+            config["base_url"] = OPENAI_API_BASE
+        
+        # 使用传入的参数覆盖默认配置
+        config.update(kwargs)
+        
+        return ChatOpenAI(**config)
 
 class QianWenProvider(LLMProvider):
     """千问 LLM提供商实现"""
     
+    @classmethod
+    def is_available(cls) -> bool:
+        return bool(DASHSCOPE_API_KEY)
+
     def get_llm(self, **kwargs) -> Any:
         """
         通义千问（Qwen）LLM实现，基于 langchain_openai.ChatOpenAI
@@ -113,12 +153,20 @@ class LLMFactory:
         cls._providers[provider_type] = provider_class
     
     @classmethod
-    def create_llm(cls, provider_type: LLMProviderType, **kwargs) -> Any:
+    def create_llm(
+        cls,
+        provider_type: LLMProviderType,
+        scheduled: bool = LLM_SCHEDULER_ENABLED,
+        replay: bool = True,
+        **kwargs,
+    ) -> Any:
         """
         根据提供商类型创建对应的LLM实例
         
         Args:
             provider_type: LLM提供商类型枚举
+            scheduled: 是否接入 llm_scheduler 的限流与优先级调度
+            replay: 是否参与 REPLAY_MODE 的录制/回放（录制时返回包装模型，回放时不创建真实模型）
             **kwargs: 可选的配置参数，会覆盖默认配置
                 - temperature: 温度参数，控制生成文本的随机性
                 - model: 模型名称
@@ -131,65 +179,80 @@ class LLMFactory:
         if provider_type not in cls._providers:
             raise ValueError(f"不支持的LLM提供商: {provider_type}")
         
+        if scheduled:
+            from .llm_scheduler import scheduled_llm_kwargs
+            key = f"{provider_type.value}:{kwargs['model']}" if kwargs.get("model") else provider_type.value
+            kwargs = {**scheduled_llm_kwargs(key, max_tokens=kwargs.get("max_tokens")), **kwargs}
+        
+        if replay and REPLAY_MODE == "replay":
+            # 回放时不创建真实模型，调度器的回调保留在回放模型上，仍可观察排队和并发行为
+            from .replay import ReplayChatModel
+            return ReplayChatModel(callbacks=kwargs.get("callbacks"))
+
         provider = cls._providers[provider_type]()
-        return provider.get_llm(**kwargs)
+        llm = provider.get_llm(**kwargs)
+        if replay and REPLAY_MODE == "record":
+            from .replay import ReplayChatModel
+            return ReplayChatModel(inner=llm, mode="record")
+        return llm
     
     @classmethod
     def get_available_providers(cls) -> list:
         """获取所有可用的LLM提供商列表"""
         return list(cls._providers.keys()) 
+
+    @classmethod
+    def is_provider_available(cls, provider_type: LLMProviderType) -> bool:
+        """提供商是否已注册且已配置可用"""
+        return provider_type in cls._providers and cls._providers[provider_type].is_available()
     
 
-# 简单、基础、高级、深度思考
+# 简单、基础、高级、深度思考 各级别的默认参数
+_LEVEL_CONFIGS = {
+    ThinkingLevel.SIMPLE: {"temperature": 0, "max_tokens": 512},
+    ThinkingLevel.BASIC: {"temperature": 0.2, "max_tokens": 1024},
+    ThinkingLevel.ADVANCED: {"temperature": 0, "max_tokens": 2048},
+    ThinkingLevel.DEEP: {"temperature": 0, "max_tokens": 4096},
+}
+
+# 不启用路由（或指定了具体模型）时各级别使用的提供商
+_DEFAULT_PROVIDERS = {
+    ThinkingLevel.SIMPLE: LLMProviderType.QIANWEN,
+    ThinkingLevel.BASIC: LLMProviderType.DEEPSEEK,
+    ThinkingLevel.ADVANCED: LLMProviderType.DEEPSEEK,
+    ThinkingLevel.DEEP: LLMProviderType.DEEPSEEK,
+}
+
+
 def get_llm_by_type(thinking_level: ThinkingLevel = ThinkingLevel.BASIC, **kwargs) -> Any:
     """
     根据思考级别创建LLM实例，不同思考级别使用不同的LLM提供商
     
+    启用 LLM_ROUTING_ENABLED 且该级别有多个可用提供商时，返回 RoutedChatModel，
+    每次调用按各提供商的实时延迟和错误率选择最健康的一个，失败时自动切换；
+    LLM_HEDGE_DELAYS 中的级别还会在首选提供商响应过慢时发出对冲请求。
+    
     Args:
         thinking_level: 思考级别枚举
-        **kwargs: 其他可选参数
+        **kwargs: 其他可选参数（指定 model 时不进行路由）
         
     Returns:
         配置好的LLM实例
     """
-    match thinking_level:
-        case ThinkingLevel.SIMPLE:
-            config = {
-                "temperature": 0,
-                "max_tokens": 512
-            }
-            config.update(kwargs)
-            return LLMFactory.create_llm(LLMProviderType.QIANWEN, **config)
-            
-        case ThinkingLevel.BASIC:
-            config = {
-                "temperature": 0.2,
-                "max_tokens": 1024
-            }
-            config.update(kwargs)
-            return LLMFactory.create_llm(LLMProviderType.DEEPSEEK, **config)
-            
-        case ThinkingLevel.ADVANCED:
-            config = {
-                "temperature": 0,
-                "max_tokens": 2048
-            }
-            config.update(kwargs)
-            return LLMFactory.create_llm(LLMProviderType.DEEPSEEK, **config)
-            
-        case ThinkingLevel.DEEP:
-            config = {
-                "temperature": 0,
-                "max_tokens": 4096
-            }
-            config.update(kwargs)
-            return LLMFactory.create_llm(LLMProviderType.DEEPSEEK, **config)
-            
-        case _:
-            # 默认使用基础配置和DeepSeek提供商
-            config = {
-                "temperature": 0.2,
-                "max_tokens": 1024
-            }
-            config.update(kwargs)
-            return LLMFactory.create_llm(LLMProviderType.DEEPSEEK, **config) 
+    config = {**_LEVEL_CONFIGS.get(thinking_level, _LEVEL_CONFIGS[ThinkingLevel.BASIC]), **kwargs}
+    default_provider = _DEFAULT_PROVIDERS.get(thinking_level, LLMProviderType.DEEPSEEK)
+    if not LLM_ROUTING_ENABLED or "model" in kwargs:
+        return LLMFactory.create_llm(default_provider, **config)
+
+    providers = [
+        LLMProviderType(name) for name in LLM_ROUTES.get(thinking_level.name, [])
+        if LLMFactory.is_provider_available(LLMProviderType(name))
+    ]
+    if len(providers) < 2:
+        return LLMFactory.create_llm(providers[0] if providers else default_provider, **config)
+
+    from .llm_router import RoutedChatModel
+    return RoutedChatModel(
+        models={provider.value: LLMFactory.create_llm(provider, **config) for provider in providers},
+        hedge_delay=LLM_HEDGE_DELAYS.get(thinking_level.name),
+    )
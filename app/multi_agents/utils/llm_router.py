@@ -0,0 +1,292 @@
+"""
+LLM 提供商路由
+
+按提供商统计滚动时间窗口内的延迟和错误率，每次调用时把请求路由到当前最健康的提供商，
+失败时自动切换到下一个；连续失败的提供商会被暂时熔断。
+对延迟敏感的思考级别可以开启对冲请求：首选提供商在指定时间内没有返回时，
+向次优提供商再发一次请求，采用先返回的结果。
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Any, Dict, Iterator, AsyncIterator, List, Optional, Sequence
+
+from langchain_core.callbacks import AsyncCallbackManager, AsyncCallbackManagerForLLMRun, CallbackManager
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import Field
+
+from app.config.config_com import LLM_HEALTH_WINDOW, LLM_BREAKER_FAILURES, LLM_BREAKER_COOLDOWN
+from app.multi_agents.utils.logger import get_logger
+
+logger = get_logger(__name__, level="debug")
+
+# LangGraph 不转发带有该标签的模型运行产生的 token，避免内部模型与路由模型重复输出
+_TAG_NOSTREAM = "nostream"
+
+
+class ProviderHealth:
+    """单个提供商的滚动健康统计"""
+
+    def __init__(self, window: float = LLM_HEALTH_WINDOW):
+        self.window = window
+        self.samples: "deque[tuple]" = deque()  # (时间, 延迟, 是否成功)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+
+    def _trim(self, now: float) -> None:
+        while self.samples and now - self.samples[0][0] > self.window:
+            self.samples.popleft()
+
+    def record(self, latency: float, ok: bool, now: float) -> None:
+        self.samples.append((now, latency, ok))
+        self._trim(now)
+        if ok:
+            self.consecutive_failures = 0
+            return
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= LLM_BREAKER_FAILURES:
+            self.open_until = now + LLM_BREAKER_COOLDOWN
+
+    def score(self, now: float) -> float:
+        """健康分数，越小越好：成功请求的平均延迟按错误率放大；窗口内没有样本时为 0，便于重新探测"""
+        self._trim(now)
+        if not self.samples:
+            return 0.0
+        latencies = [latency for _, latency, ok in self.samples if ok]
+        error_rate = 1 - len(latencies) / len(self.samples)
+        mean_latency = sum(latencies) / len(latencies) if latencies else LLM_BREAKER_COOLDOWN
+        return mean_latency * (1 + 4 * error_rate)
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        self._trim(now)
+        total = len(self.samples)
+        failures = sum(1 for _, _, ok in self.samples if not ok)
+        return {
+            "requests": total,
+            "error_rate": round(failures / total, 3) if total else 0.0,
+            "score": round(self.score(now), 3),
+            "open": now < self.open_until,
+        }
+
+
+class HealthTracker:
+    """所有提供商的健康统计"""
+
+    def __init__(self, window: float = LLM_HEALTH_WINDOW):
+        self.window = window
+        self._health: Dict[str, ProviderHealth] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name: str) -> ProviderHealth:
+        if name not in self._health:
+            self._health[name] = ProviderHealth(self.window)
+        return self._health[name]
+
+    def record(self, name: str, latency: float, ok: bool) -> None:
+        with self._lock:
+            self._get(name).record(latency, ok, time.monotonic())
+
+    def rank(self, names: Sequence[str]) -> List[str]:
+        """按健康程度排序：未熔断的在前，其次按分数，分数相同时保持偏好顺序"""
+        now = time.monotonic()
+        with self._lock:
+            keys = {
+                name: (now < self._get(name).open_until, self._get(name).score(now), index)
+                for index, name in enumerate(names)
+            }
+        return sorted(names, key=keys.get)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return {name: health.snapshot(now) for name, health in self._health.items()}
+
+
+def child_run_config(run_manager) -> Dict[str, Any]:
+    """包装模型调用内部模型时使用的运行配置
+
+    内部模型作为当前运行的子运行，继承回调、标签和元数据（如 langgraph_node），
+    并带上 nostream 标签，避免 LangGraph 把内部模型和包装模型的 token 重复输出。
+    """
+    config: Dict[str, Any] = {"tags": [_TAG_NOSTREAM]}
+    if run_manager is None:
+        return config
+    manager_cls = AsyncCallbackManager if isinstance(run_manager, AsyncCallbackManagerForLLMRun) else CallbackManager
+    manager = manager_cls(handlers=[], parent_run_id=run_manager.run_id)
+    manager.set_handlers(run_manager.inheritable_handlers)
+    manager.add_tags(run_manager.inheritable_tags)
+    manager.add_metadata(run_manager.inheritable_metadata)
+    config["callbacks"] = manager
+    return config
+
+
+# 默认的健康统计，所有路由模型共享
+default_health_tracker = HealthTracker()
+
+# 对冲请求使用的线程池
+_hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-hedge")
+
+
+class RoutedChatModel(BaseChatModel):
+    """在多个提供商之间按健康状况路由、失败切换并可对冲请求的聊天模型
+
+    各候选模型都是 OpenAI 兼容接口，bind_tools 产生的参数可以原样传给任意一个候选模型，
+    因此工具调用和 with_structured_output 同样享有路由和切换能力。
+    """
+
+    models: Dict[str, Any]  # 提供商名称 -> 模型，插入顺序即偏好顺序
+    tracker: Any = Field(default=None, exclude=True)
+    hedge_delay: Optional[float] = None  # 为 None 时不发对冲请求
+
+    @property
+    def _llm_type(self) -> str:
+        return "routed"
+
+    @property
+    def _tracker(self) -> HealthTracker:
+        return default_health_tracker if self.tracker is None else self.tracker
+
+    def ranked(self) -> List[str]:
+        """当前的候选提供商顺序"""
+        return self._tracker.rank(list(self.models))
+
+    def bind_tools(self, tools: Sequence[Any], *, tool_choice: Optional[Any] = None, **kwargs: Any):
+        """用首选模型格式化工具定义，再绑定到路由模型本身"""
+        first = next(iter(self.models.values()))
+        binding = first.bind_tools(tools, tool_choice=tool_choice, **kwargs)
+        return self.bind(**binding.kwargs)
+
+    def _invoke_one(self, name: str, messages: List[BaseMessage], config: Dict[str, Any], **kwargs: Any) -> BaseMessage:
+        start = time.monotonic()
+        try:
+            message = self.models[name].invoke(messages, config=config, **kwargs)
+        except Exception:
+            self._tracker.record(name, time.monotonic() - start, False)
+            raise
+        self._tracker.record(name, time.monotonic() - start, True)
+        return message
+
+    async def _ainvoke_one(self, name: str, messages: List[BaseMessage], config: Dict[str, Any], **kwargs: Any) -> BaseMessage:
+        start = time.monotonic()
+        try:
+            message = await self.models[name].ainvoke(messages, config=config, **kwargs)
+        except Exception:
+            self._tracker.record(name, time.monotonic() - start, False)
+            raise
+        self._tracker.record(name, time.monotonic() - start, True)
+        return message
+
+    def _failover(self, names: Sequence[str], messages, config, errors: List[Exception], **kwargs) -> BaseMessage:
+        for name in names:
+            try:
+                return self._invoke_one(name, messages, config, **kwargs)
+            except Exception as e:
+                logger.warning(f"LLM提供商 {name} 调用失败，切换到下一个: {e}", agent_name="llm_router")
+                errors.append(e)
+        raise errors[-1]
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        order = self.ranked()
+        config = child_run_config(run_manager)
+        errors: List[Exception] = []
+        if stop is not None:
+            kwargs["stop"] = stop
+        if self.hedge_delay is None or len(order) < 2:
+            message = self._failover(order, messages, config, errors, **kwargs)
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+        # 每个线程需要独立复制上下文，保留 LangGraph 的运行配置
+        def submit(name):
+            return _hedge_executor.submit(contextvars.copy_context().run, self._invoke_one, name, messages, config, **kwargs)
+
+        futures = [submit(order[0])]
+        done, _ = wait(futures, timeout=self.hedge_delay, return_when=FIRST_COMPLETED)
+        if not done or futures[0].exception() is not None:
+            logger.debug(f"{order[0]} 未在{self.hedge_delay}秒内返回，向 {order[1]} 发出对冲请求", agent_name="llm_router")
+            futures.append(submit(order[1]))
+        for future in as_completed(futures):
+            try:
+                return ChatResult(generations=[ChatGeneration(message=future.result())])
+            except Exception as e:
+                errors.append(e)
+        message = self._failover(order[2:], messages, config, errors, **kwargs)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        order = self.ranked()
+        config = child_run_config(run_manager)
+        errors: List[Exception] = []
+        if stop is not None:
+            kwargs["stop"] = stop
+        hedged = self.hedge_delay is not None and len(order) > 1
+        candidates = order[:2] if hedged else order[:1]
+
+        tasks = [asyncio.ensure_future(self._ainvoke_one(candidates[0], messages, config, **kwargs))]
+        if hedged:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay)
+            if not done or tasks[0].exception() is not None:
+                tasks.append(asyncio.ensure_future(self._ainvoke_one(candidates[1], messages, config, **kwargs)))
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    return ChatResult(generations=[ChatGeneration(message=await next_done)])
+                except Exception as e:
+                    errors.append(e)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        for name in order[len(candidates):]:
+            try:
+                message = await self._ainvoke_one(name, messages, config, **kwargs)
+                return ChatResult(generations=[ChatGeneration(message=message)])
+            except Exception as e:
+                logger.warning(f"LLM提供商 {name} 调用失败，切换到下一个: {e}", agent_name="llm_router")
+                errors.append(e)
+        raise errors[-1]
+
+    def _stream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        """流式输出：首个块返回之前失败的提供商会被切换，首块延迟计入健康统计"""
+        config = child_run_config(run_manager)
+        error: Optional[Exception] = None
+        for name in self.ranked():
+            start = time.monotonic()
+            try:
+                iterator = iter(self.models[name].stream(messages, config=config, stop=stop, **kwargs))
+                first = next(iterator)
+            except Exception as e:
+                self._tracker.record(name, time.monotonic() - start, False)
+                logger.warning(f"LLM提供商 {name} 流式调用失败，切换到下一个: {e}", agent_name="llm_router")
+                error = e
+                continue
+            self._tracker.record(name, time.monotonic() - start, True)
+            yield ChatGenerationChunk(message=first)
+            for chunk in iterator:
+                yield ChatGenerationChunk(message=chunk)
+            return
+        raise error
+
+    async def _astream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        config = child_run_config(run_manager)
+        error: Optional[Exception] = None
+        for name in self.ranked():
+            start = time.monotonic()
+            try:
+                iterator = self.models[name].astream(messages, config=config, stop=stop, **kwargs).__aiter__()
+                first = await iterator.__anext__()
+            except Exception as e:
+                self._tracker.record(name, time.monotonic() - start, False)
+                logger.warning(f"LLM提供商 {name} 流式调用失败，切换到下一个: {e}", agent_name="llm_router")
+                error = e
+                continue
+            self._tracker.record(name, time.monotonic() - start, True)
+            yield ChatGenerationChunk(message=first)
+            async for chunk in iterator:
+                yield ChatGenerationChunk(message=chunk)
+            return
+        raise error
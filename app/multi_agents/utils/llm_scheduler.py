@@ -0,0 +1,455 @@
+"""
+LLM 请求调度器
+
+DeepSeek、DashScope 等服务对每分钟请求数（RPM）和每分钟 token 数（TPM）都有限制。
+所有由 LLMFactory 创建的模型在发出请求前都要经过同一个调度器：
+
+- 令牌桶：按提供商/模型分别限制 RPM 和 TPM
+- 优先级通道：前台、规划、监督等交互式节点的请求优先于批量岗位评估
+- 自适应并发（AIMD）：请求成功且延迟正常时并发上限缓慢增加，
+  遇到 429 或延迟过高时成倍降低，并在 Retry-After 期间暂停该提供商的新请求
+
+调度通过回调处理器接入：on_chat_model_start 中排队等待放行，
+on_llm_end / on_llm_error 中归还并发名额并反馈延迟与用量；
+429 信号由 HTTP 客户端的响应钩子上报，底层客户端的每一次重试都能被感知。
+每个提供商/模型键只创建一对 HTTP 客户端，由该键的所有模型共享，调度器关闭时统一关闭；
+异步客户端的连接池按事件循环分开，浏览器任务每次新建的事件循环不会复用已关闭循环中的连接。
+"""
+import asyncio
+import atexit
+import heapq
+import itertools
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from app.config.config_com import (
+    LLM_INTERACTIVE_NODES, LLM_LATENCY_TARGET, LLM_RATE_LIMITS, LLM_SCHEDULER_TIMEOUT,
+)
+from app.multi_agents.utils.context_manager import estimate_tokens
+from app.multi_agents.utils.logger import get_logger
+
+logger = get_logger(__name__, level="debug")
+
+
+class Lane(IntEnum):
+    """优先级通道，数值越小越优先"""
+    INTERACTIVE = 0  # 前台/规划/监督等用户正在等待的调用
+    NORMAL = 1
+    BULK = 2  # 批量岗位评估等后台任务
+
+    @classmethod
+    def parse(cls, value: Any) -> "Lane":
+        if isinstance(value, Lane):
+            return value
+        return cls[str(value).upper()]
+
+
+class SchedulerTimeoutError(TimeoutError):
+    """等待调度超时"""
+
+
+class TokenBucket:
+    """令牌桶：容量为 capacity，每秒补充 rate 个令牌"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """取出 amount 个令牌还需要等待的秒数，0 表示可以立即取出"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        """取出令牌，允许透支（实际用量超过预估时记为欠账），负数表示退还"""
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+@dataclass
+class ProviderLimit:
+    """单个提供商/模型的限额配置"""
+    rpm: float = 60
+    tpm: float = 100_000
+    max_concurrency: int = 8
+    min_concurrency: int = 1
+    latency_target: float = LLM_LATENCY_TARGET  # 超过该延迟（秒）视为过载信号
+
+
+@dataclass
+class Ticket:
+    """一次获得放行的请求"""
+    key: str
+    lane: Lane
+    tokens: int
+    granted_at: float = 0.0
+
+
+@dataclass
+class _KeyState:
+    limit: ProviderLimit
+    requests: TokenBucket
+    tokens: TokenBucket
+    concurrency: float
+    inflight: int = 0
+    cooldown_until: float = 0.0
+    waiters: List[Tuple[int, int]] = field(default_factory=list)  # (通道, 序号) 小顶堆
+    stats: Dict[str, int] = field(default_factory=lambda: {
+        "granted": 0, "throttled": 0, "errors": 0, "slow": 0, "tokens": 0,
+    })
+
+
+class _PerLoopTransport:
+    """按事件循环分开连接池的异步 HTTP 传输层
+
+    httpx 的异步连接绑定在创建它的事件循环上，循环关闭后长连接不能再被其他循环复用
+    （否则报 "Event loop is closed"，被 openai 当作连接错误重试）。
+    每个事件循环使用自己的 AsyncHTTPTransport，循环关闭后对应的连接池随之丢弃。
+    """
+
+    def __init__(self):
+        self._transports: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _current(self):
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            for stale in [other for other in self._transports.keys() if other.is_closed()]:
+                del self._transports[stale]
+            transport = self._transports.get(loop)
+            if transport is None:
+                transport = self._transports[loop] = httpx.AsyncHTTPTransport()
+            return transport
+
+    @property
+    def loop_count(self) -> int:
+        """当前保存连接池的事件循环数"""
+        with self._lock:
+            return len(self._transports)
+
+    async def handle_async_request(self, request):
+        return await self._current().handle_async_request(request)
+
+    async def __aenter__(self) -> "_PerLoopTransport":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环的连接池，并丢弃其他循环的连接池（只能在各自的循环中关闭）"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transports, self._transports = dict(self._transports), weakref.WeakKeyDictionary()
+        transport = transports.get(loop)
+        if transport is not None:
+            await transport.aclose()
+
+
+class LLMScheduler:
+    """按提供商/模型限流、按通道排序、自适应调整并发的 LLM 请求调度器"""
+
+    def __init__(self, limits: Optional[Mapping[str, Mapping[str, Any]]] = None, timeout: float = LLM_SCHEDULER_TIMEOUT):
+        """
+        Args:
+            limits: 键（"提供商" 或 "提供商:模型"）-> ProviderLimit 参数
+            timeout: 请求排队等待的最长秒数
+        """
+        self.limits = {key: ProviderLimit(**value) for key, value in (limits or {}).items()}
+        self.timeout = timeout
+        self._states: Dict[str, _KeyState] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        # 键 -> (httpx.Client, httpx.AsyncClient)，带 429 响应钩子
+        self._http_clients: Dict[str, Tuple[Any, Any]] = {}
+
+    def http_clients(self, key: str) -> Tuple[Any, Any]:
+        """获取键对应的同步/异步 HTTP 客户端，首次调用时创建，响应为 429 时上报限流
+
+        同一个键的所有模型共享这对客户端，不会每创建一个模型就泄漏一对客户端；
+        异步客户端的连接池按事件循环分开（见 _PerLoopTransport）。
+        """
+        import httpx
+
+        with self._cond:
+            clients = self._http_clients.get(key)
+            if clients is not None:
+                return clients
+
+            def on_response(response) -> None:
+                if response.status_code == 429:
+                    self.report_throttle(key, _retry_after(response))
+
+            async def on_async_response(response) -> None:
+                on_response(response)
+
+            clients = (
+                httpx.Client(event_hooks={"response": [on_response]}),
+                httpx.AsyncClient(event_hooks={"response": [on_async_response]}, transport=_PerLoopTransport()),
+            )
+            self._http_clients[key] = clients
+            return clients
+
+    def close(self) -> None:
+        """关闭已创建的 HTTP 客户端，之后再获取时会重新创建"""
+        with self._cond:
+            clients, self._http_clients = self._http_clients, {}
+        for client, async_client in clients.values():
+            client.close()
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                asyncio.run(async_client.aclose())
+            else:
+                # 在事件循环中调用时交给该循环关闭
+                loop.create_task(async_client.aclose())
+
+    def _limit_for(self, key: str) -> ProviderLimit:
+        return self.limits.get(key) or self.limits.get(key.split(":", 1)[0]) or ProviderLimit()
+
+    def _state(self, key: str) -> _KeyState:
+        state = self._states.get(key)
+        if state is None:
+            limit = self._limit_for(key)
+            # 桶容量取 10 秒的额度：允许小幅突发，又不会在一分钟开头耗尽全部配额
+            state = _KeyState(
+                limit=limit,
+                requests=TokenBucket(limit.rpm / 60, max(limit.rpm / 6, 1)),
+                tokens=TokenBucket(limit.tpm / 60, limit.tpm / 6),
+                concurrency=float(limit.max_concurrency),
+            )
+            self._states[key] = state
+        return state
+
+    def _try_grant(self, state: _KeyState, waiter: Tuple[int, int], tokens: int, now: float) -> Optional[float]:
+        """尝试放行队首请求
+
+        Returns:
+            None 表示已放行，否则为建议的等待秒数
+        """
+        if state.waiters[0] != waiter:
+            return 0.5
+        if now < state.cooldown_until:
+            return state.cooldown_until - now
+        if state.inflight >= int(state.concurrency):
+            return 0.5
+        wait = max(state.requests.wait_time(1, now), state.tokens.wait_time(tokens, now))
+        if wait > 0:
+            return wait
+        state.requests.take(1)
+        state.tokens.take(min(tokens, state.tokens.capacity))
+        state.inflight += 1
+        state.stats["granted"] += 1
+        heapq.heappop(state.waiters)
+        return None
+
+    def acquire(self, key: str, lane: Lane = Lane.NORMAL, tokens: int = 0, timeout: Optional[float] = None) -> Ticket:
+        """排队等待放行
+
+        Args:
+            key: 提供商/模型键
+            lane: 优先级通道
+            tokens: 预估的本次请求 token 数
+            timeout: 最长等待秒数，默认使用调度器配置
+
+        Raises:
+            SchedulerTimeoutError: 超时仍未获得放行
+        """
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        with self._cond:
+            state = self._state(key)
+            waiter = (int(lane), next(self._seq))
+            heapq.heappush(state.waiters, waiter)
+            # 新请求可能排到了队首，唤醒其他等待方重新判断
+            self._cond.notify_all()
+            while True:
+                now = time.monotonic()
+                wait = self._try_grant(state, waiter, tokens, now)
+                if wait is None:
+                    # 队首已变化，下一个等待方可以尝试
+                    self._cond.notify_all()
+                    return Ticket(key=key, lane=lane, tokens=tokens, granted_at=now)
+                if now >= deadline:
+                    state.waiters.remove(waiter)
+                    heapq.heapify(state.waiters)
+                    self._cond.notify_all()
+                    raise SchedulerTimeoutError(f"LLM请求排队超时: {key}")
+                self._cond.wait(min(wait, deadline - now))
+
+    def release(self, ticket: Ticket, tokens_used: Optional[int] = None, error: bool = False) -> None:
+        """请求结束后归还并发名额，并根据延迟调整并发上限
+
+        Args:
+            ticket: acquire 返回的放行凭证
+            tokens_used: 实际消耗的 token 数，用于修正预估
+            error: 请求是否失败（失败不参与延迟反馈）
+        """
+        now = time.monotonic()
+        with self._cond:
+            state = self._state(ticket.key)
+            state.inflight = max(state.inflight - 1, 0)
+            if tokens_used is not None:
+                state.tokens.take(tokens_used - min(ticket.tokens, state.tokens.capacity))
+                state.stats["tokens"] += tokens_used
+            limit = state.limit
+            if error:
+                state.stats["errors"] += 1
+            elif now - ticket.granted_at > limit.latency_target:
+                state.stats["slow"] += 1
+                state.concurrency = max(limit.min_concurrency, state.concurrency * 0.9)
+            else:
+                # 加性增加：大约每完成"当前并发数"个请求，上限加 1
+                state.concurrency = min(limit.max_concurrency, state.concurrency + 1 / state.concurrency)
+            self._cond.notify_all()
+
+    def report_throttle(self, key: str, retry_after: Optional[float] = None) -> None:
+        """上报一次 429：并发上限减半，并在 retry_after 秒内暂停放行新请求"""
+        now = time.monotonic()
+        with self._cond:
+            state = self._state(key)
+            state.stats["throttled"] += 1
+            state.concurrency = max(state.limit.min_concurrency, state.concurrency * 0.5)
+            state.cooldown_until = max(state.cooldown_until, now + (1.0 if retry_after is None else retry_after))
+            self._cond.notify_all()
+        logger.warning(f"{key} 触发限流，并发上限降为 {int(state.concurrency)}", agent_name="llm_scheduler")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """各提供商/模型的调度统计"""
+        with self._cond:
+            return {
+                key: {
+                    **state.stats,
+                    "concurrency": round(state.concurrency, 2),
+                    "inflight": state.inflight,
+                    "waiting": len(state.waiters),
+                }
+                for key, state in self._states.items()
+            }
+
+
+def resolve_lane(metadata: Optional[Mapping[str, Any]]) -> Lane:
+    """根据运行元数据确定优先级通道
+
+    显式传入的 metadata["llm_lane"] 优先；否则交互式节点（LLM_INTERACTIVE_NODES）
+    走 INTERACTIVE 通道，其余走 NORMAL 通道。
+    """
+    metadata = metadata or {}
+    if metadata.get("llm_lane"):
+        return Lane.parse(metadata["llm_lane"])
+    if metadata.get("langgraph_node") in LLM_INTERACTIVE_NODES:
+        return Lane.INTERACTIVE
+    return Lane.NORMAL
+
+
+def _usage_tokens(response: Any) -> Optional[int]:
+    """从 LLMResult 中提取实际 token 用量"""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage.get("total_tokens"):
+        return usage["total_tokens"]
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if metadata:
+                return metadata.get("total_tokens")
+    return None
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    return getattr(error, "status_code", None) == 429 or "429" in str(error) or "rate limit" in str(error).lower()
+
+
+class SchedulerCallbackHandler(BaseCallbackHandler):
+    """把模型接入调度器的回调处理器
+
+    同步调用时在当前线程中排队；异步调用时 LangChain 会在线程池中执行本处理器，
+    排队不会阻塞事件循环。
+    """
+
+    raise_error = True
+
+    def __init__(self, scheduler: LLMScheduler, key: str, max_tokens: Optional[int] = None, reports_http: bool = False):
+        """
+        Args:
+            scheduler: 调度器
+            key: 提供商/模型键
+            max_tokens: 模型的最大输出 token 数，用于预估本次请求的 token 消耗
+            reports_http: 是否已通过 HTTP 钩子上报 429（为 True 时错误回调不再重复上报）
+        """
+        self.scheduler = scheduler
+        self.key = key
+        self.max_tokens = max_tokens
+        self.reports_http = reports_http
+        self._tickets: Dict[UUID, Ticket] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, metadata=None, **kwargs) -> None:
+        prompt_tokens = sum(estimate_tokens(str(m.content)) + 4 for batch in messages for m in batch)
+        ticket = self.scheduler.acquire(self.key, resolve_lane(metadata), prompt_tokens + (self.max_tokens or 256))
+        with self._lock:
+            self._tickets[run_id] = ticket
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs) -> None:
+        with self._lock:
+            ticket = self._tickets.pop(run_id, None)
+        if ticket is not None:
+            self.scheduler.release(ticket, tokens_used=_usage_tokens(response))
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs) -> None:
+        with self._lock:
+            ticket = self._tickets.pop(run_id, None)
+        if ticket is None:
+            return
+        if not self.reports_http and is_rate_limit_error(error):
+            self.scheduler.report_throttle(self.key)
+        self.scheduler.release(ticket, error=True)
+
+
+def _retry_after(response) -> Optional[float]:
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def scheduled_llm_kwargs(key: str, scheduler: Optional["LLMScheduler"] = None, max_tokens: Optional[int] = None) -> Dict[str, Any]:
+    """生成接入调度器所需的模型参数（回调处理器和带 429 钩子的 HTTP 客户端）
+
+    适用于基于 ChatOpenAI 的模型（DeepSeek、千问兼容模式、OpenAI）。
+
+    Args:
+        key: 提供商/模型键，对应 LLM_RATE_LIMITS 中的配置
+        scheduler: 调度器，默认使用 default_scheduler
+        max_tokens: 模型的最大输出 token 数
+
+    Returns:
+        可直接传给 ChatOpenAI 的 callbacks / http_client / http_async_client 参数
+    """
+    scheduler = default_scheduler if scheduler is None else scheduler
+    http_client, http_async_client = scheduler.http_clients(key)
+    return {
+        "callbacks": [SchedulerCallbackHandler(scheduler, key, max_tokens=max_tokens, reports_http=True)],
+        "http_client": http_client,
+        "http_async_client": http_async_client,
+    }
+
+
+# 默认调度器，所有 LLMFactory 创建的模型共享，进程退出时关闭其 HTTP 客户端
+default_scheduler = LLMScheduler(LLM_RATE_LIMITS)
+atexit.register(default_scheduler.close)
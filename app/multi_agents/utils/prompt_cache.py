@@ -0,0 +1,96 @@
+"""
+提示词前缀缓存统计
+
+DeepSeek、DashScope 等提供商会缓存请求的公共前缀：与之前某次请求开头完全相同的部分
+按缓存价格计费，首 token 延迟也更低。只要前缀中有一个字符不同（例如精确到秒的时间），
+之后的内容就全部无法命中。本模块记录每个节点上一次发送的提示词，
+估算本次请求与之相同的前缀长度，用于观察提示词布局的缓存效果。
+"""
+import threading
+from typing import Any, Dict, Sequence
+
+from app.config.config_com import PROMPT_CACHE_BLOCK_TOKENS
+from app.multi_agents.utils.context_manager import estimate_tokens
+from app.multi_agents.utils.logger import get_logger
+
+logger = get_logger(__name__, level="debug")
+
+
+def serialize_prompt(messages: Sequence[Any]) -> str:
+    """把消息列表按发送顺序拼接成文本，用于比较前缀"""
+    parts = []
+    for message in messages:
+        if isinstance(message, dict):
+            role, content = message.get("role", ""), message.get("content", "")
+        else:
+            role, content = getattr(message, "type", ""), getattr(message, "content", "")
+        parts.append(f"<{role}>{content}")
+    return "\n".join(parts)
+
+
+def common_prefix_length(a: str, b: str) -> int:
+    """两个字符串公共前缀的字符数"""
+    limit = min(len(a), len(b))
+    i = 0
+    while i < limit and a[i] == b[i]:
+        i += 1
+    return i
+
+
+class PromptCacheTracker:
+    """按节点估算每次请求可命中提供商缓存的前缀长度"""
+
+    def __init__(self, block_tokens: int = PROMPT_CACHE_BLOCK_TOKENS):
+        """
+        Args:
+            block_tokens: 提供商缓存的最小单位（token），不足一个单位的前缀不会被缓存
+        """
+        self.block_tokens = block_tokens
+        self._last: Dict[str, str] = {}
+        self._totals: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, messages: Sequence[Any]) -> Dict[str, int]:
+        """记录一次请求的提示词
+
+        Args:
+            name: 节点或提示词名称
+            messages: 本次发送的消息列表
+
+        Returns:
+            本次请求的估算值：prompt_tokens 为总 token 数，cacheable_tokens 为可命中缓存的前缀 token 数
+        """
+        text = serialize_prompt(messages)
+        with self._lock:
+            previous = self._last.get(name, "")
+            self._last[name] = text
+            prefix_tokens = estimate_tokens(text[:common_prefix_length(previous, text)])
+            report = {
+                "prompt_tokens": estimate_tokens(text),
+                "cacheable_tokens": prefix_tokens - prefix_tokens % self.block_tokens,
+            }
+            totals = self._totals.setdefault(name, {"calls": 0, "prompt_tokens": 0, "cacheable_tokens": 0})
+            totals["calls"] += 1
+            totals["prompt_tokens"] += report["prompt_tokens"]
+            totals["cacheable_tokens"] += report["cacheable_tokens"]
+        logger.debug(
+            f"{name} 提示词约 {report['prompt_tokens']} tokens，可缓存前缀约 {report['cacheable_tokens']} tokens",
+            agent_name="prompt_cache",
+        )
+        return report
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """各节点累计的请求数、token 数和可缓存比例"""
+        with self._lock:
+            return {
+                name: {
+                    **totals,
+                    "cacheable_ratio": round(totals["cacheable_tokens"] / totals["prompt_tokens"], 3)
+                    if totals["prompt_tokens"] else 0.0,
+                }
+                for name, totals in self._totals.items()
+            }
+
+
+# 默认的统计实例，apply_prompt_template 每次组装提示词时记录
+default_prompt_cache_tracker = PromptCacheTracker()
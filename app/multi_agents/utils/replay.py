@@ -0,0 +1,335 @@
+"""
+LLM / 搜索引擎 / Boss直聘工具的录制与回放
+
+REPLAY_MODE=record 时，LLMFactory 创建的模型、SearchEngineFactory 创建的搜索引擎和 boss_job_tool
+照常访问真实服务，同时把每次交互（请求键、响应、耗时）追加到 REPLAY_DIR 下的夹具文件；
+REPLAY_MODE=replay 时不再创建真实客户端，而是按请求键从夹具中取出响应，
+并按录制时的耗时乘以 REPLAY_LATENCY_SCALE 等待后返回。
+这样可以在没有 API Key 和浏览器的离线机器上稳定地复现整张图的执行，用于分析框架开销、并发行为和性能回归。
+
+夹具为 JSONL 文件，每行一次交互：{"key", "latency", "request", "response"}。
+请求键由请求内容计算，提示词中的日期和时间会先被屏蔽，避免录制与回放的时间不同导致无法匹配；
+同一个键录制了多次时按顺序回放，用完后重复最后一次。
+"""
+import asyncio
+import functools
+import hashlib
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import Field
+
+from app.config.config_com import REPLAY_DIR, REPLAY_LATENCY_SCALE
+from app.multi_agents.utils.llm_router import child_run_config
+from app.multi_agents.utils.search_factory import SearchEngine
+
+# 请求中随时间变化的内容，计算请求键前替换为占位符
+_VOLATILE_PATTERNS = [
+    re.compile(r"\d{4}-\d{2}-\d{2}(?: [A-Z][a-z]+day)?"),
+    re.compile(r"[A-Z][a-z]{2} [A-Z][a-z]{2} \d{2} \d{4}"),
+    re.compile(r"\d{1,2}:\d{2}:\d{2}(?: ?[+-]\d{4})?"),
+]
+
+
+class ReplayMissError(LookupError):
+    """回放时夹具中没有对应请求的录制"""
+
+
+def normalize_text(text: str) -> str:
+    """屏蔽文本中的日期和时间"""
+    for pattern in _VOLATILE_PATTERNS:
+        text = pattern.sub("<TIME>", text)
+    return text
+
+
+def request_key(payload: Any) -> str:
+    """根据请求内容计算稳定的请求键"""
+    data = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(normalize_text(data).encode("utf-8")).hexdigest()[:16]
+
+
+def _preview(value: Any, limit: int = 200) -> str:
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+    return text[:limit]
+
+
+class FixtureStore:
+    """一个 JSONL 夹具文件，录制时追加写入，回放时按请求键顺序读取"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursors: Dict[str, int] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry["key"], []).append(entry)
+
+    def record(self, key: str, request: Any, response: Any, latency: float) -> None:
+        """追加一次交互"""
+        entry = {"key": key, "latency": round(latency, 4), "request": _preview(request), "response": response}
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock:
+            self._load()
+            self._entries.setdefault(key, []).append(entry)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def next(self, key: str, request: Any = None) -> Dict[str, Any]:
+        """取出该请求键的下一次录制
+
+        Raises:
+            ReplayMissError: 夹具中没有该请求的录制
+        """
+        with self._lock:
+            self._load()
+            entries = self._entries.get(key)
+            if not entries:
+                raise ReplayMissError(f"夹具 {self.path} 中没有该请求的录制（key={key}）: {_preview(request)}")
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            return entries[min(cursor, len(entries) - 1)]
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load()
+            return sum(len(entries) for entries in self._entries.values())
+
+
+_stores: Dict[str, FixtureStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_fixture_store(kind: str) -> FixtureStore:
+    """获取 REPLAY_DIR 下指定类型（llm / search / boss_job）的夹具"""
+    with _stores_lock:
+        if kind not in _stores:
+            _stores[kind] = FixtureStore(str(Path(REPLAY_DIR) / f"{kind}.jsonl"))
+        return _stores[kind]
+
+
+def _replay_delay(latency: float, scale: Optional[float]) -> float:
+    return max(latency, 0.0) * (REPLAY_LATENCY_SCALE if scale is None else scale)
+
+
+def _messages_payload(messages: Sequence[BaseMessage], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """LLM 请求中决定响应的部分：消息内容、工具调用和绑定的工具名称"""
+    return {
+        "messages": [
+            {
+                "type": message.type,
+                "content": message.content,
+                "tool_calls": [(call["name"], call["args"]) for call in getattr(message, "tool_calls", None) or []],
+            }
+            for message in messages
+        ],
+        "tools": sorted(tool["function"]["name"] for tool in kwargs.get("tools") or [] if "function" in tool),
+    }
+
+
+class ReplayChatModel(BaseChatModel):
+    """录制或回放 LLM 交互的聊天模型
+
+    录制模式下把请求转发给 inner 并记录响应；回放模式下不需要 inner，直接从夹具返回录制的消息。
+    """
+
+    inner: Any = None
+    mode: str = "replay"
+    store: Any = Field(default=None, exclude=True)
+    latency_scale: Optional[float] = None  # 为 None 时使用 REPLAY_LATENCY_SCALE
+
+    @property
+    def _llm_type(self) -> str:
+        return f"{self.mode}-chat"
+
+    @property
+    def _store(self) -> FixtureStore:
+        return get_fixture_store("llm") if self.store is None else self.store
+
+    def bind_tools(self, tools: Sequence[Any], *, tool_choice: Optional[Any] = None, **kwargs: Any):
+        """录制时由真实模型格式化工具定义；回放时按 OpenAI 兼容格式自行格式化"""
+        if self.inner is not None:
+            return self.bind(**self.inner.bind_tools(tools, tool_choice=tool_choice, **kwargs).kwargs)
+        formatted = [convert_to_openai_tool(tool) for tool in tools]
+        if tool_choice is not None:
+            kwargs["tool_choice"] = tool_choice
+        return self.bind(tools=formatted, **kwargs)
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        payload = _messages_payload(messages, kwargs)
+        key = request_key(payload)
+        if self.mode == "record":
+            start = time.monotonic()
+            message = self.inner.invoke(messages, config=child_run_config(run_manager), stop=stop, **kwargs)
+            self._store.record(key, payload["messages"][-1:], message_to_dict(message), time.monotonic() - start)
+        else:
+            entry = self._store.next(key, payload["messages"][-1:])
+            time.sleep(_replay_delay(entry["latency"], self.latency_scale))
+            message = messages_from_dict([entry["response"]])[0]
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        payload = _messages_payload(messages, kwargs)
+        key = request_key(payload)
+        if self.mode == "record":
+            start = time.monotonic()
+            message = await self.inner.ainvoke(messages, config=child_run_config(run_manager), stop=stop, **kwargs)
+            self._store.record(key, payload["messages"][-1:], message_to_dict(message), time.monotonic() - start)
+        else:
+            entry = self._store.next(key, payload["messages"][-1:])
+            await asyncio.sleep(_replay_delay(entry["latency"], self.latency_scale))
+            message = messages_from_dict([entry["response"]])[0]
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class ReplaySearchEngine(SearchEngine):
+    """录制或回放搜索引擎调用
+
+    search_with_subqueries 和 search_async 由 search 组合而成，
+    其他方法（如 Jina 的 read_webpage、rerank）按方法名和参数整体录制。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        factory: Optional[Callable[[], SearchEngine]] = None,
+        mode: str = "replay",
+        store: Optional[FixtureStore] = None,
+        latency_scale: Optional[float] = None,
+    ):
+        """
+        Args:
+            name: 搜索引擎名称，参与请求键计算
+            factory: 创建真实搜索引擎的函数，只在录制模式下调用
+            mode: record 或 replay
+            store: 夹具，默认使用 REPLAY_DIR 下的 search.jsonl
+            latency_scale: 回放延迟倍数，默认使用 REPLAY_LATENCY_SCALE
+        """
+        self.name = name
+        self.factory = factory
+        self.mode = mode
+        self.store = get_fixture_store("search") if store is None else store
+        self.latency_scale = latency_scale
+        self._inner: Optional[SearchEngine] = None
+
+    def _call(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        payload = {"engine": self.name, "method": method, "args": args, "kwargs": kwargs}
+        key = request_key(payload)
+        if self.mode == "record":
+            if self._inner is None:
+                self._inner = self.factory()
+            start = time.monotonic()
+            result = getattr(self._inner, method)(*args, **kwargs)
+            self.store.record(key, payload, result, time.monotonic() - start)
+            return result
+        entry = self.store.next(key, payload)
+        time.sleep(_replay_delay(entry["latency"], self.latency_scale))
+        return entry["response"]
+
+    def search(self, query: str, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        return self._call("search", query, *args, **kwargs)
+
+    def search_with_subqueries(self, subqueries: List[str]) -> List[Dict[str, Any]]:
+        return [self.search(query) for query in subqueries]
+
+    async def search_async(self, queries: List[str], max_concurrency: int = 5) -> List[Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _search_with_limit(query: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await asyncio.to_thread(self.search, query)
+
+        return list(await asyncio.gather(*[_search_with_limit(query) for query in queries]))
+
+    def __getattr__(self, method: str):
+        if method.startswith("_"):
+            raise AttributeError(method)
+        return functools.partial(self._call, method)
+
+
+class ReplayBossJobTool:
+    """录制或回放 Boss直聘工具的执行结果和浏览器步骤进度
+
+    回放时按录制的时间点依次触发步骤回调，保持与真实执行相同的进度节奏。
+    """
+
+    name = "boss_job"
+
+    def __init__(
+        self,
+        tool: Any = None,
+        mode: str = "replay",
+        store: Optional[FixtureStore] = None,
+        latency_scale: Optional[float] = None,
+    ):
+        """
+        Args:
+            tool: 真实的 BossJobTool，只在录制模式下使用
+            mode: record 或 replay
+            store: 夹具，默认使用 REPLAY_DIR 下的 boss_job.jsonl
+            latency_scale: 回放延迟倍数，默认使用 REPLAY_LATENCY_SCALE
+        """
+        self.tool = tool
+        self.mode = mode
+        self.store = get_fixture_store("boss_job") if store is None else store
+        self.latency_scale = latency_scale
+
+    def _run(
+        self,
+        task: str,
+        step_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        cdp_url: Optional[str] = None,
+    ) -> str:
+        """参数同 BossJobTool._run"""
+        key = request_key({"task": task})
+        if self.mode == "record":
+            start = time.monotonic()
+            steps: List[Dict[str, Any]] = []
+
+            def on_step(step: Dict[str, Any]) -> None:
+                steps.append({"offset": round(time.monotonic() - start, 4), "step": step})
+                if step_callback is not None:
+                    step_callback(step)
+
+            result = self.tool._run(task, step_callback=on_step, cdp_url=cdp_url)
+            self.store.record(key, task, {"result": result, "steps": steps}, time.monotonic() - start)
+            return result
+
+        entry = self.store.next(key, task)
+        start = time.monotonic()
+        for step in entry["response"]["steps"]:
+            time.sleep(max(_replay_delay(step["offset"], self.latency_scale) - (time.monotonic() - start), 0))
+            if step_callback is not None:
+                step_callback(step["step"])
+        time.sleep(max(_replay_delay(entry["latency"], self.latency_scale) - (time.monotonic() - start), 0))
+        return entry["response"]["result"]
+
+    async def _arun(
+        self,
+        instruction: str,
+        step_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        cdp_url: Optional[str] = None,
+    ) -> str:
+        return await asyncio.to_thread(self._run, instruction, step_callback, cdp_url)
+
+    def run(self, instruction: str) -> str:
+        return self._run(instruction)
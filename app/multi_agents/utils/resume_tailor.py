@@ -0,0 +1,387 @@
+"""
+按岗位定制简历和打招呼语
+
+为每个岗位单独改写整份简历是代价最高的 LLM 步骤之一。ResumeTailor 把简历按标题拆分为章节，
+定制后的章节按 (章节, 岗位聚类) 缓存在 SQLite 中：
+- 岗位描述的 embedding 按余弦相似度归入最近的聚类（质心为聚类内岗位 embedding 的均值），
+  相似的岗位复用同一聚类下已有的定制内容
+- 每个缓存的章节记录生成时已覆盖的岗位关键词；新岗位的特有关键词（未覆盖的关键词）
+  只有出现在某个章节的原文中时，该章节才需要重新生成——原文中没有的经历不能靠改写补出来
+- 需要重新生成的章节和打招呼语合并为一次结构化输出请求；章节原文变化后旧的定制内容自动失效
+
+打招呼语以 {company}、{job_title} 占位符的模板缓存，按岗位填充。
+"""
+import functools
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from pydantic import BaseModel, Field
+
+from app.config.config_com import (
+    RESUME_CLUSTER_THRESHOLD,
+    RESUME_PATH,
+    RESUME_STATIC_SECTIONS,
+    RESUME_TAILOR_DB_PATH,
+)
+from app.multi_agents.utils.job_evaluator import Listing, render_listing
+from app.multi_agents.utils.logger import get_logger
+from app.multi_agents.utils.skill_keywords import extract_keywords
+
+logger = get_logger(__name__, level="debug")
+
+TAILOR_PROMPT = """你是求职简历顾问。根据岗位要求改写简历中指定的章节，并写一段打招呼语：
+- 突出与岗位要求相关的经历和技能，调整措辞和顺序，保持原有的 Markdown 格式
+- 只能使用原文中已有的经历、项目和技能，不得编造
+- 每个指定的章节都必须返回一条结果，name 与章节标题完全一致
+- greeting 为发给HR的打招呼语，不超过80字，用 {company} 表示公司名、{job_title} 表示岗位名"""
+
+# 打招呼语在缓存中使用的章节名
+GREETING = "__greeting__"
+
+# 第一个标题之前的内容（姓名、联系方式等）所属的章节，不做定制
+_HEADER_SECTION = ""
+
+_HEADING = re.compile(r"^#{2,3}\s+(.+?)\s*$")
+
+class ResumeSection(NamedTuple):
+    """简历的一个章节"""
+    name: str
+    content: str
+
+    @property
+    def digest(self) -> str:
+        return hashlib.sha1(self.content.encode("utf-8")).hexdigest()[:16]
+
+
+class TailoredSection(BaseModel):
+    """改写后的章节"""
+
+    name: str = Field(description="章节标题，与原文一致")
+    content: str = Field(description="改写后的章节内容（不含标题行）")
+
+
+class TailoringResult(BaseModel):
+    """一次定制请求的结果"""
+
+    sections: List[TailoredSection] = Field(description="每个指定章节一条改写结果")
+    greeting: str = Field(description="打招呼语模板，使用 {company} 和 {job_title} 占位符")
+
+
+class TailoredResume(NamedTuple):
+    """为一个岗位定制的简历"""
+    job: str
+    cluster_id: int
+    resume: str
+    greeting: str
+    # 本次重新生成的章节（含打招呼语）和直接复用缓存的章节
+    regenerated: List[str]
+    reused: List[str]
+
+
+def split_resume(text: str) -> List[ResumeSection]:
+    """按二、三级 Markdown 标题把简历拆分为章节，第一个章节标题之前的内容（含一级标题）作为标题为空的章节"""
+    sections: List[ResumeSection] = []
+    name, lines = _HEADER_SECTION, []
+    for line in text.splitlines():
+        match = _HEADING.match(line)
+        if match:
+            if name != _HEADER_SECTION or any(part.strip() for part in lines):
+                sections.append(ResumeSection(name, "\n".join(lines).strip()))
+            name, lines = match.group(1), []
+        else:
+            lines.append(line)
+    if name != _HEADER_SECTION or any(part.strip() for part in lines):
+        sections.append(ResumeSection(name, "\n".join(lines).strip()))
+    return sections
+
+
+def join_resume(sections: Sequence[ResumeSection]) -> str:
+    """把章节重新组合为 Markdown 简历"""
+    parts = []
+    for section in sections:
+        parts.append(section.content if section.name == _HEADER_SECTION else f"## {section.name}\n{section.content}")
+    return "\n\n".join(part for part in parts if part).strip() + "\n"
+
+
+def job_fields(job: Listing) -> Tuple[str, str]:
+    """岗位的公司名和岗位名，无法识别时为空字符串"""
+    if not isinstance(job, Mapping):
+        return "", ""
+    company = next((str(job[key]) for key in ("公司", "company", "公司名称") if job.get(key)), "")
+    title = next((str(job[key]) for key in ("岗位", "job_title", "title", "职位") if job.get(key)), "")
+    return company, title
+
+
+def fill_greeting(template: str, job: Listing) -> str:
+    """用岗位的公司名和岗位名填充打招呼语模板"""
+    company, title = job_fields(job)
+    return template.replace("{company}", company or "贵公司").replace("{job_title}", title or "这个岗位")
+
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class ResumeVariantStore:
+    """基于 SQLite 的岗位聚类质心和章节定制缓存"""
+
+    def __init__(self, db_path: str = RESUME_TAILOR_DB_PATH):
+        """
+        Args:
+            db_path: SQLite 数据库文件路径，":memory:" 表示内存数据库
+        """
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS job_clusters ("
+            "cluster_id INTEGER PRIMARY KEY AUTOINCREMENT, centroid TEXT NOT NULL, size INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS section_variants ("
+            "section TEXT NOT NULL, digest TEXT NOT NULL, cluster_id INTEGER NOT NULL, content TEXT NOT NULL, "
+            "covered TEXT NOT NULL, updated_at REAL NOT NULL, PRIMARY KEY (section, digest, cluster_id));"
+        )
+        self.conn.commit()
+
+    def clusters(self) -> Dict[int, Tuple[List[float], int]]:
+        """全部聚类: 聚类ID -> (质心, 岗位数)"""
+        with self.lock:
+            rows = self.conn.execute("SELECT cluster_id, centroid, size FROM job_clusters").fetchall()
+        return {cluster_id: (json.loads(centroid), size) for cluster_id, centroid, size in rows}
+
+    def add_cluster(self, centroid: Sequence[float]) -> int:
+        """新建聚类，返回聚类ID"""
+        with self.lock:
+            cursor = self.conn.execute(
+                "INSERT INTO job_clusters (centroid, size) VALUES (?, 1)", (json.dumps(list(centroid)),),
+            )
+            self.conn.commit()
+            return cursor.lastrowid
+
+    def update_cluster(self, cluster_id: int, centroid: Sequence[float], size: int) -> None:
+        """更新聚类的质心和岗位数"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE job_clusters SET centroid = ?, size = ? WHERE cluster_id = ?",
+                (json.dumps(list(centroid)), size, cluster_id),
+            )
+            self.conn.commit()
+
+    def get_variant(self, section: str, digest: str, cluster_id: int) -> Optional[Tuple[str, Set[str]]]:
+        """读取章节在聚类下的定制内容和已覆盖的关键词，没有时返回 None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT content, covered FROM section_variants WHERE section = ? AND digest = ? AND cluster_id = ?",
+                (section, digest, cluster_id),
+            ).fetchone()
+        return None if row is None else (row[0], set(json.loads(row[1])))
+
+    def put_variant(self, section: str, digest: str, cluster_id: int, content: str, covered: Set[str]) -> None:
+        """保存章节在聚类下的定制内容"""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO section_variants (section, digest, cluster_id, content, covered, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (section, digest, cluster_id, content, json.dumps(sorted(covered), ensure_ascii=False), time.time()),
+            )
+            self.conn.commit()
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self.lock:
+            self.conn.close()
+
+
+class ResumeTailor:
+    """按岗位聚类缓存、按章节增量生成的简历定制"""
+
+    def __init__(
+        self,
+        resume: Optional[str] = None,
+        llm: Any = None,
+        embedding: Any = None,
+        store: Optional[ResumeVariantStore] = None,
+        cluster_threshold: float = RESUME_CLUSTER_THRESHOLD,
+        static_sections: Sequence[str] = RESUME_STATIC_SECTIONS,
+        resume_path: str = RESUME_PATH,
+    ):
+        """
+        Args:
+            resume: Markdown 格式的简历原文，默认读取 resume_path
+            llm: 支持 with_structured_output 的聊天模型，默认使用 BASIC 级别的模型
+            embedding: 提供 embed_documents/embed_query 的 embedding 实例，默认使用 DashScope
+            store: 定制缓存，默认使用 RESUME_TAILOR_DB_PATH
+            cluster_threshold: 岗位归入已有聚类的最低余弦相似度
+            static_sections: 不需要定制的章节
+            resume_path: 简历文件路径
+        """
+        self._resume = resume
+        self._llm = llm
+        self._embedding = embedding
+        self._store = store
+        self.cluster_threshold = cluster_threshold
+        self.static_sections = set(static_sections)
+        self.resume_path = resume_path
+        self._structured = None
+        self._lock = threading.Lock()
+        self.stats = {"jobs": 0, "llm_calls": 0, "sections_generated": 0, "sections_reused": 0}
+
+    @property
+    def resume(self) -> str:
+        if self._resume is None:
+            with open(self.resume_path, encoding="utf-8") as f:
+                self._resume = f.read()
+        return self._resume
+
+    @property
+    def sections(self) -> List[ResumeSection]:
+        return split_resume(self.resume)
+
+    @property
+    def store(self) -> ResumeVariantStore:
+        if self._store is None:
+            self._store = ResumeVariantStore()
+        return self._store
+
+    @property
+    def embedding(self):
+        if self._embedding is None:
+            from app.multi_agents.utils.embedding_factory import EmbeddingFactory, EmbeddingProviderType
+            self._embedding = EmbeddingFactory.create_embedding(EmbeddingProviderType.DASHSCOPE)
+        return self._embedding
+
+    @property
+    def structured_llm(self):
+        if self._structured is None:
+            if self._llm is None:
+                from app.multi_agents.utils.llm_factory import get_llm_by_type, ThinkingLevel
+                self._llm = get_llm_by_type(ThinkingLevel.BASIC)
+            self._structured = self._llm.with_structured_output(TailoringResult)
+        return self._structured
+
+    def assign_cluster(self, vector: Sequence[float]) -> int:
+        """把岗位 embedding 归入最相似的聚类并更新质心，没有足够相似的聚类时新建"""
+        clusters = self.store.clusters()
+        best, similarity = None, -1.0
+        for cluster_id, (centroid, _) in clusters.items():
+            score = _cosine(vector, centroid)
+            if score > similarity:
+                best, similarity = cluster_id, score
+        if best is None or similarity < self.cluster_threshold:
+            return self.store.add_cluster(vector)
+        centroid, size = clusters[best]
+        self.store.update_cluster(best, [(c * size + v) / (size + 1) for c, v in zip(centroid, vector)], size + 1)
+        return best
+
+    def plan(self, cluster_id: int, keywords: Set[str]) -> Tuple[Dict[str, str], List[ResumeSection]]:
+        """确定哪些章节可以复用缓存，哪些需要重新生成
+
+        Returns:
+            (章节名 -> 复用的定制内容, 需要重新生成的章节)
+        """
+        reused: Dict[str, str] = {}
+        stale: List[ResumeSection] = []
+        for section in self.sections:
+            if section.name == _HEADER_SECTION or section.name in self.static_sections:
+                continue
+            cached = self.store.get_variant(section.name, section.digest, cluster_id)
+            if cached is None:
+                stale.append(section)
+                continue
+            content, covered = cached
+            # 岗位的特有关键词出现在章节原文中时，需要重新生成以突出这部分经历
+            if (keywords - covered) & extract_keywords(section.content):
+                stale.append(section)
+            else:
+                reused[section.name] = content
+        return reused, stale
+
+    def _messages(self, job_text: str, keywords: Set[str], stale: Sequence[ResumeSection]) -> List[Any]:
+        sections = "\n\n".join(f"### {section.name}\n{section.content}" for section in stale)
+        return [
+            SystemMessage(content=TAILOR_PROMPT),
+            HumanMessage(content=(
+                f"## 岗位要求\n{job_text}\n\n## 岗位关键词\n{'、'.join(sorted(keywords)) or '无'}\n\n"
+                f"## 需要改写的章节\n{sections or '无（只需要写打招呼语）'}"
+            )),
+        ]
+
+    def _config(self) -> Dict[str, Any]:
+        return {"run_name": "resume_tailor", "metadata": {"llm_lane": "bulk"}}
+
+    def _tailor(self, job: Listing, vector: Sequence[float]) -> TailoredResume:
+        job_text = render_listing(job)
+        keywords = extract_keywords(job_text)
+        with self._lock:
+            cluster_id = self.assign_cluster(vector)
+            reused, stale = self.plan(cluster_id, keywords)
+            greeting = self.store.get_variant(GREETING, "", cluster_id)
+            regenerate_greeting = greeting is None or bool(stale)
+
+            generated: Dict[str, str] = {}
+            if stale or regenerate_greeting:
+                self.stats["llm_calls"] += 1
+                result = self.structured_llm.invoke(self._messages(job_text, keywords, stale), config=self._config())
+                generated = {section.name: section.content for section in result.sections}
+                for section in stale:
+                    # 模型遗漏的章节使用原文，不写入缓存，下次仍会重新生成
+                    if section.name not in generated:
+                        continue
+                    _, covered = self.store.get_variant(section.name, section.digest, cluster_id) or ("", set())
+                    self.store.put_variant(section.name, section.digest, cluster_id, generated[section.name], covered | keywords)
+                self.store.put_variant(GREETING, "", cluster_id, result.greeting, keywords)
+                greeting = (result.greeting, keywords)
+
+            self.stats["jobs"] += 1
+            self.stats["sections_generated"] += len(stale)
+            self.stats["sections_reused"] += len(reused)
+
+        sections = [
+            ResumeSection(section.name, reused.get(section.name) or generated.get(section.name) or section.content)
+            for section in self.sections
+        ]
+        regenerated = [section.name for section in stale] + ([GREETING] if regenerate_greeting else [])
+        return TailoredResume(
+            job_text, cluster_id, join_resume(sections), fill_greeting(greeting[0], job), regenerated, list(reused),
+        )
+
+    def tailor(self, job: Listing) -> TailoredResume:
+        """为一个岗位定制简历和打招呼语
+
+        Args:
+            job: 岗位卡片文本或字段字典
+
+        Returns:
+            定制后的简历，包含本次重新生成和复用的章节
+        """
+        return self._tailor(job, self.embedding.embed_query(render_listing(job)))
+
+    def tailor_many(self, jobs: Sequence[Listing]) -> List[TailoredResume]:
+        """为多个岗位定制简历，岗位 embedding 一次计算；同一聚类中靠后的岗位复用前面岗位的定制"""
+        if not jobs:
+            return []
+        vectors = self.embedding.embed_documents([render_listing(job) for job in jobs])
+        results = [self._tailor(job, vector) for job, vector in zip(jobs, vectors)]
+        logger.info(
+            f"简历定制: {len(jobs)}个岗位，累计LLM调用{self.stats['llm_calls']}次，"
+            f"重新生成{self.stats['sections_generated']}个章节，复用{self.stats['sections_reused']}个章节",
+            agent_name="resume",
+        )
+        return results
+
+
+@functools.lru_cache(maxsize=None)
+def get_resume_tailor() -> ResumeTailor:
+    """获取默认的简历定制器，首次使用时才读取简历和创建模型"""
+    return ResumeTailor()
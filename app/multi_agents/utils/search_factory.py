@@ -8,6 +8,7 @@ from typing import List, Dict, Any
 from tavily import TavilyClient
 from enum import Enum, auto
 from app.config.config_ai import TAVILY_API_KEY, JINA_API_KEY
+from app.config.config_com import REPLAY_MODE
 
 class SearchEngineType(Enum):
     """搜索引擎类型枚举"""
@@ -40,6 +41,19 @@ class SearchEngineFactory:
         Raises:
             ValueError: 当指定的搜索引擎类型不受支持时
         """
+        if REPLAY_MODE in ("record", "replay"):
+            # 录制/回放模式：回放时不会创建真实的搜索引擎
+            from app.multi_agents.utils.replay import ReplaySearchEngine
+            return ReplaySearchEngine(
+                str(engine_type),
+                factory=lambda: SearchEngineFactory._create_engine(engine_type, **kwargs),
+                mode=REPLAY_MODE,
+            )
+        return SearchEngineFactory._create_engine(engine_type, **kwargs)
+
+    @staticmethod
+    def _create_engine(engine_type: SearchEngineType, **kwargs) -> SearchEngine:
+        """创建真实的搜索引擎实例，参数同 create_engine"""
         if engine_type == SearchEngineType.TAVILY:
             api_key = kwargs.get("api_key")
             if not api_key:
@@ -0,0 +1,30 @@
+"""
+技能关键词提取
+
+从岗位描述、岗位卡片和简历文本中提取技能关键词：英文技术词直接按单词提取（小写），
+中文技能/领域词按词表匹配。简历定制（resume_tailor）和岗位市场统计（job_market）共用，
+本模块只依赖标准库。
+"""
+import re
+from typing import Set
+
+# 中文技能/领域关键词（英文技术词直接按单词提取）
+SKILL_TERMS = (
+    "大模型", "多智能体", "智能体", "知识库", "知识图谱", "检索增强", "提示词", "微调", "推荐", "搜索", "广告",
+    "爬虫", "分布式", "微服务", "高并发", "中间件", "数据仓库", "数据分析", "数据挖掘", "实时计算", "机器学习",
+    "深度学习", "强化学习", "自然语言处理", "计算机视觉", "语音识别", "自动驾驶", "前端", "后端", "全栈", "运维",
+    "测试", "算法", "架构", "性能优化", "云原生", "嵌入式", "游戏", "电商", "金融", "支付",
+)
+
+_ENGLISH_TERM = re.compile(r"[a-z][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+
+# 英文技术词中的常见无关词
+_STOPWORDS = {"and", "or", "the", "of", "in", "on", "for", "with", "to", "a", "an", "k"}
+
+
+def extract_keywords(text: str) -> Set[str]:
+    """提取文本中的技能关键词：英文技术词（小写）和常见的中文技能/领域词"""
+    text = (text or "").lower()
+    keywords = {word for word in _ENGLISH_TERM.findall(text) if word not in _STOPWORDS and len(word) > 1}
+    keywords.update(term for term in SKILL_TERMS if term in text)
+    return keywords
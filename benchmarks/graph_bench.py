@@ -0,0 +1,402 @@
+"""
+智能体图端到端基准
+
+使用脚本化的模拟 LLM 和模拟 Boss直聘工具运行 build_agent 编译的图与 db_query 智能体，
+不访问任何外部服务。按指定的并发数和请求组合执行多个会话，统计：
+- 吞吐量（会话/秒）和各类会话的 p50/p95 延迟
+- 各节点的 p50/p95 耗时（frontdesk、planner、supervisor、job_find、agent、tools 等）
+- 每个会话的内存分配峰值（单独的串行测量阶段，使用 tracemalloc）
+- 每个会话的检查点大小（SqliteDeltaSaver.storage_stats）
+
+请求组合：
+    job      找工作请求，命中前台快速路由：frontdesk -> planner -> job_find -> supervisor
+    job_llm  表述模糊的找工作请求，前台需要调用 LLM 判断
+    db       db_query 智能体查询电路引脚表（LLM -> 工具 -> LLM）
+
+用法:
+    python benchmarks/graph_bench.py
+    python benchmarks/graph_bench.py --concurrency 8 --sessions 64 --mix job=6,job_llm=2,db=2 --json
+    python benchmarks/graph_bench.py --llm-latency 0.2 --tool-latency 1.0 --output bench.json
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "false")
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+# 各类会话的用户输入
+REQUESTS = {
+    "job": ["帮我寻找AI Agent 工作", "去boss直聘搜索深圳的Python岗位", "帮我找上海的产品经理职位"],
+    "job_llm": ["最近想换个方向，看看有什么机会", "我想试试大模型应用方向"],
+    "db": ["查询元件U1的全部引脚", "元件U2有哪些引脚"],
+}
+
+DEFAULT_MIX = {"job": 6, "job_llm": 2, "db": 2}
+
+_PLAN = json.dumps({
+    "thought": "用户需要在Boss直聘上查找岗位",
+    "title": "岗位查找计划",
+    "steps": [{"agent_name": "job_find", "title": "查找岗位", "description": "在Boss直聘搜索并沟通匹配的岗位"}],
+}, ensure_ascii=False)
+
+_JOB_RESULT = "\n## Boss直聘岗位查找结果\n\n### 执行步骤:\n" + "".join(
+    f"- 岗位{i}: AI Agent开发工程师 深圳 20-30K 已点击立即沟通\n" for i in range(20)
+) + "\n### 任务结果:\n共沟通20个岗位\n"
+
+
+def _system_text(messages: Sequence[Any]) -> str:
+    first = messages[0] if messages else None
+    return str(getattr(first, "content", "")) if getattr(first, "type", "") == "system" else ""
+
+
+class ScriptedChatModel(BaseChatModel):
+    """按提示词类型返回固定回复的模拟模型，每次调用等待 latency 秒（流式输出时分摊到各个块）"""
+
+    latency: float = 0.05
+    chunk_size: int = 16
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: Sequence[Any], *, tool_choice: Optional[Any] = None, **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _respond(self, messages: Sequence[Any], tools: Sequence[Dict[str, Any]]) -> AIMessage:
+        names = [tool["function"]["name"] for tool in tools]
+        system = _system_text(messages)
+        if "Router" in names:
+            return AIMessage(content="", tool_calls=[{"name": "Router", "args": {"next": "FINISH"}, "id": "call_router"}])
+        if "execute_sql" in names:
+            if isinstance(messages[-1], ToolMessage):
+                rows = json.loads(messages[-1].content or "{}").get("data", [])
+                return AIMessage(content=f"查询完成，共{len(rows)}个引脚")
+            component = "U2" if "U2" in str(messages[-1].content) else "U1"
+            sql = f"SELECT * FROM pin_table WHERE component_id = '{component}'"
+            return AIMessage(content="", tool_calls=[{"name": "execute_sql", "args": {"sql": sql}, "id": "call_sql"}])
+        if "handoff_to_planner" in system:
+            return AIMessage(content="handoff_to_planner()")
+        if "agent_name" in system:
+            return AIMessage(content=_PLAN)
+        return AIMessage(content="好的")
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages, kwargs.get("tools") or []))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        message = self._respond(messages, kwargs.get("tools") or [])
+        text = message.content
+        chunks = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)] or [""]
+        for piece in chunks:
+            time.sleep(self.latency / len(chunks))
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+
+
+class FakeBossJobTool:
+    """模拟 Boss直聘工具：按步骤发送进度，总耗时 latency 秒"""
+
+    def __init__(self, latency: float = 0.2, steps: int = 4):
+        self.latency = latency
+        self.steps = steps
+
+    def _run(self, task: str, step_callback=None, cdp_url: Optional[str] = None) -> str:
+        for step in range(1, self.steps + 1):
+            time.sleep(self.latency / self.steps)
+            if step_callback is not None:
+                step_callback({"step": step, "url": "https://www.zhipin.com/web/geek/job", "title": "BOSS直聘"})
+        return _JOB_RESULT
+
+
+class NodeTimer(BaseCallbackHandler):
+    """按 LangGraph 节点统计每次执行的耗时"""
+
+    def __init__(self):
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+        self._starts: Dict[Any, tuple] = {}
+        self._lock = threading.Lock()
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        if node is not None and kwargs.get("name") == node:
+            self._starts[run_id] = (node, time.perf_counter())
+
+    def _finish(self, run_id) -> None:
+        started = self._starts.pop(run_id, None)
+        if started is not None:
+            with self._lock:
+                self.durations[started[0]].append(time.perf_counter() - started[1])
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs) -> None:
+        self._finish(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs) -> None:
+        self._finish(run_id)
+
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """线性插值的百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _summary(values: Sequence[float]) -> Dict[str, float]:
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+    }
+
+
+def _create_pin_db(path: str) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE pin_table (component_id TEXT, pin_name TEXT, pin_type TEXT)")
+    conn.executemany(
+        "INSERT INTO pin_table VALUES (?, ?, ?)",
+        [(component, f"P{i}", "IO") for component in ("U1", "U2") for i in range(16)],
+    )
+    conn.commit()
+    conn.close()
+
+
+class GraphBench:
+    """搭建模拟环境并运行会话"""
+
+    def __init__(self, workdir: str, llm_latency: float, tool_latency: float):
+        import importlib
+
+        from app.multi_agents.graph import agents, node_graph
+        from app.multi_agents.graph.checkpointer import SqliteDeltaSaver
+        from app.multi_agents.tools.db_query_tool import DBConnection
+
+        self.llm = ScriptedChatModel(latency=llm_latency)
+        # tools 包会把同名的工具对象缓存到包属性上，这里必须取子模块本身
+        boss_job_module = importlib.import_module("app.multi_agents.tools.boss_job_tool")
+        # 图中的节点和智能体在调用时才获取模型和工具，替换模块属性即可接入模拟实现
+        self._patches = [
+            (node_graph, "get_llm_by_type", lambda *args, **kwargs: self.llm),
+            (agents, "get_llm_by_type", lambda *args, **kwargs: self.llm),
+            (boss_job_module, "boss_job_tool", FakeBossJobTool(tool_latency)),
+            (DBConnection, "_instance", None),
+        ]
+        self._originals = [(module, name, getattr(module, name)) for module, name, _ in self._patches]
+        for module, name, value in self._patches:
+            setattr(module, name, value)
+        self._agents = agents
+
+        db_path = os.path.join(workdir, "circuit.db")
+        _create_pin_db(db_path)
+        DBConnection(db_path)
+        agents.get_db_query_agent.cache_clear()
+
+        self.checkpointer = SqliteDeltaSaver(os.path.join(workdir, "checkpoints.db"))
+        self.graph = node_graph.build_agent(checkpointer=self.checkpointer)
+        self.db_agent = agents.get_db_query_agent()
+        self.timer = NodeTimer()
+
+    def run_session(self, kind: str, session_id: str, text: str) -> Dict[str, Any]:
+        from app.config.config_com import TEAM_MEMBERS
+        from app.multi_agents.graph.streaming import stream_agent
+
+        config = {"configurable": {"thread_id": session_id}, "callbacks": [self.timer]}
+        start = time.perf_counter()
+        if kind == "db":
+            result = self.db_agent.invoke({"messages": [HumanMessage(content=text)]}, config)
+            ok = "查询完成" in result["messages"][-1].content
+        else:
+            state = {"messages": [HumanMessage(content=text)], "TEAM_MEMBERS": TEAM_MEMBERS}
+            events = list(stream_agent(self.graph, state, config))
+            ok = any(event.get("node") == "job_find" for event in events)
+        return {"kind": kind, "session_id": session_id, "latency": time.perf_counter() - start, "ok": ok}
+
+    def close(self) -> None:
+        """关闭检查点存储并恢复被替换的模块属性"""
+        self.checkpointer.close()
+        for module, name, value in self._originals:
+            setattr(module, name, value)
+        self._agents.get_db_query_agent.cache_clear()
+
+    def checkpoint_bytes(self, session_id: str) -> int:
+        stats = self.checkpointer.storage_stats(session_id)
+        return sum(value for key, value in stats.items() if key.endswith("_bytes"))
+
+
+def _parse_mix(text: str) -> Dict[str, int]:
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        if kind.strip() not in REQUESTS:
+            raise ValueError(f"未知的请求类型: {kind}，可选: {', '.join(REQUESTS)}")
+        mix[kind.strip()] = int(weight or 1)
+    return mix
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_benchmark(
+    concurrency: int = 4,
+    sessions: int = 32,
+    mix: Optional[Dict[str, int]] = None,
+    llm_latency: float = 0.05,
+    tool_latency: float = 0.2,
+    memory_samples: int = 3,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """运行基准并返回可序列化的结果
+
+    Args:
+        concurrency: 同时运行的会话数
+        sessions: 会话总数
+        mix: 各类请求的权重，默认 DEFAULT_MIX
+        llm_latency: 模拟 LLM 每次调用的耗时（秒）
+        tool_latency: 模拟 Boss直聘工具每次执行的耗时（秒）
+        memory_samples: 内存测量阶段每类请求串行运行的会话数
+        seed: 请求组合的随机种子
+
+    Returns:
+        基准结果字典
+    """
+    mix = mix or DEFAULT_MIX
+    rng = random.Random(seed)
+    kinds = rng.choices(list(mix), weights=list(mix.values()), k=sessions)
+    counter = itertools.count()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        bench = GraphBench(workdir, llm_latency, tool_latency)
+
+        try:
+            def _one(kind: str) -> Dict[str, Any]:
+                index = next(counter)
+                return bench.run_session(kind, f"bench-{kind}-{index}", REQUESTS[kind][index % len(REQUESTS[kind])])
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                results = list(pool.map(_one, kinds))
+            elapsed = time.perf_counter() - start
+            nodes = {node: _summary(values) for node, values in sorted(bench.timer.durations.items())}
+
+            # 内存测量：串行运行，避免会话之间互相干扰；tracemalloc 开销较大，不计入吞吐量
+            memory: Dict[str, List[float]] = defaultdict(list)
+            tracemalloc.start()
+            try:
+                for kind in mix:
+                    for _ in range(memory_samples):
+                        tracemalloc.reset_peak()
+                        baseline = tracemalloc.get_traced_memory()[0]
+                        _one(kind)
+                        memory[kind].append((tracemalloc.get_traced_memory()[1] - baseline) / 1024)
+            finally:
+                tracemalloc.stop()
+
+            by_kind: Dict[str, List[float]] = defaultdict(list)
+            for result in results:
+                by_kind[result["kind"]].append(result["latency"])
+            checkpoint_sizes = [bench.checkpoint_bytes(r["session_id"]) for r in results if r["kind"] != "db"]
+
+        finally:
+            bench.close()
+
+        return {
+            "benchmark": "graph",
+            "commit": _git_commit(),
+            "config": {
+                "concurrency": concurrency, "sessions": sessions, "mix": mix,
+                "llm_latency": llm_latency, "tool_latency": tool_latency,
+            },
+            "elapsed_s": round(elapsed, 3),
+            "throughput_per_s": round(sessions / elapsed, 3) if elapsed else 0.0,
+            "failures": sum(1 for r in results if not r["ok"]),
+            "sessions": {kind: _summary(values) for kind, values in sorted(by_kind.items())},
+            "nodes": nodes,
+            "memory_peak_kb_per_session": {
+                kind: round(percentile(values, 50), 1) for kind, values in sorted(memory.items())
+            },
+            "checkpoint_bytes_per_session": {
+                "p50": int(percentile(checkpoint_sizes, 50)),
+                "max": max(checkpoint_sizes, default=0),
+            },
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="使用模拟LLM和工具运行智能体图的端到端基准")
+    parser.add_argument("--concurrency", type=int, default=4, help="同时运行的会话数")
+    parser.add_argument("--sessions", type=int, default=32, help="会话总数")
+    parser.add_argument("--mix", default=",".join(f"{k}={v}" for k, v in DEFAULT_MIX.items()), help="请求组合，如 job=6,db=2")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="模拟LLM每次调用的耗时（秒）")
+    parser.add_argument("--tool-latency", type=float, default=0.2, help="模拟Boss直聘工具的耗时（秒）")
+    parser.add_argument("--memory-samples", type=int, default=3, help="内存测量阶段每类请求的会话数")
+    parser.add_argument("--seed", type=int, default=0, help="请求组合的随机种子")
+    parser.add_argument("--json", action="store_true", help="以JSON格式输出")
+    parser.add_argument("--output", help="把JSON结果写入文件，便于跨提交对比")
+    args = parser.parse_args()
+
+    # 项目的日志和调试输出写到标准输出，JSON 模式下先转到标准错误，保证标准输出只有结果
+    stdout = sys.stdout
+    if args.json:
+        sys.stdout = sys.stderr
+    try:
+        result = run_benchmark(
+            concurrency=args.concurrency,
+            sessions=args.sessions,
+            mix=_parse_mix(args.mix),
+            llm_latency=args.llm_latency,
+            tool_latency=args.tool_latency,
+            memory_samples=args.memory_samples,
+            seed=args.seed,
+        )
+    finally:
+        sys.stdout = stdout
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+
+    print(f"提交: {result['commit']}  并发: {args.concurrency}  会话: {args.sessions}  失败: {result['failures']}")
+    print(f"吞吐量: {result['throughput_per_s']} 会话/秒  总耗时: {result['elapsed_s']}s")
+    print(f"\n{'会话类型/节点':<20}{'次数':>8}{'p50(ms)':>12}{'p95(ms)':>12}")
+    for name, item in list(result["sessions"].items()) + list(result["nodes"].items()):
+        print(f"{name:<20}{item['count']:>8}{item['p50_ms']:>12}{item['p95_ms']:>12}")
+    print(f"\n每会话内存峰值(KB): {result['memory_peak_kb_per_session']}")
+    print(f"每会话检查点大小(字节): {result['checkpoint_bytes_per_session']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+HR 回复评估基准
+
+使用 tests/fixtures/hr_replies.jsonl 中标注过的会话语料（按需重复到指定数量），分别以
+逐条调用（每个会话一次 LLM 请求，不预分类）和 HRReplyScorer（预分类 + 批量结构化输出）评估，
+模拟模型按标注返回结果，每次请求等待 --llm-latency 秒。统计：
+- 预分类命中率和预分类准确率
+- LLM 请求次数和总耗时
+- 吞吐量（会话/秒）
+
+用法:
+    python benchmarks/hr_reply_bench.py
+    python benchmarks/hr_reply_bench.py --conversations 200 --llm-latency 1.5 --concurrency 3 --json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Dict
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "tests"))
+
+from hr_reply_corpus import OracleReplyLLM, load_corpus  # noqa: E402
+
+from app.multi_agents.utils.hr_reply_scorer import HRReplyScorer  # noqa: E402
+
+
+def _corpus(n: int):
+    base = load_corpus()
+    corpus = []
+    for i in range(n):
+        conversation, intent, next_action = base[i % len(base)]
+        corpus.append((conversation._replace(conversation_id=f"{conversation.conversation_id}-{i}"), intent, next_action))
+    return corpus
+
+
+def run(conversations: int, llm_latency: float, concurrency: int, max_batch: int) -> Dict[str, Any]:
+    corpus = _corpus(conversations)
+    pending = [conversation for conversation, _, _ in corpus]
+    labels = [(intent, next_action) for _, intent, next_action in corpus]
+    report: Dict[str, Any] = {"conversations": conversations, "llm_latency": llm_latency, "concurrency": concurrency}
+
+    for name, kwargs in (
+        ("per_message", {"preclassify": False, "max_batch_size": 1}),
+        ("batched", {"max_batch_size": max_batch}),
+    ):
+        llm = OracleReplyLLM(corpus, latency=llm_latency)
+        scorer = HRReplyScorer(llm=llm, max_concurrency=concurrency, **kwargs)
+        start = time.perf_counter()
+        assessments, failed = asyncio.run(scorer.ascore(pending))
+        elapsed = time.perf_counter() - start
+        rule = [a for a in assessments if a.source != "llm"]
+        report[name] = {
+            "llm_calls": scorer.stats["llm_calls"],
+            "preclassified": len(rule),
+            "preclassified_accuracy": (
+                sum((a.intent, a.next_action) == labels[a.index] for a in rule) / len(rule) if rule else None
+            ),
+            "accuracy": sum((a.intent, a.next_action) == labels[a.index] for a in assessments) / len(labels),
+            "failed": len(failed),
+            "seconds": round(elapsed, 3),
+            "throughput": round(conversations / elapsed, 1) if elapsed else None,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HR 回复评估基准")
+    parser.add_argument("--conversations", type=int, default=200, help="会话数")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="每次 LLM 请求的模拟耗时（秒）")
+    parser.add_argument("--concurrency", type=int, default=3, help="同时进行的请求数")
+    parser.add_argument("--max-batch", type=int, default=20, help="每批会话数上限")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出")
+    args = parser.parse_args()
+
+    report = run(args.conversations, args.llm_latency, args.concurrency, args.max_batch)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+    print(f"会话数: {args.conversations}，LLM耗时: {args.llm_latency}s/次，并发: {args.concurrency}")
+    for name in ("per_message", "batched"):
+        item = report[name]
+        print(
+            f"{name:12s} LLM调用 {item['llm_calls']:4d} 次  预分类 {item['preclassified']:4d} 个  "
+            f"准确率 {item['accuracy']:.2f}  耗时 {item['seconds']:.2f}s  吞吐 {item['throughput']} 会话/秒"
+        )
+
+
+if __name__ == "__main__":
+    main()
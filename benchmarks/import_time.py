@@ -0,0 +1,103 @@
+"""
+导入耗时基准
+
+在独立的子进程中执行 `python -X importtime -c "import <模块>"`，
+解析 stderr 中的累计耗时，统计各入口模块的冷启动导入开销，
+并列出每个模块中耗时最多的依赖，便于发现重新变成"急切导入"的重型依赖。
+
+用法:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --json
+    python benchmarks/import_time.py app.multi_agents.tools --top 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# 默认测量的入口模块
+DEFAULT_MODULES = [
+    "app.multi_agents.utils",
+    "app.multi_agents.prompts.template",
+    "app.multi_agents.tools",
+    "app.multi_agents.graph.node_graph",
+    "app.multi_agents.graph.agents",
+]
+
+# 不应在入口模块导入时被加载的重型依赖
+HEAVY_MODULES = ["browser_use", "playwright", "langgraph.prebuilt"]
+
+
+def measure(module: str) -> Tuple[int, Dict[str, int]]:
+    """测量单个模块的冷启动导入耗时
+
+    Args:
+        module: 模块名
+
+    Returns:
+        (总耗时微秒, {被导入模块: 累计耗时微秒})
+    """
+    env = {**os.environ, "PYTHONPATH": ROOT, "ANONYMIZED_TELEMETRY": "false"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{proc.stderr[-2000:]}")
+
+    cumulative: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        # 格式: "import time:      self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        name = parts[2].strip()
+        cumulative[name] = max(cumulative.get(name, 0), int(parts[1]))
+    return cumulative.get(module, 0), cumulative
+
+
+def run(modules: List[str], top: int = 5) -> List[Dict]:
+    results = []
+    for module in modules:
+        total, cumulative = measure(module)
+        deps = sorted(
+            ((name, us) for name, us in cumulative.items() if name != module and "." not in name),
+            key=lambda item: item[1], reverse=True,
+        )[:top]
+        results.append({
+            "module": module,
+            "total_ms": round(total / 1000, 1),
+            "heavy_loaded": [name for name in HEAVY_MODULES if name in cumulative],
+            "top_deps": [{"module": name, "ms": round(us / 1000, 1)} for name, us in deps],
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="统计入口模块的冷启动导入耗时")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES, help="要测量的模块")
+    parser.add_argument("--top", type=int, default=5, help="每个模块列出的耗时最多的依赖数")
+    parser.add_argument("--json", action="store_true", help="以JSON格式输出")
+    args = parser.parse_args()
+
+    results = run(args.modules, args.top)
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+
+    print(f"{'模块':<45}{'耗时(ms)':>10}  重型依赖")
+    for item in results:
+        heavy = ", ".join(item["heavy_loaded"]) or "-"
+        print(f"{item['module']:<45}{item['total_ms']:>10}  {heavy}")
+        for dep in item["top_deps"]:
+            print(f"    {dep['module']:<41}{dep['ms']:>10}")
+
+
+if __name__ == "__main__":
+    main()
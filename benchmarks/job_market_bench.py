@@ -0,0 +1,108 @@
+"""
+岗位市场数据基准
+
+生成指定数量的模拟岗位（城市、关键词、技能、薪资按固定随机种子生成），按批写入 JobMarketStore 的列式分区，
+然后统计：
+- 写入耗时和分区文件总大小
+- 读取并合并全部分区（含去重）的耗时
+- 按城市、关键词、技能计算薪资分位数以及技能计数的耗时
+
+用法:
+    python benchmarks/job_market_bench.py
+    python benchmarks/job_market_bench.py --listings 2000000 --batch 200000 --json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Dict
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from app.multi_agents.utils.job_market import (  # noqa: E402
+    JobMarketStore,
+    ListingRecord,
+    count_by,
+    salary_percentiles,
+)
+
+CITIES = ["北京", "上海", "深圳", "杭州", "广州", "成都", "武汉", "南京", "苏州", "西安"]
+KEYWORDS = ["python", "java", "go", "前端", "算法", "数据 开发", "测试", "产品 经理", "ai agent", "运维"]
+SKILLS = ["python", "java", "go", "mysql", "redis", "kafka", "docker", "k8s", "大模型", "推荐", "spark", "flink", "react"]
+EXPERIENCE = ["经验不限", "1-3年", "3-5年", "5-10年"]
+EDUCATION = ["大专", "本科", "硕士"]
+
+
+def generate(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    now = time.time()
+    for i in range(n):
+        low = rng.choice([8, 10, 12, 15, 18, 20, 25, 30, 35, 40])
+        yield ListingRecord(
+            i, now - rng.random() * 86400 * 20, rng.choice(CITIES), rng.choice(KEYWORDS), f"岗位{i % 5000}",
+            f"公司{i % 20000}", rng.choice(EXPERIENCE), rng.choice(EDUCATION),
+            float(low), float(low + rng.choice([5, 10, 15])), rng.choice([12, 13, 14, 15, 16]),
+            rng.choice([20, 100, 500, 1000]), -1, tuple(rng.sample(SKILLS, rng.randint(1, 4))),
+        )
+
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, round(time.perf_counter() - start, 3)
+
+
+def run(listings: int, batch: int) -> Dict[str, Any]:
+    report: Dict[str, Any] = {"listings": listings}
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JobMarketStore(tmp)
+        records = generate(listings)
+
+        def write():
+            written = 0
+            while written < listings:
+                chunk = [next(records) for _ in range(min(batch, listings - written))]
+                store.append(chunk)
+                written += len(chunk)
+
+        _, report["write_seconds"] = _timed(write)
+        report["partitions"] = len(store.partitions())
+        report["bytes"] = sum(os.path.getsize(path) for path in store.partitions())
+
+        data, report["load_seconds"] = _timed(store.load)
+        report["rows"] = len(data)
+        by_city, report["percentiles_by_city_seconds"] = _timed(lambda: salary_percentiles(data, by="city"))
+        _, report["percentiles_by_keyword_seconds"] = _timed(lambda: salary_percentiles(data, by="keyword"))
+        _, report["percentiles_by_skill_seconds"] = _timed(lambda: salary_percentiles(data, by="skill"))
+        _, report["skill_counts_seconds"] = _timed(lambda: count_by(data, "skill"))
+        _, report["filter_seconds"] = _timed(lambda: salary_percentiles(data.filter(city="深圳", skill="python"), by="keyword"))
+        report["sample"] = dict(list(by_city.items())[:3])
+        store.close()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="岗位市场数据基准")
+    parser.add_argument("--listings", type=int, default=1000000, help="岗位数")
+    parser.add_argument("--batch", type=int, default=100000, help="每个分区的岗位数")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出")
+    args = parser.parse_args()
+
+    report = run(args.listings, args.batch)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+    print(f"岗位数: {report['listings']}，分区: {report['partitions']}个，{report['bytes'] / 1024 / 1024:.1f}MB")
+    for key, value in report.items():
+        if key.endswith("_seconds"):
+            print(f"{key:36s} {value:.3f}s")
+    for city, stats in report["sample"].items():
+        print(f"{city}: {stats}")
+
+
+if __name__ == "__main__":
+    main()
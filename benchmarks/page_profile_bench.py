@@ -0,0 +1,123 @@
+"""
+浏览器资源拦截基准
+
+在本地启动模拟的岗位列表页面（tests/fixture_site.py），用 Chromium 分别在不拦截和启用 ResourceProfile 的情况下
+多次加载页面，统计：
+- 页面加载时间（load 事件）的 p50/p95
+- 页面服务返回的字节数
+- 浏览器进程树（含 Playwright 驱动）的常驻内存（RSS，需要 psutil）
+
+所有 .test 域名通过 --host-resolver-rules 指向本地服务，不访问外部网络。需要已安装 Chromium
+（patchright install chromium）。
+
+用法:
+    python benchmarks/page_profile_bench.py
+    python benchmarks/page_profile_bench.py --loads 20 --json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "tests"))
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "false")
+
+from fixture_site import FixtureSite  # noqa: E402
+
+
+def _children_rss_mb() -> float:
+    """当前进程所有子进程（Playwright 驱动和浏览器）的常驻内存（MB），未安装 psutil 时返回 0"""
+    try:
+        import psutil
+    except ImportError:
+        return 0.0
+    rss = 0
+    for proc in psutil.Process(os.getpid()).children(recursive=True):
+        try:
+            rss += proc.memory_info().rss
+        except psutil.Error:
+            pass
+    return rss / 1024 / 1024
+
+
+def _percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+async def _measure(site: FixtureSite, profiled: bool, loads: int) -> Dict[str, Any]:
+    from patchright.async_api import async_playwright
+
+    from app.multi_agents.tools.resource_profile import ResourceProfile
+
+    profile = ResourceProfile(
+        blocked_domains=["hm.baidu.test", "googletagmanager.test"],
+        allowed_domains=["zhipin.test", "bosszhipin.test", "geetest.test"],
+        exempt_domains=["geetest.test"],
+    )
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(
+            headless=True, args=["--host-resolver-rules=MAP *.test 127.0.0.1"],
+        )
+        context = await browser.new_context()
+        if profiled:
+            await profile.apply(context)
+        site.requests.clear()
+        timings = []
+        for _ in range(loads):
+            page = await context.new_page()
+            started = time.perf_counter()
+            await page.goto(site.page_url, wait_until="load")
+            timings.append(time.perf_counter() - started)
+            await page.close()
+        # 最后一次加载后保持页面打开，测量浏览器进程树的内存
+        page = await context.new_page()
+        await page.goto(site.page_url, wait_until="load")
+        rss = _children_rss_mb()
+        await browser.close()
+    return {
+        "load_p50_ms": round(statistics.median(timings) * 1000, 1),
+        "load_p95_ms": round(_percentile(timings, 0.95) * 1000, 1),
+        "bytes_per_load": site.total_bytes // (loads + 1),
+        "rss_mb": round(rss, 1),
+        "blocked": dict(profile.blocked) if profiled else {},
+    }
+
+
+def run_benchmark(loads: int = 10) -> Dict[str, Any]:
+    """分别在不拦截和拦截的情况下加载本地岗位列表页面
+
+    Returns:
+        {"baseline": 统计, "profiled": 统计}
+    """
+    with FixtureSite() as site:
+        baseline = asyncio.run(_measure(site, profiled=False, loads=loads))
+        profiled = asyncio.run(_measure(site, profiled=True, loads=loads))
+    return {"loads": loads, "baseline": baseline, "profiled": profiled}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比启用资源拦截前后的页面加载时间、流量和浏览器内存")
+    parser.add_argument("--loads", type=int, default=10, help="每种配置加载页面的次数")
+    parser.add_argument("--json", action="store_true", help="以JSON格式输出")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.loads)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+    print(f"{'':10}{'加载p50(ms)':>12}{'加载p95(ms)':>12}{'字节/次':>12}{'RSS(MB)':>10}")
+    for name in ("baseline", "profiled"):
+        stats = result[name]
+        print(f"{name:10}{stats['load_p50_ms']:>12}{stats['load_p95_ms']:>12}{stats['bytes_per_load']:>12}{stats['rss_mb']:>10}")
+    print(f"拦截: {result['profiled']['blocked']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+本地模拟的岗位列表页面，用于在不访问 Boss直聘 的情况下测试和评估浏览器的资源拦截
+
+页面为 fixtures/boss_job_page.html，其中的图片、视频、字体、脚本和样式分布在多个 .test 域名下，
+服务按路径前缀返回指定大小的合成资源，并记录每个请求的主机名、路径和返回的字节数。
+所有 .test 域名都由同一个服务处理：测试中把请求地址改写为 127.0.0.1，
+真实浏览器中使用 --host-resolver-rules="MAP *.test 127.0.0.1"。
+"""
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+PAGE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "boss_job_page.html")
+
+# 路径前缀 -> (Content-Type, 字节数)
+ASSETS = {
+    "/img/": ("image/png", 200 * 1024),
+    "/media/": ("video/mp4", 2 * 1024 * 1024),
+    "/font/": ("font/woff2", 120 * 1024),
+    "/js/": ("application/javascript", 30 * 1024),
+    "/css/": ("text/css", 10 * 1024),
+}
+
+
+class FixtureSite:
+    """在后台线程中运行的岗位列表页面服务"""
+
+    def __init__(self):
+        self.requests: List[Tuple[str, str, int]] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    @property
+    def page_url(self) -> str:
+        return f"http://www.zhipin.test:{self.port}/web/geek/job?query=python"
+
+    def page_html(self) -> str:
+        with open(PAGE_PATH, encoding="utf-8") as f:
+            return f.read().replace("{port}", str(self.port))
+
+    def local_url(self, url: str) -> str:
+        """把 .test 域名的地址改写为本服务的地址"""
+        parts = urlsplit(url)
+        return urlunsplit((parts.scheme, f"127.0.0.1:{self.port}", parts.path, parts.query, ""))
+
+    def bytes_by_host(self) -> Dict[str, int]:
+        """各主机名返回的字节数"""
+        totals: Dict[str, int] = {}
+        with self._lock:
+            for host, _, size in self.requests:
+                totals[host] = totals.get(host, 0) + size
+        return totals
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(size for _, _, size in self.requests)
+
+    def _handler_class(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.0"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                path = urlsplit(self.path).path
+                if path.startswith("/web/"):
+                    content_type, body = "text/html; charset=utf-8", site.page_html().encode("utf-8")
+                else:
+                    prefix = next((p for p in ASSETS if path.startswith(p)), None)
+                    if prefix is None:
+                        self.send_error(404)
+                        return
+                    content_type, size = ASSETS[prefix]
+                    body = b"\0" * size if prefix in ("/img/", "/media/", "/font/") else b"/*" + b" " * (size - 4) + b"*/"
+                host = (self.headers.get("Host") or "").split(":")[0]
+                with site._lock:
+                    site.requests.append((host, path, len(body)))
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,107 @@
+"""
+HR 回复语料与模拟评估模型
+
+tests/fixtures/hr_replies.jsonl 中每行是一个会话: 公司、HR、岗位、消息和人工标注的意图/下一步行动。
+OracleReplyLLM 按标注返回批量评估结果，记录每次请求的会话数，供测试和 benchmarks/hr_reply_bench.py 使用。
+"""
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from app.multi_agents.utils.hr_inbox import ChatMessage, PendingConversation
+from app.multi_agents.utils.hr_reply_scorer import ReplyAssessment, ReplyAssessmentBatch, render_conversation
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "hr_replies.jsonl")
+
+_ITEM = re.compile(r"^\[(\d+)\] (.*)$")
+
+
+def load_corpus(path: str = CORPUS_PATH) -> List[Tuple[PendingConversation, str, str]]:
+    """读取语料，返回 (会话, 标注意图, 标注下一步行动) 列表"""
+    corpus = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            messages = [
+                ChatMessage(f"{row['conversation_id']}-{i}", message["sender"], message["text"])
+                for i, message in enumerate(row["messages"])
+            ]
+            conversation = PendingConversation(
+                row["conversation_id"], row["hr_name"], row["company"], row["job_title"], messages,
+            )
+            corpus.append((conversation, row["intent"], row["next_action"]))
+    return corpus
+
+
+class OracleReplyLLM:
+    """按语料标注返回评估结果的模拟结构化输出模型"""
+
+    def __init__(
+        self,
+        corpus: Sequence[Tuple[PendingConversation, str, str]],
+        latency: float = 0.0,
+        drop: Optional[Set[str]] = None,
+    ):
+        """
+        Args:
+            corpus: load_corpus() 返回的语料
+            latency: 每次请求的模拟耗时（秒）
+            drop: 首次出现时故意遗漏结果的会话所包含的文本（如HR姓名），用于测试重试
+        """
+        self.labels: Dict[str, Tuple[str, str]] = {
+            render_conversation(conversation): (intent, next_action) for conversation, intent, next_action in corpus
+        }
+        self.latency = latency
+        self.drop = set(drop or ())
+        self.batch_sizes: List[int] = []
+        self.configs: List[dict] = []
+        self.lock = threading.Lock()
+
+    def with_structured_output(self, schema):
+        assert schema is ReplyAssessmentBatch
+        return self
+
+    def _answer(self, messages) -> ReplyAssessmentBatch:
+        items = [_ITEM.match(line) for line in messages[-1].content.splitlines()]
+        items = [(int(match.group(1)), match.group(2)) for match in items if match]
+        with self.lock:
+            self.batch_sizes.append(len(items))
+        assessments = []
+        for number, text in items:
+            intent, next_action = self.labels.get(text, ("other", "follow_up"))
+            with self.lock:
+                dropped = [key for key in self.drop if key in text]
+                if dropped:
+                    self.drop.difference_update(dropped)
+                    continue
+            assessments.append(ReplyAssessment(
+                index=number, intent=intent, interest=60, next_action=next_action, reason="按标注返回",
+            ))
+        return ReplyAssessmentBatch(assessments=assessments)
+
+    def invoke(self, messages, config=None):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._answer(messages)
+
+    def batch(self, inputs, config=None, return_exceptions=False):
+        self.configs.append(config or {})
+        return [self.invoke(messages) for messages in inputs]
+
+    async def abatch(self, inputs, config=None, return_exceptions=False):
+        self.configs.append(config or {})
+        limit = asyncio.Semaphore((config or {}).get("max_concurrency") or len(inputs) or 1)
+
+        async def _one(messages):
+            async with limit:
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                return self._answer(messages)
+
+        return await asyncio.gather(*(_one(messages) for messages in inputs))
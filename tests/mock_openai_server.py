@@ -0,0 +1,137 @@
+"""
+本地模拟的 OpenAI 兼容服务，用于在不访问真实 API 的情况下测试 LLM 相关逻辑
+
+支持按顺序返回预设状态码（如先返回若干次 429）、模拟响应延迟、
+stream=true 时以 SSE 逐字返回，并记录请求次数、最大并发数和每次请求的 messages。
+非流式响应使用 HTTP/1.1 长连接，与真实服务一样允许客户端复用连接。
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+
+class MockOpenAIServer:
+    """在后台线程中运行的 /v1/chat/completions 模拟服务"""
+
+    def __init__(
+        self,
+        reply: Callable[[Dict[str, Any]], str] = lambda body: "ok",
+        delay: float = 0.0,
+        statuses: Optional[List[int]] = None,
+        retry_after: str = "0",
+    ):
+        """
+        Args:
+            reply: 根据请求体生成回复的函数，返回字符串作为回复文本，返回字典作为完整的 message（如工具调用）
+            delay: 每次请求的处理延迟（秒）
+            statuses: 依次返回的状态码，用完后一律返回 200
+            retry_after: 429 响应的 Retry-After 头
+        """
+        self.reply = reply
+        self.delay = delay
+        self.statuses = list(statuses or [])
+        self.retry_after = retry_after
+        self.requests: List[Dict[str, Any]] = []
+        self.active = 0
+        self.max_active = 0
+        # 建立过的 TCP 连接数，小于请求数说明客户端复用了长连接
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                try:
+                    self._handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    # 客户端已放弃该请求（例如对冲请求中较慢的一方）
+                    pass
+
+            def _handle(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with server._lock:
+                    server.requests.append(body)
+                    status = server.statuses.pop(0) if server.statuses else 200
+                    server.active += 1
+                    server.max_active = max(server.max_active, server.active)
+                time.sleep(server.delay)
+                # 在发送响应之前结束计数，客户端收到响应后立即发出的下一个请求不会被算作并发
+                with server._lock:
+                    server.active -= 1
+                if status != 200:
+                    self._send(status, {"error": {"message": "rate limited", "type": "rate_limit"}},
+                               {"Retry-After": server.retry_after})
+                    return
+                reply = server.reply(body)
+                message = {"role": "assistant", **reply} if isinstance(reply, dict) else {"role": "assistant", "content": reply}
+                if body.get("stream"):
+                    self._send_stream(message.get("content") or "")
+                    return
+                self._send(200, {
+                    "id": "chatcmpl-mock",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "mock"),
+                    "choices": [{
+                        "index": 0,
+                        "message": message,
+                        "finish_reason": "tool_calls" if message.get("tool_calls") else "stop",
+                    }],
+                    "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+                })
+
+            def _send_stream(self, content: str):
+                """以 SSE 格式逐字返回流式结果"""
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                # 流式响应没有 Content-Length，以关闭连接表示结束
+                self.send_header("Connection", "close")
+                self.close_connection = True
+                self.end_headers()
+                for char in content:
+                    chunk = {
+                        "id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": int(time.time()),
+                        "model": "mock", "choices": [{"index": 0, "delta": {"content": char}, "finish_reason": None}],
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                self.wfile.write(b"data: [DONE]\n\n")
+
+            def _send(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def __enter__(self) -> "MockOpenAIServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
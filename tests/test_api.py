@@ -0,0 +1,109 @@
+import os
+import sys
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, StateGraph
+
+from app.api.browser_pool import BrowserPool
+from app.api.job_queue import JobManager, JobStatus, QueueFullError
+from app.api.main import create_app
+from app.multi_agents.graph.state_langgraph import State
+from app.multi_agents.graph.streaming import emit_progress
+
+
+def _build_graph(gate: threading.Event = None, seen_urls: list = None):
+    """只有一个节点的小图：记录租借到的浏览器，发送进度事件后返回结果"""
+    def job_find(state: State, config):
+        if gate is not None:
+            gate.wait(5)
+        if seen_urls is not None:
+            seen_urls.append(config["configurable"]["cdp_url"])
+        emit_progress("job_find", "浏览器第1步", step=1)
+        return {"messages": [AIMessage(content="找到3个岗位", name="browse")]}
+
+    workflow = StateGraph(State)
+    workflow.add_node("job_find", job_find)
+    workflow.set_entry_point("job_find")
+    workflow.add_edge("job_find", END)
+    return workflow.compile(checkpointer=InMemorySaver())
+
+
+def test_browser_pool_lease():
+    """租借的浏览器在归还前不会被再次借出"""
+    pool = BrowserPool(["cdp://a", "cdp://b"])
+    with pool.lease() as first, pool.lease() as second:
+        assert {first, second} == {"cdp://a", "cdp://b"}
+        assert pool.in_use == 2
+        try:
+            pool.acquire(timeout=0.01)
+            assert False, "浏览器已全部借出时应超时"
+        except TimeoutError:
+            pass
+    assert pool.in_use == 0
+
+
+def test_queue_full_and_thread_busy():
+    """队列满时拒绝新任务，同一线程不能同时有两个未完成的任务"""
+    manager = JobManager(graph=_build_graph(), browser_pool=BrowserPool(["cdp://a"]), max_queue_size=1)
+    job = manager.submit("帮我找Python工作", thread_id="t1")
+    assert job.status == JobStatus.QUEUED
+    try:
+        manager.submit("再找一次", thread_id="t2")
+        assert False, "队列已满时应抛出 QueueFullError"
+    except QueueFullError:
+        pass
+
+
+def test_api_end_to_end():
+    """提交任务、轮询结果、读取 SSE 事件，并返回检查点ID"""
+    gate = threading.Event()
+    seen_urls = []
+    manager = JobManager(
+        graph=_build_graph(gate, seen_urls),
+        browser_pool=BrowserPool(["cdp://a", "cdp://b"]),
+        max_queue_size=2,
+    )
+    with TestClient(create_app(manager)) as client:
+        first = client.post("/jobs", json={"query": "帮我找AI Agent工作", "thread_id": "t1"})
+        assert first.status_code == 202
+        assert client.post("/jobs", json={"query": "同一线程", "thread_id": "t1"}).status_code == 409
+
+        gate.set()
+        job_id = first.json()["job_id"]
+        with client.stream("GET", f"/jobs/{job_id}/events") as response:
+            body = "".join(response.iter_text())
+        assert "event: progress" in body
+        assert "event: done" in body
+
+        job = client.get(f"/jobs/{job_id}").json()
+        assert job["status"] == "succeeded"
+        assert job["result"] == "找到3个岗位"
+        assert job["checkpoint_id"]
+        assert seen_urls[0] in ("cdp://a", "cdp://b")
+        assert client.get("/jobs/unknown").status_code == 404
+        assert client.get("/queue").json()["browsers"] == 2
+
+
+def test_api_returns_429_when_queue_full():
+    """工作线程全部繁忙且队列已满时返回 429"""
+    gate = threading.Event()
+    manager = JobManager(graph=_build_graph(gate), browser_pool=BrowserPool(["cdp://a"]), max_queue_size=1)
+    with TestClient(create_app(manager)) as client:
+        responses = [client.post("/jobs", json={"query": f"任务{i}"}) for i in range(4)]
+        gate.set()
+    assert responses[0].status_code == 202
+    assert responses[-1].status_code == 429
+    assert responses[-1].headers["Retry-After"] == "5"
+
+
+if __name__ == "__main__":
+    test_browser_pool_lease()
+    test_queue_full_and_thread_busy()
+    test_api_end_to_end()
+    test_api_returns_429_when_queue_full()
+    print("所有测试通过")
@@ -0,0 +1,74 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.multi_agents.tools.bash_tool import OutputBuffer, bash_tool, run_command
+
+
+def test_output_buffer_keeps_head_and_tail():
+    """输出超过上限时只保留开头和结尾"""
+    buffer = OutputBuffer(head_bytes=5, tail_bytes=5)
+    for i in range(1000):
+        buffer.write(f"{i:04d}\n".encode())
+    text = buffer.text()
+    assert buffer.truncated and buffer.total == 5000
+    assert text.startswith("0000\n") and text.endswith("0999\n")
+    assert "省略 4990 字节" in text
+    assert len(buffer.tail) <= 10
+
+
+def test_streaming_and_failures():
+    """输出边执行边回调，失败时返回退出码和合并的 stderr"""
+    chunks = []
+    result = asyncio.run(run_command("echo first; sleep 0.3; echo second", on_output=chunks.append))
+    assert result["exit_code"] == 0 and result["output"] == "first\nsecond\n"
+    assert chunks[0] == "first\n"
+
+    text = bash_tool.invoke({"cmd": "echo oops >&2; exit 3"})
+    assert "exit code 3" in text and "oops" in text
+
+
+def test_timeout_and_output_limit():
+    """超时或输出过多时终止命令（包括其子进程）"""
+    start = time.monotonic()
+    result = asyncio.run(run_command("sleep 5 & sleep 5; echo never", timeout=0.3))
+    assert result["killed"] == "timeout" and "never" not in result["output"]
+    assert time.monotonic() - start < 2
+
+    result = asyncio.run(run_command("yes", max_output_bytes=1024 * 1024, head_bytes=10, tail_bytes=10))
+    assert result["killed"] == "output_limit" and result["truncated"]
+    assert len(result["output"]) < 100
+
+
+def test_concurrency_limit():
+    """并发执行的命令数不超过名额数，其余命令排队"""
+    slots = threading.BoundedSemaphore(2)
+
+    async def main():
+        start = time.monotonic()
+        await asyncio.gather(*[run_command("sleep 0.3", slots=slots) for _ in range(4)])
+        return time.monotonic() - start
+
+    elapsed = asyncio.run(main())
+    assert 0.55 < elapsed < 1.2
+
+    async def parallel():
+        start = time.monotonic()
+        results = await asyncio.gather(*[bash_tool.ainvoke({"cmd": "sleep 0.3; echo done"}) for _ in range(3)])
+        return results, time.monotonic() - start
+
+    results, elapsed = asyncio.run(parallel())
+    assert results == ["done\n"] * 3 and elapsed < 0.6
+
+
+if __name__ == "__main__":
+    test_output_buffer_keeps_head_and_tail()
+    test_streaming_and_failures()
+    test_timeout_and_output_limit()
+    test_concurrency_limit()
+    print("所有测试通过")
@@ -0,0 +1,112 @@
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from browser_use.agent.views import ActionResult
+
+from app.multi_agents.tools.boss_job_governor import StepGovernor, page_fingerprint
+from app.multi_agents.tools.boss_job_tool import BossJobTool
+
+
+class _Tree:
+    def __init__(self, text):
+        self.text = text
+
+    def clickable_elements_to_string(self):
+        return self.text
+
+
+class _History:
+    def __init__(self):
+        self.tokens = 0
+
+    def total_input_tokens(self):
+        return self.tokens
+
+
+class _FakeAgent:
+    """按脚本返回页面状态的浏览器智能体，每步消耗固定的token和时间"""
+
+    def __init__(self, pages, step_callback, tokens_per_step=100, step_seconds=0.0):
+        self.pages = pages
+        self.step_callback = step_callback
+        self.tokens_per_step = tokens_per_step
+        self.step_seconds = step_seconds
+        self.state = SimpleNamespace(n_steps=0, stopped=False, history=_History())
+
+    def stop(self):
+        self.state.stopped = True
+
+    async def run(self, max_steps=100, on_step_end=None):
+        for step in range(max_steps):
+            if self.state.stopped:
+                break
+            await asyncio.sleep(self.step_seconds)
+            url, dom = self.pages[step % len(self.pages)]
+            self.state.n_steps += 1
+            self.state.history.tokens += self.tokens_per_step
+            self.step_callback(SimpleNamespace(url=url, element_tree=_Tree(dom), pixels_above=0), None, self.state.n_steps)
+            await on_step_end(self)
+        return self.state.history
+
+
+def _run(governor, pages, **kwargs):
+    steps = []
+    agent = _FakeAgent(pages, governor.wrap_step_callback(lambda state, output, step: steps.append(step)), **kwargs)
+    asyncio.run(governor.run(agent))
+    return agent, steps
+
+
+def test_loop_detection():
+    """在两个页面之间来回切换时判定为循环并停止，步骤回调仍然收到每一步"""
+    governor = StepGovernor(max_steps=50, loop_window=6, loop_threshold=3)
+    agent, steps = _run(governor, [("https://www.zhipin.com", "首页"), ("https://www.zhipin.com/web/geek/job", "列表")])
+    assert agent.state.n_steps == 5 and steps == [1, 2, 3, 4, 5]
+    assert "循环" in governor.stop_reason
+
+    # 页面内容变化（例如按钮变为"继续沟通"）不算循环
+    governor = StepGovernor(max_steps=8, loop_threshold=3)
+    agent, _ = _run(governor, [("https://www.zhipin.com/web/geek/job", f"列表{i}") for i in range(20)])
+    assert agent.state.n_steps == 8 and "最大步数" in governor.stop_reason
+
+    a = SimpleNamespace(url="u", element_tree=_Tree("x"), pixels_above=0)
+    b = SimpleNamespace(url="u", element_tree=_Tree("x"), pixels_above=800)
+    assert page_fingerprint(a) != page_fingerprint(b)
+
+
+def test_token_and_time_budget():
+    """超过token或运行时间预算时提前结束"""
+    pages = [(f"https://www.zhipin.com/job_detail/{i}.html", str(i)) for i in range(100)]
+    governor = StepGovernor(max_tokens=1000)
+    agent, _ = _run(governor, pages, tokens_per_step=300)
+    assert agent.state.n_steps == 4 and "token" in governor.stop_reason
+
+    governor = StepGovernor(max_seconds=0.3)
+    start = time.monotonic()
+    _run(governor, pages, step_seconds=0.2)
+    assert time.monotonic() - start < 0.6 and "运行时间" in governor.stop_reason
+
+
+def test_partial_result_when_stopped():
+    """没有完成动作时返回已完成步骤和提前结束的原因"""
+    history = SimpleNamespace(all_results=[
+        ActionResult(extracted_content="搜索Python岗位"),
+        ActionResult(extracted_content="对岗位A点击立即沟通"),
+    ])
+    text = BossJobTool()._format_result(history, "检测到循环")
+    assert "对岗位A点击立即沟通" in text and "任务提前结束（检测到循环）" in text
+
+    history.all_results.append(ActionResult(is_done=True, extracted_content="共沟通1个岗位"))
+    assert "共沟通1个岗位" in BossJobTool()._format_result(history)
+
+
+if __name__ == "__main__":
+    test_loop_detection()
+    test_token_and_time_budget()
+    test_partial_result_when_stopped()
+    print("所有测试通过")
@@ -0,0 +1,127 @@
+import os
+import sys
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.messages import HumanMessage
+from langgraph.graph import END, START, StateGraph
+
+from app.multi_agents.graph import node_graph
+from app.multi_agents.graph.state_langgraph import State
+from app.multi_agents.graph.streaming import stream_agent
+from app.multi_agents.tools import boss_job_pool
+from app.multi_agents.tools.boss_job_pool import BossJobProcessPool, shard_for
+
+
+def fake_runner(task, cdp_url, step_callback):
+    """代替真实浏览器的任务运行函数，返回执行进程和浏览器信息"""
+    if task == "boom":
+        raise ValueError("浏览器崩溃")
+    if task == "exit":
+        os._exit(1)
+    step_callback({"step": 1, "url": cdp_url})
+    return f"{os.getpid()}|{cdp_url}|{task}"
+
+
+def test_shard_for_is_stable():
+    """分片结果稳定且落在范围内"""
+    assert shard_for("user-1", 4) == shard_for("user-1", 4)
+    assert {shard_for(f"user-{i}", 4) for i in range(50)} == {0, 1, 2, 3}
+
+
+def test_process_pool_sharding_and_progress():
+    """同一分片键总是由同一个进程和浏览器执行，进度回调在协调方收到"""
+    pool = BossJobProcessPool(["cdp://a", "cdp://b"], runner=fake_runner).start()
+    try:
+        steps = []
+        keys = ["thread-1", "thread-2", "thread-3", "thread-4"]
+        futures = {key: [pool.submit(f"{key}-{i}", key, steps.append) for i in range(2)] for key in keys}
+        results = {key: [f.result(60).split("|") for f in fs] for key, fs in futures.items()}
+
+        for key, runs in results.items():
+            pids = {pid for pid, _, _ in runs}
+            urls = {url for _, url, _ in runs}
+            assert len(pids) == 1 and len(urls) == 1
+            assert urls == {pool.cdp_urls[shard_for(key, 2)]}
+        assert len({runs[0][0] for runs in results.values()}) == len({shard_for(k, 2) for k in keys})
+        assert pool.run("x", "thread-1", timeout=60)
+        assert len(steps) == 8
+        assert all(os.getpid() != int(runs[0][0]) for runs in results.values())
+    finally:
+        pool.shutdown()
+
+
+def test_process_pool_routes_leased_browser():
+    """指定了租借的CDP地址时由独占该浏览器的进程执行，不按分片键分片"""
+    pool = BossJobProcessPool(["cdp://a", "cdp://b"], runner=fake_runner).start()
+    try:
+        key = "thread-1"
+        other = pool.cdp_urls[1 - shard_for(key, 2)]
+        assert pool.run("leased", key, timeout=60, cdp_url=other).split("|")[1] == other
+        assert pool.run("sharded", key, timeout=60).split("|")[1] == pool.cdp_urls[shard_for(key, 2)]
+        try:
+            pool.submit("unknown", key, cdp_url="cdp://c")
+            assert False, "未知的CDP地址应抛出异常"
+        except ValueError as e:
+            assert "cdp://c" in str(e)
+    finally:
+        pool.shutdown()
+
+
+def test_pool_progress_reaches_graph_stream():
+    """进程池模式下浏览器步骤进度在节点线程中发出，流式运行图时可以收到"""
+    pool = BossJobProcessPool(["cdp://a"], runner=fake_runner).start()
+    callback_threads = []
+    assert pool.run("x", "k", lambda step: callback_threads.append(threading.current_thread()), timeout=60)
+    assert callback_threads == [threading.current_thread()]
+
+    workflow = StateGraph(State)
+    workflow.add_node("job_find", node_graph.job_find_node)
+    workflow.add_node("supervisor", lambda state: {})
+    workflow.add_edge(START, "job_find")
+    workflow.add_edge("supervisor", END)
+    original_flag, original_pool = node_graph.JOB_FIND_PROCESS_POOL, boss_job_pool.get_boss_job_pool
+    node_graph.JOB_FIND_PROCESS_POOL = True
+    boss_job_pool.get_boss_job_pool = lambda: pool
+    try:
+        events = list(stream_agent(
+            workflow.compile(), {"messages": [HumanMessage(content="帮我找Python岗位")]},
+            {"configurable": {"thread_id": "t1"}},
+        ))
+    finally:
+        node_graph.JOB_FIND_PROCESS_POOL = original_flag
+        boss_job_pool.get_boss_job_pool = original_pool
+        pool.shutdown()
+    progress = [e for e in events if e["type"] == "progress" and e["node"] == "job_find"]
+    assert [e["message"] for e in progress] == ["开始在Boss直聘查找岗位", "浏览器第1步"]
+    assert progress[1]["url"] == "cdp://a"
+
+
+def test_process_pool_errors_and_restart():
+    """任务异常会传回协调方，进程意外退出后自动重启"""
+    pool = BossJobProcessPool(["cdp://a"], runner=fake_runner).start()
+    try:
+        try:
+            pool.run("boom", "k", timeout=60)
+            assert False, "应抛出异常"
+        except RuntimeError as e:
+            assert "浏览器崩溃" in str(e)
+
+        try:
+            pool.run("exit", "k", timeout=60)
+            assert False, "进程退出时应抛出异常"
+        except RuntimeError as e:
+            assert "异常退出" in str(e)
+        assert pool.run("after", "k", timeout=60).endswith("after")
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    test_shard_for_is_stable()
+    test_process_pool_sharding_and_progress()
+    test_process_pool_routes_leased_browser()
+    test_pool_progress_reaches_graph_stream()
+    test_process_pool_errors_and_restart()
+    print("所有测试通过")
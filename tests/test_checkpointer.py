@@ -0,0 +1,93 @@
+import os
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import StateGraph, MessagesState, START, END
+
+from app.multi_agents.graph.checkpointer import SqliteDeltaSaver
+
+
+def _big_result(n: int) -> str:
+    """模拟浏览器返回的大段结果"""
+    return "\n".join(f"- 第{n}轮 岗位{i}: AI Agent开发工程师 深圳 20-30K" for i in range(200))
+
+
+def _build_graph(checkpointer):
+    def job_find(state: MessagesState):
+        return {"messages": [AIMessage(content=_big_result(len(state["messages"])), name="browse")]}
+
+    workflow = StateGraph(MessagesState)
+    workflow.add_node("job_find", job_find)
+    workflow.add_edge(START, "job_find")
+    workflow.add_edge("job_find", END)
+    return workflow.compile(checkpointer=checkpointer)
+
+
+def _run_turns(graph, thread_id: str, turns: int):
+    config = {"configurable": {"thread_id": thread_id}}
+    for turn in range(turns):
+        graph.invoke({"messages": [HumanMessage(content=f"第{turn}轮继续找工作")]}, config)
+    return config
+
+
+def test_resume_after_reopen():
+    """关闭后重新打开数据库，可以从最新检查点恢复完整状态"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "checkpoints.db")
+        saver = SqliteDeltaSaver(db_path, max_checkpoints=None)
+        config = _run_turns(_build_graph(saver), "thread-1", 3)
+        expected = _build_graph(saver).get_state(config).values["messages"]
+        saver.close()
+
+        reopened = SqliteDeltaSaver(db_path)
+        graph = _build_graph(reopened)
+        messages = graph.get_state(config).values["messages"]
+        assert [m.content for m in messages] == [m.content for m in expected]
+        assert len(messages) == 6
+
+        # 继续运行
+        graph.invoke({"messages": [HumanMessage(content="再来一轮")]}, config)
+        assert len(graph.get_state(config).values["messages"]) == 8
+        assert len(list(graph.get_state_history(config))) > 1
+        reopened.close()
+
+
+def test_bounded_growth_per_step():
+    """每步只写入新增消息，消息内容不会在检查点之间重复保存"""
+    saver = SqliteDeltaSaver(":memory:", max_checkpoints=None)
+    graph = _build_graph(saver)
+    _run_turns(graph, "thread-2", 2)
+    before = saver.storage_stats("thread-2")
+    _run_turns(graph, "thread-2", 10)
+    after = saver.storage_stats("thread-2")
+
+    # 每轮新增一条用户消息和一条结果消息
+    assert after["items_rows"] - before["items_rows"] == 20
+    # 每轮的增量大致是两条新消息（压缩后）加少量元数据，与历史长度无关
+    growth_per_turn = (sum(after.values()) - sum(before.values())) / 10
+    full_copy = sum(len(_big_result(0).encode()) for _ in range(12))
+    assert growth_per_turn < full_copy / 4
+
+
+def test_prune_keeps_latest():
+    """定期清理后只保留最近的检查点，最新状态不受影响"""
+    saver = SqliteDeltaSaver(":memory:", max_checkpoints=5, prune_interval=1)
+    graph = _build_graph(saver)
+    config = _run_turns(graph, "thread-3", 8)
+
+    assert len(list(saver.list(config))) == 5
+    assert len(graph.get_state(config).values["messages"]) == 16
+
+    saver.delete_thread("thread-3")
+    assert saver.get_tuple(config) is None
+    assert saver.storage_stats("thread-3")["items_rows"] == 0
+
+
+if __name__ == "__main__":
+    test_resume_after_reopen()
+    test_bounded_growth_per_step()
+    test_prune_keeps_latest()
@@ -0,0 +1,77 @@
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.multi_agents.utils.context_manager import (
+    ContentStore,
+    compact_messages,
+    context_stats,
+    estimate_tokens,
+)
+from app.multi_agents.prompts.template import PromptType, apply_prompt_template
+
+
+def _job_result(n: int) -> str:
+    """模拟岗位查找工具返回的长Markdown结果"""
+    lines = "".join(f"- 第{n}轮 岗位{i}: AI Agent开发工程师 深圳 20-30K 已点击立即沟通\n" for i in range(60))
+    return f"\n## Boss直聘岗位查找结果\n\n### 执行步骤:\n{lines}\n### 任务结果:\n第{n}轮共沟通60个岗位\n"
+
+
+def _session(rounds: int):
+    messages = [HumanMessage(content="帮我寻找AI Agent 工作")]
+    for n in range(rounds):
+        messages.append(AIMessage(content=_job_result(n), name="browse"))
+        messages.append(HumanMessage(content=f"继续第{n + 1}轮"))
+    return messages
+
+
+def test_compact_within_budget():
+    """压缩后的token数不超过预算，原文可以通过引用取回"""
+    store = ContentStore()
+    messages = _session(5)
+    assert context_stats(messages)["tokens"] > 3000
+
+    compacted = compact_messages(messages, budget=3000, store=store)
+    stats = context_stats(compacted)
+    assert stats["tokens"] <= 3000
+    assert stats["compacted"] > 0
+    # 原始需求始终保留
+    assert compacted[0].content == "帮我寻找AI Agent 工作"
+    # 原消息不被修改
+    assert messages[1].content == _job_result(0)
+
+    stub = next(m for m in compacted if m.content.startswith("[已压缩"))
+    ref = stub.content.split("引用 ")[1].split("]")[0]
+    assert store.get(ref).startswith("\n## Boss直聘岗位查找结果")
+    assert stub.name == "browse"
+
+
+def test_bounded_regardless_of_session_length():
+    """无论会话多长，压缩后的提示词大小都有上限"""
+    sizes = [context_stats(compact_messages(_session(n), budget=2000, store=ContentStore()))["tokens"] for n in (2, 10, 40)]
+    assert all(size <= 2000 for size in sizes)
+
+
+def test_under_budget_untouched():
+    """未超出预算时消息保持原样"""
+    messages = _session(1)
+    assert compact_messages(messages, budget=10_000) == messages
+
+
+def test_apply_prompt_template_budget():
+    """apply_prompt_template按预算压缩历史消息"""
+    state = {"messages": _session(10), "TEAM_MEMBERS": ["job_find"]}
+    formatted = apply_prompt_template(PromptType.SUPERVISOR, state, token_budget=3000)
+    total = sum(estimate_tokens(m["content"] if isinstance(m, dict) else m.content) for m in formatted)
+    assert total <= 3000 + 4 * len(formatted)
+
+
+if __name__ == "__main__":
+    test_compact_within_budget()
+    test_bounded_regardless_of_session_length()
+    test_under_budget_untouched()
+    test_apply_prompt_template_budget()
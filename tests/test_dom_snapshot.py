@@ -0,0 +1,149 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from browser_use.agent.message_manager.views import MessageManagerState, MessageMetadata
+from browser_use.agent.views import ActionResult
+from browser_use.browser.views import BrowserState
+from browser_use.dom.views import DOMElementNode, DOMTextNode
+
+from app.multi_agents.tools.dom_snapshot import DomSnapshotter, _ranges
+from app.multi_agents.utils.context_manager import estimate_tokens
+
+ATTRIBUTES = ["title", "aria-label"]
+
+
+def _state(url, cards, scrolled=0):
+    """构造岗位列表页：搜索框 + 若干岗位卡片（每张卡片一个"立即沟通"按钮），编号按提取顺序分配"""
+    root = DOMElementNode(is_visible=True, parent=None, tag_name="body", xpath="/body", attributes={}, children=[])
+    selector_map = {}
+    elements = [("input", "/body/input", "搜索职位")] + [
+        ("a", f"/body/ul/li[{i}]/a", f"{title} 20-30K 深圳 本科 3-5年 公司{i}") for i, title in cards
+    ]
+    for index, (tag, xpath, text) in enumerate(elements[scrolled:] if scrolled else elements):
+        node = DOMElementNode(is_visible=True, parent=root, tag_name=tag, xpath=xpath,
+                              attributes={"title": text[:6]}, children=[], highlight_index=index)
+        node.children.append(DOMTextNode(is_visible=True, parent=node, text=text))
+        root.children.append(node)
+        selector_map[index] = node
+    return BrowserState(element_tree=root, selector_map=selector_map, url=url, title="BOSS直聘", tabs=[])
+
+
+class _MessageManager:
+    """与 browser_use 的 MessageManager 使用相同的消息历史"""
+
+    def __init__(self):
+        self.settings = SimpleNamespace(include_attributes=ATTRIBUTES)
+        self.state = MessageManagerState()
+
+    @property
+    def messages(self):
+        return self.state.history.get_messages()
+
+    def _add_message_with_tokens(self, message, position=None, message_type=None):
+        metadata = MessageMetadata(tokens=estimate_tokens(message.content), message_type=message_type)
+        self.state.history.add_message(message, metadata, position)
+
+
+def test_stable_ids():
+    """同一个元素在不同步骤中编号不变，列表前面插入元素也不影响已有元素的编号"""
+    snapshotter = DomSnapshotter()
+    first = snapshotter.remap(_state("u", [(1, "Python开发"), (2, "Java开发")]))
+    ids = {node.xpath: index for index, node in first.selector_map.items()}
+    # 滚动后搜索框移出视口，browser_use 重新从 0 开始编号
+    second = snapshotter.remap(_state("u", [(1, "Python开发"), (2, "Java开发"), (3, "Go开发")], scrolled=1))
+    assert all(ids[node.xpath] == index for index, node in second.selector_map.items() if node.xpath in ids)
+    assert second.selector_map[ids["/body/ul/li[2]/a"]].xpath == "/body/ul/li[2]/a"
+    assert _ranges([1, 2, 3, 7, 9, 10]) == "1-3, 7, 9-10"
+
+
+def test_only_changes_are_sent():
+    """相同的页面状态不再发送元素，滚动后只发送新出现的岗位，内容变化的元素重新发送"""
+    snapshotter = DomSnapshotter()
+    manager = _MessageManager()
+    cards = [(i, f"AI Agent工程师{i}") for i in range(1, 31)]
+
+    def step(state, result=None):
+        before = {id(message) for message in manager.messages}
+        snapshotter.add_state_message(manager, snapshotter.remap(state), result=result)
+        return [message for message in manager.messages if id(message) not in before]
+
+    first = step(_state("https://www.zhipin.com/web/geek/job", cards[:20]))
+    assert len(first) == 2 and first[0].content.startswith("页面元素（") and "AI Agent工程师20" in first[0].content
+    assert "当前视口中的元素编号: 1-21" in first[1].content
+
+    same = step(_state("https://www.zhipin.com/web/geek/job", cards[:20]), [ActionResult(extracted_content="点击了第3个岗位", include_in_memory=True)])
+    assert [m.content for m in same][0] == "Action result: 点击了第3个岗位" and len(same) == 2
+
+    scrolled = step(_state("https://www.zhipin.com/web/geek/job", cards, scrolled=10))
+    assert "新增或变化10个" in scrolled[0].content and "AI Agent工程师21" in scrolled[0].content
+    assert "AI Agent工程师15" not in scrolled[0].content
+
+    cards[24] = (25, "AI Agent工程师25 继续沟通")
+    changed = step(_state("https://www.zhipin.com/web/geek/job", cards, scrolled=10))
+    assert "新增或变化1个" in changed[0].content and "继续沟通" in changed[0].content
+
+    full = _state("https://www.zhipin.com/web/geek/job", cards).element_tree.clickable_elements_to_string(ATTRIBUTES)
+    assert estimate_tokens(changed[-1].content) + estimate_tokens(changed[0].content) < estimate_tokens(full) / 3
+
+    new_page = step(_state("https://www.zhipin.com/job_detail/1.html", cards[:1]))
+    assert new_page[0].content.startswith("页面元素（https://www.zhipin.com/job_detail/1.html）")
+
+
+def test_attach_remaps_browser_state():
+    """挂载后浏览器上下文返回的状态使用固定编号，动作按该编号找到元素"""
+    class _Context:
+        def __init__(self):
+            self.states = [_state("u", [(1, "Python开发")]), _state("u", [(1, "Python开发")], scrolled=1)]
+
+        async def get_state(self, cache_clickable_elements_hashes=True):
+            return self.states.pop(0)
+
+    agent = SimpleNamespace(browser_context=_Context(), _message_manager=_MessageManager())
+    DomSnapshotter().attach(agent)
+    first = asyncio.run(agent.browser_context.get_state(cache_clickable_elements_hashes=True))
+    second = asyncio.run(agent.browser_context.get_state())
+    assert first.selector_map[2].xpath == second.selector_map[2].xpath == "/body/ul/li[1]/a"
+
+    agent._message_manager.add_state_message(second)
+    assert "[2]<a" in agent._message_manager.messages[0].content
+
+
+def test_navigation_drops_previous_page_elements():
+    """进入新页面时删除上一个页面的元素消息，动作结果保留；实际发送量包含仍在历史中的元素消息"""
+    snapshotter = DomSnapshotter()
+    manager = _MessageManager()
+    cards = [(i, f"AI Agent工程师{i}") for i in range(1, 31)]
+    list_url = "https://www.zhipin.com/web/geek/job"
+
+    snapshotter.add_state_message(manager, snapshotter.remap(_state(list_url, cards, scrolled=10)))
+    snapshotter.add_state_message(manager, snapshotter.remap(_state(list_url, cards)))
+    assert sum(m.content.startswith("页面元素") for m in manager.messages) == 2
+    list_tokens = sum(estimate_tokens(m.content) for m in manager.messages if m.content.startswith("页面元素"))
+    # 第二步没有新的页面元素消息，但第一步的消息仍随历史发送
+    assert snapshotter.sent_tokens >= list_tokens + estimate_tokens(manager.messages[0].content)
+
+    before = snapshotter.sent_tokens
+    snapshotter.add_state_message(
+        manager, snapshotter.remap(_state("https://www.zhipin.com/job_detail/1.html", cards[:1])),
+        result=[ActionResult(extracted_content="打开了第1个岗位", include_in_memory=True)],
+    )
+    contents = [m.content for m in manager.messages]
+    assert not any(list_url in content for content in contents if content.startswith("页面元素"))
+    assert sum(content.startswith("页面元素（https://www.zhipin.com/job_detail/1.html）") for content in contents) == 1
+    assert "Action result: 打开了第1个岗位" in contents
+    history = manager.state.history
+    assert history.current_tokens == sum(m.metadata.tokens for m in history.messages)
+    assert snapshotter.sent_tokens - before < list_tokens
+
+
+if __name__ == "__main__":
+    test_stable_ids()
+    test_only_changes_are_sent()
+    test_attach_remaps_browser_state()
+    test_navigation_drops_previous_page_elements()
+    print("所有测试通过")
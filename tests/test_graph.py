@@ -6,6 +6,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app.multi_agents.graph.node_graph import build_agent
 from app.multi_agents.graph.state_langgraph import State
+from app.multi_agents.graph.streaming import stream_agent
 from langgraph.checkpoint.memory import InMemorySaver
 from langchain_core.messages import HumanMessage
 
@@ -37,6 +38,28 @@ def test_basic_flow():
     
     return result
 
+def test_stream_flow():
+    """测试流式工作流程，实时打印token和浏览器进度"""
+    print("开始测试流式工作流程...")
+
+    graph = build_agent(checkpointer=InMemorySaver())
+
+    initial_state = State(
+        messages=[HumanMessage(content="帮我寻找AI Agnet 工作")],
+        TEAM_MEMBERS=TEAM_MEMBERS
+    )
+
+    config = {"configurable": {"thread_id": "test-thread-stream"}}
+    events = []
+    for event in stream_agent(graph, initial_state, config):
+        events.append(event)
+        if event["type"] == "token":
+            print(event["content"], end="", flush=True)
+        elif event["type"] == "progress":
+            print(f"\n[{event['node']}] {event['message']}")
+
+    return events
+
 def test_specific_agent(agent_name="job_filter"):
     """测试特定智能体的功能"""
     print(f"\n开始测试特定智能体: {agent_name}...")
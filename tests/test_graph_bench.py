@@ -0,0 +1,34 @@
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.graph_bench import percentile, run_benchmark
+
+
+def test_percentile():
+    """百分位数按线性插值计算"""
+    assert percentile([], 50) == 0.0
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    assert percentile([5], 95) == 5
+
+
+def test_graph_bench_smoke():
+    """小规模运行基准：找工作路径和 db_query 智能体都能跑通，并输出各节点耗时和检查点大小"""
+    result = run_benchmark(
+        concurrency=2, sessions=6, mix={"job": 1, "job_llm": 1, "db": 1},
+        llm_latency=0, tool_latency=0, memory_samples=1,
+    )
+    assert result["failures"] == 0
+    assert set(result["sessions"]) == {"job", "job_llm", "db"}
+    for node in ("frontdesk", "planner", "job_find", "supervisor", "agent", "tools"):
+        assert result["nodes"][node]["count"] > 0
+    assert result["checkpoint_bytes_per_session"]["p50"] > 0
+    assert all(value > 0 for value in result["memory_peak_kb_per_session"].values())
+
+
+if __name__ == "__main__":
+    test_percentile()
+    test_graph_bench_smoke()
+    print("所有测试通过")
@@ -0,0 +1,232 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.api.browser_pool import BrowserPool
+from app.api.inbox_poller import InboxPoller
+from app.multi_agents.tools.boss_chat_source import parse_conversation, parse_messages
+from app.multi_agents.utils.hr_inbox import (
+    ChatMessage,
+    ConversationSummary,
+    InboxStore,
+    SyncStats,
+    messages_after,
+    sync_inbox,
+)
+
+
+class _FakeInbox:
+    """模拟聊天页面：会话列表预览随最后一条消息变化，记录打开过的会话"""
+
+    def __init__(self, conversations):
+        self.conversations = {cid: list(messages) for cid, messages in conversations.items()}
+        self.opened = []
+        self.counter = 0
+
+    def add(self, conversation_id, sender, text):
+        self.counter += 1
+        self.conversations[conversation_id].append(ChatMessage(f"m{self.counter}", sender, text))
+
+    async def list_conversations(self):
+        return [
+            ConversationSummary(cid, f"HR{cid}", f"公司{cid}", "Python开发", messages[-1].text if messages else "")
+            for cid, messages in self.conversations.items()
+        ]
+
+    async def read_messages(self, conversation_id):
+        self.opened.append(conversation_id)
+        # 聊天页面只加载最近的消息
+        return self.conversations[conversation_id][-20:]
+
+
+def _inbox(n):
+    inbox = _FakeInbox({f"c{i}": [] for i in range(n)})
+    for i in range(n):
+        inbox.add(f"c{i}", "me", "您好，我对这个岗位很感兴趣")
+        inbox.add(f"c{i}", "hr", "你好，方便发一份简历吗")
+    return inbox
+
+
+def test_messages_after():
+    """只返回高水位之后的消息，高水位不在读取范围内时返回全部"""
+    messages = [ChatMessage(f"m{i}", "hr", str(i)) for i in range(5)]
+    assert messages_after(messages, None) == messages
+    assert [m.message_id for m in messages_after(messages, "m2")] == ["m3", "m4"]
+    assert messages_after(messages, "m4") == []
+    assert messages_after(messages, "old") == messages
+
+
+def test_incremental_sync():
+    """首次同步保存全部消息；之后只打开有新消息的会话，只有新的HR消息才进入待分析队列"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = InboxStore(os.path.join(tmp, "inbox.db"))
+        inbox = _inbox(50)
+
+        first = asyncio.run(sync_inbox(inbox, store))
+        assert first == SyncStats(listed=50, opened=50, new_messages=100, queued=50)
+        store.mark_analyzed(store.pending())
+
+        inbox.opened.clear()
+        idle = asyncio.run(sync_inbox(inbox, store))
+        assert idle == SyncStats(listed=50, opened=0, new_messages=0, queued=0)
+        assert inbox.opened == []
+
+        inbox.add("c7", "hr", "我们觉得你很合适，什么时候方便面试？")
+        inbox.add("c7", "hr", "周三下午可以吗")
+        inbox.add("c9", "me", "已发送简历，请查收")
+        stats = asyncio.run(sync_inbox(inbox, store))
+        assert stats == SyncStats(listed=50, opened=2, new_messages=3, queued=1)
+        assert sorted(inbox.opened) == ["c7", "c9"]
+        assert store.message_count() == 103
+
+        pending = store.pending()
+        assert [p.conversation_id for p in pending] == ["c7"]
+        assert [m.text for m in pending[0].messages] == ["我们觉得你很合适，什么时候方便面试？", "周三下午可以吗"]
+        assert pending[0].company == "公司c7"
+
+        store.mark_analyzed(pending)
+        assert store.pending() == []
+        store.close()
+
+        # 重启后高水位仍然有效
+        store = InboxStore(os.path.join(tmp, "inbox.db"))
+        inbox.opened.clear()
+        assert asyncio.run(sync_inbox(inbox, store)).opened == 0
+        store.close()
+
+
+def test_duplicate_messages_ignored():
+    """高水位之前的消息被再次读取时不会重复保存"""
+    store = InboxStore(":memory:")
+    summary = ConversationSummary("c1", "王女士", "某科技", "后端开发", "你好")
+    messages = [ChatMessage("m1", "hr", "你好"), ChatMessage("m2", "me", "你好")]
+    assert store.save(summary, messages) == (2, True)
+    assert store.save(summary._replace(preview="在吗"), messages + [ChatMessage("m3", "hr", "在吗")]) == (1, True)
+    assert store.message_count("c1") == 3
+    assert store.high_water_marks() == {"c1": (summary._replace(preview="在吗").signature, "m3")}
+
+
+def test_mark_analyzed_keeps_newer_messages():
+    """pending() 之后同步到的HR消息不会被标记为已分析，会话留在待分析队列中"""
+    store = InboxStore(":memory:")
+    summary = ConversationSummary("c1", "王女士", "某科技", "后端开发", "你好")
+    store.save(summary, [ChatMessage("m1", "hr", "你好"), ChatMessage("m2", "me", "你好")])
+    store.save(ConversationSummary("c2", "李先生", "某公司", "算法", "在吗"), [ChatMessage("n1", "hr", "在吗")])
+    pending = store.pending()
+
+    # 分析期间后台同步到新消息：c1 有新的HR消息，c2 只有自己发的消息
+    store.save(summary._replace(preview="方便面试吗"), [ChatMessage("m3", "hr", "方便面试吗")])
+    store.save(ConversationSummary("c2", "李先生", "某公司", "算法", "好的"), [ChatMessage("n2", "me", "好的")])
+    store.mark_analyzed(pending)
+
+    remaining = store.pending()
+    assert [p.conversation_id for p in remaining] == ["c1"]
+    assert [m.text for m in remaining[0].messages] == ["方便面试吗"]
+    store.mark_analyzed(remaining)
+    assert store.pending() == []
+
+
+class _FlakyInbox(_FakeInbox):
+    """打开会话时可能读取失败，或者新消息还没加载出来的模拟聊天页面"""
+
+    def __init__(self, conversations):
+        super().__init__(conversations)
+        self.fail = False
+        self.stale = False
+
+    async def read_messages(self, conversation_id):
+        messages = await super().read_messages(conversation_id)
+        if self.fail:
+            raise TimeoutError("消息区域加载超时")
+        return messages[:-1] if self.stale else messages
+
+
+def test_failed_read_reopens_conversation():
+    """读取失败或预览变化但没有读到新消息时不推进签名，下一轮重新打开会话"""
+    store = InboxStore(":memory:")
+    inbox = _FlakyInbox({"c1": [ChatMessage("m0", "hr", "a")]})
+    assert asyncio.run(sync_inbox(inbox, store)) == SyncStats(listed=1, opened=1, new_messages=1, queued=1)
+    store.mark_analyzed(store.pending())
+
+    # 预览 "a" -> "b"，打开会话时读取超时
+    inbox.add("c1", "hr", "b")
+    inbox.fail = True
+    assert asyncio.run(sync_inbox(inbox, store)) == SyncStats(listed=1, opened=1, new_messages=0, queued=0, failed=1)
+
+    # 页面加载出来了，但还没有新消息
+    inbox.fail, inbox.stale = False, True
+    assert asyncio.run(sync_inbox(inbox, store)) == SyncStats(listed=1, opened=1, new_messages=0, queued=0)
+
+    inbox.stale = False
+    inbox.opened.clear()
+    assert asyncio.run(sync_inbox(inbox, store)) == SyncStats(listed=1, opened=1, new_messages=1, queued=1)
+    assert inbox.opened == ["c1"]
+    assert store.message_count("c1") == 2
+    assert [m.text for m in store.pending()[0].messages] == ["b"]
+
+    # 读到新消息后签名推进，不再重复打开
+    inbox.opened.clear()
+    assert asyncio.run(sync_inbox(inbox, store)).opened == 0
+    store.close()
+
+
+def test_parse_chat_page():
+    """聊天列表条目和消息元素的解析"""
+    summary = parse_conversation({"id": "u123", "lines": ["2", "10:32", "李先生", "某某科技", "招聘经理", "方便发份简历吗"]})
+    assert summary.conversation_id == "u123"
+    assert (summary.hr_name, summary.company, summary.job_title) == ("李先生", "某某科技", "招聘经理")
+    assert "方便发份简历吗" in summary.preview
+
+    messages = parse_messages([
+        {"id": "", "mine": False, "system": False, "text": "好的", "time": "10:30"},
+        {"id": "", "mine": True, "system": False, "text": "好的", "time": "10:30"},
+        {"id": "", "mine": False, "system": False, "text": "好的", "time": "10:30"},
+        {"id": "88", "mine": False, "system": True, "text": "对方已查看您的简历", "time": ""},
+    ])
+    assert [m.sender for m in messages] == ["hr", "me", "hr", "system"]
+    assert len({m.message_id for m in messages}) == 4 and messages[3].message_id == "88"
+
+
+def test_poller_uses_browser_pool():
+    """同步时租借浏览器并在结束后归还，浏览器都在使用中时跳过本轮"""
+    pool = BrowserPool(["cdp://a"])
+    store = InboxStore(":memory:")
+    seen = []
+
+    async def _sync(cdp_url, inbox_store):
+        seen.append((cdp_url, pool.in_use))
+        return SyncStats(1, 0, 0, 0)
+
+    poller = InboxPoller(pool, store=store, interval=60, lease_timeout=0.05, sync=_sync)
+    assert poller.sync_once() == SyncStats(1, 0, 0, 0)
+    assert seen == [("cdp://a", 1)] and pool.in_use == 0
+
+    with pool.lease():
+        assert poller.sync_once() is None
+    assert len(seen) == 1
+
+    # 后台线程启动后立即同步一次
+    poller.start()
+    try:
+        assert poller.running
+        deadline = time.time() + 5
+        while len(seen) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        poller.stop(timeout=5)
+    assert not poller.running and len(seen) == 2
+
+
+if __name__ == "__main__":
+    test_messages_after()
+    test_incremental_sync()
+    test_duplicate_messages_ignored()
+    test_mark_analyzed_keeps_newer_messages()
+    test_failed_read_reopens_conversation()
+    test_parse_chat_page()
+    test_poller_uses_browser_pool()
+    print("所有测试通过")
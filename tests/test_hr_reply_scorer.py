@@ -0,0 +1,270 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(__file__))
+
+from langchain_core.messages import AIMessage
+
+from app.multi_agents.graph import node_graph
+from app.multi_agents.utils import hr_inbox, hr_reply_scorer
+from app.multi_agents.utils.hr_inbox import ChatMessage, ConversationSummary, InboxStore, PendingConversation
+from app.multi_agents.utils.hr_reply_scorer import (
+    PRECLASSIFIED,
+    HRReplyScorer,
+    ReplyAssessment,
+    format_assessments,
+    render_conversation,
+)
+from hr_reply_corpus import OracleReplyLLM, load_corpus
+
+
+class _FailingLLM:
+    """第一次请求整体失败的模拟模型"""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.failed = False
+
+    def with_structured_output(self, schema):
+        self.inner.with_structured_output(schema)
+        return self
+
+    def batch(self, inputs, config=None, return_exceptions=False):
+        if not self.failed:
+            self.failed = True
+            return [RuntimeError("rate limited")] + self.inner.batch(inputs[1:], config=config)
+        return self.inner.batch(inputs, config=config)
+
+
+class _BrokenLLM:
+    """每次请求都失败的模拟模型"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def with_structured_output(self, schema):
+        return self
+
+    def batch(self, inputs, config=None, return_exceptions=False):
+        self.calls += 1
+        raise RuntimeError("service unavailable")
+
+
+def test_preclassifier_on_corpus():
+    """预分类器识别语料中意图明确的回复，且不会把需要LLM判断的回复误判"""
+    corpus = load_corpus()
+    scorer = HRReplyScorer(llm=object())
+    hits = 0
+    for index, (conversation, intent, next_action) in enumerate(corpus):
+        assessment = scorer.preclassify(conversation, index)
+        if assessment is None:
+            continue
+        hits += 1
+        assert assessment.intent == intent, (conversation.conversation_id, assessment.intent, intent)
+        assert assessment.next_action == next_action
+        assert assessment.source == "rule"
+    obvious = sum(1 for _, intent, _ in corpus if intent in PRECLASSIFIED)
+    assert hits == obvious == 19
+
+
+def test_preclassify_disabled():
+    """关闭预分类时所有会话都交给LLM"""
+    corpus = load_corpus()
+    llm = OracleReplyLLM(corpus)
+    scorer = HRReplyScorer(llm=llm, preclassify=False)
+    assessments, failed = scorer.score([conversation for conversation, _, _ in corpus])
+    assert failed == {}
+    assert scorer.stats["preclassified"] == 0
+    assert sum(llm.batch_sizes) == len(corpus)
+    assert all(assessment.source == "llm" for assessment in assessments)
+
+
+def test_batched_scoring():
+    """其余会话按批调用LLM，结果与会话一一对应，请求走 BULK 通道"""
+    corpus = load_corpus()
+    conversations = [conversation for conversation, _, _ in corpus]
+    llm = OracleReplyLLM(corpus)
+    scorer = HRReplyScorer(llm=llm, max_batch_size=8)
+    assessments, failed = scorer.score(conversations)
+
+    assert failed == {}
+    assert len(assessments) == len(corpus)
+    for index, (assessment, (_, intent, next_action)) in enumerate(zip(assessments, corpus)):
+        assert assessment.index == index
+        assert (assessment.intent, assessment.next_action) == (intent, next_action)
+    assert scorer.stats == {"conversations": 40, "preclassified": 19, "llm_calls": 3}
+    assert llm.batch_sizes == [8, 8, 5]
+    assert llm.configs[0]["metadata"] == {"llm_lane": "bulk"}
+    assert llm.configs[0]["run_name"] == "hr_reply_scorer"
+
+
+def test_batches_respect_context_window():
+    """上下文窗口较小时每批的会话更少"""
+    corpus = load_corpus()
+    texts = [render_conversation(conversation) for conversation, _, _ in corpus]
+    scorer = HRReplyScorer(llm=object(), context_window=1200, max_batch_size=50)
+    batches = scorer.make_batches(texts, list(range(len(texts))))
+    assert len(batches) > 1
+    assert [index for batch in batches for index in batch] == list(range(len(texts)))
+
+
+def test_missing_and_failed_batches_retried():
+    """模型遗漏的会话和失败的批次会重试，最终每个会话都有结果"""
+    corpus = load_corpus()
+    conversations = [conversation for conversation, _, _ in corpus]
+    inner = OracleReplyLLM(corpus, drop={"曹先生", "戚女士"})
+    scorer = HRReplyScorer(llm=_FailingLLM(inner), max_batch_size=8)
+    assessments, failed = scorer.score(conversations)
+    assert failed == {}
+    assert [(a.intent, a.next_action) for a in assessments] == [(intent, action) for _, intent, action in corpus]
+    assert all(a.index == i for i, a in enumerate(assessments))
+    # 3批，第1批失败后拆成2批重试，2个遗漏的会话再各重试一次
+    assert scorer.stats["llm_calls"] > 3
+
+
+def test_async_scoring():
+    """ascore 与 score 的结果一致"""
+    corpus = load_corpus()
+    conversations = [conversation for conversation, _, _ in corpus]
+    scorer = HRReplyScorer(llm=OracleReplyLLM(corpus), max_batch_size=6)
+    assessments, failed = asyncio.run(scorer.ascore(conversations))
+    assert failed == {}
+    assert [(a.intent, a.next_action) for a in assessments] == [(intent, action) for _, intent, action in corpus]
+
+
+def test_format_assessments():
+    """需要行动的会话排在前面"""
+    conversations = [
+        PendingConversation("a", "张女士", "甲公司", "Python开发", []),
+        PendingConversation("b", "李先生", "乙公司", "Python开发", []),
+    ]
+    assessments = [
+        ReplyAssessment(index=0, intent="rejection", interest=0, next_action="none", reason="不合适"),
+        ReplyAssessment(index=1, intent="interview_invite", interest=90, next_action="schedule_interview", reason="周三面试"),
+    ]
+    text = format_assessments(conversations, assessments)
+    assert text.index("乙公司") < text.index("甲公司")
+    assert "确认面试" in text and "无需行动" in text
+
+    # 只有部分会话评估成功时按 index 对应会话
+    text = format_assessments(conversations, assessments[1:], failed=[0])
+    assert "乙公司" in text and "甲公司" not in text
+    assert "1个会话评估失败" in text
+
+
+def test_message_processor_node():
+    """消息处理节点评估待分析的会话并保存结果，没有待分析会话时直接结束"""
+    corpus = load_corpus()
+    store = InboxStore(":memory:")
+    for conversation, _, _ in corpus[:12]:
+        summary = ConversationSummary(
+            conversation.conversation_id, conversation.hr_name, conversation.company, conversation.job_title,
+            conversation.messages[-1].text,
+        )
+        store.save(summary, conversation.messages)
+    llm = OracleReplyLLM(corpus)
+    scorer = HRReplyScorer(llm=llm)
+
+    original_store, original_scorer = hr_inbox.get_inbox_store, hr_reply_scorer.get_hr_reply_scorer
+    hr_inbox.get_inbox_store = lambda: store
+    hr_reply_scorer.get_hr_reply_scorer = lambda: scorer
+    try:
+        command = node_graph.message_processor_node({"messages": []})
+        assert command.goto == "__end__"
+        message = command.update["messages"][0]
+        assert isinstance(message, AIMessage) and message.name == "message_processor"
+        assert "共分析12个会话" in message.content
+
+        assert store.pending() == []
+        latest = store.latest_assessments()
+        assert len(latest) == 12
+        assert latest["c007"]["intent"] == "rejection" and latest["c007"]["source"] == "rule"
+
+        # 新的HR消息只重新分析对应的会话
+        summary = ConversationSummary("c007", "周先生", "远景软件", "Java开发", "等等，另一个岗位可能合适")
+        store.save(summary, [ChatMessage("c007-9", "hr", "其实我们另一个岗位挺适合你，下周方便面试吗？")])
+        command = node_graph.message_processor_node({"messages": []})
+        assert "共分析1个会话" in command.update["messages"][0].content
+        assert scorer.stats["conversations"] == 13
+
+        command = node_graph.message_processor_node({"messages": []})
+        assert command.update["messages"][0].content == "没有新的HR回复需要分析"
+    finally:
+        hr_inbox.get_inbox_store = original_store
+        hr_reply_scorer.get_hr_reply_scorer = original_scorer
+        store.close()
+
+
+def test_save_assessments_keeps_messages_synced_during_scoring():
+    """评估期间同步到的HR消息不会随评估结果被标记为已分析"""
+    store = InboxStore(":memory:")
+    summary = ConversationSummary("c1", "王女士", "某科技", "后端开发", "方便发简历吗")
+    store.save(summary, [ChatMessage("m1", "me", "您好"), ChatMessage("m2", "hr", "方便发简历吗")])
+    pending = store.pending()
+    assessments, _ = HRReplyScorer(llm=object()).score(pending)
+    assert assessments[0].intent == "resume_request"
+
+    # LLM 评估耗时较长，期间后台同步到了新的HR消息
+    store.save(summary._replace(preview="周三面试可以吗"), [ChatMessage("m3", "hr", "周三下午方便面试吗？")])
+    store.save_assessments(list(zip(pending, assessments)))
+
+    assert store.latest_assessments()["c1"]["intent"] == "resume_request"
+    remaining = store.pending()
+    assert [p.conversation_id for p in remaining] == ["c1"]
+    assert [m.message_id for m in remaining[0].messages] == ["m3"]
+    store.close()
+
+
+def test_failed_scoring_stays_pending():
+    """LLM 评估失败的会话不保存结果，留在待分析队列中下次重试"""
+    store = InboxStore(":memory:")
+    store.save(
+        ConversationSummary("c1", "王女士", "某科技", "后端开发", "方便发简历吗"),
+        [ChatMessage("m1", "hr", "方便发简历吗")],
+    )
+    store.save(
+        ConversationSummary("c2", "赵先生", "某网络", "后端开发", "你对远程办公怎么看"),
+        [ChatMessage("m2", "hr", "你对远程办公怎么看？我们团队一半人远程")],
+    )
+    llm = _BrokenLLM()
+    scorer = HRReplyScorer(llm=llm)
+
+    original_store, original_scorer = hr_inbox.get_inbox_store, hr_reply_scorer.get_hr_reply_scorer
+    hr_inbox.get_inbox_store = lambda: store
+    hr_reply_scorer.get_hr_reply_scorer = lambda: scorer
+    try:
+        command = node_graph.message_processor_node({"messages": []})
+        content = command.update["messages"][0].content
+        assert "共分析1个会话" in content and "1个会话评估失败" in content
+        assert llm.calls == 1
+
+        # 预分类的会话已保存，LLM 失败的会话没有结果，仍在队列中
+        assert list(store.latest_assessments()) == ["c1"]
+        remaining = store.pending()
+        assert [p.conversation_id for p in remaining] == ["c2"]
+        assert [m.message_id for m in remaining[0].messages] == ["m2"]
+
+        # 下次运行重新分析失败的会话
+        node_graph.message_processor_node({"messages": []})
+        assert llm.calls == 2
+        assert [p.conversation_id for p in store.pending()] == ["c2"]
+    finally:
+        hr_inbox.get_inbox_store = original_store
+        hr_reply_scorer.get_hr_reply_scorer = original_scorer
+        store.close()
+
+
+if __name__ == "__main__":
+    test_preclassifier_on_corpus()
+    test_preclassify_disabled()
+    test_batched_scoring()
+    test_batches_respect_context_window()
+    test_missing_and_failed_batches_retried()
+    test_async_scoring()
+    test_format_assessments()
+    test_message_processor_node()
+    test_save_assessments_keeps_messages_synced_during_scoring()
+    test_failed_scoring_stays_pending()
+    print("所有测试通过")
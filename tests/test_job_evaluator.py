@@ -0,0 +1,115 @@
+import asyncio
+import json
+import os
+import re
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(__file__))
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_openai import ChatOpenAI
+
+from app.multi_agents.utils.context_manager import estimate_tokens
+from app.multi_agents.utils.job_evaluator import BatchJobEvaluator, render_listing
+from mock_openai_server import MockOpenAIServer
+
+REQUIREMENTS = "Python开发，薪资大于8000"
+
+
+def _listings(n):
+    return [
+        {"岗位": f"{'Python' if i % 3 == 0 else 'Java'}开发工程师{i}", "薪资": "10-15K", "公司": f"公司{i}"}
+        for i in range(n)
+    ]
+
+
+def _judge(body, skip=()):
+    """模拟模型：按局部编号为每个岗位返回结论，岗位名包含 Python 时判定为匹配，skip 中的编号被遗漏"""
+    content = body["messages"][-1]["content"]
+    verdicts = [
+        {"index": int(number), "match": "Python" in text, "score": 90 if "Python" in text else 10, "reason": "测试"}
+        for number, text in re.findall(r"^\[(\d+)\] (.*)$", content, re.M)
+        if int(number) not in skip
+    ]
+    arguments = json.dumps({"verdicts": verdicts}, ensure_ascii=False)
+    if "response_format" in body:
+        # json_schema 方式的结构化输出直接返回 JSON 文本
+        return arguments
+    return {"content": None, "tool_calls": [{
+        "id": "call_1", "type": "function", "function": {"name": "JobVerdictBatch", "arguments": arguments},
+    }]}
+
+
+def _evaluator(server, **kwargs):
+    llm = ChatOpenAI(base_url=server.base_url, api_key="x", model="mock", max_retries=0)
+    return BatchJobEvaluator(llm=llm, **kwargs)
+
+
+def test_batch_evaluation_of_result_page():
+    """60个岗位只需要少量请求，结论与输入一一对应"""
+    with MockOpenAIServer(reply=_judge) as server:
+        verdicts = _evaluator(server).evaluate(_listings(60), REQUIREMENTS)
+    assert len(server.requests) <= 3
+    assert [v.index for v in verdicts] == list(range(60))
+    assert [v.match for v in verdicts] == [i % 3 == 0 for i in range(60)]
+
+
+def test_batches_fit_context_window():
+    """上下文窗口较小时自动减小批次，每批估算的 token 不超过窗口"""
+    listings = [f"Python开发工程师{i} " + "负责后端服务开发与维护，" * 20 for i in range(30)]
+    evaluator = BatchJobEvaluator(llm=object(), context_window=2000)
+    texts = [render_listing(listing) for listing in listings]
+    batches = evaluator.make_batches(texts, REQUIREMENTS)
+    assert len(batches) > 2
+    assert sorted(i for batch in batches for i in batch) == list(range(30))
+    for batch in batches:
+        messages = evaluator._messages(REQUIREMENTS, texts, batch)
+        assert sum(estimate_tokens(m.content) for m in messages) + 60 * len(batch) <= 2000
+
+
+def test_failed_and_missing_items_are_retried():
+    """失败的批次拆分重试，模型遗漏的岗位单独重试"""
+    calls = []
+
+    def reply(body):
+        calls.append(body)
+        # 第一次请求遗漏第2个岗位
+        return _judge(body, skip=(2,) if len(calls) == 1 else ())
+
+    with MockOpenAIServer(reply=reply) as server:
+        verdicts = _evaluator(server).evaluate(_listings(6), REQUIREMENTS)
+    assert len(server.requests) == 2
+    assert "Java开发工程师1" in server.requests[1]["messages"][-1]["content"]
+    assert [v.match for v in verdicts] == [i % 3 == 0 for i in range(6)]
+
+    with MockOpenAIServer(reply=_judge, statuses=[400]) as server:
+        verdicts = _evaluator(server).evaluate(_listings(4), REQUIREMENTS)
+    assert len(server.requests) == 3
+    assert [v.match for v in verdicts] == [True, False, False, True]
+
+
+def test_async_batches_run_concurrently_on_bulk_lane():
+    """异步评估时多批并发执行，请求元数据标记为 BULK 通道"""
+    lanes = []
+
+    class LaneRecorder(BaseCallbackHandler):
+        def on_chat_model_start(self, serialized, messages, *, metadata=None, **kwargs):
+            lanes.append((metadata or {}).get("llm_lane"))
+
+    with MockOpenAIServer(reply=_judge, delay=0.2) as server:
+        llm = ChatOpenAI(base_url=server.base_url, api_key="x", model="mock", max_retries=0, callbacks=[LaneRecorder()])
+        evaluator = BatchJobEvaluator(llm=llm, max_batch_size=10, max_concurrency=3)
+        verdicts = asyncio.run(evaluator.aevaluate(_listings(30), REQUIREMENTS))
+    assert len(server.requests) == 3
+    assert server.max_active == 3
+    assert lanes == ["bulk"] * 3
+    assert sum(v.match for v in verdicts) == 10
+
+
+if __name__ == "__main__":
+    test_batch_evaluation_of_result_page()
+    test_batches_fit_context_window()
+    test_failed_and_missing_items_are_retried()
+    test_async_batches_run_concurrently_on_bulk_lane()
+    print("所有测试通过")
@@ -0,0 +1,203 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.multi_agents.graph import node_graph
+from app.multi_agents.graph.pre_router import default_supervisor_router
+from app.multi_agents.tools.boss_job_actions import build_boss_job_controller
+from app.multi_agents.utils import job_market
+from app.multi_agents.utils.job_market import (
+    JobMarketStore,
+    ListingRecord,
+    count_by,
+    grouped_percentiles,
+    parse_listing,
+    parse_salary,
+    salary_percentiles,
+)
+from app.multi_agents.utils.job_search_cache import JobSearchCache, make_job_query
+
+CARD = {
+    "text": "Python开发工程师\n25-40K·14薪\n深圳·南山区·科技园\n3-5年\n本科\n星河科技\n互联网\nB轮\n100-499人\nPython\nDjango\nMySQL",
+    "url": "https://www.zhipin.com/job_detail/abc.html?lid=1",
+}
+
+
+def _record(key, city, low, high, skills=("python",), keyword="python", seen_at=None):
+    return ListingRecord(
+        key, time.time() if seen_at is None else seen_at, city, keyword, "Python开发", f"公司{key}", "3-5年", "本科",
+        low, high, 12, 100, 499, tuple(skills),
+    )
+
+
+def test_parse_listing():
+    """岗位卡片解析为薪资、城市、经验、学历、公司、公司规模和技能"""
+    record = parse_listing(CARD, keyword="python", city="全国")
+    assert record.title == "Python开发工程师" and record.company == "星河科技"
+    assert (record.city, record.experience, record.education) == ("深圳", "3-5年", "本科")
+    assert (record.salary_low, record.salary_high, record.salary_months) == (25, 40, 14)
+    assert (record.size_low, record.size_high) == (100, 499)
+    assert {"python", "django", "mysql"} <= set(record.skills)
+    # 同一岗位的链接参数不同时去重键相同
+    assert parse_listing(dict(CARD, url=CARD["url"].split("?")[0])).job_key == record.job_key
+
+    assert parse_salary("1-1.5万") == (10, 15, 12)
+    assert parse_salary("200-300元/天")[0] == 200 * 21.75 / 1000
+    assert np.isnan(parse_salary("面议")[0])
+    # 卡片中没有城市时使用搜索城市
+    assert parse_listing({"text": "数据分析师\n10-15K\n1-3年\n大专\n某公司"}, city="杭州").city == "杭州"
+
+
+def test_grouped_percentiles_match_numpy():
+    """向量化的分组分位数与逐组调用 np.percentile 的结果一致"""
+    rng = np.random.default_rng(0)
+    groups = rng.integers(0, 7, size=5000)
+    values = rng.normal(20, 5, size=5000)
+    values[::50] = np.nan
+    unique, counts, result = grouped_percentiles(groups, values, (10, 50, 90))
+    for i, group in enumerate(unique):
+        expected = np.percentile(values[(groups == group) & ~np.isnan(values)], (10, 50, 90))
+        assert np.allclose(result[i], expected)
+        assert counts[i] == np.sum((groups == group) & ~np.isnan(values))
+
+
+def test_partitions_and_aggregation():
+    """多个分区合并后按城市、技能统计，同一岗位多次出现只保留最近的一条"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JobMarketStore(tmp)
+        store.append([
+            _record(1, "深圳", 20, 30, ("python", "django")),
+            _record(2, "深圳", 30, 40, ("python", "大模型")),
+            _record(3, "上海", 15, 25, ("java",), keyword="java"),
+        ])
+        store.append([
+            _record(4, "深圳", 40, 60, ("python", "大模型")),
+            _record(5, "上海", float("nan"), float("nan"), ("java",), keyword="java"),
+            # 岗位1再次被看到，薪资已调整
+            _record(1, "深圳", 25, 35, ("python", "django"), seen_at=time.time() + 10),
+        ])
+        assert len(store.partitions()) == 2
+
+        data = store.load()
+        assert len(data) == 5
+        assert len(store.load(dedupe=False)) == 6
+
+        by_city = salary_percentiles(data, by="city")
+        assert list(by_city) == ["深圳", "上海"]
+        assert by_city["深圳"] == {"count": 3, "p25": 32.5, "p50": 35.0, "p75": 42.5}
+        # 面议的岗位不参与薪资统计
+        assert by_city["上海"]["count"] == 1 and by_city["上海"]["p50"] == 20.0
+        assert salary_percentiles(data, by="city", min_count=2).keys() == {"深圳"}
+        assert salary_percentiles(data, by="skill")["大模型"]["p50"] == 42.5
+        assert salary_percentiles(data, by="keyword", annual=True)["python"]["p50"] == 420.0
+
+        assert count_by(data, "skill") == {"python": 3, "java": 2, "大模型": 2, "django": 1}
+        shenzhen_llm = data.filter(city="深圳", skill="大模型")
+        assert sorted(shenzhen_llm.decode("company")) == ["公司2", "公司4"]
+        assert count_by(shenzhen_llm, "skill") == {"python": 2, "大模型": 2}
+        assert len(data.filter(city="北京")) == 0
+
+        month = time.strftime("%Y-%m")
+        assert len(store.load(months=[month])) == 5
+        assert len(store.load(months=["2000-01"])) == 0
+        store.close()
+
+
+def test_search_stages_listings():
+    """搜索结果页读取到的岗位被暂存，flush 后写入分区；缓存命中时不重复暂存"""
+
+    class _Page:
+        def __init__(self):
+            self.visited = []
+
+        async def goto(self, url):
+            self.visited.append(url)
+
+        async def wait_for_selector(self, selector, timeout=None):
+            return None
+
+        async def evaluate(self, script):
+            return None
+
+        async def wait_for_timeout(self, ms):
+            return None
+
+        async def eval_on_selector_all(self, selector, script):
+            return [CARD, {"text": "Go开发工程师\n30-50K\n深圳·福田区\n5-10年\n本科\n云帆数据\nGo", "url": ""}]
+
+    class _Browser:
+        async def get_current_page(self):
+            return _Page()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = JobSearchCache(os.path.join(tmp, "cache.db"))
+        store = JobMarketStore(os.path.join(tmp, "market"))
+        controller = build_boss_job_controller(search_cache=cache, market_store=store)
+        for _ in range(2):
+            asyncio.run(controller.registry.execute_action(
+                "search_job_listings", {"keyword": "后端开发", "city": "深圳"}, browser=_Browser()))
+        assert store.staged_count() == 2
+
+        assert store.flush() == 2
+        assert store.staged_count() == 0 and store.flush() == 0
+        data = store.load()
+        assert sorted(data.decode("title")) == ["Go开发工程师", "Python开发工程师"]
+        assert set(data.decode("keyword")) == {make_job_query("后端开发", "深圳").keyword}
+        cache.close()
+        store.close()
+
+
+def test_data_collector_node():
+    """数据收集节点写入暂存的岗位并输出各城市的薪资分位数和热门技能"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JobMarketStore(tmp)
+        query = make_job_query("python", "深圳")
+        store.stage(query, [
+            {"text": f"Python开发\n{20 + i}-{30 + i}K\n深圳·南山区\n3-5年\n本科\n公司{i}\nPython", "url": f"/job_detail/{i}.html"}
+            for i in range(6)
+        ])
+        original = job_market.get_job_market_store
+        job_market.get_job_market_store = lambda: store
+        try:
+            command = node_graph.data_collector_node({"messages": []})
+            assert command.goto == "__end__"
+            message = command.update["messages"][0]
+            assert isinstance(message, AIMessage) and message.name == "data_collector"
+            assert "本次收集6个岗位，累计6个岗位" in message.content
+            assert "深圳（6个）: 26.25 / 27.5 / 28.75" in message.content
+            assert "python(6)" in message.content
+        finally:
+            job_market.get_job_market_store = original
+            store.close()
+
+        empty = JobMarketStore(os.path.join(tmp, "empty"))
+        job_market.get_job_market_store = lambda: empty
+        try:
+            command = node_graph.data_collector_node({"messages": []})
+            assert command.update["messages"][0].content.startswith("还没有收集到岗位数据")
+        finally:
+            job_market.get_job_market_store = original
+            empty.close()
+
+    # 数据收集节点已注册，薪资行情请求由监督智能体直接调度
+    assert "data_collector" in node_graph.build_agent().get_graph().nodes
+    router = default_supervisor_router(use_embedding=False)
+    assert router.decide({"messages": [HumanMessage(content="深圳Python岗位的薪资行情怎么样")]}).target == "data_collector"
+    assert router.decide({"messages": [HumanMessage(content="帮我找深圳的Python岗位")]}).target == "job_find"
+
+
+if __name__ == "__main__":
+    test_parse_listing()
+    test_grouped_percentiles_match_numpy()
+    test_partitions_and_aggregation()
+    test_search_stages_listings()
+    test_data_collector_node()
+    print("所有测试通过")
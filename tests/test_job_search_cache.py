@@ -0,0 +1,119 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.multi_agents.tools.boss_job_actions import build_boss_job_controller
+from app.multi_agents.utils.job_evaluator import JobVerdict
+from app.multi_agents.utils.job_market import JobMarketStore
+from app.multi_agents.utils.job_search_cache import JobSearchCache, make_job_query, salary_band
+
+
+def test_equivalent_searches_share_key():
+    """语序、空格、城市写法不同的相同搜索得到同一个键"""
+    a = make_job_query("深圳 Python 开发")
+    b = make_job_query("Python开发", city="深圳市")
+    c = make_job_query("帮我找python 开发岗位 深圳", page=1)
+    assert a == b == c
+    assert a.city == "深圳" and a.keyword == "python 开发"
+    assert make_job_query("AI Agent", "深圳") == make_job_query("agent ai 深圳")
+    assert make_job_query("Python", "深圳", page=2) != a
+    assert "city=101280600" in a.url and "query=python" in a.url
+
+    assert salary_band("2万以上") == salary_band("20-30K") == "406"
+    assert salary_band("8000") == "404"
+    assert salary_band("") == ""
+
+
+def test_cache_ttl_and_sharing():
+    """同一个数据库文件在不同实例（进程）之间共享，过期后不再命中"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.db")
+        query = make_job_query("产品经理", "上海", "2万以上")
+        writer = JobSearchCache(path, ttl=0.3)
+        writer.put(query, [{"text": "产品经理\n30-40K", "url": "https://www.zhipin.com/job_detail/1.html"}])
+
+        reader = JobSearchCache(path, ttl=0.3)
+        assert reader.get(make_job_query("上海 产品经理", salary="20K"))[0]["text"].startswith("产品经理")
+        time.sleep(0.35)
+        assert reader.get(query) is None
+        assert (reader.hits, reader.misses) == (1, 1)
+        writer.close()
+        reader.close()
+
+
+class _FakePage:
+    def __init__(self, cards):
+        self.cards = cards
+        self.visited = []
+
+    async def goto(self, url):
+        self.visited.append(url)
+
+    async def wait_for_selector(self, selector, timeout=None):
+        return None
+
+    async def evaluate(self, script):
+        return None
+
+    async def wait_for_timeout(self, ms):
+        return None
+
+    async def eval_on_selector_all(self, selector, script):
+        return self.cards if self.visited else []
+
+
+class _FakeBrowser:
+    def __init__(self, page):
+        self.page = page
+
+    async def get_current_page(self):
+        return self.page
+
+
+class _Evaluator:
+    async def aevaluate(self, cards, requirements):
+        return [JobVerdict(index=i, match="Python" in card, score=80, reason="符合") for i, card in enumerate(cards)]
+
+
+def test_search_action_uses_cache():
+    """第二个用户的相同搜索不打开搜索页，评估时使用缓存的岗位列表并给出链接"""
+    cards = [
+        {"text": "Python开发工程师\n20-30K", "url": "https://www.zhipin.com/job_detail/a.html"},
+        {"text": "Java开发工程师\n20-30K", "url": "https://www.zhipin.com/job_detail/b.html"},
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = JobSearchCache(os.path.join(tmp, "cache.db"))
+        market = JobMarketStore(os.path.join(tmp, "market"))
+
+        async def run(page, keyword, city):
+            controller = build_boss_job_controller(evaluator=_Evaluator(), search_cache=cache, market_store=market)
+            browser = _FakeBrowser(page)
+            search = await controller.registry.execute_action(
+                "search_job_listings", {"keyword": keyword, "city": city}, browser=browser)
+            verdict = await controller.registry.execute_action(
+                "evaluate_job_listings", {"requirements": "Python"}, browser=browser)
+            return search.extracted_content, verdict.extracted_content
+
+        first_page = _FakePage(cards)
+        search, _ = asyncio.run(run(first_page, "Python 开发", "深圳"))
+        assert len(first_page.visited) == 1 and "已从搜索结果页读取" in search
+
+        second_page = _FakePage(cards)
+        search, verdict = asyncio.run(run(second_page, "python开发", "深圳市"))
+        assert second_page.visited == []
+        assert "来自缓存" in search
+        assert "推荐沟通1个" in verdict and "job_detail/a.html" in verdict
+        cache.close()
+        market.close()
+
+
+if __name__ == "__main__":
+    test_equivalent_searches_share_key()
+    test_cache_ttl_and_sharing()
+    test_search_action_uses_cache()
+    print("所有测试通过")
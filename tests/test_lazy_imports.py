@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _loaded_after_import(module: str, probes):
+    """在子进程中导入模块，返回 probes 中已被加载的模块"""
+    code = (
+        f"import sys, {module}\n"
+        f"print(','.join(m for m in {list(probes)!r} if m in sys.modules))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True,
+        env={**os.environ, "PYTHONPATH": ROOT, "ANONYMIZED_TELEMETRY": "false"},
+    )
+    assert proc.returncode == 0, proc.stderr
+    return [m for m in proc.stdout.strip().split(",") if m]
+
+
+def test_tools_package_is_lazy():
+    """导入工具包时不加载 browser_use 和数据库工具"""
+    loaded = _loaded_after_import(
+        "app.multi_agents.tools",
+        ["browser_use", "app.multi_agents.tools.boss_job_tool", "app.multi_agents.tools.db_query_tool"],
+    )
+    assert loaded == []
+
+
+def test_graph_import_does_not_load_browser():
+    """导入图节点模块时不加载 browser_use 和 langgraph.prebuilt"""
+    loaded = _loaded_after_import("app.multi_agents.graph.node_graph", ["browser_use", "langgraph.prebuilt"])
+    assert loaded == []
+
+
+def test_db_tools_resolve_on_access():
+    """按属性访问时才构造数据库工具，且多次访问返回同一实例"""
+    from app.multi_agents import tools
+    from app.multi_agents.tools import db_query_tool
+
+    assert tools.db_query_tools is db_query_tool.get_db_query_tools()
+    assert tools.pin_query_tool.name == "query_pin_table"
+    assert tools.sql_query_tool.name == "execute_sql"
+
+
+if __name__ == "__main__":
+    test_tools_package_is_lazy()
+    test_graph_import_does_not_load_browser()
+    test_db_tools_resolve_on_access()
+    print("所有测试通过")
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(__file__))
+
+from langchain_openai import ChatOpenAI
+from pydantic import BaseModel
+
+from app.multi_agents.utils.llm_router import HealthTracker, RoutedChatModel
+from mock_openai_server import MockOpenAIServer
+
+
+def _chat(server):
+    return ChatOpenAI(base_url=server.base_url, api_key="x", model="mock", max_retries=0)
+
+
+def _routed(servers, tracker, hedge_delay=None):
+    return RoutedChatModel(
+        models={name: _chat(server) for name, server in servers.items()},
+        tracker=tracker,
+        hedge_delay=hedge_delay,
+    )
+
+
+def test_failover_and_breaker():
+    """首选提供商出错时切换到下一个，之后不再优先选择出错的提供商；连续失败会触发熔断"""
+    tracker = HealthTracker()
+    with MockOpenAIServer(statuses=[500] * 10) as bad, MockOpenAIServer(reply=lambda body: "来自b") as good:
+        llm = _routed({"a": bad, "b": good}, tracker)
+        for _ in range(3):
+            assert llm.invoke("你好").content == "来自b"
+    assert len(bad.requests) == 1
+    assert tracker.stats()["a"]["error_rate"] == 1.0
+    assert llm.ranked() == ["b", "a"]
+
+    for _ in range(3):
+        tracker.record("c", 0.1, False)
+    assert tracker.stats()["c"]["open"]
+    assert tracker.rank(["c", "a"]) == ["a", "c"]
+
+
+def test_latency_based_routing():
+    """延迟更低的提供商被优先选择"""
+    tracker = HealthTracker()
+    with MockOpenAIServer(delay=0.2, reply=lambda body: "慢") as slow, MockOpenAIServer(reply=lambda body: "快") as fast:
+        llm = _routed({"slow": slow, "fast": fast}, tracker)
+        tracker.record("fast", 0.01, True)
+        assert llm.invoke("第一次").content == "慢"  # 没有样本的提供商分数为0，先被探测
+        assert [llm.invoke("之后").content for _ in range(3)] == ["快"] * 3
+    assert len(slow.requests) == 1
+
+
+def test_hedged_request():
+    """首选提供商响应过慢时发出对冲请求，采用先返回的结果"""
+    tracker = HealthTracker()
+    with MockOpenAIServer(delay=1.0, reply=lambda body: "慢") as slow, MockOpenAIServer(reply=lambda body: "快") as fast:
+        llm = _routed({"slow": slow, "fast": fast}, tracker, hedge_delay=0.1)
+        start = time.monotonic()
+        assert llm.invoke("你好").content == "快"
+        assert time.monotonic() - start < 0.8
+        assert asyncio.run(llm.ainvoke("你好")).content == "快"
+
+
+def test_structured_output_and_stream():
+    """with_structured_output 的工具定义传给实际处理请求的提供商，流式输出同样可以切换"""
+    class Router(BaseModel):
+        next: str
+
+    def tool_reply(body):
+        assert body["tools"][0]["function"]["name"] == "Router"
+        return {"content": None, "tool_calls": [{
+            "id": "call_1", "type": "function",
+            "function": {"name": "Router", "arguments": json.dumps({"next": "job_find"})},
+        }]}
+
+    tracker = HealthTracker()
+    with MockOpenAIServer(statuses=[500] * 10) as bad, MockOpenAIServer(reply=tool_reply) as good:
+        llm = _routed({"a": bad, "b": good}, tracker)
+        assert llm.with_structured_output(Router).invoke("路由").next == "job_find"
+
+    with MockOpenAIServer(statuses=[500] * 10) as bad, MockOpenAIServer(reply=lambda body: "流式结果") as good:
+        llm = _routed({"a": bad, "b": good}, HealthTracker())
+        assert "".join(chunk.content for chunk in llm.stream("你好")) == "流式结果"
+
+
+if __name__ == "__main__":
+    test_failover_and_breaker()
+    test_latency_based_routing()
+    test_hedged_request()
+    test_structured_output_and_stream()
+    print("所有测试通过")
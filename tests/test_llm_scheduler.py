@@ -0,0 +1,167 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(__file__))
+
+from langchain_openai import ChatOpenAI
+
+from app.multi_agents.utils.llm_scheduler import Lane, LLMScheduler, SchedulerTimeoutError, resolve_lane, scheduled_llm_kwargs
+from mock_openai_server import MockOpenAIServer
+
+
+def _llm(server, scheduler, key="mock", **kwargs):
+    return ChatOpenAI(
+        base_url=server.base_url, api_key="x", model="mock-model", max_retries=kwargs.pop("max_retries", 0),
+        **scheduled_llm_kwargs(key, scheduler), **kwargs,
+    )
+
+
+def test_priority_lanes():
+    """名额释放后，交互式请求先于更早排队的批量请求获得放行"""
+    scheduler = LLMScheduler({"p": {"rpm": 6000, "tpm": 10 ** 7, "max_concurrency": 1}})
+    first = scheduler.acquire("p")
+    order = []
+
+    def worker(lane):
+        ticket = scheduler.acquire("p", lane)
+        order.append(lane)
+        scheduler.release(ticket)
+
+    bulk = threading.Thread(target=worker, args=(Lane.BULK,))
+    bulk.start()
+    time.sleep(0.05)
+    interactive = threading.Thread(target=worker, args=(Lane.INTERACTIVE,))
+    interactive.start()
+    time.sleep(0.05)
+    scheduler.release(first)
+    bulk.join(5)
+    interactive.join(5)
+    assert order == [Lane.INTERACTIVE, Lane.BULK]
+
+
+def test_rate_limit_and_timeout():
+    """RPM 令牌用完后请求需要等待，超过等待时间抛出超时"""
+    scheduler = LLMScheduler({"p": {"rpm": 6, "max_concurrency": 10}})
+    scheduler.release(scheduler.acquire("p"))
+    start = time.monotonic()
+    try:
+        scheduler.acquire("p", timeout=0.2)
+        assert False, "令牌不足时应超时"
+    except SchedulerTimeoutError:
+        pass
+    assert time.monotonic() - start >= 0.2
+    assert scheduler.stats()["p"]["waiting"] == 0
+
+
+def test_resolve_lane():
+    """显式指定的通道优先，交互式节点走 INTERACTIVE 通道"""
+    assert resolve_lane({"llm_lane": "bulk", "langgraph_node": "supervisor"}) == Lane.BULK
+    assert resolve_lane({"langgraph_node": "supervisor"}) == Lane.INTERACTIVE
+    assert resolve_lane({"langgraph_node": "job_find"}) == Lane.NORMAL
+    assert resolve_lane(None) == Lane.NORMAL
+
+
+def test_concurrency_limit_against_mock_server():
+    """并发请求数不超过配置的并发上限，并统计实际 token 用量"""
+    scheduler = LLMScheduler({"mock": {"rpm": 6000, "tpm": 10 ** 7, "max_concurrency": 2}})
+    with MockOpenAIServer(delay=0.1) as server:
+        llm = _llm(server, scheduler)
+        threads = [threading.Thread(target=llm.invoke, args=(f"问题{i}",)) for i in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(10)
+    assert len(server.requests) == 6
+    assert server.max_active <= 2
+    stats = scheduler.stats()["mock"]
+    assert stats["granted"] == 6 and stats["inflight"] == 0 and stats["tokens"] == 90
+
+
+def test_throttle_backs_off_against_mock_server():
+    """收到 429 时降低并发上限，客户端重试后请求仍然成功"""
+    scheduler = LLMScheduler({"mock": {"rpm": 6000, "tpm": 10 ** 7, "max_concurrency": 8}})
+    with MockOpenAIServer(statuses=[429, 429]) as server:
+        llm = _llm(server, scheduler, max_retries=3)
+        assert llm.invoke("你好").content == "ok"
+    stats = scheduler.stats()["mock"]
+    assert stats["throttled"] == 2
+    assert stats["concurrency"] < 8
+
+
+def test_async_invoke_against_mock_server():
+    """异步调用同样经过调度器"""
+    import asyncio
+
+    scheduler = LLMScheduler({"mock": {"rpm": 6000, "tpm": 10 ** 7, "max_concurrency": 1}})
+    with MockOpenAIServer(delay=0.05) as server:
+        llm = _llm(server, scheduler)
+
+        async def run():
+            return await asyncio.gather(*(llm.ainvoke(f"问题{i}") for i in range(3)))
+
+        results = asyncio.run(run())
+    assert [r.content for r in results] == ["ok"] * 3
+    assert server.max_active == 1
+
+
+def test_http_clients_shared_per_key():
+    """同一个键的模型共享一对 HTTP 客户端，调度器关闭时客户端随之关闭"""
+    scheduler = LLMScheduler({"mock": {"rpm": 6000, "tpm": 10 ** 7, "max_concurrency": 8}})
+    first, second = scheduled_llm_kwargs("mock", scheduler), scheduled_llm_kwargs("mock", scheduler)
+    assert first["http_client"] is second["http_client"]
+    assert first["http_async_client"] is second["http_async_client"]
+    assert first["callbacks"][0] is not second["callbacks"][0]
+    other = scheduled_llm_kwargs("other", scheduler)
+    assert other["http_client"] is not first["http_client"]
+
+    with MockOpenAIServer(statuses=[429]) as server:
+        llm = _llm(server, scheduler, max_retries=2)
+        assert llm.invoke("你好").content == "ok"
+    assert scheduler.stats()["mock"]["throttled"] == 1
+
+    scheduler.close()
+    assert first["http_client"].is_closed and first["http_async_client"].is_closed
+    assert other["http_client"].is_closed
+    assert scheduled_llm_kwargs("mock", scheduler)["http_client"] is not first["http_client"]
+    scheduler.close()
+
+
+def test_async_client_across_event_loops():
+    """每个任务新建事件循环时，共享的异步客户端不会复用已关闭循环中的长连接"""
+    import asyncio
+
+    scheduler = LLMScheduler({"mock": {"rpm": 6000, "tpm": 10 ** 7, "max_concurrency": 4}})
+    with MockOpenAIServer() as server:
+        llm = _llm(server, scheduler)
+        for i in range(3):
+            loop = asyncio.new_event_loop()
+            try:
+                # 同一个循环中的两次请求复用一个连接
+                results = loop.run_until_complete(llm.ainvoke(f"问题{i}")), loop.run_until_complete(llm.ainvoke("再问"))
+            finally:
+                loop.close()
+            assert [r.content for r in results] == ["ok", "ok"]
+        assert len(server.requests) == 6
+        assert server.connections == 3
+        # 同步调用共享同一个长连接
+        for _ in range(3):
+            llm.invoke("同步")
+        assert server.connections == 4
+    transport = scheduler.http_clients("mock")[1]._transport
+    assert transport.loop_count <= 1
+    scheduler.close()
+
+
+if __name__ == "__main__":
+    test_priority_lanes()
+    test_rate_limit_and_timeout()
+    test_resolve_lane()
+    test_concurrency_limit_against_mock_server()
+    test_throttle_backs_off_against_mock_server()
+    test_async_invoke_against_mock_server()
+    test_http_clients_shared_per_key()
+    test_async_client_across_event_loops()
+    print("所有测试通过")
@@ -0,0 +1,113 @@
+import json
+import os
+import sys
+import threading
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.config.config_com import TEAM_MEMBERS
+from app.multi_agents.graph import node_graph
+from app.multi_agents.graph.plan_parser import IncrementalPlanParser, PlanStream, pop_plan_stream
+
+PLAN = {
+    "thought": "用户想找AI Agent岗位，并计算 {12*12}",
+    "title": "寻找\"AI Agent\"工作",
+    "steps": [
+        {"agent_name": "coder", "title": "计算", "description": "计算12*12 [结果]", "note": "使用python"},
+        {"agent_name": "job_find", "title": "找工作", "description": "去boss直聘查找{AI Agent}岗位"},
+    ],
+}
+
+
+def test_parse_char_by_char():
+    """逐字符输入时，每个Step在闭合的那一刻被返回"""
+    text = json.dumps(PLAN, ensure_ascii=False, indent=2)
+    parser = IncrementalPlanParser()
+    emitted_at = []
+    for i, char in enumerate(text):
+        for step in parser.feed(char):
+            emitted_at.append((i, step))
+
+    assert [step for _, step in emitted_at] == PLAN["steps"]
+    # 第一个步骤在整个计划结束之前就已经可用
+    assert emitted_at[0][0] < len(text) - 1
+    assert parser.thought == PLAN["thought"]
+    assert parser.title == PLAN["title"]
+    assert parser.done
+
+
+def test_parse_code_fence():
+    """带 ```json 代码块包裹的输出同样可以解析"""
+    text = "```json\n" + json.dumps(PLAN, ensure_ascii=False) + "\n```"
+    parser = IncrementalPlanParser()
+    steps = []
+    for start in range(0, len(text), 7):
+        steps.extend(parser.feed(text[start:start + 7]))
+    assert [s["agent_name"] for s in steps] == ["coder", "job_find"]
+
+
+def test_plan_stream_wait_first_step():
+    """第一个步骤就绪时，计划剩余部分仍在生成"""
+    text = json.dumps(PLAN, ensure_ascii=False)
+    first_end = text.index(', {"agent_name": "job_find"')
+    release = threading.Event()
+
+    def chunks():
+        yield text[:first_end]
+        release.wait(5)
+        yield text[first_end:]
+
+    stream = PlanStream(chunks()).start()
+    first = stream.wait_step(0, timeout=5)
+    assert first["agent_name"] == "coder"
+    assert not stream.finished
+
+    release.set()
+    assert json.loads(stream.result(timeout=5)) == PLAN
+    assert stream.wait_step(2, timeout=5) is None
+
+
+def test_supervisor_replans_without_registered_stream():
+    """提前调度的计划流不在本进程中时（如从检查点恢复），监督智能体重新生成完整计划再调度"""
+    plan = {"thought": "找岗位并定制简历", "title": "找工作", "steps": [
+        {"agent_name": "job_find", "title": "找工作", "description": "查找AI Agent岗位"},
+        {"agent_name": "resume", "title": "定制简历", "description": "为推荐的岗位定制简历"},
+    ]}
+    calls = []
+
+    def fake_llm(*args, **kwargs):
+        calls.append(args)
+        return GenericFakeChatModel(messages=iter([AIMessage(content=json.dumps(plan, ensure_ascii=False))]))
+
+    state = {
+        "messages": [HumanMessage(content="帮我找AI Agent岗位并定制简历"), AIMessage(content="已沟通2个岗位", name="browse")],
+        "plan_steps": plan["steps"][:1],
+        "plan_pending": True,
+        "TEAM_MEMBERS": TEAM_MEMBERS,
+    }
+    assert pop_plan_stream("resumed-thread") is None
+    original = node_graph.get_llm_by_type
+    node_graph.get_llm_by_type = fake_llm
+    try:
+        command = node_graph.supervisor_node(state, {"configurable": {"thread_id": "resumed-thread"}})
+        assert len(calls) == 1
+        assert command.goto == "resume"
+        assert command.update["plan_steps"] == plan["steps"] and command.update["plan_pending"] is False
+        assert json.loads(command.update["full_plan"]) == plan
+
+        # 计划已完整合并时不再重新生成
+        command = node_graph.supervisor_node({**state, **command.update}, {"configurable": {"thread_id": "resumed-thread"}})
+        assert len(calls) == 1 and command.goto == "resume"
+    finally:
+        node_graph.get_llm_by_type = original
+
+
+if __name__ == "__main__":
+    test_parse_char_by_char()
+    test_parse_code_fence()
+    test_plan_stream_wait_first_step()
+    test_supervisor_replans_without_registered_stream()
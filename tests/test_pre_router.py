@@ -0,0 +1,106 @@
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.config.config_com import WORKER_NODES
+from app.multi_agents.graph.node_graph import build_agent
+
+from app.multi_agents.graph.pre_router import (
+    EmbeddingClassifier,
+    PreRouter,
+    SupervisorPreRouter,
+    default_frontdesk_router,
+    default_supervisor_router,
+)
+
+
+class KeywordEmbedding:
+    """按关键词出现情况生成向量的假embedding"""
+
+    VOCAB = ["工作", "岗位", "天气", "你好"]
+
+    def _vector(self, text):
+        return [1.0 if word in text else 0.0 for word in self.VOCAB]
+
+    def embed_documents(self, texts):
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+def test_frontdesk_rules():
+    """找工作请求直接交给规划智能体，简单问候直接结束，其余回退到LLM"""
+    router = default_frontdesk_router(use_embedding=False)
+
+    decision = router.decide({"messages": [HumanMessage(content="帮我寻找AI Agnet 工作")]})
+    assert decision.target == "planner"
+    assert router.decide({"messages": [HumanMessage(content="你好！")]}).target == "__end__"
+    assert router.decide({"messages": [HumanMessage(content="蔡徐坤的最新动态是什么？")]}) is None
+
+    stats = router.stats
+    assert stats["total"] == 3
+    assert stats["saved_llm_calls"] == 2
+    assert stats["fallback"] == 1
+
+
+def test_supervisor_plan_and_finish():
+    """监督智能体根据计划调度，岗位查找返回后直接结束"""
+    router = default_supervisor_router(use_embedding=False)
+    query = HumanMessage(content="请计算12*12， 并去boss直聘寻找AI Agent开发工作")
+
+    # 多任务请求的文本规则不生效
+    assert router.decide({"messages": [query]}) is None
+
+    plan_steps = [{"agent_name": "job_find", "title": "找工作", "description": "..."}]
+    assert router.decide({"messages": [query], "plan_steps": plan_steps}).target == "job_find"
+
+    result = AIMessage(content="## Boss直聘岗位查找结果", name="browse")
+    assert router.decide({"messages": [query, result], "plan_steps": plan_steps}).target == "FINISH"
+
+
+def test_supervisor_dispatches_only_registered_nodes():
+    """计划中只有未注册为节点的智能体时不快速调度，快速路由的目标都是图中的节点"""
+    router = default_supervisor_router(use_embedding=False)
+    query = HumanMessage(content="打开github看看这个项目")
+    plan_steps = [{"agent_name": "browser", "title": "浏览网页", "description": "..."}]
+    assert router.decide({"messages": [query], "plan_steps": plan_steps}) is None
+
+    classifier = EmbeddingClassifier({"job_find": ["工作", "岗位"], "reporter": ["天气"]}, embedding=KeywordEmbedding())
+    router = SupervisorPreRouter("test", classifier=classifier, threshold=0.5)
+    assert router.decide({"messages": [HumanMessage(content="天气")]}) is None
+    assert router.decide({"messages": [HumanMessage(content="岗位")]}).target == "job_find"
+
+    # 分析HR回复的请求交给消息处理智能体
+    router = default_supervisor_router(use_embedding=False)
+    assert router.decide({"messages": [HumanMessage(content="帮我看看boss直聘上HR的回复")]}).target == "message_processor"
+    plan_steps = [{"agent_name": "message_processor", "title": "分析HR回复", "description": "..."}]
+    assert router.decide({"messages": [query], "plan_steps": plan_steps}).target == "message_processor"
+
+    nodes = set(build_agent().get_graph().nodes)
+    assert set(WORKER_NODES) <= nodes
+
+
+def test_embedding_classifier_threshold():
+    """embedding分类置信度低于阈值时回退到LLM"""
+    classifier = EmbeddingClassifier(
+        {"planner": ["找工作", "岗位推荐"], "__end__": ["你好", "天气"]},
+        embedding=KeywordEmbedding(),
+    )
+    router = PreRouter("test", classifier=classifier, threshold=0.9)
+
+    assert router.decide({"messages": [HumanMessage(content="推荐一个工作岗位")]}).target == "planner"
+    # 没有任何关键词，两个标签的相似度相同
+    assert router.decide({"messages": [HumanMessage(content="讲个笑话")]}) is None
+    assert router.stats["saved_llm_calls"] == 1
+
+
+if __name__ == "__main__":
+    test_frontdesk_rules()
+    test_supervisor_plan_and_finish()
+    test_supervisor_dispatches_only_registered_nodes()
+    test_embedding_classifier_threshold()
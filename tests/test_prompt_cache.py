@@ -0,0 +1,58 @@
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.multi_agents.prompts.template import PromptType, apply_prompt_template
+from app.multi_agents.utils.prompt_cache import PromptCacheTracker
+
+
+def _state(*contents):
+    return {"messages": [HumanMessage(content=c) for c in contents], "TEAM_MEMBERS": "job_find, browser"}
+
+
+def test_static_instructions_come_first():
+    """缓存布局下系统提示词以静态指令开头，时间只精确到日期并位于末尾"""
+    for prompt_type in (PromptType.COORDINATOR, PromptType.SUPERVISOR, PromptType.PLANNER):
+        system = apply_prompt_template(prompt_type, _state("你好"), cache_layout=True)[0]["content"]
+        assert "<<" not in system and "{CURRENT_TIME}" not in system
+        assert not system.startswith("---")
+        assert system.rstrip().splitlines()[-1].startswith("当前时间: ")
+        assert ":" not in system.rstrip().splitlines()[-1].split(": ", 1)[1]  # 不包含时分秒
+
+    legacy = apply_prompt_template(PromptType.COORDINATOR, _state("你好"), cache_layout=False)[0]["content"]
+    assert legacy.startswith("---") and legacy.count(":") >= 2
+
+
+def test_repeated_calls_share_prefix():
+    """同一节点的重复调用，时间变化也不影响系统提示词，可缓存前缀覆盖上一次的全部内容"""
+    first = apply_prompt_template(PromptType.SUPERVISOR, _state("找工作"), time_format="%Y-%m-%d", cache_layout=True)
+    second = apply_prompt_template(PromptType.SUPERVISOR, _state("找工作"), time_format="%Y-%m-%d", cache_layout=True)
+    assert first[0]["content"] == second[0]["content"]
+
+    tracker = PromptCacheTracker(block_tokens=64)
+    assert tracker.record("supervisor", first)["cacheable_tokens"] == 0
+    longer = second + [AIMessage(content="岗位查找完成"), HumanMessage(content="继续")]
+    report = tracker.record("supervisor", longer)
+    assert report["cacheable_tokens"] > 0
+    assert report["cacheable_tokens"] % 64 == 0
+    assert report["prompt_tokens"] - report["cacheable_tokens"] < 64 + 30
+    assert tracker.stats()["supervisor"]["calls"] == 2
+
+
+def test_changed_prefix_is_not_cacheable():
+    """前缀开头发生变化时没有可缓存的部分"""
+    tracker = PromptCacheTracker(block_tokens=1)
+    tracker.record("node", [{"role": "system", "content": "时间 12:00:01\n" + "指令" * 200}])
+    report = tracker.record("node", [{"role": "system", "content": "时间 12:00:02\n" + "指令" * 200}])
+    assert report["cacheable_tokens"] < 10
+
+
+if __name__ == "__main__":
+    test_static_instructions_come_first()
+    test_repeated_calls_share_prefix()
+    test_changed_prefix_is_not_cacheable()
+    print("所有测试通过")
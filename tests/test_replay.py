@@ -0,0 +1,157 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(__file__))
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_openai import ChatOpenAI
+from pydantic import BaseModel
+
+from app.multi_agents.utils import llm_factory
+from app.multi_agents.utils.llm_factory import LLMFactory, LLMProviderType
+from app.multi_agents.utils.replay import (
+    FixtureStore, ReplayBossJobTool, ReplayChatModel, ReplayMissError, ReplaySearchEngine,
+)
+from app.multi_agents.utils.search_factory import SearchEngine
+from mock_openai_server import MockOpenAIServer
+
+
+class Verdict(BaseModel):
+    match: bool
+    reason: str
+
+
+def _prompt(now):
+    return [SystemMessage(content=f"当前时间: {now}\n你是岗位筛选助手"), HumanMessage(content="评估Python岗位")]
+
+
+def test_llm_record_and_replay():
+    """录制真实模型的响应，回放时无需服务即可得到相同结果，提示词中的时间不影响匹配"""
+    def reply(body):
+        if body.get("tools"):
+            args = json.dumps({"match": True, "reason": "薪资符合"}, ensure_ascii=False)
+            return {"content": None, "tool_calls": [
+                {"id": "call_1", "type": "function", "function": {"name": "Verdict", "arguments": args}}]}
+        return "这是录制的回复"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "llm.jsonl")
+        with MockOpenAIServer(reply=reply, delay=0.2) as server:
+            inner = ChatOpenAI(base_url=server.base_url, api_key="x", model="mock", max_retries=0)
+            recorder = ReplayChatModel(inner=inner, mode="record", store=FixtureStore(path))
+            assert recorder.invoke(_prompt("2026-10-19 Monday 08:00:00")).content == "这是录制的回复"
+            assert recorder.with_structured_output(Verdict).invoke(_prompt("2026-10-19")).reason == "薪资符合"
+
+        replayer = ReplayChatModel(store=FixtureStore(path), latency_scale=0)
+        start = time.monotonic()
+        assert replayer.invoke(_prompt("2027-01-01 Friday 23:59:59")).content == "这是录制的回复"
+        assert replayer.with_structured_output(Verdict).invoke(_prompt("2027-01-01")).match is True
+        assert time.monotonic() - start < 0.2
+
+        # 按原始延迟回放
+        slow = ReplayChatModel(store=FixtureStore(path), latency_scale=1.0)
+        start = time.monotonic()
+        asyncio.run(slow.ainvoke(_prompt("2027-01-01 Friday 23:59:59")))
+        assert time.monotonic() - start >= 0.2
+
+        try:
+            replayer.invoke("没有录制过的请求")
+            assert False, "应当抛出 ReplayMissError"
+        except ReplayMissError:
+            pass
+
+
+class _FakeProvider(llm_factory.LLMProvider):
+    """不需要 API Key 的假提供商，返回一个标记对象"""
+
+    def get_llm(self, **kwargs):
+        return ("fake-llm", kwargs)
+
+
+def test_factory_replay_without_api_keys():
+    """回放模式下 LLMFactory 不创建真实模型；不参与回放的调用走提供商创建模型"""
+    original_mode = llm_factory.REPLAY_MODE
+    original_provider = LLMFactory._providers[LLMProviderType.QIANWEN]
+    llm_factory.REPLAY_MODE = "replay"
+    LLMFactory.register_provider(LLMProviderType.QIANWEN, _FakeProvider)
+    try:
+        llm = LLMFactory.create_llm(LLMProviderType.DEEPSEEK)
+        assert isinstance(llm, ReplayChatModel) and llm.inner is None
+        direct = LLMFactory.create_llm(LLMProviderType.QIANWEN, scheduled=False, replay=False)
+        assert direct[0] == "fake-llm"
+    finally:
+        llm_factory.REPLAY_MODE = original_mode
+        LLMFactory.register_provider(LLMProviderType.QIANWEN, original_provider)
+
+
+class _FakeEngine(SearchEngine):
+    def __init__(self):
+        self.calls = 0
+
+    def search(self, query):
+        self.calls += 1
+        time.sleep(0.1)
+        return {"query": query, "results": [f"{query}的结果"]}
+
+    def search_with_subqueries(self, subqueries):
+        return [self.search(q) for q in subqueries]
+
+    async def search_async(self, queries, max_concurrency=5):
+        return [self.search(q) for q in queries]
+
+    def read_webpage(self, url):
+        return {"url": url, "content": "网页内容"}
+
+
+def test_search_engine_record_and_replay():
+    """搜索引擎录制后回放，异步搜索按并发数并行回放"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "search.jsonl")
+        engine = _FakeEngine()
+        recorder = ReplaySearchEngine("tavily", factory=lambda: engine, mode="record", store=FixtureStore(path))
+        queries = [f"深圳Python岗位{i}" for i in range(4)]
+        recorded = recorder.search_with_subqueries(queries)
+        recorder.read_webpage("https://www.zhipin.com")
+        assert engine.calls == 4
+
+        replayer = ReplaySearchEngine("tavily", store=FixtureStore(path), latency_scale=1.0)
+        start = time.monotonic()
+        assert asyncio.run(replayer.search_async(queries, max_concurrency=4)) == recorded
+        assert time.monotonic() - start < 0.35
+        assert replayer.read_webpage("https://www.zhipin.com")["content"] == "网页内容"
+
+
+class _FakeBossJobTool:
+    def _run(self, task, step_callback=None, cdp_url=None):
+        for step in range(1, 3):
+            time.sleep(0.05)
+            step_callback({"step": step, "url": "https://www.zhipin.com"})
+        return f"完成: {task}"
+
+
+def test_boss_job_record_and_replay():
+    """Boss直聘工具回放时按录制的节奏触发步骤回调"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "boss_job.jsonl")
+        recorder = ReplayBossJobTool(_FakeBossJobTool(), mode="record", store=FixtureStore(path))
+        assert recorder._run("查找深圳Python岗位", step_callback=lambda step: None) == "完成: 查找深圳Python岗位"
+
+        steps = []
+        replayer = ReplayBossJobTool(store=FixtureStore(path), latency_scale=1.0)
+        start = time.monotonic()
+        assert replayer._run("查找深圳Python岗位", step_callback=steps.append) == "完成: 查找深圳Python岗位"
+        assert [step["step"] for step in steps] == [1, 2]
+        assert time.monotonic() - start >= 0.1
+
+
+if __name__ == "__main__":
+    test_llm_record_and_replay()
+    test_factory_replay_without_api_keys()
+    test_search_engine_record_and_replay()
+    test_boss_job_record_and_replay()
+    print("所有测试通过")
@@ -0,0 +1,185 @@
+import asyncio
+import os
+import sys
+import urllib.request
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(__file__))
+
+from browser_use.browser.context import BrowserContext
+
+from app.multi_agents.tools.resource_profile import ProfiledBrowserContext, ResourceProfile, domain_matches
+from fixture_site import FixtureSite
+
+
+def _profile(**kwargs):
+    """与默认配置相同的规则，域名换成本地页面使用的 .test 域名"""
+    settings = dict(
+        blocked_types=["image", "media", "font"],
+        blocked_domains=["hm.baidu.test", "googletagmanager.test"],
+        allowed_domains=["zhipin.test", "bosszhipin.test", "geetest.test"],
+        exempt_domains=["geetest.test"],
+    )
+    settings.update(kwargs)
+    return ResourceProfile(**settings)
+
+
+class _SubresourceParser(HTMLParser):
+    """按浏览器的资源类型提取页面引用的子资源"""
+
+    def __init__(self):
+        super().__init__()
+        self.resources = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "img":
+            self.resources.append((attrs["src"], "image"))
+        elif tag == "video":
+            self.resources.append((attrs["src"], "media"))
+        elif tag == "script" and attrs.get("src"):
+            self.resources.append((attrs["src"], "script"))
+        elif tag == "link" and attrs.get("rel") == "stylesheet":
+            self.resources.append((attrs["href"], "stylesheet"))
+        elif tag == "link" and attrs.get("rel") == "preload" and attrs.get("as") == "font":
+            self.resources.append((attrs["href"], "font"))
+
+
+class _FakeRequest:
+    def __init__(self, url, resource_type):
+        self.url = url
+        self.resource_type = resource_type
+
+
+class _FakeRoute:
+    """模拟 Playwright 的 Route：放行时从本地页面服务下载资源"""
+
+    def __init__(self, site, url, resource_type):
+        self.site = site
+        self.request = _FakeRequest(url, resource_type)
+        self.aborted = None
+
+    async def continue_(self):
+        request = urllib.request.Request(
+            self.site.local_url(self.request.url), headers={"Host": urlsplit(self.request.url).netloc},
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            response.read()
+
+    async def abort(self, error_code=None):
+        self.aborted = error_code
+
+
+def _load_page(site, profile):
+    """按 profile 加载本地岗位列表页面及其子资源，返回被拦截的地址"""
+    routes = [_FakeRoute(site, site.page_url, "document")]
+    asyncio.run(routes[0].continue_())
+    parser = _SubresourceParser()
+    parser.feed(site.page_html())
+    routes += [_FakeRoute(site, url, resource_type) for url, resource_type in parser.resources]
+
+    async def _run():
+        for route in routes[1:]:
+            await profile.handle(route)
+
+    asyncio.run(_run())
+    return {urlsplit(route.request.url).path for route in routes if route.aborted}
+
+
+def test_domain_matches():
+    """域名匹配包含子域名，但不匹配只是后缀相同的其他域名"""
+    assert domain_matches("www.zhipin.com", ["zhipin.com"])
+    assert domain_matches("zhipin.com", ["zhipin.com"])
+    assert domain_matches("IMG.BOSSZHIPIN.COM", ["bosszhipin.com"])
+    assert not domain_matches("fakezhipin.com", ["zhipin.com"])
+    assert not domain_matches("", ["zhipin.com"])
+
+
+def test_allows_rules():
+    """拦截规则：本地地址和豁免域名始终放行，页面跳转不受白名单限制"""
+    profile = _profile()
+    assert profile.allows("data:image/png;base64,AAAA", "image")
+    assert profile.allows("http://static.geetest.test/img/bg.png", "image")
+    assert not profile.allows("http://hm.baidu.test/hm.js", "script")
+    assert not profile.allows("http://img.bosszhipin.test/logo.png", "image")
+    assert not profile.allows("http://static.zhipin.test/brand.mp4", "media")
+    assert profile.allows("http://static.zhipin.test/app.js", "script")
+    assert profile.allows("http://www.zhipin.test/wapi/zpgeek/search/joblist.json", "fetch")
+    assert not profile.allows("http://ads.example.test/ad.js", "script")
+    assert profile.allows("http://passport.example.test/login", "document")
+    # 不设白名单时只按类型和统计域名拦截
+    assert _profile(allowed_domains=[]).allows("http://ads.example.test/ad.js", "script")
+
+
+def test_fixture_page_blocks_heavy_assets():
+    """本地岗位列表页面：图片、视频、字体、统计和第三方脚本被拦截，页面脚本、样式和验证码资源正常加载"""
+    with FixtureSite() as site:
+        baseline = _load_page(site, _profile(blocked_types=[], blocked_domains=[], allowed_domains=[]))
+        baseline_bytes = site.total_bytes
+        assert baseline == set()
+
+        site.requests.clear()
+        profile = _profile()
+        blocked = _load_page(site, profile)
+        profiled_bytes = site.total_bytes
+        loaded = {path for _, path, _ in site.requests}
+
+    assert blocked == {
+        "/img/banner.jpg", "/img/logo-1.png", "/img/logo-2.png", "/img/logo-3.png",
+        "/media/brand.mp4", "/font/iconfont.woff2", "/js/hm.js", "/js/gtm.js", "/js/ad.js",
+    }
+    assert {"/web/geek/job", "/css/job-list.css", "/js/job-list.js", "/js/gt.js", "/img/captcha-bg.png"} <= loaded
+    assert profile.blocked == {"image": 4, "media": 1, "font": 1, "script": 3}
+    assert profile.allowed == 4
+    # 页面需要的资源只占原始流量的很小一部分
+    assert profiled_bytes < baseline_bytes * 0.15, (profiled_bytes, baseline_bytes)
+
+
+def test_profiled_context_registers_and_removes_route():
+    """创建浏览器上下文时注册请求拦截，关闭时取消，不影响之后复用同一个CDP上下文的任务"""
+
+    class _FakePlaywrightContext:
+        def __init__(self):
+            self.routes = []
+
+        async def route(self, pattern, handler):
+            self.routes.append((pattern, handler))
+
+        async def unroute(self, pattern, handler):
+            self.routes.remove((pattern, handler))
+
+    playwright_context = _FakePlaywrightContext()
+
+    async def _create_context(self, browser):
+        return playwright_context
+
+    async def _close(self):
+        pass
+
+    original_create, original_close = BrowserContext._create_context, BrowserContext.close
+    BrowserContext._create_context, BrowserContext.close = _create_context, _close
+    try:
+        class _Browser:
+            config = None
+
+        context = ProfiledBrowserContext(_Browser(), profile=_profile())
+
+        async def _run():
+            assert await context._create_context(object()) is playwright_context
+            assert playwright_context.routes == [("**/*", context.profile.handle)]
+            await context.close()
+
+        asyncio.run(_run())
+        assert playwright_context.routes == []
+    finally:
+        BrowserContext._create_context, BrowserContext.close = original_create, original_close
+
+
+if __name__ == "__main__":
+    test_domain_matches()
+    test_allows_rules()
+    test_fixture_page_blocks_heavy_assets()
+    test_profiled_context_registers_and_removes_route()
+    print("所有测试通过")
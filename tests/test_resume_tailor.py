@@ -0,0 +1,253 @@
+import os
+import re
+import sys
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.multi_agents.graph import node_graph
+from app.multi_agents.graph.pre_router import default_supervisor_router
+from app.multi_agents.tools import boss_job_pool
+from app.multi_agents.utils.job_evaluator import JobVerdict
+from app.multi_agents.utils.skill_keywords import extract_keywords
+from app.multi_agents.tools.boss_job_actions import format_verdicts
+from app.multi_agents.utils import resume_tailor
+from app.multi_agents.utils.resume_tailor import (
+    GREETING,
+    ResumeTailor,
+    ResumeVariantStore,
+    TailoredSection,
+    TailoringResult,
+    fill_greeting,
+    join_resume,
+    split_resume,
+)
+
+RESUME = """# 张三
+电话: 13800000000 邮箱: zhangsan@example.com
+
+## 个人优势
+5年Python后端开发经验，熟悉大模型应用和Agent开发。
+
+## 工作经历
+星河科技 2020-2024 Python后端开发，负责微服务和高并发接口。
+
+## 项目经历
+Boss直聘自动求职系统：基于LangGraph的多智能体系统，自动查找岗位并与HR沟通。
+
+## 教育经历
+某大学 计算机科学 本科
+"""
+
+AGENT_JOB = {"岗位": "AI Agent开发工程师", "公司": "星河科技", "要求": "熟悉Python和大模型应用开发"}
+SIMILAR_JOB = {"岗位": "大模型Agent工程师", "公司": "云帆数据", "要求": "Python，大模型，Agent"}
+LANGGRAPH_JOB = {"岗位": "Agent工程师", "公司": "极光智能", "要求": "Python、大模型Agent开发，熟悉LangGraph"}
+JAVA_JOB = {"岗位": "Agent开发", "公司": "蓝鲸互娱", "要求": "Python/Java均可，大模型Agent"}
+FRONTEND_JOB = {"岗位": "前端开发", "公司": "青橙网络", "要求": "React 前端"}
+
+
+class KeywordEmbedding:
+    """按关键词出现情况生成向量的假embedding"""
+
+    VOCAB = ["python", "agent", "大模型", "langgraph", "java", "react", "前端"]
+
+    def _vector(self, text):
+        text = text.lower()
+        return [1.0 if word in text else 0.0 for word in self.VOCAB]
+
+    def embed_documents(self, texts):
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+class FakeTailorLLM:
+    """在章节开头加上岗位标记的模拟模型，记录每次请求改写的章节"""
+
+    def __init__(self):
+        self.requests = []
+        self.configs = []
+
+    def with_structured_output(self, schema):
+        assert schema is TailoringResult
+        return self
+
+    def invoke(self, messages, config=None):
+        names = re.findall(r"^### (.+)$", messages[-1].content, re.M)
+        self.requests.append(names)
+        self.configs.append(config or {})
+        return TailoringResult(
+            sections=[TailoredSection(name=name, content=f"【定制{len(self.requests)}】{name}") for name in names],
+            greeting="您好，我对{company}的{job_title}很感兴趣",
+        )
+
+
+def _tailor(store=None, resume=RESUME, llm=None):
+    return ResumeTailor(
+        resume=resume, llm=llm or FakeTailorLLM(), embedding=KeywordEmbedding(),
+        store=store or ResumeVariantStore(":memory:"), cluster_threshold=0.8,
+    )
+
+
+def test_split_and_join():
+    """简历按二、三级标题拆分，一级标题和联系方式归入开头的章节"""
+    sections = split_resume(RESUME)
+    assert [s.name for s in sections] == ["", "个人优势", "工作经历", "项目经历", "教育经历"]
+    assert sections[0].content.startswith("# 张三")
+    assert split_resume(join_resume(sections)) == sections
+
+
+def test_extract_keywords():
+    """提取英文技术词和中文技能词"""
+    keywords = extract_keywords("熟悉Python、LangGraph和大模型，了解C++/Go，有推荐系统经验")
+    assert {"python", "langgraph", "c++", "go", "大模型", "推荐"} <= keywords
+    assert fill_greeting("{company}的{job_title}", AGENT_JOB) == "星河科技的AI Agent开发工程师"
+    assert fill_greeting("{company}的{job_title}", "卡片文本") == "贵公司的这个岗位"
+
+
+def test_similar_jobs_reuse_tailoring():
+    """相似岗位复用已有定制；特有关键词只重新生成原文中涉及的章节"""
+    llm = FakeTailorLLM()
+    tailor = _tailor(llm=llm)
+
+    first = tailor.tailor(AGENT_JOB)
+    assert llm.requests == [["个人优势", "工作经历", "项目经历"]]
+    assert first.regenerated == ["个人优势", "工作经历", "项目经历", GREETING]
+    assert "【定制1】个人优势" in first.resume and "某大学 计算机科学 本科" in first.resume
+    assert first.greeting == "您好，我对星河科技的AI Agent开发工程师很感兴趣"
+    assert llm.configs[0]["metadata"] == {"llm_lane": "bulk"}
+
+    second = tailor.tailor(SIMILAR_JOB)
+    assert len(llm.requests) == 1
+    assert second.cluster_id == first.cluster_id
+    assert second.regenerated == [] and second.reused == ["个人优势", "工作经历", "项目经历"]
+    assert second.resume == first.resume
+    assert second.greeting == "您好，我对云帆数据的大模型Agent工程师很感兴趣"
+
+    # LangGraph 只出现在项目经历中
+    third = tailor.tailor(LANGGRAPH_JOB)
+    assert third.cluster_id == first.cluster_id
+    assert llm.requests[-1] == ["项目经历"]
+    assert third.regenerated == ["项目经历", GREETING]
+    assert "【定制2】项目经历" in third.resume and "【定制1】个人优势" in third.resume
+
+    # 简历中没有Java经历，改写也无法补出来，不需要重新生成
+    fourth = tailor.tailor(JAVA_JOB)
+    assert len(llm.requests) == 2 and fourth.regenerated == []
+
+    # 不相似的岗位使用新的聚类
+    fifth = tailor.tailor(FRONTEND_JOB)
+    assert fifth.cluster_id != first.cluster_id
+    assert len(llm.requests) == 3 and len(fifth.regenerated) == 4
+
+    assert tailor.stats == {"jobs": 5, "llm_calls": 3, "sections_generated": 7, "sections_reused": 8}
+
+
+def test_resume_edit_invalidates_changed_section():
+    """简历某个章节修改后只有该章节需要重新生成"""
+    store = ResumeVariantStore(":memory:")
+    llm = FakeTailorLLM()
+    _tailor(store=store, llm=llm).tailor(AGENT_JOB)
+    edited = RESUME.replace("负责微服务和高并发接口", "负责微服务、高并发接口和Agent平台")
+    result = _tailor(store=store, resume=edited, llm=llm).tailor(SIMILAR_JOB)
+    assert llm.requests[-1] == ["工作经历"]
+    assert result.reused == ["个人优势", "项目经历"]
+
+
+def test_cache_persists():
+    """定制缓存和聚类保存在数据库中，重启后仍然可以复用"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tailor.db")
+        store = ResumeVariantStore(path)
+        _tailor(store=store).tailor_many([AGENT_JOB, FRONTEND_JOB])
+        store.close()
+
+        store = ResumeVariantStore(path)
+        llm = FakeTailorLLM()
+        results = _tailor(store=store, llm=llm).tailor_many([SIMILAR_JOB, FRONTEND_JOB])
+        assert llm.requests == []
+        assert all(result.regenerated == [] for result in results)
+        store.close()
+
+
+def test_resume_node():
+    """简历节点为筛选出的岗位定制简历，没有岗位或简历文件时直接结束"""
+    llm = FakeTailorLLM()
+    tailor = _tailor(llm=llm)
+    original = resume_tailor.get_resume_tailor
+    resume_tailor.get_resume_tailor = lambda: tailor
+    try:
+        command = node_graph.resume_node({"messages": [], "filter_job_list": [
+            "AI Agent开发工程师 星河科技 Python 大模型", "大模型Agent工程师 云帆数据 Python",
+        ]})
+        assert command.goto == "__end__"
+        message = command.update["messages"][0]
+        assert isinstance(message, AIMessage) and message.name == "resume"
+        assert "已为2个岗位定制简历" in message.content
+        assert "复用3个章节" in message.content
+        assert len(llm.requests) == 1
+
+        command = node_graph.resume_node({"messages": []})
+        assert command.update["messages"][0].content == "没有需要定制简历的岗位"
+
+        missing = ResumeTailor(
+            llm=llm, embedding=KeywordEmbedding(), store=ResumeVariantStore(":memory:"),
+            resume_path=os.path.join(tempfile.gettempdir(), "no_such_resume.md"),
+        )
+        resume_tailor.get_resume_tailor = lambda: missing
+        command = node_graph.resume_node({"messages": [], "filter_job_list": ["Python开发"]})
+        assert command.update["messages"][0].content.startswith("未找到简历文件")
+    finally:
+        resume_tailor.get_resume_tailor = original
+
+
+def test_job_find_feeds_resume_node():
+    """岗位查找结果中推荐沟通的岗位写入 filter_job_list，计划中有简历智能体时监督智能体调度它"""
+    cards = ["AI Agent开发工程师\n30-50K\n星河科技", "前端开发\n15-25K\n青橙网络", "大模型Agent工程师\n25-40K\n云帆数据"]
+    verdicts = [
+        JobVerdict(index=0, match=True, score=90, reason="Python和大模型应用开发"),
+        JobVerdict(index=1, match=False, score=20, reason="前端岗位"),
+        JobVerdict(index=2, match=True, score=85, reason="Python，大模型，Agent"),
+    ]
+    summary = format_verdicts(cards, verdicts, ["https://www.zhipin.com/job_detail/a.html", "", ""])
+    result = f"## Boss直聘岗位查找结果\n\n### 执行步骤:\n- {summary}\n\n### 任务结果:\n已沟通2个岗位"
+
+    class _Pool:
+        def run(self, task, shard_key=None, cdp_url=None, step_callback=None):
+            return result
+
+    original_flag, original_pool = node_graph.JOB_FIND_PROCESS_POOL, boss_job_pool.get_boss_job_pool
+    node_graph.JOB_FIND_PROCESS_POOL = True
+    boss_job_pool.get_boss_job_pool = lambda: _Pool()
+    try:
+        query = HumanMessage(content="帮我找AI Agent开发岗位并定制简历")
+        command = node_graph.job_find_node({"messages": [query]}, {"configurable": {"thread_id": "t1"}})
+    finally:
+        node_graph.JOB_FIND_PROCESS_POOL = original_flag
+        boss_job_pool.get_boss_job_pool = original_pool
+    jobs = command.update["filter_job_list"]
+    assert jobs == ["AI Agent开发工程师 Python和大模型应用开发", "大模型Agent工程师 Python，大模型，Agent"]
+
+    state = {"messages": [query] + command.update["messages"], "filter_job_list": jobs, "plan_steps": [
+        {"agent_name": "job_find", "title": "查找岗位", "description": "..."},
+        {"agent_name": "resume", "title": "定制简历", "description": "..."},
+    ]}
+    router = default_supervisor_router(use_embedding=False)
+    assert router.decide(state).target == "resume"
+    # 计划中没有简历智能体时岗位查找完成后直接结束
+    assert router.decide(dict(state, plan_steps=state["plan_steps"][:1])).target == "FINISH"
+    assert "resume" in node_graph.build_agent().get_graph().nodes
+
+
+if __name__ == "__main__":
+    test_split_and_join()
+    test_extract_keywords()
+    test_similar_jobs_reuse_tailoring()
+    test_resume_edit_invalidates_changed_section()
+    test_cache_persists()
+    test_resume_node()
+    test_job_find_feeds_resume_node()
+    print("所有测试通过")
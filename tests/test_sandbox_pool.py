@@ -0,0 +1,102 @@
+import os
+import sys
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from concurrent.futures import ThreadPoolExecutor
+
+from app.multi_agents.tools import sandbox_repl
+from app.multi_agents.tools.sandbox_pool import SandboxPool
+
+
+def test_run_in_separate_process():
+    """代码在独立进程中执行，预导入 numpy，每次执行的变量互不影响"""
+    pool = SandboxPool(size=1, preload={"numpy": "np"}, max_executions=10).start()
+    try:
+        result = pool.run("import os\nx = 41\nprint(os.getpid(), int(np.int64(x + 1)))")
+        assert result["error"] is None
+        pid, value = result["stdout"].split()
+        assert int(pid) != os.getpid() and value == "42"
+        assert "NameError" in pool.run("print(x)")["error"]
+        assert "ZeroDivisionError" in pool.run("1 / 0")["error"]
+    finally:
+        pool.shutdown()
+
+
+def test_parallel_execution():
+    """多个工作进程同时执行代码"""
+    pool = SandboxPool(size=3, preload={}).start()
+    try:
+        pool.run("pass")
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            results = list(executor.map(pool.run, ["import time; time.sleep(0.5); print('ok')"] * 3))
+        assert all(r["stdout"].strip() == "ok" for r in results)
+        assert time.monotonic() - start < 1.2
+    finally:
+        pool.shutdown()
+
+
+def test_timeout_memory_and_recycle():
+    """超时的进程被终止替换，超出内存上限报 MemoryError，执行次数达到上限后回收进程"""
+    pool = SandboxPool(size=1, preload={}, timeout=0.5, memory_mb=512, max_executions=2).start()
+    try:
+        assert "TimeoutError" in pool.run("while True: pass")["error"]
+        assert pool.run("print('alive')")["stdout"].strip() == "alive"
+
+        assert "MemoryError" in pool.run("data = bytearray(1024 * 1024 * 1024)")["error"]
+
+        pids = [pool.run("import os; print(os.getpid())")["stdout"] for _ in range(4)]
+        assert pids[0] == pids[1] and pids[1] != pids[2] and pids[2] == pids[3]
+
+        assert "异常退出" in pool.run("import os; os._exit(3)")["error"]
+        assert pool.run("print(1 + 1)")["stdout"].strip() == "2"
+    finally:
+        pool.shutdown()
+
+
+def test_session_namespace_persists():
+    """同一会话的变量在多次执行之间保留，不同会话互不影响，工作进程回收后会话的命名空间重置"""
+    pool = SandboxPool(size=2, preload={}, max_executions=4).start()
+    try:
+        assert pool.run("rows = [1, 2, 3]", session="t1")["error"] is None
+        assert pool.run("x = 1", session="t2")["error"] is None
+        assert pool.run("print(sum(rows))", session="t1")["stdout"].strip() == "6"
+        assert "NameError" in pool.run("print(rows)", session="t2")["error"]
+        assert "NameError" in pool.run("print(rows)")["error"]
+
+        # t1 所在的工作进程执行满4次后被回收
+        pool.run("pass", session="t1")
+        result = pool.run("print(rows)", session="t1")
+        assert result["reset"] and "NameError" in result["error"]
+        assert not pool.run("rows = [4]", session="t1")["reset"]
+        assert pool.run("print(rows)", session="t1")["stdout"].strip() == "[4]"
+    finally:
+        pool.shutdown()
+
+
+def test_python_repl_keeps_state_per_thread():
+    """python_repl 按线程ID使用会话命名空间，先加载数据再使用不会出现 NameError"""
+    pool = SandboxPool(size=1, preload={}).start()
+    original = sandbox_repl.get_sandbox_pool
+    sandbox_repl.get_sandbox_pool = lambda: pool
+    try:
+        config = {"configurable": {"thread_id": "thread-1"}}
+        assert "Successfully" in sandbox_repl.python_repl.invoke({"code": "data = {'a': 1}"}, config=config)
+        assert "Stdout: 1" in sandbox_repl.python_repl.invoke({"code": "print(data['a'])"}, config=config)
+        other = sandbox_repl.python_repl.invoke({"code": "print(data)"}, config={"configurable": {"thread_id": "thread-2"}})
+        assert "NameError" in other
+    finally:
+        sandbox_repl.get_sandbox_pool = original
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    test_run_in_separate_process()
+    test_parallel_execution()
+    test_timeout_memory_and_recycle()
+    test_session_namespace_persists()
+    test_python_repl_keeps_state_per_thread()
+    print("所有测试通过")
@@ -0,0 +1,110 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from browser_use import Controller
+from browser_use.agent.views import ActionResult
+from browser_use.browser.views import BrowserState
+from browser_use.dom.views import DOMElementNode
+
+from app.multi_agents.tools.dom_snapshot import DomSnapshotter
+from app.multi_agents.tools.screenshot_policy import OnDemandScreenshots, register_screenshot_action
+
+
+class _Context:
+    """模拟 browser_use 的浏览器上下文：获取页面状态时调用 take_screenshot"""
+
+    def __init__(self):
+        self.captured = 0
+
+    async def take_screenshot(self, full_page=False):
+        self.captured += 1
+        return "iVBORw0KGgo="
+
+    async def get_state(self, cache_clickable_elements_hashes=True):
+        root = DOMElementNode(is_visible=True, parent=None, tag_name="body", xpath="/body", attributes={}, children=[])
+        return BrowserState(
+            element_tree=root, selector_map={}, url="https://www.zhipin.com/web/geek/job", title="BOSS直聘", tabs=[],
+            screenshot=await self.take_screenshot(),
+        )
+
+
+class _MessageManager:
+    def __init__(self):
+        self.settings = SimpleNamespace(include_attributes=["title"])
+        self.messages = []
+
+    def _add_message_with_tokens(self, message):
+        self.messages.append(message)
+
+
+def _agent():
+    agent = SimpleNamespace(
+        browser_context=_Context(),
+        _message_manager=_MessageManager(),
+        state=SimpleNamespace(consecutive_failures=0, last_result=None),
+    )
+    DomSnapshotter().attach(agent)
+    screenshots = OnDemandScreenshots(after_failures=1)
+    screenshots.attach(agent)
+    return agent, screenshots
+
+
+def _step(agent):
+    """模拟一步：获取页面状态并写入状态消息，返回状态消息是否附带图片"""
+    state = asyncio.run(agent.browser_context.get_state())
+    agent._message_manager.add_state_message(state, agent.state.last_result, None, False)
+    content = agent._message_manager.messages[-1].content
+    return isinstance(content, list) and any(part.get("type") == "image_url" for part in content)
+
+
+def test_no_screenshot_by_default():
+    """默认不截图，状态消息只有文本"""
+    agent, screenshots = _agent()
+    assert not _step(agent)
+    assert not _step(agent)
+    assert agent.browser_context.captured == 0
+    assert screenshots.skipped == 2 and screenshots.taken == 0
+
+
+def test_request_screenshot_action():
+    """智能体调用 request_screenshot 后，只有下一步附带截图"""
+    agent, screenshots = _agent()
+    controller = register_screenshot_action(Controller())
+    result = asyncio.run(controller.registry.execute_action("request_screenshot", {}, browser=agent.browser_context))
+    assert "已请求截图" in result.extracted_content
+    assert _step(agent)
+    assert not _step(agent)
+    assert agent.browser_context.captured == 1
+
+    # 没有挂载按需截图（每步都截图）时动作直接返回
+    result = asyncio.run(controller.registry.execute_action("request_screenshot", {}, browser=_Context()))
+    assert "无需请求" in result.extracted_content
+
+
+def test_screenshot_after_failure():
+    """上一步动作失败时自动附带截图，恢复后不再截图"""
+    agent, screenshots = _agent()
+    agent.state.last_result = [ActionResult(error="Element with index 12 does not exist")]
+    assert _step(agent)
+    agent.state.last_result = [ActionResult(extracted_content="点击了立即沟通")]
+    assert not _step(agent)
+    agent.state.last_result, agent.state.consecutive_failures = None, 1
+    assert _step(agent)
+
+    # after_failures=0 时只在请求时截图
+    agent, screenshots = _agent()
+    screenshots.after_failures = 0
+    agent.state.last_result = [ActionResult(error="timeout")]
+    assert not _step(agent)
+
+
+if __name__ == "__main__":
+    test_no_screenshot_by_default()
+    test_request_screenshot_action()
+    test_screenshot_after_failure()
+    print("所有测试通过")
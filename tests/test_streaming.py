@@ -0,0 +1,81 @@
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import StateGraph, MessagesState, START, END
+
+from app.multi_agents.graph.streaming import stream_agent, emit_progress
+
+
+def _build_graph():
+    """构建一个只包含前台、规划和岗位查找节点的小型图，LLM使用假模型"""
+
+    def frontdesk(state: MessagesState):
+        llm = GenericFakeChatModel(messages=iter([AIMessage(content="handoff to planner")]))
+        llm.invoke(state["messages"])
+        return {}
+
+    def planner(state: MessagesState):
+        llm = GenericFakeChatModel(messages=iter([AIMessage(content="step one step two")]))
+        result = llm.invoke(state["messages"])
+        return {"messages": [result]}
+
+    def job_find(state: MessagesState):
+        for step in range(1, 3):
+            emit_progress("job_find", f"浏览器第{step}步", step=step)
+        return {}
+
+    workflow = StateGraph(MessagesState)
+    workflow.add_node("frontdesk", frontdesk)
+    workflow.add_node("planner", planner)
+    workflow.add_node("job_find", job_find)
+    workflow.add_edge(START, "frontdesk")
+    workflow.add_edge("frontdesk", "planner")
+    workflow.add_edge("planner", "job_find")
+    workflow.add_edge("job_find", END)
+    return workflow.compile()
+
+
+def test_stream_tokens_and_progress():
+    """规划节点的token和岗位查找的进度应按顺序流出"""
+    events = list(stream_agent(_build_graph(), {"messages": [HumanMessage(content="找工作")]}))
+
+    tokens = [e for e in events if e["type"] == "token"]
+    assert tokens, "应该至少收到一个token"
+    assert {e["node"] for e in tokens} == {"planner"}
+    assert "".join(e["content"] for e in tokens) == "step one step two"
+
+    progress = [e for e in events if e["type"] == "progress"]
+    assert [e["step"] for e in progress] == [1, 2]
+    assert all(e["node"] == "job_find" for e in progress)
+
+    # token 必须先于规划节点的状态更新到达
+    first_token = events.index(tokens[0])
+    planner_update = next(i for i, e in enumerate(events) if e["type"] == "update" and e["node"] == "planner")
+    assert first_token < planner_update
+
+
+def test_stream_all_nodes():
+    """token_nodes为None时转发所有节点的token"""
+    events = list(stream_agent(
+        _build_graph(),
+        {"messages": [HumanMessage(content="找工作")]},
+        stream_mode=("messages",),
+        token_nodes=None,
+    ))
+    assert {e["node"] for e in events} == {"frontdesk", "planner"}
+
+
+def test_emit_progress_outside_graph():
+    """在图之外调用emit_progress不应报错"""
+    emit_progress("job_find", "独立调试")
+
+
+if __name__ == "__main__":
+    test_stream_tokens_and_progress()
+    test_stream_all_nodes()
+    test_emit_progress_outside_graph()